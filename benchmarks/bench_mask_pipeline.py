@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: legacy segmentation mask post-processing
+
+Compares the original per-pixel loop in AiEditorWidget.segment_foreground
+(QImage.pixel + QPainter.drawPoint) against the vectorized NumPy pipeline in
+legacy/<app>/common/mask.py.
+
+Usage:
+    python benchmarks/bench_mask_pipeline.py [--width 1000 --height 1000] [--app furniture]
+
+The per-pixel baseline scales linearly with pixel count, so it is measured at
+the given size and extrapolated to 12MP; the vectorized pipeline is measured
+at both sizes.
+"""
+
+import os
+import sys
+import time
+import argparse
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPainter, QColor
+from PyQt5.QtWidgets import QApplication
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_PIXELS = 4000 * 3000
+
+
+def make_mask_bytes(width: int, height: int) -> bytes:
+    """Synthetic black/white mask: an ellipse with noisy edges."""
+    yy, xx = np.mgrid[0:height, 0:width]
+    ellipse = ((xx - width / 2) / (width * 0.35)) ** 2 + ((yy - height / 2) / (height * 0.4)) ** 2
+    noise = np.random.default_rng(0).normal(0, 0.05, size=(height, width))
+    mask = ((ellipse + noise) < 1.0).astype(np.uint8) * 255
+    buffer = BytesIO()
+    Image.fromarray(mask, "L").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def legacy_loop(mask_bytes: bytes, color: QColor) -> QImage:
+    """The original segment_foreground post-processing."""
+    mask_image = QImage()
+    mask_image.loadFromData(mask_bytes)
+
+    processed_mask = QImage(mask_image.size(), QImage.Format_ARGB32)
+    processed_mask.fill(Qt.transparent)
+    painter = QPainter(processed_mask)
+    for y in range(mask_image.height()):
+        for x in range(mask_image.width()):
+            pixel_color = QColor(mask_image.pixel(x, y))
+            if pixel_color.red() <= 128:
+                painter.setPen(color)
+                painter.drawPoint(x, y)
+    painter.end()
+    return processed_mask
+
+
+def timed(fn, *args, repeat: int = 1, **kwargs) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=1000)
+    parser.add_argument("--app", default="furniture", choices=["furniture", "samsung", "cosmetics"])
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(ROOT, "legacy", args.app))
+    from common.mask import build_segmentation_overlay
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+
+    color = QColor(255, 0, 0, 128)
+    rgba = (color.red(), color.green(), color.blue(), color.alpha())
+    pixels = args.width * args.height
+
+    small_mask = make_mask_bytes(args.width, args.height)
+    large_w, large_h = 4000, 3000
+    large_mask = make_mask_bytes(large_w, large_h)
+
+    legacy_small = timed(legacy_loop, small_mask, color)
+    vector_small = timed(build_segmentation_overlay, small_mask, (args.width, args.height), rgba,
+                         select_foreground=False, repeat=3)
+    vector_large = timed(build_segmentation_overlay, large_mask, (large_w, large_h), rgba,
+                         select_foreground=False, repeat=3)
+    vector_large_raw = timed(build_segmentation_overlay, large_mask, (large_w, large_h), rgba,
+                             select_foreground=False, clean_radius=0, feather_radius=0, repeat=3)
+
+    legacy_large_est = legacy_small * TARGET_PIXELS / pixels
+
+    print(f"Mask size {args.width}x{args.height} ({pixels / 1e6:.2f} MP)")
+    print(f"  legacy per-pixel loop      : {legacy_small:8.3f} s")
+    print(f"  vectorized (clean+feather) : {vector_small:8.3f} s   ({legacy_small / vector_small:,.0f}x faster)")
+    print()
+    print(f"Mask size {large_w}x{large_h} (12 MP)")
+    print(f"  legacy per-pixel loop (est): {legacy_large_est:8.1f} s")
+    print(f"  vectorized (clean+feather) : {vector_large:8.3f} s   ({legacy_large_est / vector_large:,.0f}x faster)")
+    print(f"  vectorized (threshold only): {vector_large_raw:8.3f} s   ({legacy_large_est / vector_large_raw:,.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+"""
+Load test: concurrent simulated designers against the Streamlit app
+
+Each simulated user is one headless Streamlit session (streamlit.testing
+AppTest) with its own workspace. Users loop over the Home/template, Image
+Editor and DAM flows, clicking and typing the way a designer would, with
+Gemini served by the offline backend (core.fake_gemini). The run ramps
+through the requested user counts and reports, per level:
+    - throughput (completed reruns, plus template generations, per second)
+    - rerun latency p50/p95/p99/max per flow step, and the slowdown versus
+      the single-user level (reruns queueing behind each other)
+    - memory per session (process RSS growth divided by sessions)
+
+AppTest runs page scripts in-process on a script thread per session, the
+same way the server does, but without the websocket layer; numbers measure
+script execution and backend work, not browser rendering or network.
+
+Usage:
+    python benchmarks/bench_streamlit_load.py --users 1,2,4,8 --duration 60
+    python benchmarks/bench_streamlit_load.py --max-users 32 --gemini-latency 3 --output load.json
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WEB_DIR = os.path.join(ROOT, "web")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FLOWS = ("template", "editor", "dam")
+
+HOME_PAGE = "app.py"
+EDITOR_PAGE = "pages/01_Image_Editor.py"
+DAM_PAGE = "pages/02_DAM_System.py"
+
+# Sidebar menu label per page
+PAGE_TITLES = {
+    HOME_PAGE: "🏠 홈",
+    EDITOR_PAGE: "🎨 Image Editor",
+    DAM_PAGE: "📊 DAM System",
+}
+
+# Home gallery index -> ImageGenerator method the template form feeds
+HOME_TEMPLATES = [
+    "generate_sns_marketing",
+    "generate_studio_shooting",
+    "generate_style_based_image",
+    "generate_multilingual_image",
+    "generate_infographic",
+    "generate_illustration",
+    "complete_artwork",
+]
+
+EDITOR_PROMPTS = ["배경을 파란색으로 변경하세요", "소재를 원목으로 변경", "조명을 따뜻하게", "그림자를 부드럽게"]
+DAM_QUERIES = ["", "원목", "침대", "모던", "asset_00"]
+DAM_SORTS = ["최근 수정", "최근 생성", "이름순", "크기순"]
+DAM_VIEWS = ["🔲 그리드", "📋 리스트", "📊 컬럼"]
+CATEGORIES = ["가구", "가전", "화장품", "미분류"]
+TAGS = ["모던", "원목", "화이트", "신상품", "베스트"]
+
+
+def configure_environment(run_dir: str, gemini_latency: float, gemini_error_rate: float):
+    """Point the app at the offline Gemini backend and a scratch ledger."""
+    os.environ["GEMINI_BACKEND"] = "fake"
+    os.environ["GEMINI_FAKE_LATENCY"] = str(gemini_latency)
+    os.environ["GEMINI_FAKE_ERROR_RATE"] = str(gemini_error_rate)
+    os.environ.setdefault("USAGE_LEDGER_PATH", os.path.join(run_dir, "usage_ledger.db"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    for path in (ROOT, WEB_DIR, BENCH_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def share_test_runtime():
+    """
+    Make concurrent AppTest sessions share server-wide state.
+
+    AppTest installs a fresh mock Runtime and ScriptCache for each run and
+    clears the Runtime when the run ends, which crashes sessions still
+    running on other threads and recompiles every page on every rerun.
+    Sessions of a real server share one Runtime and one script cache, so
+    share them here too.
+    """
+    import logging
+    from unittest.mock import MagicMock
+    from streamlit.testing.v1 import app_test
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    script_cache = ScriptCache()
+    app_test.ScriptCache = lambda: script_cache
+
+    # Deprecation warnings are logged on every rerun of every session
+    logging.getLogger("streamlit.deprecation_util").disabled = True
+
+
+def seed_workspace(workspace_dir: str, assets: int, seed: int) -> List[str]:
+    """Create a user workspace with `assets` product images and metadata."""
+    rng = random.Random(seed)
+    for folder in ("uploads", "generated", "metadata", "projects", "temp"):
+        os.makedirs(os.path.join(workspace_dir, folder), exist_ok=True)
+
+    paths = []
+    for index in range(assets):
+        filename = f"asset_{index:04d}.png"
+        path = os.path.join(workspace_dir, "uploads", filename)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        image = Image.new("RGB", (512, 512), color)
+        image.paste((255, 255, 255), (128, 128, 384, 384))
+        image.save(path, compress_level=1)
+        paths.append(path)
+
+        metadata = {
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(TAGS, rng.randrange(3)),
+            "description": f"부하 테스트 상품 {index}"
+        }
+        with open(os.path.join(workspace_dir, "metadata", f"asset_{index:04d}.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+    return paths
+
+
+def process_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is a high-water mark (KiB on Linux, bytes on macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class Recorder:
+    """Thread-safe rerun latency/error collection for one load level."""
+
+    def __init__(self):
+        from core.metrics import MetricsRegistry
+
+        self.registry = MetricsRegistry()
+        self.latency = self.registry.histogram("loadtest_rerun_seconds", "Rerun latency per flow step")
+        self.calls = self.registry.counter("loadtest_reruns_total", "Reruns per flow step and status")
+        self.error_samples: Dict[str, str] = {}
+
+    def record(self, flow: str, step: str, seconds: float, ok: bool, error: Optional[str] = None):
+        self.latency.observe(seconds, flow=flow, step=step)
+        self.latency.observe(seconds, flow="all", step="all")
+        self.calls.inc(flow=flow, step=step, status="ok" if ok else "error")
+        if not ok:
+            # First error per step is enough to tell what broke
+            self.error_samples.setdefault(f"{flow}.{step}", error or "unknown error")
+
+    def count(self, status: Optional[str] = None) -> int:
+        return int(sum(
+            value for key, value in self.calls.series().items()
+            if status is None or dict(key).get("status") == status
+        ))
+
+    def steps(self) -> List[Dict]:
+        rows = []
+        for key, series in sorted(self.latency.series().items()):
+            labels = dict(key)
+            rows.append({
+                "flow": labels["flow"],
+                "step": labels["step"],
+                "count": series.count,
+                "mean": series.total / series.count,
+                "p50": self.latency.percentile(50, **labels),
+                "p95": self.latency.percentile(95, **labels),
+                "p99": self.latency.percentile(99, **labels),
+                "max": series.max,
+            })
+        return rows
+
+
+class SimulatedUser:
+    """One designer session looping over the template, editor and DAM flows."""
+
+    def __init__(self, index: int, workspace_dir: str, product_images: List[str], recorder: Recorder,
+                 think_time: float, timeout: float, seed: int):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.workspace_dir = workspace_dir
+        self.product_images = product_images
+        self.recorder = recorder
+        self.think_time = think_time
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+        self.app = AppTest.from_file(os.path.join(WEB_DIR, HOME_PAGE), default_timeout=timeout)
+        self.app.session_state["user"] = {
+            "name": f"부하테스트 {index}",
+            "email": f"load{index}@example.com",
+            "is_logged_in": True,
+            "workspace_dir": workspace_dir
+        }
+        self.current_page = None
+
+    def _rerun(self, flow: str, step: str, action=None) -> bool:
+        """Apply a widget action (if any), rerun the script and record latency."""
+        start = time.perf_counter()
+        error = None
+        try:
+            if action is not None:
+                action(self.app)
+            self.app.run(timeout=self.timeout)
+            if self.app.exception:
+                error = self.app.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.record(flow, step, time.perf_counter() - start, error is None, error)
+        return error is None
+
+    def _open(self, flow: str, page: str) -> bool:
+        def navigate(app):
+            # Select the target in the sidebar menu too, otherwise the menu's
+            # previous value sends the new page straight back. (Letting the
+            # menu's own st.switch_page navigate leaves the old page's
+            # elements in the AppTest tree.)
+            for radio in app.radio:
+                if radio.key == "sidebar_radio":
+                    radio.set_value(PAGE_TITLES[page])
+            app.switch_page(page)
+
+        if self.current_page is None and page == HOME_PAGE:
+            ok = self._rerun(flow, "open")
+        else:
+            ok = self._rerun(flow, "open", navigate)
+        self.current_page = page if ok else None
+        return ok
+
+    def _think(self, stop: threading.Event):
+        if self.think_time > 0:
+            stop.wait(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    # ================================================================
+    # FLOWS
+    # ================================================================
+
+    def template_flow(self, stop: threading.Event):
+        """Home gallery: open a template dialog, then run its generation."""
+        if not self._open("template", HOME_PAGE):
+            return
+        self._think(stop)
+
+        index = self.rng.randrange(len(HOME_TEMPLATES))
+        if not self._rerun("template", "open_dialog", lambda app: app.button(key=f"template_{index}").click()):
+            return
+        self._think(stop)
+
+        # The dialog's submit is not wired to generation in the UI yet, so
+        # issue the generator call the form describes directly
+        from core.image_generator import ImageGenerator
+        from core.tracing import span
+        from test_generator import TEMPLATES
+
+        method = HOME_TEMPLATES[index]
+        start = time.perf_counter()
+        try:
+            with span("ui.template_generate", template=method, user=os.path.basename(self.workspace_dir)):
+                generator = ImageGenerator(os.path.join(self.workspace_dir, "generated"))
+                getattr(generator, method)(**TEMPLATES[method](self.product_images, None))
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.record("template", "generate", time.perf_counter() - start, error is None, error)
+
+    def editor_flow(self, stop: threading.Event):
+        """Image Editor: pick a tool, apply a prompt to the canvas."""
+        if "current_canvas_image" not in self.app.session_state or \
+                self.app.session_state["current_canvas_image"] is None:
+            # Stands in for the left-menu upload (file_uploader is not drivable headless)
+            self.app.session_state["current_canvas_image"] = Image.open(self.rng.choice(self.product_images)).copy()
+
+        if not self._open("editor", EDITOR_PAGE):
+            return
+        self._think(stop)
+
+        tool = self.rng.choice(["brush", "highlighter", "eraser"])
+        self._rerun("editor", "select_tool", lambda app: app.button(key=f"tool_{tool}").click())
+        self._think(stop)
+
+        prompt = self.rng.choice(EDITOR_PROMPTS)
+        self._rerun(
+            "editor", "apply_prompt",
+            lambda app: (app.text_area(key="editor_prompt").input(prompt), app.button(key="apply_prompt").click())
+        )
+
+    def dam_flow(self, stop: threading.Event):
+        """DAM: search, sort and switch view mode."""
+        if not self._open("dam", DAM_PAGE):
+            return
+        self._think(stop)
+
+        query = self.rng.choice(DAM_QUERIES)
+        self._rerun("dam", "search", lambda app: app.text_input(key="dam_search").input(query))
+        self._think(stop)
+
+        sort_order = self.rng.choice(DAM_SORTS)
+        self._rerun("dam", "sort", lambda app: app.selectbox(key="dam_sort").select(sort_order))
+        self._think(stop)
+
+        view = self.rng.choice(DAM_VIEWS)
+        self._rerun("dam", "view_mode", lambda app: next(b for b in app.button if b.label == view).click())
+
+    def run(self, stop: threading.Event, flows: List[str]):
+        """Loop over flows until stop is set."""
+        offset = self.index % len(flows)
+        while not stop.is_set():
+            for flow in flows[offset:] + flows[:offset]:
+                if stop.is_set():
+                    break
+                getattr(self, f"{flow}_flow")(stop)
+                self._think(stop)
+
+
+def warm_up(args, run_dir: str):
+    """Run every flow once so imports and caches are not billed to the first level."""
+    workspace_dir = os.path.join(run_dir, "warmup")
+    product_images = seed_workspace(workspace_dir, args.assets, seed=0)
+    session = SimulatedUser(0, workspace_dir, product_images, Recorder(), 0.0, args.timeout, seed=args.seed)
+    stop = threading.Event()
+    for flow in args.flows:
+        getattr(session, f"{flow}_flow")(stop)
+
+
+def run_level(users: int, args, run_dir: str, baseline: Optional[Dict]) -> Dict:
+    """Run `users` concurrent sessions for args.duration seconds."""
+    recorder = Recorder()
+    stop = threading.Event()
+
+    gc.collect()
+    rss_before = process_rss()
+
+    sessions = []
+    for index in range(users):
+        workspace_dir = os.path.join(run_dir, f"level{users}_user{index}")
+        product_images = seed_workspace(workspace_dir, args.assets, seed=index)
+        sessions.append(SimulatedUser(
+            index, workspace_dir, product_images, recorder,
+            args.think_time, args.timeout, seed=args.seed + index
+        ))
+
+    threads = [
+        threading.Thread(target=session.run, args=(stop, args.flows), name=f"load-user-{session.index}", daemon=True)
+        for session in sessions
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        # Ramp up instead of starting every session on the same tick
+        time.sleep(min(args.ramp / max(users, 1), 1.0))
+
+    stop.wait(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+
+    rss_after = process_rss()
+    steps = recorder.steps()
+    overall = next((row for row in steps if row["flow"] == "all"), None)
+    completed = recorder.count()
+
+    result = {
+        "users": users,
+        "elapsed_s": elapsed,
+        "reruns": completed,
+        "errors": recorder.count("error"),
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "p50_s": overall["p50"] if overall else None,
+        "p95_s": overall["p95"] if overall else None,
+        "p99_s": overall["p99"] if overall else None,
+        "max_s": overall["max"] if overall else None,
+        "rss_mb": rss_after / 2**20,
+        "mb_per_session": max(rss_after - rss_before, 0) / 2**20 / users,
+        "steps": [row for row in steps if row["flow"] != "all"],
+        "error_samples": recorder.error_samples,
+    }
+    if baseline and baseline.get("p95_s") and result["p95_s"]:
+        result["p95_slowdown"] = result["p95_s"] / baseline["p95_s"]
+
+    del sessions, threads
+    gc.collect()
+    return result
+
+
+def parse_levels(users: Optional[str], max_users: int) -> List[int]:
+    if users:
+        return sorted({int(n) for n in users.split(",") if n.strip()})
+    levels, n = [], 1
+    while n < max_users:
+        levels.append(n)
+        n *= 2
+    return levels + [max_users]
+
+
+def print_level(result: Dict):
+    slowdown = f"{result['p95_slowdown']:.1f}x" if "p95_slowdown" in result else "-"
+    print(f"{result['users']:>5} {result['reruns']:>8} {result['errors']:>6} {result['throughput_rps']:>9.2f}"
+          f" {result['p50_s'] or 0:>8.3f} {result['p95_s'] or 0:>8.3f} {result['p99_s'] or 0:>8.3f}"
+          f" {slowdown:>8} {result['rss_mb']:>8.0f} {result['mb_per_session']:>9.1f}")
+
+
+def print_steps(result: Dict):
+    for row in result["steps"]:
+        print(f"        {row['flow'] + '.' + row['step']:<24} n={row['count']:<5}"
+              f" p50={row['p50']:.3f}s p95={row['p95']:.3f}s max={row['max']:.3f}s")
+    for step, message in result["error_samples"].items():
+        print(f"        ! {step}: {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", help="Comma-separated user counts (e.g. 1,2,4,8)")
+    parser.add_argument("--max-users", type=int, default=8, help="Ramp 1, 2, 4, ... up to this (when --users is not given)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds to stagger session start-up over")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between actions in seconds")
+    parser.add_argument("--gemini-latency", type=float, default=2.0, help="Median fake Gemini latency in seconds")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--assets", type=int, default=40, help="Images per user workspace (DAM page size)")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="Flows to run: " + ", ".join(FLOWS))
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", action="store_true", help="Print per-step latency for each level")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    args.flows = [flow.strip() for flow in args.flows.split(",") if flow.strip()]
+    unknown = set(args.flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(sorted(unknown))}")
+
+    run_dir = tempfile.mkdtemp(prefix="cen_load_")
+    configure_environment(run_dir, args.gemini_latency, args.gemini_error_rate)
+    share_test_runtime()
+    levels = parse_levels(args.users, args.max_users)
+    args.assets = max(args.assets, 4)
+
+    print(f"Flows: {', '.join(args.flows)} | {args.duration:.0f}s per level | think {args.think_time}s"
+          f" | Gemini {args.gemini_latency}s | workspaces in {run_dir}")
+    print(f"{'users':>5} {'reruns':>8} {'errors':>6} {'rerun/s':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}"
+          f" {'p95 x1':>8} {'RSS MB':>8} {'MB/sess':>9}")
+
+    warm_up(args, run_dir)
+
+    results = []
+    baseline = None
+    for users in levels:
+        result = run_level(users, args, run_dir, baseline)
+        if baseline is None:
+            baseline = result
+        results.append(result)
+        print_level(result)
+        if args.steps:
+            print_steps(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items()}, "levels": results}, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures for the offline pytest-benchmark suite.
+
+All Gemini traffic goes to core.fake_gemini.FakeGenaiClient, so the suite
+needs no credentials or network. Environment knobs:
+    BENCH_FAKE_LATENCY     Simulated median model latency in seconds (default 0,
+                           i.e. measure local overhead only)
+    BENCH_FAKE_ERROR_RATE  Simulated failure rate for the retry benchmarks (default 0.2)
+    BENCH_ASSET_COUNTS     Comma-separated DAM workspace sizes (default 1000,10000,100000)
+
+Usage:
+    pytest benchmarks --benchmark-only
+    pytest benchmarks --benchmark-only -k dam --benchmark-save=baseline
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep benchmark runs out of the real ledger and quiet
+_RUN_DIR = tempfile.mkdtemp(prefix='cen_bench_')
+os.environ.setdefault('USAGE_LEDGER_PATH', os.path.join(_RUN_DIR, 'usage_ledger.db'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.pop('GEMINI_DAILY_TOKEN_BUDGET', None)
+os.environ.pop('GEMINI_DAILY_COST_BUDGET_USD', None)
+
+from core.gemini_client import GeminiClient
+from core.fake_gemini import FakeGenaiClient
+
+FAKE_LATENCY = float(os.getenv('BENCH_FAKE_LATENCY', '0') or 0)
+FAKE_ERROR_RATE = float(os.getenv('BENCH_FAKE_ERROR_RATE', '0.2') or 0)
+ASSET_COUNTS = [int(n) for n in os.getenv('BENCH_ASSET_COUNTS', '1000,10000,100000').split(',') if n.strip()]
+
+CATEGORIES = ['침대', '소파', '의자', '테이블', '수납장', '조명', '미분류']
+TAGS = ['모던', '원목', '화이트', '신상품', '베스트', '북유럽', '빈티지', '프리미엄']
+
+
+def make_product_image(path: str, size: int = 1024, seed: int = 0) -> str:
+    """Write a synthetic product photo (noise over a gradient) to path."""
+    rng = random.Random(seed)
+    image = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    noise = Image.effect_noise((size, size), 40).convert('RGB')
+    image = Image.blend(image, noise, 0.3)
+    image.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+                (size // 4, size // 4, size * 3 // 4, size * 3 // 4))
+    image.save(path)
+    return path
+
+
+@pytest.fixture
+def fake_backend():
+    return FakeGenaiClient(latency=FAKE_LATENCY, seed=0)
+
+
+@pytest.fixture
+def gemini(fake_backend):
+    return GeminiClient(backend=fake_backend)
+
+
+@pytest.fixture
+def flaky_gemini():
+    """Gemini client whose backend fails at BENCH_FAKE_ERROR_RATE (retries are immediate).
+
+    Seeded so the very first call fails: a single benchmark-disabled round
+    still goes through the retry path (seed 0 draws no failure for 20+ calls).
+    """
+    return GeminiClient(backend=FakeGenaiClient(latency=FAKE_LATENCY, error_rate=FAKE_ERROR_RATE, seed=1))
+
+
+@pytest.fixture(scope='session')
+def product_images(tmp_path_factory):
+    """Four synthetic product images (1024px PNG)."""
+    image_dir = tmp_path_factory.mktemp('products')
+    return [make_product_image(str(image_dir / f"product_{i}.png"), seed=i) for i in range(4)]
+
+
+@pytest.fixture(scope='session')
+def metadata_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('metadata') / 'product_0.json'
+    path.write_text(json.dumps({
+        'category': '침대',
+        'description': {'description': '따뜻한 원목 결이 살아있는 모던 침대 프레임입니다.'}
+    }, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def make_asset(index: int, rng: random.Random, now: datetime) -> dict:
+    """One in-memory asset record shaped like core.asset_catalog output."""
+    category = rng.choice(CATEGORIES)
+    created = now - timedelta(minutes=rng.randrange(525600))
+    return {
+        'filename': f"asset_{index:06d}.png",
+        'path': f"/workspace/uploads/asset_{index:06d}.png",
+        'folder': rng.choice(('uploads', 'generated')),
+        'created': created,
+        'modified': created + timedelta(minutes=rng.randrange(1440)),
+        'size': rng.randrange(50_000, 5_000_000),
+        'metadata': {},
+        'category': category,
+        'tags': rng.sample(TAGS, rng.randrange(4)),
+        'description': f"{category} 상품 설명 {index}"
+    }
+
+
+@pytest.fixture(scope='session')
+def asset_lists():
+    """In-memory asset lists keyed by size."""
+    rng = random.Random(0)
+    now = datetime.now()
+    largest = max(ASSET_COUNTS)
+    assets = [make_asset(i, rng, now) for i in range(largest)]
+    return {count: assets[:count] for count in ASSET_COUNTS}
+
+
+def build_workspace(workspace_dir: str, count: int, seed: int = 0):
+    """
+    Create a DAM workspace with `count` image files split across uploads/
+    and generated/, and metadata JSON for every other asset.
+
+    Image files are placeholders: asset loading only stats them.
+    """
+    rng = random.Random(seed)
+    for folder in ('uploads', 'generated', 'metadata'):
+        os.makedirs(os.path.join(workspace_dir, folder), exist_ok=True)
+
+    for index in range(count):
+        folder = 'uploads' if index % 2 == 0 else 'generated'
+        filename = f"asset_{index:06d}.png"
+        with open(os.path.join(workspace_dir, folder, filename), 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+        if index % 2 == 0:
+            category = rng.choice(CATEGORIES)
+            metadata = {
+                'category': category,
+                'tags': rng.sample(TAGS, rng.randrange(4)),
+                'description': f"{category} 상품 설명 {index}"
+            }
+            with open(os.path.join(workspace_dir, 'metadata', f"asset_{index:06d}.json"), 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False)
+
+
+@pytest.fixture(scope='session')
+def workspaces(tmp_path_factory):
+    """Lazily built on-disk DAM workspaces keyed by asset count."""
+    built = {}
+
+    def get(count: int) -> str:
+        if count not in built:
+            workspace_dir = str(tmp_path_factory.mktemp(f"workspace_{count}"))
+            build_workspace(workspace_dir, count)
+            built[count] = workspace_dir
+        return built[count]
+
+    return get
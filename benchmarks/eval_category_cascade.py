@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluation: confidence-gated category cascade (local classifier -> Gemini)
+
+Replays labeled assets in order the way ImageAnalyzer sees them: the local
+nearest-neighbour classifier (core/category_classifier.py) proposes a
+category from the examples confirmed so far; at or above the threshold its
+answer is used, otherwise the asset goes to Gemini, whose label is taken as
+correct and becomes a new example. Reported per threshold:
+    local share      assets answered without a Gemini call
+    local accuracy   category (and category + sub-category) accuracy of those answers
+    overall accuracy accuracy of the whole cascade
+    cost             Gemini category calls x cost per call, and the saving
+                     against sending every asset to Gemini
+
+Labeled assets come from an analysis metadata folder (confirmed categories
+and Gemini categories at or above the confirm threshold), or are generated
+(--synthetic) with category-dependent shapes and colors.
+
+Usage:
+    python benchmarks/eval_category_cascade.py --metadata-dir workspace/<user>/metadata
+    python benchmarks/eval_category_cascade.py --synthetic 600 [--noise 0.1] [--thresholds 0.6,0.8,0.9]
+
+The cost per call is --call-cost, else the average of 'analyzer.category'
+calls in the usage ledger, else an estimate from the category prompt size.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from typing import Dict, List
+
+from PIL import Image, ImageDraw, ImageFilter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from core.config import PRODUCT_CATEGORY
+from core.analysis_checkpoint import image_hash
+from core.category_classifier import CategoryIndex, confirmed_source, image_embedding
+from core.fake_gemini import CHARS_PER_TOKEN, IMAGE_INPUT_TOKENS
+from core.prompt_registry import get_prompt_registry
+from core.reanalysis import load_analysis_metadata
+from core.usage_ledger import default_ledger_path, estimate_cost, get_usage_ledger
+
+DEFAULT_THRESHOLDS = '0.5,0.6,0.7,0.8,0.9,0.95'
+DEFAULT_MODEL = 'gemini-2.0-flash'
+# Typical category response (category, sub_category, confidence, reason, key_features)
+CATEGORY_OUTPUT_TOKENS = 80
+
+
+# ================================================================
+# LABELED ASSETS
+# ================================================================
+
+def load_labeled_assets(metadata_dir: str) -> List[Dict]:
+    """Analysis records with confirmed labels and an existing image."""
+    assets = []
+    for filename in sorted(os.listdir(metadata_dir)):
+        if not filename.endswith('.json'):
+            continue
+        metadata = load_analysis_metadata(os.path.join(metadata_dir, filename))
+        if metadata is None or not os.path.exists(metadata['image_path']):
+            continue
+        if not confirmed_source(metadata.get('category_data') or {}):
+            continue
+        assets.append({
+            'image_path': metadata['image_path'],
+            'brand': metadata.get('brand', ''),
+            'category': metadata.get('category', ''),
+            'sub_category': metadata.get('sub_category', ''),
+        })
+    return assets
+
+
+def synthetic_image(category_index: int, sub_index: int, rng: random.Random, size: int = 512) -> Image.Image:
+    """Product-like image whose shape and palette depend on the category (details on the sub-category)."""
+    palette = random.Random(category_index)
+    background = tuple(min(255, max(0, palette.randrange(170, 256) + rng.randint(-20, 20))) for _ in range(3))
+    color = tuple(min(255, max(0, palette.randrange(256) + rng.randint(-30, 30))) for _ in range(3))
+    image = Image.new('RGB', (size, size), background)
+    draw = ImageDraw.Draw(image)
+
+    def at(value: float) -> int:
+        return int(value * size + rng.randint(-12, 12))
+
+    kind = category_index % 4
+    if kind == 0:
+        draw.rectangle([at(.15), at(.45), at(.85), at(.75)], fill=color)
+        draw.rectangle([at(.15), at(.2), at(.25), at(.75)], fill=color)
+    elif kind == 1:
+        draw.ellipse([at(.3), at(.1), at(.7), at(.5)], fill=color)
+        draw.rectangle([at(.44), at(.5), at(.56), at(.9)], fill=color)
+    elif kind == 2:
+        draw.rectangle([at(.1), at(.35), at(.9), at(.45)], fill=color)
+        for leg in (at(.15), at(.8)):
+            draw.rectangle([leg, at(.45), leg + 12, at(.85)], fill=color)
+    else:
+        draw.rectangle([at(.3), at(.15), at(.7), at(.85)], fill=color)
+        for shelf in (.4, .6):
+            draw.line([at(.3), at(shelf), at(.7), at(shelf)], fill=background, width=4)
+    # Categories sharing a shape differ in palette; sub-categories add a detail
+    if category_index // 4:
+        draw.rectangle([at(.05), at(.85), at(.95), at(.9)], fill=color)
+    for mark in range(sub_index):
+        draw.ellipse([at(.1 + .1 * mark), at(.05), at(.15 + .1 * mark), at(.1)], fill=color)
+    return image.filter(ImageFilter.GaussianBlur(rng.uniform(0, 2)))
+
+
+def make_synthetic_assets(count: int, noise: float, seed: int, image_dir: str) -> List[Dict]:
+    """Write synthetic labeled Furniture assets; a `noise` share looks like another category."""
+    rng = random.Random(seed)
+    categories = list(PRODUCT_CATEGORY['Furniture'].items())[:6]
+    assets = []
+    for index in range(count):
+        category_index = rng.randrange(len(categories))
+        category, sub_categories = categories[category_index]
+        sub_index = rng.randrange(min(len(sub_categories), 2))
+        drawn = rng.randrange(len(categories)) if rng.random() < noise else category_index
+        path = os.path.join(image_dir, f"asset_{index:05d}.png")
+        synthetic_image(drawn, sub_index, rng).save(path)
+        assets.append({
+            'image_path': path,
+            'brand': 'Furniture',
+            'category': category,
+            'sub_category': sub_categories[sub_index],
+        })
+    return assets
+
+
+# ================================================================
+# EVALUATION
+# ================================================================
+
+def category_call_cost(args) -> float:
+    """USD cost of one Gemini category call."""
+    if args.call_cost is not None:
+        return args.call_cost
+    if os.path.exists(default_ledger_path()):
+        ledger = get_usage_ledger()
+        ledger.flush()
+        for row in ledger.summarize('template'):
+            if row['template'] == 'analyzer.category' and row['calls']:
+                return row['cost_usd'] / row['calls']
+    prompt = get_prompt_registry().category_prompt('Furniture', measure=False)
+    usage = {
+        'prompt_tokens': len(prompt) // CHARS_PER_TOKEN + IMAGE_INPUT_TOKENS,
+        'cached_tokens': 0,
+        'candidate_tokens': CATEGORY_OUTPUT_TOKENS,
+        'image_tokens': 0,
+    }
+    return estimate_cost(DEFAULT_MODEL, usage)
+
+
+def replay(assets: List[Dict], threshold: float, warmup: int, index_path: str) -> Dict:
+    """Run the cascade over the assets in order, learning from the ones sent to Gemini."""
+    index = CategoryIndex(index_path)
+    totals = {'local': 0, 'local_category': 0, 'local_exact': 0, 'gemini': 0, 'predict_s': 0.0}
+
+    for position, asset in enumerate(assets):
+        if position >= warmup:
+            start = time.perf_counter()
+            prediction = index.predict(asset['vector'], asset['brand'])
+            totals['predict_s'] += time.perf_counter() - start
+            if (prediction is not None and prediction['confidence'] >= threshold
+                    and prediction['sub_confidence'] >= threshold):
+                totals['local'] += 1
+                if prediction['category'] == asset['category']:
+                    totals['local_category'] += 1
+                    totals['local_exact'] += int(prediction['sub_category'] == asset['sub_category'])
+                continue
+            totals['gemini'] += 1
+        index.add(asset['key'], asset['vector'], asset['brand'], asset['category'], asset['sub_category'])
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--metadata-dir', help='Analysis metadata folder with labeled assets')
+    source.add_argument('--synthetic', type=int, metavar='N', help='Generate N synthetic labeled assets')
+    parser.add_argument('--noise', type=float, default=0.1, help='Synthetic share drawn like another category')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS)
+    parser.add_argument('--warmup', type=int, default=0, help='Assets used only as initial examples')
+    parser.add_argument('--call-cost', type=float, default=None, help='USD per Gemini category call')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='cen_cascade_')
+    if args.synthetic:
+        assets = make_synthetic_assets(args.synthetic, args.noise, args.seed, work_dir)
+    else:
+        assets = load_labeled_assets(args.metadata_dir)
+        random.Random(args.seed).shuffle(assets)
+    if len(assets) <= args.warmup:
+        parser.error(f"Need more than {args.warmup} labeled assets, found {len(assets)}")
+
+    start = time.perf_counter()
+    for asset in assets:
+        asset['key'] = image_hash(asset['image_path'])
+        asset['vector'] = image_embedding(asset['image_path'])
+    embed_ms = (time.perf_counter() - start) / len(assets) * 1000
+
+    cost_per_call = category_call_cost(args)
+    evaluated = len(assets) - args.warmup
+    baseline_cost = evaluated * cost_per_call
+
+    print(f"Assets: {len(assets)} ({evaluated} evaluated, {args.warmup} warm-up)")
+    print(f"Embedding: {embed_ms:.1f} ms/asset   Gemini category call: ${cost_per_call:.6f}")
+    print()
+    print(f"{'threshold':>9} {'local':>7} {'local acc':>10} {'+sub':>7} {'overall':>8} "
+          f"{'calls':>6} {'cost $':>9} {'saving':>7} {'ms/asset':>9}")
+    for threshold in [float(value) for value in args.thresholds.split(',') if value.strip()]:
+        totals = replay(assets, threshold, args.warmup, os.path.join(work_dir, f"index_{threshold}.db"))
+        local = totals['local']
+        local_accuracy = totals['local_category'] / local if local else float('nan')
+        exact_accuracy = totals['local_exact'] / local if local else float('nan')
+        overall = (totals['local_category'] + totals['gemini']) / evaluated
+        cost = totals['gemini'] * cost_per_call
+        saving = 1 - cost / baseline_cost if baseline_cost else 0.0
+        local_ms = embed_ms + totals['predict_s'] / evaluated * 1000
+        print(f"{threshold:>9.2f} {local / evaluated:>7.1%} {local_accuracy:>10.1%} {exact_accuracy:>7.1%} "
+              f"{overall:>8.1%} {totals['gemini']:>6} {cost:>9.4f} {saving:>7.1%} {local_ms:>9.1f}")
+    print(f"{'gemini':>9} {0:>7.1%} {'-':>10} {'-':>7} {1:>8.1%} {evaluated:>6} {baseline_cost:>9.4f} {0:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
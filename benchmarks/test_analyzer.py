@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: ImageAnalyzer against the recorded-response Gemini backend.
+"""
+
+import os
+import json
+
+from PIL import Image
+
+from conftest import FAKE_ERROR_RATE, make_product_image
+from core.config import PRODUCT_CATEGORY
+from core.image_analyzer import ImageAnalyzer
+from core.metrics import get_registry
+from core.reanalysis import find_stale_assets
+from core.analysis_checkpoint import image_hash
+from core.category_classifier import DEFAULT_THRESHOLD, CategoryIndex, image_embedding
+
+
+def test_analyze_image(benchmark, gemini, product_images, tmp_path):
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+
+    result = benchmark(analyzer.analyze_image, product_images[0], brand="Furniture", resume=False)
+
+    assert result['category'] == '침대'
+    assert result['description']
+
+
+def test_analyze_image_without_save(benchmark, gemini, product_images, tmp_path):
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+
+    result = benchmark(analyzer.analyze_image, product_images[0], brand="Furniture", save_metadata=False, resume=False)
+
+    assert result['product_attributes']
+
+
+def test_analyze_batch(benchmark, gemini, product_images, tmp_path):
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+
+    results = benchmark(analyzer.analyze_batch, product_images, brand="Furniture", resume=False)
+
+    assert len(results) == len(product_images)
+
+
+def test_analyze_image_with_retries(benchmark, gemini, fake_backend, flaky_gemini, product_images, tmp_path):
+    """Same pipeline with simulated API failures, exercising the retry path."""
+    ImageAnalyzer(str(tmp_path), gemini=gemini).analyze_image(product_images[0], save_metadata=False, resume=False)
+    calls_per_run = sum(fake_backend.calls.values())
+    # Enough attempts that no benchmark round exhausts them
+    flaky_gemini.max_retries = 10
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=flaky_gemini)
+    retries = get_registry().counter('gemini_retries_total')
+    retries_before = retries.value(error='FakeGeminiError')
+    runs = []
+
+    def analyze():
+        runs.append(1)
+        return analyzer.analyze_image(product_images[0], save_metadata=False, resume=False)
+
+    result = benchmark(analyze)
+
+    assert result['category'] == '침대'
+    retried = retries.value(error='FakeGeminiError') - retries_before
+    # Every retry repeats at least the failed call
+    assert sum(flaky_gemini.client.calls.values()) >= calls_per_run * len(runs) + retried
+    if FAKE_ERROR_RATE:
+        assert retried > 0
+
+
+def test_analyze_image_resumed(benchmark, gemini, fake_backend, product_images, tmp_path):
+    """Re-run of an analyzed image: every stage comes from its checkpoint."""
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+    expected = analyzer.analyze_image(product_images[0], save_metadata=False)
+    calls = dict(fake_backend.calls)
+
+    result = benchmark(analyzer.analyze_image, product_images[0], save_metadata=False)
+
+    assert result == expected
+    assert fake_backend.calls == calls
+
+
+def test_analyze_image_resume_after_failure(benchmark, gemini, fake_backend, product_images, tmp_path):
+    """A failure in the last stage keeps the three image stages; the retry runs only the description."""
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+
+    def fail_then_resume():
+        generate_text = analyzer.gemini.generate_text
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("description failed")
+
+        analyzer.gemini.generate_text = fail
+        try:
+            analyzer.analyze_image(product_images[1], save_metadata=False, resume=False)
+        except RuntimeError:
+            pass
+        finally:
+            analyzer.gemini.generate_text = generate_text
+        before = dict(fake_backend.calls)
+        result = analyzer.analyze_image(product_images[1], save_metadata=False)
+        return result, before
+
+    result, before = benchmark(fail_then_resume)
+
+    assert result['description']
+    assert fake_backend.calls['upload'] == before['upload']
+    assert fake_backend.calls['generate_content'] == before['generate_content'] + 1
+
+
+def test_find_stale_assets(benchmark, gemini, product_images, tmp_path):
+    """Version check of 500 up-to-date analysis records (no model calls)."""
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+    metadata = analyzer.analyze_image(product_images[0], save_metadata=False)
+    for i in range(500):
+        record = dict(metadata, filename=f"asset_{i}.png", image_path=f"/assets/asset_{i}.png")
+        with open(tmp_path / f"asset_{i}.json", 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+
+    stale = benchmark(find_stale_assets, str(tmp_path), analyzer)
+
+    assert stale == []
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.json')]) == 500
+
+
+def add_labeled_examples(index, tmp_path, categories=('침대', '소파')):
+    """Six examples per category; each category is the synthetic product photo turned another way."""
+    for turn, category in enumerate(categories):
+        for seed in range(10, 16):
+            path = make_product_image(str(tmp_path / f"labeled_{turn}_{seed}.png"), size=256, seed=seed)
+            if turn:
+                with Image.open(path) as image:
+                    image.rotate(90 * turn).save(path)
+            sub_category = PRODUCT_CATEGORY['Furniture'][category][0]
+            index.add(image_hash(path), image_embedding(path), 'Furniture', category, sub_category)
+
+
+def test_analyze_image_local_category(benchmark, gemini, fake_backend, product_images, tmp_path):
+    """Cascade with a confident local classifier: the category needs no Gemini call."""
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+    add_labeled_examples(analyzer.category_index, tmp_path)
+    before = fake_backend.calls['generate_content']
+    analyzer.analyze_image(product_images[0], save_metadata=False, resume=False)
+    calls = fake_backend.calls['generate_content'] - before
+
+    result = benchmark(analyzer.analyze_image, product_images[0], save_metadata=False, resume=False)
+
+    assert result['category_data']['source'] == 'local'
+    assert result['category'] == '침대'
+    assert result['sub_category'] in PRODUCT_CATEGORY['Furniture']['침대']
+    assert calls == 3
+
+
+def test_category_index_ignores_retired_labels(product_images, tmp_path):
+    """Examples labelled with a sub-category no longer in the taxonomy never win."""
+    index = CategoryIndex(str(tmp_path / 'category_index.db'))
+    add_labeled_examples(index, tmp_path, categories=('침대', '소파', '의자'))
+    vector = image_embedding(product_images[0])
+    assert index.predict(vector, 'Furniture')['category'] == '침대'
+
+    # Relabel the 침대 examples (the unturned images) with a retired sub-category
+    for seed in range(10, 16):
+        path = str(tmp_path / f"labeled_0_{seed}.png")
+        index.add(image_hash(path), image_embedding(path), 'Furniture', '침대', '물침대')
+
+    # Only dissimilar examples remain: no confident answer, so the image goes to Gemini
+    prediction = index.predict(vector, 'Furniture')
+    assert prediction is None or (prediction['category'] != '침대' and prediction['confidence'] < DEFAULT_THRESHOLD)
+
+
+def test_category_index_single_category(benchmark, product_images, tmp_path):
+    """Examples of one category only: no local answer, however close the image."""
+    index = CategoryIndex(str(tmp_path / 'category_index.db'))
+    add_labeled_examples(index, tmp_path, categories=('소파',))
+    vector = image_embedding(product_images[0])
+
+    prediction = benchmark(index.predict, vector, 'Furniture')
+
+    assert prediction is None
+    add_labeled_examples(index, tmp_path, categories=('소파', '침대'))
+    assert index.predict(vector, 'Furniture') is not None
+
+
+def test_category_index_weak_match(product_images, tmp_path):
+    """An image unlike every example goes to Gemini instead of the nearest category."""
+    index = CategoryIndex(str(tmp_path / 'category_index.db'))
+    add_labeled_examples(index, tmp_path, categories=('소파', '침대'))
+    unlike = Image.new('RGB', (256, 256), (20, 20, 20))
+    unlike.paste((250, 250, 250), (0, 0, 256, 32))
+
+    assert index.predict(image_embedding(unlike), 'Furniture') is None
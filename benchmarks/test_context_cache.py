@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: ContextCache against the fake backend's in-memory caches API.
+"""
+
+import time
+
+from core.context_cache import ContextCache, min_cache_tokens
+from core.fake_gemini import CHARS_PER_TOKEN, FakeGenaiClient
+from core.gemini_client import GeminiClient
+
+MODEL = 'gemini-2.0-flash'
+# Comfortably above the model's minimum cacheable size
+LARGE_CONTEXT = '카테고리 표와 속성 옵션. ' * (min_cache_tokens(MODEL) * CHARS_PER_TOKEN // 8)
+
+
+def test_resolve_hit(benchmark, fake_backend):
+    cache = ContextCache()
+    name = cache.resolve(fake_backend, 'scope', MODEL, LARGE_CONTEXT)
+
+    resolved = benchmark(cache.resolve, fake_backend, 'scope', MODEL, LARGE_CONTEXT)
+
+    assert name and resolved == name
+    assert fake_backend.calls['cache_create'] == 1
+
+
+def test_resolve_refresh(fake_backend):
+    """Inside the refresh margin the TTL is extended instead of recreating the context."""
+    cache = ContextCache(ttl=600, refresh_margin=600)
+    name = cache.resolve(fake_backend, 'scope', MODEL, LARGE_CONTEXT)
+    expires_at = fake_backend.get_cache(name).expire_time
+    time.sleep(0.01)
+
+    assert cache.resolve(fake_backend, 'scope', MODEL, LARGE_CONTEXT) == name
+    assert fake_backend.get_cache(name).expire_time > expires_at
+    assert fake_backend.calls['cache_create'] == 1
+
+
+def test_small_context_stays_inline(benchmark, fake_backend):
+    """Below the model's minimum no create call is made."""
+    cache = ContextCache()
+
+    name = benchmark(cache.resolve, fake_backend, 'scope', MODEL, '짧은 분석 지침')
+
+    assert name is None
+    assert fake_backend.calls['cache_create'] == 0
+
+
+def test_rejected_context_falls_back_inline(fake_backend):
+    """A 400 from caches.create keeps the context inline for good, without retrying the create."""
+    cache = ContextCache(retry_after=0)
+    rejecting = FakeGenaiClient(seed=0, cache_min_tokens=len(LARGE_CONTEXT))
+
+    assert cache.resolve(rejecting, 'scope', MODEL, LARGE_CONTEXT) is None
+    assert cache.resolve(rejecting, 'scope', MODEL, LARGE_CONTEXT) is None
+    assert rejecting.calls['cache_create'] == 1
+
+
+def test_missing_context_is_recreated(benchmark, fake_backend, product_images):
+    """A context deleted server-side (404) is invalidated and recreated by the retry."""
+    gemini = GeminiClient(backend=fake_backend)
+    gemini.context_cache = ContextCache()
+
+    def analyze_after_delete():
+        for cached in fake_backend.list_caches():
+            fake_backend.delete_cache(cached.name)
+        return gemini.analyze_image(
+            prompt='분석해 주세요',
+            image_path=product_images[0],
+            system_context=LARGE_CONTEXT,
+            context_name='bench'
+        )
+
+    gemini.analyze_image(prompt='분석해 주세요', image_path=product_images[0],
+                         system_context=LARGE_CONTEXT, context_name='bench')
+    before = fake_backend.calls['cache_create']
+    analyze_after_delete()
+    created = fake_backend.calls['cache_create'] - before
+
+    benchmark(analyze_after_delete)
+
+    assert created == 1
+    assert len(fake_backend.list_caches()) == 1
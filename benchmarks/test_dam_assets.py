@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: DAM asset loading (directory scan + metadata JSON) and
+search/filter/sort at BENCH_ASSET_COUNTS workspace sizes.
+"""
+
+import pytest
+
+from core.asset_catalog import load_assets_from_workspace, filter_assets
+
+from conftest import ASSET_COUNTS
+
+SORT_ORDERS = ["최근 수정", "최근 생성", "이름순", "크기순"]
+
+
+@pytest.mark.parametrize('count', ASSET_COUNTS)
+def test_load_assets(benchmark, count, workspaces):
+    workspace_dir = workspaces(count)
+
+    assets = benchmark.pedantic(load_assets_from_workspace, args=(workspace_dir, 'all'), rounds=3, iterations=1)
+
+    assert len(assets) == count
+
+
+@pytest.mark.parametrize('count', ASSET_COUNTS)
+@pytest.mark.parametrize('sort_order', SORT_ORDERS)
+def test_sort_assets(benchmark, count, sort_order, asset_lists):
+    assets = asset_lists[count]
+
+    # filter_assets sorts in place when nothing is filtered out; sort a copy
+    result = benchmark(lambda: filter_assets(list(assets), "", "전체", sort_order))
+
+    assert len(result) == count
+
+
+@pytest.mark.parametrize('count', ASSET_COUNTS)
+def test_search_assets(benchmark, count, asset_lists):
+    assets = asset_lists[count]
+
+    result = benchmark(filter_assets, assets, "원목", "전체", "최근 수정")
+
+    assert len(result) <= count
+
+
+@pytest.mark.parametrize('count', ASSET_COUNTS)
+def test_search_and_category_filter(benchmark, count, asset_lists):
+    assets = asset_lists[count]
+
+    result = benchmark(filter_assets, assets, "모던", "침대", "이름순")
+
+    assert all(asset['category'] == "침대" for asset in result)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: every ImageGenerator template against the recorded-response
+Gemini backend (prompt building, reference encoding, streaming, saving).
+"""
+
+import pytest
+
+from core.image_generator import ImageGenerator
+
+# template name -> function(product_images, metadata_file) returning call kwargs
+TEMPLATES = {
+    'change_attributes': lambda images, meta: dict(
+        image_path=images[0], instructions="색상을 네이비로 변경"),
+    'create_thumbnail_with_metadata': lambda images, meta: dict(
+        image_path=images[0], metadata_path=meta),
+    'apply_style_from_reference': lambda images, meta: dict(
+        product_image_path=images[0], reference_image_paths=images[1:3]),
+    'replace_object_in_reference': lambda images, meta: dict(
+        product_image_path=images[0], reference_image_paths=images[1:2]),
+    'create_interior_scene': lambda images, meta: dict(
+        product_image_paths=images[:3]),
+    'generate_sns_marketing': lambda images, meta: dict(
+        product_name="모던 침대", product_images=images[:2], target_audience="신혼부부",
+        layout="1:1 정방형", concept="신상품 출시",
+        copy={'main': "오늘 밤은 더 깊게", 'sub': "원목 침대 프레임", 'hashtags': "#침대 #신혼"}),
+    'generate_detail_page': lambda images, meta: dict(
+        product_name="모던 침대", product_images=images[:2], layout_ratio="9:16"),
+    'generate_studio_shooting': lambda images, meta: dict(
+        product_image=images[0], model_setting="30대 여성 모델", combination_products=images[1:2]),
+    'generate_style_based_image': lambda images, meta: dict(
+        product_image=images[0], reference_images=images[1:3], placement="침실 중앙",
+        environment="아파트 안방", mood="아늑한"),
+    'generate_illustration': lambda images, meta: dict(
+        content_type="블로그 헤더", text_content="숙면을 위한 침실 가이드", subject="침실",
+        visual_style="플랫 일러스트", color_palette="파스텔"),
+    'complete_artwork': lambda images, meta: dict(
+        sketch_image=images[0], artwork_type="제품 일러스트", coloring_style="수채화",
+        color_scheme={'method': 'palette', 'primary': "#8B5A2B", 'secondary': "#F5F0E6", 'accent': "#A23B72"},
+        detail_level="높음", texture=["종이"], effects={'glow': True}),
+    'generate_multilingual_image': lambda images, meta: dict(
+        original_image=images[0], target_language="영어"),
+    'generate_infographic': lambda images, meta: dict(
+        data_source_description="2024 침대 판매량: 1분기 120, 2분기 150", content_type="막대 차트",
+        purpose="판매 보고"),
+}
+
+
+@pytest.mark.parametrize('template', sorted(TEMPLATES))
+def test_template(benchmark, template, gemini, product_images, metadata_file, tmp_path):
+    generator = ImageGenerator(str(tmp_path), gemini=gemini)
+    method = getattr(generator, template)
+    kwargs = TEMPLATES[template](product_images, metadata_file)
+
+    saved_paths = benchmark(method, **kwargs)
+
+    assert saved_paths
+
+
+def test_templates_cover_generator():
+    """Fail when a public generator template has no benchmark entry."""
+    public = {
+        name for name in vars(ImageGenerator)
+        if not name.startswith('_') and callable(getattr(ImageGenerator, name))
+    }
+    assert public == set(TEMPLATES)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: editor project save/load (canvas, history and reference PNGs).
+"""
+
+import pytest
+from PIL import Image
+
+from web.utils.project_manager import ProjectManager
+
+HISTORY_DEPTHS = [1, 10]
+
+
+def make_canvas(size: int, seed: int) -> Image.Image:
+    image = Image.effect_noise((size, size), 30 + seed).convert('RGB')
+    return Image.blend(image, Image.linear_gradient('L').resize((size, size)).convert('RGB'), 0.5)
+
+
+@pytest.mark.parametrize('history_depth', HISTORY_DEPTHS)
+def test_save_project(benchmark, history_depth, tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    canvas = make_canvas(1024, 0)
+    history = [make_canvas(1024, i) for i in range(history_depth)]
+    references = [make_canvas(512, i) for i in range(2)]
+
+    project_file = benchmark.pedantic(
+        manager.save_project,
+        args=("벤치마크 프로젝트", canvas, history, references, {'brand': 'Furniture'}),
+        rounds=5,
+        iterations=1
+    )
+
+    assert project_file.endswith('project.json')
+
+
+@pytest.mark.parametrize('history_depth', HISTORY_DEPTHS)
+def test_load_project(benchmark, history_depth, tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    project_file = manager.save_project(
+        "벤치마크 프로젝트",
+        make_canvas(1024, 0),
+        [make_canvas(1024, i) for i in range(history_depth)],
+        [make_canvas(512, i) for i in range(2)]
+    )
+
+    def load_and_decode():
+        # load_project opens images lazily; decode them as the editor would
+        project = manager.load_project(project_file)
+        for image in [project['canvas_image'], *project['canvas_history'], *project['reference_images']]:
+            image.load()
+        return project
+
+    project = benchmark(load_and_decode)
+
+    assert len(project['canvas_history']) == history_depth
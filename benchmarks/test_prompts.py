@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: analysis prompt rendering, uncached (PromptTemplates + json.dumps
+per call, as before the registry) vs precompiled/memoized (PromptRegistry).
+"""
+
+import json
+
+import pytest
+
+from core.config import PRODUCT_CATEGORY, PRODUCT_ATTRIBUTE
+from core.prompt_registry import PromptRegistry
+from core.prompt_templates import PromptTemplates
+
+BRANDS = sorted(PRODUCT_CATEGORY)
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return PromptRegistry()
+
+
+@pytest.mark.parametrize('brand', BRANDS)
+def test_category_prompt_uncached(benchmark, brand):
+    text = benchmark(lambda: PromptTemplates.product_category_analysis(
+        product_categories=json.dumps(PRODUCT_CATEGORY[brand], ensure_ascii=False, indent=2)
+    ))
+
+    assert "정확한 카테고리" in text
+
+
+@pytest.mark.parametrize('brand', BRANDS)
+def test_category_prompt_registry(benchmark, brand, registry):
+    text = benchmark(registry.category_prompt, brand)
+
+    assert "정확한 카테고리" in text
+
+
+def test_attribute_prompts_registry(benchmark, registry):
+    pairs = [(brand, category) for brand, categories in PRODUCT_ATTRIBUTE.items() for category in categories]
+
+    texts = benchmark(lambda: [registry.attribute_prompt(brand, category) for brand, category in pairs])
+
+    assert all("전용 속성" in text for text in texts)
+
+
+def test_memoized_render(benchmark, registry):
+    text = benchmark(
+        registry.render, 'infographic_image_template',
+        data_source_description="2024 침대 판매량: 1분기 120, 2분기 150",
+        content_type="막대 차트", purpose="판매 보고"
+    )
+
+    assert text == PromptTemplates.infographic_image_template(
+        "2024 침대 판매량: 1분기 120, 2분기 150", "막대 차트", "판매 보고"
+    )
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: structured-output parsing and repair of analyzer responses.
+"""
+
+import json
+
+import pytest
+
+from core.image_analyzer import ImageAnalyzer
+from core.structured_output import (
+    ResponseFormatError, attribute_schema, category_schema, common_attribute_schema,
+    parse_response, repair_json
+)
+
+CATEGORY = {
+    'category': '침대',
+    'sub_category': '수납 침대',
+    'confidence': 0.92,
+    'reason': '헤드보드와 프레임 구조가 보이는 침대 제품',
+    'key_features': ['패널형 헤드보드', '하단 수납 서랍']
+}
+CATEGORY_JSON = json.dumps(CATEGORY, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('text', [
+    f"```json\n{CATEGORY_JSON}\n```",
+    f"분석 결과입니다:\n{CATEGORY_JSON}\n이상입니다.",
+    CATEGORY_JSON.replace('"]', '",]').replace('}', ',}'),
+], ids=['fence', 'surrounding-text', 'trailing-commas'])
+def test_repair_defects(text):
+    assert parse_response(text, category_schema('Furniture')) == CATEGORY
+
+
+def test_repair_truncated_string():
+    truncated = CATEGORY_JSON[:CATEGORY_JSON.index('헤드보드와') + 4]
+
+    data = json.loads(repair_json(truncated))
+
+    assert data['category'] == '침대'
+    assert data['reason'] == '헤드보드'
+
+
+def test_repair_truncated_array_and_object():
+    truncated = '{"colors": ["화이트", "오크", "월넛'
+    assert json.loads(repair_json(truncated)) == {'colors': ['화이트', '오크', '월넛']}
+
+    truncated = '{"침대 형태": {"value": "패널형", "confidence": 0.9}, "헤드 형태": {"value": "라운'
+    assert json.loads(repair_json(truncated))['침대 형태'] == {'value': '패널형', 'confidence': 0.9}
+
+    truncated = '{"a": 1, "b": {"c": 2, "d":'
+    assert json.loads(repair_json(truncated)) == {'a': 1, 'b': {'c': 2}}
+
+
+def test_repair_without_json():
+    with pytest.raises(ResponseFormatError):
+        repair_json('죄송합니다, 이미지를 분석할 수 없습니다.')
+
+
+@pytest.mark.parametrize('confidence, expected', [
+    ('92%', 0.92), ('0.75', 0.75), (' 100 % ', 1.0), (1.4, 1.0), (-0.2, 0.0),
+])
+def test_confidence_coercion(confidence, expected):
+    data = parse_response(json.dumps(dict(CATEGORY, confidence=confidence)), category_schema('Furniture'))
+
+    assert data['confidence'] == pytest.approx(expected)
+
+
+def test_enum_matching_ignores_case_and_spacing():
+    text = json.dumps(dict(CATEGORY, sub_category='수납침대'), ensure_ascii=False)
+    assert parse_response(text, category_schema('Furniture'))['sub_category'] == '수납 침대'
+
+    schema = category_schema('Samsung Electronics')
+    assert 'The Frame' in schema['properties']['sub_category']['enum']
+    text = json.dumps(dict(CATEGORY, sub_category=' the  FRAME'), ensure_ascii=False)
+    assert parse_response(text, schema)['sub_category'] == 'The Frame'
+
+
+def test_unknown_enum_value_is_kept():
+    text = json.dumps(dict(CATEGORY, category='우주선'), ensure_ascii=False)
+
+    assert parse_response(text, category_schema('Furniture'))['category'] == '우주선'
+
+
+def test_scalar_wrapped_into_list():
+    text = json.dumps(dict(CATEGORY, key_features='패널형 헤드보드'), ensure_ascii=False)
+
+    assert parse_response(text, category_schema('Furniture'))['key_features'] == ['패널형 헤드보드']
+
+
+@pytest.mark.parametrize('missing', ['category', 'sub_category', 'confidence'])
+def test_missing_required_field(missing):
+    data = {key: value for key, value in CATEGORY.items() if key != missing}
+
+    with pytest.raises(ResponseFormatError, match=missing):
+        parse_response(json.dumps(data, ensure_ascii=False), category_schema('Furniture'))
+
+
+def test_missing_attribute_is_accepted():
+    schema = attribute_schema('Furniture', '침대')
+    name = next(iter(schema['properties']))
+    text = json.dumps({name: {'value': 'x', 'confidence': 0.5}}, ensure_ascii=False)
+
+    assert list(parse_response(text, schema)) == [name]
+
+
+def test_parse_clean_response(benchmark):
+    schema = category_schema('Furniture')
+
+    data = benchmark(parse_response, CATEGORY_JSON, schema)
+
+    assert data == CATEGORY
+
+
+def test_parse_repaired_response(benchmark):
+    schema = category_schema('Furniture')
+    text = f"```json\n{CATEGORY_JSON[:-1]},\n```"
+
+    data = benchmark(parse_response, text, schema)
+
+    assert data == CATEGORY
+
+
+def test_malformed_stage_retried_alone(benchmark, gemini, product_images, tmp_path):
+    """One unparseable response re-requests only its stage; the others run once."""
+    analyzer = ImageAnalyzer(str(tmp_path), gemini=gemini)
+    analyze_image = analyzer.gemini.analyze_image
+    malformed = common_attribute_schema()
+
+    def analyze_with_one_malformed_response():
+        schemas = []
+
+        def flaky(*args, **kwargs):
+            schemas.append(kwargs.get('response_schema'))
+            if schemas[-1] is malformed and schemas.count(malformed) == 1:
+                return '죄송합니다, 이미지를 분석할 수 없습니다.'
+            return analyze_image(*args, **kwargs)
+
+        analyzer.gemini.analyze_image = flaky
+        try:
+            result = analyzer.analyze_image(product_images[0], save_metadata=False, resume=False)
+        finally:
+            analyzer.gemini.analyze_image = analyze_image
+        return result, schemas
+
+    result, schemas = benchmark(analyze_with_one_malformed_response)
+
+    assert result['common_attributes']
+    assert schemas.count(malformed) == 2
+    assert schemas.count(category_schema('Furniture')) == 1
+    assert schemas.count(attribute_schema('Furniture', '침대')) == 1
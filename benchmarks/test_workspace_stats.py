@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks: WorkspaceStatistics reconcile against file events.
+"""
+
+import os
+
+from core.file_events import FILE_REMOVED, FILE_WRITTEN
+from core.workspace_stats import WorkspaceStatistics
+
+
+def write_file(path: str, size: int) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return path
+
+
+def test_events_during_reconcile_are_kept(tmp_path):
+    """Files written or removed while the scan runs are reflected in the published totals."""
+    workspace_dir = str(tmp_path)
+    kept = write_file(os.path.join(workspace_dir, 'uploads', 'kept.png'), 100)
+    removed = write_file(os.path.join(workspace_dir, 'uploads', 'removed.png'), 200)
+    stats = WorkspaceStatistics(workspace_dir)
+    stats.close()
+    scan = stats._scan
+
+    def scan_then_change():
+        scanned = list(scan())
+        added = write_file(os.path.join(workspace_dir, 'uploads', 'added.png'), 300)
+        stats._on_file_event(FILE_WRITTEN, added)
+        write_file(kept, 150)
+        stats._on_file_event(FILE_WRITTEN, kept)
+        os.remove(removed)
+        stats._on_file_event(FILE_REMOVED, removed)
+        yield from scanned
+
+    stats._scan = scan_then_change
+    stats.reconcile()
+
+    uploads = stats.get_summary()['folders']['uploads']
+    assert uploads['count'] == 2
+    assert uploads['bytes'] == 450
+    assert stats._scan_touched is None
@@ -8,9 +8,27 @@ Modules:
     - gemini_client: Google Gemini API client
     - config: Product categories and attributes configuration
     - prompt_templates: AI prompt templates
+    - prompt_registry: Precompiled and memoized prompt rendering
     - image_generator: AI image generation engine
     - image_analyzer: AI image analysis engine
     - logger: Logging utilities
+    - file_events: File write/remove hooks
+    - workspace_stats: Incremental workspace disk usage statistics
+    - storage_lifecycle: Retention policies, archiving and cleanup
+    - image_io: In-memory image inputs (encode-once buffers)
+    - ai_tools: AI tool instruction builder and local routing
+    - image_ops: Local NumPy/Pillow image operations
+    - batch_runner: Checkpointed batch AI tool runner
+    - metrics: Counters, latency histograms and snapshot export
+    - tracing: Request spans and JSON trace export
+    - usage_ledger: Gemini token/cost ledger and daily budgets
+    - context_cache: Server-side cached Gemini system contexts
+    - structured_output: Analyzer response schemas and tolerant JSON parsing
+    - analysis_checkpoint: Per-image stage checkpoints for resumable analysis
+    - reanalysis: Stale-stage detection and incremental re-analysis
+    - category_classifier: Local nearest-neighbour category classifier for the analysis cascade
+    - fake_gemini: Offline recorded-response Gemini backend
+    - asset_catalog: DAM asset listing and search/filter/sort
 """
 
 __version__ = "1.0.0"
@@ -22,6 +40,7 @@ from .prompt_templates import PromptTemplates
 from .image_generator import ImageGenerator
 from .image_analyzer import ImageAnalyzer
 from .logger import init_logger, get_logger, timefn, APP_LOGGER_NAME
+from .metrics import get_registry, timed, timer
 
 __all__ = [
     "GeminiClient",
@@ -36,4 +55,7 @@ __all__ = [
     "get_logger",
     "timefn",
     "APP_LOGGER_NAME",
+    "get_registry",
+    "timed",
+    "timer",
 ]
\ No newline at end of file
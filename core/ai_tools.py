@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+AI Tool Instructions for CEN AI DAM Editor
+
+Maps the editor's AI tools (background removal, upscaling, color correction,
+etc.) and their parameters to generation instructions. Shared by the
+interactive AI tools panel and the DAM batch tool runner.
+
+Tool settings that have a deterministic result are applied locally with
+core.image_ops; only generative edits go to Gemini.
+"""
+
+from typing import Dict, Optional
+
+from PIL import Image
+
+from . import image_ops
+
+# Tool names (as shown in the UI)
+TOOL_BACKGROUND_REMOVAL = "배경 제거"
+TOOL_STYLE_TRANSFER = "스타일 전환"
+TOOL_UPSCALE = "이미지 업스케일링"
+TOOL_OBJECT_REPLACE = "객체 교체"
+TOOL_COLOR_CORRECTION = "색상 보정"
+TOOL_OUTPAINT = "이미지 확장"
+
+AI_TOOLS = [
+    TOOL_BACKGROUND_REMOVAL,
+    TOOL_STYLE_TRANSFER,
+    TOOL_UPSCALE,
+    TOOL_OBJECT_REPLACE,
+    TOOL_COLOR_CORRECTION,
+    TOOL_OUTPAINT,
+]
+
+# Outpainting fill modes
+FILL_GENERATIVE = "AI 자연스럽게 채우기"
+FILL_SOLID = "단색 여백"
+
+# Auto color correction level -> percent clipped at each end of the histogram
+AUTO_LEVEL_CUTOFFS = {"약하게": 0.5, "보통": 1.0, "강하게": 2.0}
+
+
+def apply_local_tool(
+    tool: str,
+    params: Dict,
+    image: Image.Image,
+    mask: Optional[Image.Image] = None
+) -> Optional[Image.Image]:
+    """
+    Apply an AI tool locally when its result does not need a generative model.
+
+    Args:
+        tool: Tool name (one of AI_TOOLS)
+        params: Tool parameters collected by the UI
+        image: Source image
+        mask: Optional subject mask (255 = subject) for background tools;
+            defaults to the image's alpha channel if the image is already
+            a cutout (see image_ops.mask_from_alpha)
+
+    Returns:
+        Processed image, or None if the tool must be routed to Gemini
+    """
+    if tool == TOOL_COLOR_CORRECTION:
+        if params['mode'] == "자동 보정":
+            cutoff = AUTO_LEVEL_CUTOFFS.get(params.get('auto_level', '보통'), 1.0)
+            return image_ops.auto_levels(image, cutoff)
+        return image_ops.adjust_colors(
+            image,
+            brightness=params.get('brightness', 0),
+            contrast=params.get('contrast', 0),
+            saturation=params.get('saturation', 0)
+        )
+
+    if tool == TOOL_UPSCALE and not params.get('enhance', True):
+        return image_ops.upscale(image, params['scale_factor'])
+
+    if tool == TOOL_OUTPAINT and params.get('fill_mode') == FILL_SOLID:
+        return image_ops.expand_canvas(
+            image,
+            left=params.get('expand_left', 0),
+            right=params.get('expand_right', 0),
+            top=params.get('expand_top', 0),
+            bottom=params.get('expand_bottom', 0),
+            fill=params.get('fill_color', '#FFFFFF')
+        )
+
+    if tool == TOOL_BACKGROUND_REMOVAL:
+        subject_mask = mask if mask is not None else image_ops.mask_from_alpha(image)
+        if subject_mask is None:
+            # Segmenting the subject needs the generative model
+            return None
+
+        background_type = params['background_type']
+        if background_type == "투명 배경":
+            rgba = image.convert('RGBA')
+            rgba.putalpha(image_ops.to_mask(subject_mask, rgba.size))
+            return rgba
+        if background_type == "단색 배경":
+            return image_ops.fill_background(image, subject_mask, params.get('background_color', '#FFFFFF'))
+        radius = params.get('blur_intensity', 5) * max(image.size) / 400
+        return image_ops.blur_background(image, subject_mask, radius)
+
+    return None
+
+
+def build_tool_instruction(tool: str, params: Dict) -> str:
+    """
+    Build the generation instruction for an AI tool.
+
+    Args:
+        tool: Tool name (one of AI_TOOLS)
+        params: Tool parameters collected by the UI
+
+    Returns:
+        Instruction text for ImageGenerator.change_attributes
+
+    Raises:
+        ValueError: If the tool is unknown
+    """
+    if tool == TOOL_BACKGROUND_REMOVAL:
+        if params['background_type'] == "투명 배경":
+            instruction = "Remove the background completely and make it transparent, keeping only the main subject"
+        elif params['background_type'] == "단색 배경":
+            bg_color = params.get('background_color', '#FFFFFF')
+            instruction = f"Remove the background and replace it with a solid {bg_color} color background"
+        else:  # 블러 배경
+            blur = params.get('blur_intensity', 5)
+            instruction = f"Apply a blur effect to the background with intensity level {blur}, keeping the main subject sharp"
+
+    elif tool == TOOL_STYLE_TRANSFER:
+        if 'preset_style' in params:
+            style = params['preset_style']
+            intensity = params['intensity']
+            instruction = f"Transform this image into {style} style with {intensity}% intensity, maintaining the main composition"
+        else:
+            instruction = "Apply the style from the reference image to this image while preserving the content"
+            # TODO: Handle reference image upload
+
+    elif tool == TOOL_UPSCALE:
+        scale = params['scale_factor']
+        enhance = params.get('enhance', True)
+        instruction = f"Upscale this image by {scale}x using AI super-resolution"
+        if enhance:
+            instruction += " with additional quality enhancement and detail restoration"
+
+    elif tool == TOOL_OBJECT_REPLACE:
+        remove_obj = params.get('remove_object', '')
+        add_obj = params.get('add_object', '')
+        if remove_obj and add_obj:
+            instruction = f"Replace the {remove_obj} in the image with {add_obj}, maintaining natural lighting and perspective"
+        else:
+            instruction = "Perform object replacement based on the provided specifications"
+
+    elif tool == TOOL_COLOR_CORRECTION:
+        if params['mode'] == "자동 보정":
+            level = params.get('auto_level', '보통')
+            instruction = f"Automatically adjust colors, brightness, and contrast with {level} enhancement level"
+        else:
+            brightness = params.get('brightness', 0)
+            contrast = params.get('contrast', 0)
+            saturation = params.get('saturation', 0)
+            instruction = f"Adjust image: brightness {brightness:+d}, contrast {contrast:+d}, saturation {saturation:+d}"
+
+    elif tool == TOOL_OUTPAINT:
+        left = params.get('expand_left', 0)
+        right = params.get('expand_right', 0)
+        top = params.get('expand_top', 0)
+        bottom = params.get('expand_bottom', 0)
+        custom_prompt = params.get('prompt', '')
+
+        instruction = f"Expand the image outward: {left}px left, {right}px right, {top}px top, {bottom}px bottom"
+        if custom_prompt:
+            instruction += f". {custom_prompt}"
+        else:
+            instruction += ". Fill the expanded areas naturally based on the existing image context"
+
+    else:
+        raise ValueError(f"Unknown AI tool: {tool}")
+
+    return instruction
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis Checkpoints for CEN AI DAM Editor
+
+Stage-level checkpoints for `ImageAnalyzer`, so a failure late in the
+4-stage pipeline (category, product attributes, common attributes,
+description) does not throw away the stages that already succeeded:
+- Each image gets a sidecar JSON file in `<metadata dir>/.analysis/`,
+  named by the SHA-256 of the image content, so renamed or copied files
+  share their checkpoint and an edited file starts fresh
+- Every completed stage is stored with a fingerprint of its inputs (model,
+  rendered prompt and response schema). A stage is reused only while its
+  fingerprint matches, so changing a prompt template or the brand config
+  re-runs exactly the stages whose prompt changed, and a stage that depends
+  on an earlier result (attributes on the category, the description on the
+  attributes) is re-run when that result changes
+- Sidecars are written atomically (tmp file + os.replace) after each stage
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+
+from .logger import get_logger
+
+CHECKPOINT_FOLDER = '.analysis'
+CHECKPOINT_VERSION = 1
+
+_HASH_CHUNK = 1 << 20
+
+
+def image_hash(image_path: str) -> str:
+    """
+    Compute the SHA-256 of an image file's content.
+
+    Args:
+        image_path: Path to image file
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_fingerprint(model: str, prompt: str, schema: Optional[Dict] = None) -> str:
+    """
+    Fingerprint the inputs of an analysis stage.
+
+    Args:
+        model: Model the stage runs on
+        prompt: Fully rendered prompt text
+        schema: Response schema, if any
+
+    Returns:
+        Short hex digest identifying the stage's prompt version
+    """
+    digest = hashlib.sha1()
+    digest.update(model.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(prompt.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(json.dumps(schema, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class AnalysisCheckpoint:
+    """
+    Per-image stage results persisted next to the analysis metadata.
+
+    Not thread-safe for the same image; analyzing one image from two threads
+    at once is not supported by ImageAnalyzer either.
+    """
+
+    def __init__(self, metadata_dir: str, image_path: str):
+        """
+        Initialize AnalysisCheckpoint and load an existing sidecar.
+
+        Args:
+            metadata_dir: Directory the analysis metadata is saved to
+            image_path: Path to the analyzed image
+        """
+        self.image_path = image_path
+        self.image_sha256 = image_hash(image_path)
+        self.path = os.path.join(metadata_dir, CHECKPOINT_FOLDER, f"{self.image_sha256}.json")
+        self.stages: Dict[str, Dict] = {}
+        self._load()
+
+    def get(self, stage: str, fingerprint: str):
+        """
+        Get a completed stage result if it was produced from the same inputs.
+
+        Args:
+            stage: Stage name
+            fingerprint: Current fingerprint from stage_fingerprint()
+
+        Returns:
+            Stored result, or None when the stage must run
+        """
+        record = self.stages.get(stage)
+        if record is None or record.get('fingerprint') != fingerprint:
+            return None
+        return record['result']
+
+    def put(self, stage: str, fingerprint: str, result):
+        """
+        Record a completed stage and write the sidecar.
+
+        Args:
+            stage: Stage name
+            fingerprint: Fingerprint of the inputs the result was produced from
+            result: JSON-serializable stage result
+        """
+        self.stages[stage] = {
+            'fingerprint': fingerprint,
+            'result': result,
+            'completed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self._write()
+
+    def seed(self, stages: Dict[str, tuple]):
+        """
+        Record several completed stages at once (e.g. from saved metadata) and write the sidecar.
+
+        Args:
+            stages: Dict of stage name to (fingerprint, result)
+        """
+        completed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for stage, (fingerprint, result) in stages.items():
+            self.stages[stage] = {'fingerprint': fingerprint, 'result': result, 'completed_at': completed_at}
+        self._write()
+
+    def clear(self):
+        """Forget all stages and delete the sidecar."""
+        self.stages = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger = get_logger()
+            logger.warning("Ignoring unreadable analysis checkpoint %s: %s", self.path, e)
+            return
+        if data.get('version') == CHECKPOINT_VERSION:
+            self.stages = data.get('stages', {})
+
+    def _write(self):
+        """Write the sidecar atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'image_sha256': self.image_sha256,
+            'image_path': self.image_path,
+            'stages': self.stages
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
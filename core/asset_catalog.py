@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Asset Catalog for CEN AI DAM Editor
+
+Workspace asset listing and search/filter/sort used by the DAM page.
+Kept free of Streamlit so it can be benchmarked and reused outside the UI.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Dict, List
+
+
+def load_assets_from_workspace(workspace_dir: str, folder: str = 'all') -> List[Dict]:
+    """
+    Load assets from user workspace.
+
+    Args:
+        workspace_dir: User workspace directory
+        folder: Folder to load from ('all', 'uploads', 'generated', etc.)
+
+    Returns:
+        List of asset dictionaries with metadata
+    """
+    assets = []
+
+    # Determine which folders to scan
+    if folder == 'all':
+        folders_to_scan = ['uploads', 'generated']
+    else:
+        folders_to_scan = [folder]
+
+    for folder_name in folders_to_scan:
+        folder_path = os.path.join(workspace_dir, folder_name)
+
+        if not os.path.exists(folder_path):
+            continue
+
+        # Scan for image files
+        for filename in os.listdir(folder_path):
+            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+                file_path = os.path.join(folder_path, filename)
+
+                # Get file stats
+                stats = os.stat(file_path)
+                created_time = datetime.fromtimestamp(stats.st_ctime)
+                modified_time = datetime.fromtimestamp(stats.st_mtime)
+                file_size = stats.st_size
+
+                # Try to load metadata
+                metadata_path = os.path.join(workspace_dir, 'metadata', f"{os.path.splitext(filename)[0]}.json")
+                metadata = {}
+
+                if os.path.exists(metadata_path):
+                    try:
+                        with open(metadata_path, 'r', encoding='utf-8') as f:
+                            metadata = json.load(f)
+                    except (OSError, ValueError):
+                        pass
+
+                # Build asset info
+                asset = {
+                    'filename': filename,
+                    'path': file_path,
+                    'folder': folder_name,
+                    'created': created_time,
+                    'modified': modified_time,
+                    'size': file_size,
+                    'metadata': metadata,
+                    'category': metadata.get('category', '미분류'),
+                    'tags': metadata.get('tags', []),
+                    'description': metadata.get('description', '')
+                }
+
+                assets.append(asset)
+
+    return assets
+
+
+def filter_assets(assets: List[Dict], search_query: str, category_filter: str, sort_order: str) -> List[Dict]:
+    """
+    Filter and sort assets based on search and filter criteria.
+
+    Args:
+        assets: List of asset dictionaries
+        search_query: Search query string
+        category_filter: Category filter
+        sort_order: Sort order
+
+    Returns:
+        Filtered and sorted list of assets
+    """
+    filtered = assets
+
+    # Apply search filter
+    if search_query:
+        query_lower = search_query.lower()
+        filtered = [
+            asset for asset in filtered
+            if query_lower in asset['filename'].lower()
+            or query_lower in asset['category'].lower()
+            or any(query_lower in tag.lower() for tag in asset['tags'])
+            or query_lower in asset['description'].lower()
+        ]
+
+    # Apply category filter
+    if category_filter != "전체":
+        filtered = [asset for asset in filtered if asset['category'] == category_filter]
+
+    # Apply sorting
+    if sort_order == "최근 수정":
+        filtered.sort(key=lambda x: x['modified'], reverse=True)
+    elif sort_order == "최근 생성":
+        filtered.sort(key=lambda x: x['created'], reverse=True)
+    elif sort_order == "이름순":
+        filtered.sort(key=lambda x: x['filename'])
+    elif sort_order == "크기순":
+        filtered.sort(key=lambda x: x['size'], reverse=True)
+
+    return filtered
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+Batch AI Tool Runner for CEN AI DAM Editor
+
+Applies one AI tool (background removal, upscaling, color correction, etc.)
+to many DAM assets:
+- Bounded concurrency via a fixed-size worker pool
+- Job state is checkpointed to the workspace so interrupted jobs can resume
+- Output metadata is written in bulk at each checkpoint
+"""
+
+import os
+import json
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+
+from .ai_tools import apply_local_tool, build_tool_instruction
+from .image_generator import ImageGenerator
+from .file_events import notify_file_written
+from .logger import get_logger, log_context, new_request_id
+from .tracing import span, trace_dir_for
+
+BATCH_JOBS_FOLDER = '.batch_jobs'
+
+# Job status
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_CANCELLED = 'cancelled'
+
+# Item status
+ITEM_PENDING = 'pending'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+
+# Analysis fields that describe the source image's own analysis, not a derived output
+_SOURCE_ONLY_METADATA = ('image_sha256', 'analysis_versions', 'category_data')
+
+_running_jobs = set()
+_running_jobs_lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _jobs_dir(workspace_dir: str) -> str:
+    return os.path.join(workspace_dir, BATCH_JOBS_FOLDER)
+
+
+def create_batch_job(workspace_dir: str, tool_data: Dict, asset_paths: List[str]) -> str:
+    """
+    Create and checkpoint a new batch job.
+
+    Args:
+        workspace_dir: User workspace directory
+        tool_data: Dictionary with 'tool' and JSON-serializable 'params'
+        asset_paths: Paths of the source assets
+
+    Returns:
+        Job ID
+
+    Raises:
+        ValueError: If the tool is unknown
+    """
+    instruction = build_tool_instruction(tool_data['tool'], tool_data['params'])
+    job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+    job = {
+        'job_id': job_id,
+        'tool': tool_data['tool'],
+        'params': tool_data['params'],
+        'instruction': instruction,
+        'status': JOB_PENDING,
+        'created_at': _now(),
+        'updated_at': _now(),
+        'items': [
+            {
+                'source': path,
+                'status': ITEM_PENDING,
+                'outputs': [],
+                'error': None,
+                'metadata_written': False
+            }
+            for path in dict.fromkeys(asset_paths)
+        ]
+    }
+
+    os.makedirs(_jobs_dir(workspace_dir), exist_ok=True)
+    _write_job(workspace_dir, job)
+    return job_id
+
+
+def list_batch_jobs(workspace_dir: str) -> List[Dict]:
+    """
+    List batch jobs in a workspace, newest first.
+
+    Args:
+        workspace_dir: User workspace directory
+
+    Returns:
+        List of job summaries (job_id, tool, status, total, done, failed, pending, updated_at)
+    """
+    jobs_dir = _jobs_dir(workspace_dir)
+    if not os.path.isdir(jobs_dir):
+        return []
+
+    summaries = []
+    for filename in os.listdir(jobs_dir):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(jobs_dir, filename), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+        except Exception as e:
+            logger = get_logger()
+            logger.warning("Failed to read batch job %s: %s", filename, e)
+            continue
+        summaries.append(_summarize(job))
+
+    summaries.sort(key=lambda s: s['job_id'], reverse=True)
+    return summaries
+
+
+def _summarize(job: Dict) -> Dict:
+    counts = {ITEM_PENDING: 0, ITEM_DONE: 0, ITEM_FAILED: 0}
+    for item in job['items']:
+        counts[item['status']] += 1
+    return {
+        'job_id': job['job_id'],
+        'tool': job['tool'],
+        'status': job['status'],
+        'total': len(job['items']),
+        'done': counts[ITEM_DONE],
+        'failed': counts[ITEM_FAILED],
+        'pending': counts[ITEM_PENDING],
+        'updated_at': job['updated_at']
+    }
+
+
+def _write_job(workspace_dir: str, job: Dict):
+    """Write a job checkpoint atomically."""
+    job_path = os.path.join(_jobs_dir(workspace_dir), f"{job['job_id']}.json")
+    temp_path = f"{job_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, job_path)
+
+
+class BatchToolRunner:
+    """
+    Runs (or resumes) a checkpointed batch job.
+
+    Pending and previously failed items are processed by a bounded worker
+    pool. Progress is checkpointed every `flush_every` completed items, so an
+    interrupted run (page reload, crash) resumes where it left off.
+    """
+
+    def __init__(
+        self,
+        workspace_dir: str,
+        job_id: str,
+        max_workers: int = 4,
+        flush_every: int = 10
+    ):
+        """
+        Initialize BatchToolRunner.
+
+        Args:
+            workspace_dir: User workspace directory
+            job_id: ID returned by create_batch_job
+            max_workers: Maximum concurrent Gemini requests
+            flush_every: Completed items between checkpoints
+        """
+        self.workspace_dir = workspace_dir
+        self.job_id = job_id
+        self.max_workers = max(1, max_workers)
+        self.flush_every = max(1, flush_every)
+
+        self.job_path = os.path.join(_jobs_dir(workspace_dir), f"{job_id}.json")
+        with open(self.job_path, 'r', encoding='utf-8') as f:
+            self.job = json.load(f)
+
+        self.output_dir = os.path.join(workspace_dir, 'generated')
+        self.metadata_dir = os.path.join(workspace_dir, 'metadata')
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop after in-flight items finish; remaining items stay pending."""
+        self._cancel.set()
+
+    def run(self, progress_callback: Optional[Callable[[int, int, Dict], None]] = None) -> Dict:
+        """
+        Process all pending and failed items.
+
+        Args:
+            progress_callback: Called in the caller's thread as
+                (completed_count, total_count, item) after each item
+
+        Returns:
+            Job summary
+
+        Raises:
+            RuntimeError: If the job is already running in this process
+        """
+        with _running_jobs_lock:
+            if self.job_path in _running_jobs:
+                raise RuntimeError(f"Batch job already running: {self.job_id}")
+            _running_jobs.add(self.job_path)
+
+        logger = get_logger()
+        try:
+            with log_context(job_id=self.job_id):
+                return self._run(logger, progress_callback)
+        finally:
+            with _running_jobs_lock:
+                _running_jobs.discard(self.job_path)
+
+    def _run(self, logger, progress_callback) -> Dict:
+        """Body of run(); the caller holds the running-job slot."""
+        todo = [item for item in self.job['items'] if item['status'] != ITEM_DONE]
+        total = len(self.job['items'])
+        completed = total - len(todo)
+
+        self.job['status'] = JOB_RUNNING
+        self._checkpoint()
+        logger.info("Batch job %s: %d of %d items to process", self.job_id, len(todo), total)
+
+        generator = ImageGenerator(self.output_dir)
+        since_flush = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch-tool')
+        try:
+            futures = {
+                executor.submit(self._process_item, generator, item['source']): item
+                for item in todo
+            }
+            for future in as_completed(futures):
+                item = futures[future]
+                if future.cancelled():
+                    continue
+                try:
+                    outputs = future.result()
+                    if outputs is None:
+                        # Skipped after cancel; stays pending for resume
+                        continue
+                    item['outputs'] = outputs
+                    item['status'] = ITEM_DONE if item['outputs'] else ITEM_FAILED
+                    item['error'] = None if item['outputs'] else 'No image generated'
+                except Exception as e:
+                    item['status'] = ITEM_FAILED
+                    item['error'] = str(e)
+                    logger.error("Batch job %s failed on %s: %s", self.job_id, item['source'], e)
+
+                completed += 1
+                since_flush += 1
+                if since_flush >= self.flush_every:
+                    self._flush()
+                    since_flush = 0
+
+                if progress_callback:
+                    progress_callback(completed, total, item)
+
+                if self._cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        self.job['status'] = JOB_CANCELLED if self._cancel.is_set() else JOB_COMPLETED
+        self._flush()
+
+        summary = _summarize(self.job)
+        logger.info(
+            "Batch job %s %s: %d done, %d failed, %d pending",
+            self.job_id, summary['status'], summary['done'], summary['failed'], summary['pending']
+        )
+        return summary
+
+    def _process_item(self, generator: ImageGenerator, source_path: str) -> Optional[List[str]]:
+        """Apply the job's instruction to one asset (runs in a worker thread)."""
+        if self._cancel.is_set():
+            return None
+        with log_context(job_id=self.job_id, request_id=new_request_id()), \
+                span('batch.item', trace_dir=trace_dir_for(self.workspace_dir),
+                     job_id=self.job_id, source=os.path.basename(source_path),
+                     user=os.path.basename(os.path.abspath(self.workspace_dir))):
+            return self._apply_tool(generator, source_path)
+
+    def _apply_tool(self, generator: ImageGenerator, source_path: str) -> Optional[List[str]]:
+        """Run the local tool or the generator on one asset."""
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(source_path)
+
+        with Image.open(source_path) as source:
+            local_result = apply_local_tool(self.job['tool'], self.job['params'], source)
+        if local_result is not None:
+            return [self._save_local_result(local_result, source_path)]
+
+        return generator.change_attributes(
+            image_path=source_path,
+            instructions=[self.job['instruction']]
+        )
+
+    def _save_local_result(self, image: Image.Image, source_path: str) -> str:
+        """Save a locally processed image next to the generated outputs (uniquely named, like ImageGenerator's)."""
+        base, ext = os.path.splitext(os.path.basename(source_path))
+        if image.mode == 'RGBA' and ext.lower() in ('.jpg', '.jpeg'):
+            ext = '.png'
+        output_path = os.path.join(self.output_dir, f"{base}_changed_{uuid.uuid4().hex[:8]}{ext}")
+        image.save(output_path)
+        notify_file_written(output_path)
+        return output_path
+
+    def _flush(self):
+        """Write pending output metadata in one pass, then checkpoint the job."""
+        self._write_output_metadata()
+        self._checkpoint()
+
+    def _checkpoint(self):
+        self.job['updated_at'] = _now()
+        _write_job(self.workspace_dir, self.job)
+
+    def _write_output_metadata(self):
+        """Write metadata sidecars for finished items that do not have one yet."""
+        items = [
+            item for item in self.job['items']
+            if item['status'] == ITEM_DONE and not item['metadata_written']
+        ]
+        if not items:
+            return
+
+        os.makedirs(self.metadata_dir, exist_ok=True)
+        logger = get_logger()
+
+        for item in items:
+            source_metadata = self._load_source_metadata(item['source'])
+            for output_path in item['outputs']:
+                output_name = os.path.basename(output_path)
+                metadata = {
+                    key: value for key, value in source_metadata.items()
+                    if key not in _SOURCE_ONLY_METADATA
+                }
+                metadata.update({
+                    'image_path': output_path,
+                    'filename': output_name,
+                    'source_image': item['source'],
+                    'ai_tool': self.job['tool'],
+                    'batch_job': self.job_id,
+                    'created_at': self.job['updated_at']
+                })
+
+                metadata_path = os.path.join(self.metadata_dir, f"{os.path.splitext(output_name)[0]}.json")
+                try:
+                    with open(metadata_path, 'w', encoding='utf-8') as f:
+                        json.dump(metadata, f, ensure_ascii=False, indent=2)
+                    notify_file_written(metadata_path)
+                except Exception as e:
+                    logger.warning("Failed to write metadata for %s: %s", output_name, e)
+
+            item['metadata_written'] = True
+
+    def _load_source_metadata(self, source_path: str) -> Dict:
+        base = os.path.splitext(os.path.basename(source_path))[0]
+        metadata_path = os.path.join(self.metadata_dir, f"{base}.json")
+        if not os.path.exists(metadata_path):
+            return {}
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
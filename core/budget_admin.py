@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Operator command line for Gemini daily budgets.
+
+Budgets are deliberately not editable from the web app (any session could
+raise its own or the global limit); they come from the
+GEMINI_DAILY_TOKEN_BUDGET / GEMINI_DAILY_COST_BUDGET_USD environment
+variables or from this tool, which writes the usage ledger's budgets table.
+Running app processes pick the change up within BUDGET_RELOAD_INTERVAL.
+
+Usage:
+    python -m core.budget_admin                                         # show budgets and today's usage
+    python -m core.budget_admin --user alice --tokens 2000000 --cost 5  # per-user budget
+    python -m core.budget_admin --global --clear                        # remove the global budget
+"""
+
+import sys
+import argparse
+from typing import List, Optional
+
+from .usage_ledger import DEFAULT_SOFT_RATIO, GLOBAL_SCOPE, get_usage_ledger
+
+
+def main(argv: Optional[List[str]] = None):
+    """Show or set daily budgets (operator entry point; the app only displays them)."""
+    parser = argparse.ArgumentParser(
+        prog='python -m core.budget_admin',
+        description='Show Gemini daily budgets, or set one when a limit or --clear is given'
+    )
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument('--global', dest='global_scope', action='store_true', help='Global budget (default)')
+    scope.add_argument('--user', help='Per-user budget (workspace folder name)')
+    parser.add_argument('--tokens', type=int, help='Maximum total tokens per day')
+    parser.add_argument('--cost', type=float, help='Maximum estimated USD per day')
+    parser.add_argument('--soft-ratio', type=float, default=DEFAULT_SOFT_RATIO,
+                        help='Fraction of the budget after which calls are throttled')
+    parser.add_argument('--clear', action='store_true', help='Remove the budget')
+    parser.add_argument('--db', help='Ledger database (defaults to USAGE_LEDGER_PATH / workspace)')
+    args = parser.parse_args(argv)
+
+    ledger = get_usage_ledger(args.db)
+    target = args.user or GLOBAL_SCOPE
+    if args.clear:
+        ledger.set_budget(target, None, None)
+    elif args.tokens is not None or args.cost is not None:
+        if not 0 < args.soft_ratio <= 1:
+            parser.error('--soft-ratio must be in (0, 1]')
+        ledger.set_budget(target, args.tokens or None, args.cost or None, args.soft_ratio)
+
+    budgets = ledger.get_budgets()
+    for scope_name in [GLOBAL_SCOPE] + sorted(name for name in budgets if name != GLOBAL_SCOPE):
+        status = ledger.budget_status(None if scope_name == GLOBAL_SCOPE else scope_name)[-1]
+        label = 'global' if scope_name == GLOBAL_SCOPE else f"user {scope_name}"
+        limit = budgets.get(scope_name)
+        if limit is None:
+            print(f"{label}: no budget (today {status['tokens']:,} tokens, ${status['cost_usd']:.2f})")
+            continue
+        print(
+            f"{label}: {limit['daily_tokens'] or '-'} tokens, ${limit['daily_cost_usd'] or '-'} per day, "
+            f"throttled from {limit['soft_ratio']:.0%} (today {status['tokens']:,} tokens, "
+            f"${status['cost_usd']:.2f}, {status['ratio']:.0%})"
+        )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
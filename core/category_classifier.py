@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+"""
+Local Category Classifier for CEN AI DAM Editor
+
+A CPU-only nearest-neighbour classifier over already-labeled DAM assets,
+used by `ImageAnalyzer` as the first step of a cascade: the local model
+proposes category and sub-category with a confidence, and the multimodal
+Gemini call runs only when that confidence is below the threshold.
+- Embeddings are compact image descriptors computed with NumPy/Pillow
+  (HSV color histogram, gradient orientation histogram over a 4x4 grid and
+  an 8x8 luminance layout), L2-normalized so a dot product is the cosine
+  similarity
+- Prediction is a similarity-weighted vote of the k nearest examples of the
+  same brand; the confidence is the winning category's share of the vote
+  (later stages depend on the category only), and the sub-category is the
+  best one within that category, with its own share as sub_confidence
+- Only examples whose (category, sub-category) is still in the brand's
+  taxonomy (`PRODUCT_CATEGORY`) vote, so renamed or removed labels are
+  never proposed; such images go to Gemini like any uncertain one
+- Weak matches are not trusted: no prediction is made until the brand has
+  examples of at least two categories or when even the nearest example is
+  below MIN_SIMILARITY, and neighbours below it vote for "unknown", which
+  lowers the confidence instead of backing whichever category is closest
+- Examples are stored in SQLite next to the analysis checkpoints
+  (`<metadata dir>/.analysis/category_index.db`), one row per image hash,
+  so training is incremental: a confirmed label (set by a user, or a Gemini
+  classification at or above the confirm threshold) is added or replaces
+  the image's previous label without refitting anything
+- Local predictions are never added back as examples; `train_from_metadata()`
+  bootstraps the index from existing analysis metadata and
+  `confirm_category()` records a user's correction
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from .analysis_checkpoint import CHECKPOINT_FOLDER, image_hash
+from .config import PRODUCT_CATEGORY
+from .file_events import notify_file_written
+from .logger import get_logger
+from .reanalysis import load_analysis_metadata
+
+INDEX_FILENAME = 'category_index.db'
+
+# Bump when image_embedding() changes; examples of other versions are ignored
+EMBEDDING_VERSION = 1
+EMBEDDING_SIZE = 64
+
+DEFAULT_K = 7
+DEFAULT_MIN_EXAMPLES = 5
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_CONFIRM_THRESHOLD = 0.9
+
+# Sharpens the vote toward the closest neighbours
+SIMILARITY_POWER = 4
+# Cosine similarity below which a neighbour is no evidence for its category
+MIN_SIMILARITY = 0.6
+# Categories a brand needs examples of before predictions are made
+MIN_CATEGORIES = 2
+
+# Label sources
+SOURCE_USER = 'user'
+SOURCE_GEMINI = 'gemini'
+SOURCE_LOCAL = 'local'
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _normalized(vector: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+def image_embedding(image) -> np.ndarray:
+    """
+    Compute the descriptor the local classifier compares images by.
+
+    Args:
+        image: Path to image file or PIL Image
+
+    Returns:
+        L2-normalized float32 vector
+    """
+    if isinstance(image, str):
+        with Image.open(image) as source:
+            source.draft('RGB', (EMBEDDING_SIZE * 2, EMBEDDING_SIZE * 2))
+            image = source.convert('RGB').resize((EMBEDDING_SIZE, EMBEDDING_SIZE), Image.BILINEAR)
+    else:
+        image = image.convert('RGB').resize((EMBEDDING_SIZE, EMBEDDING_SIZE), Image.BILINEAR)
+
+    # Color: 12 hue x 3 saturation x 3 value bins (square-rooted frequencies)
+    hsv = np.asarray(image.convert('HSV'), dtype=np.int32).reshape(-1, 3)
+    bins = (hsv[:, 0] * 12 // 256) * 9 + (hsv[:, 1] * 3 // 256) * 3 + hsv[:, 2] * 3 // 256
+    color = np.sqrt(np.bincount(bins, minlength=108) / len(bins))
+
+    # Shape: 8 unsigned gradient orientations per cell of a 4x4 grid, weighted by magnitude
+    gray = np.asarray(image, dtype=np.float32) @ _LUMA / 255
+    grad_y, grad_x = np.gradient(gray)
+    magnitude = np.hypot(grad_x, grad_y).ravel()
+    orientation = ((np.arctan2(grad_y, grad_x) % np.pi) / np.pi * 8).astype(np.int32).clip(0, 7).ravel()
+    cell_size = EMBEDDING_SIZE // 4
+    rows, cols = np.indices(gray.shape)
+    cells = ((rows // cell_size) * 4 + cols // cell_size).ravel()
+    shape = np.sqrt(np.bincount(cells * 8 + orientation, weights=magnitude, minlength=128))
+
+    # Layout: 8x8 luminance, zero-mean
+    block = EMBEDDING_SIZE // 8
+    layout = gray.reshape(8, block, 8, block).mean(axis=(1, 3)).ravel()
+    layout = layout - layout.mean()
+
+    vector = np.concatenate([_normalized(color), _normalized(shape), 0.5 * _normalized(layout)])
+    return _normalized(vector).astype(np.float32)
+
+
+class _BrandExamples:
+    """Growable example matrix of one brand."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((16, dim), dtype=np.float32)
+        self.keys: List[str] = []
+        self.labels: List[tuple] = []
+        self.rows: Dict[str, int] = {}
+
+    def put(self, key: str, vector: np.ndarray, label: tuple):
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.vectors):
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.keys.append(key)
+            self.labels.append(label)
+            self.rows[key] = row
+        else:
+            self.labels[row] = label
+        self.vectors[row] = vector
+
+
+class CategoryIndex:
+    """
+    Incrementally trained nearest-neighbour category classifier.
+
+    Thread-safe; one instance per metadata folder is shared in the process
+    (see `get_category_index`).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        k: int = DEFAULT_K,
+        min_examples: int = DEFAULT_MIN_EXAMPLES
+    ):
+        """
+        Initialize CategoryIndex and load stored examples.
+
+        Args:
+            db_path: SQLite database file
+            k: Neighbours voting on a prediction
+            min_examples: Examples a brand needs before predictions are made
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.k = k
+        self.min_examples = min_examples
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._brands: Dict[str, _BrandExamples] = {}
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._init_database()
+        self._load()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_database(self):
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS examples (
+                image_sha256 TEXT PRIMARY KEY,
+                brand TEXT NOT NULL,
+                category TEXT NOT NULL,
+                sub_category TEXT,
+                source TEXT,
+                embedding_version INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                updated_at TEXT
+            );
+        ''')
+        conn.commit()
+
+    def _load(self):
+        rows = self._connection().execute(
+            'SELECT image_sha256, brand, category, sub_category, vector FROM examples '
+            'WHERE embedding_version = ?',
+            (EMBEDDING_VERSION,)
+        ).fetchall()
+        with self._lock:
+            for key, brand, category, sub_category, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                self._examples(brand, len(vector)).put(key, vector, (category, sub_category or ''))
+
+    def _examples(self, brand: str, dim: int) -> _BrandExamples:
+        examples = self._brands.get(brand)
+        if examples is None:
+            examples = self._brands[brand] = _BrandExamples(dim)
+        return examples
+
+    def add(
+        self,
+        key: str,
+        vector: np.ndarray,
+        brand: str,
+        category: str,
+        sub_category: str = '',
+        source: str = SOURCE_GEMINI
+    ):
+        """
+        Add a labeled example, replacing the previous label of the same image.
+
+        Args:
+            key: Image content hash
+            vector: Embedding from image_embedding()
+            brand: Brand name
+            category: Confirmed main category
+            sub_category: Confirmed sub-category
+            source: Who confirmed the label (SOURCE_USER or SOURCE_GEMINI)
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO examples VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, brand, category, sub_category, source, EMBEDDING_VERSION, vector.tobytes(),
+             datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        )
+        conn.commit()
+        with self._lock:
+            self._examples(brand, len(vector)).put(key, vector, (category, sub_category or ''))
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return any(key in examples.rows for examples in self._brands.values())
+
+    def predict(self, vector: np.ndarray, brand: str) -> Optional[Dict]:
+        """
+        Propose a category for an image.
+
+        Args:
+            vector: Embedding from image_embedding()
+            brand: Brand whose examples are searched
+
+        Returns:
+            Category result (category, sub_category, confidence, reason,
+            key_features, source, sub_confidence, similarity), or None when
+            the brand has fewer than min_examples examples or examples of
+            fewer than MIN_CATEGORIES categories in the current taxonomy,
+            or when no example is at least MIN_SIMILARITY similar
+        """
+        taxonomy = PRODUCT_CATEGORY.get(brand, {})
+        with self._lock:
+            examples = self._brands.get(brand)
+            count = len(examples.keys) if examples else 0
+            labels = list(examples.labels[:count]) if examples else []
+            # Examples labelled with categories no longer in the taxonomy do not vote
+            valid = np.array([sub in taxonomy.get(category, ()) for category, sub in labels], dtype=bool)
+            valid_count = int(valid.sum())
+            if valid_count < max(self.min_examples, 1):
+                return None
+            if len({label[0] for label, ok in zip(labels, valid) if ok}) < MIN_CATEGORIES:
+                return None
+            similarities = examples.vectors[:count] @ np.asarray(vector, dtype=np.float32)
+        similarities[~valid] = -np.inf
+
+        k = min(self.k, valid_count)
+        nearest = np.argpartition(-similarities, k - 1)[:k]
+        if float(similarities[nearest].max()) < MIN_SIMILARITY:
+            return None
+
+        votes: Dict[str, float] = {}
+        sub_votes: Dict[tuple, float] = {}
+        best_similarity: Dict[str, float] = {}
+        # A weak neighbour counts as a borderline match voting for no category
+        unknown = 0.0
+        for row in nearest:
+            similarity = float(similarities[row])
+            if similarity < MIN_SIMILARITY:
+                unknown += MIN_SIMILARITY ** SIMILARITY_POWER
+                continue
+            weight = similarity ** SIMILARITY_POWER
+            category, sub_category = labels[row]
+            votes[category] = votes.get(category, 0.0) + weight
+            sub_votes[(category, sub_category)] = sub_votes.get((category, sub_category), 0.0) + weight
+            best_similarity[category] = max(best_similarity.get(category, -1.0), similarity)
+
+        total = sum(votes.values()) + unknown
+        category = max(votes, key=votes.get)
+        sub_category = max(
+            (label for label in sub_votes if label[0] == category), key=sub_votes.get
+        )[1]
+        agreeing = sum(
+            1 for row in nearest
+            if labels[row][0] == category and similarities[row] >= MIN_SIMILARITY
+        )
+        return {
+            'category': category,
+            'sub_category': sub_category,
+            'confidence': round(votes[category] / total, 4),
+            'reason': f"유사 자산 {k}개 중 {agreeing}개가 같은 카테고리 (최대 유사도 {best_similarity[category]:.2f})",
+            'key_features': [],
+            'source': SOURCE_LOCAL,
+            'sub_confidence': round(sub_votes[(category, sub_category)] / votes[category], 4),
+            'similarity': round(best_similarity[category], 4),
+        }
+
+    def stats(self) -> List[Dict]:
+        """
+        Count stored examples.
+
+        Returns:
+            List of dicts with brand, category, source and examples
+        """
+        rows = self._connection().execute(
+            'SELECT brand, category, source, COUNT(*) FROM examples WHERE embedding_version = ? '
+            'GROUP BY brand, category, source ORDER BY brand, COUNT(*) DESC',
+            (EMBEDDING_VERSION,)
+        ).fetchall()
+        keys = ('brand', 'category', 'source', 'examples')
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def index_path_for(metadata_dir: str) -> str:
+    """Return the category index database of a metadata folder."""
+    return os.path.join(metadata_dir, CHECKPOINT_FOLDER, INDEX_FILENAME)
+
+
+def confirmed_source(category_data: Dict, confirm_threshold: float = DEFAULT_CONFIRM_THRESHOLD) -> Optional[str]:
+    """
+    Decide whether a category result may train the local classifier.
+
+    Args:
+        category_data: Category stage result
+        confirm_threshold: Minimum Gemini confidence to accept its label
+
+    Returns:
+        SOURCE_USER or SOURCE_GEMINI, or None when the label is not confirmed
+    """
+    if category_data.get('confirmed'):
+        return SOURCE_USER
+    if category_data.get('source', SOURCE_GEMINI) == SOURCE_LOCAL:
+        return None
+    try:
+        confidence = float(category_data.get('confidence', 0))
+    except (TypeError, ValueError):
+        return None
+    return SOURCE_GEMINI if confidence >= confirm_threshold else None
+
+
+def train_from_metadata(
+    metadata_dir: str,
+    index: Optional[CategoryIndex] = None,
+    confirm_threshold: float = DEFAULT_CONFIRM_THRESHOLD
+) -> int:
+    """
+    Add the confirmed labels of existing analysis metadata that the index does not have yet.
+
+    Args:
+        metadata_dir: Folder of analysis metadata JSON files
+        index: Index to train (defaults to the folder's shared index)
+        confirm_threshold: Minimum Gemini confidence to accept its label
+
+    Returns:
+        Number of examples added
+    """
+    index = index or get_category_index(metadata_dir)
+    if not os.path.isdir(metadata_dir):
+        return 0
+
+    logger = get_logger()
+    added = 0
+    for filename in sorted(os.listdir(metadata_dir)):
+        if not filename.endswith('.json'):
+            continue
+        metadata = load_analysis_metadata(os.path.join(metadata_dir, filename))
+        if metadata is None or not os.path.exists(metadata['image_path']):
+            continue
+        category_data = metadata.get('category_data') or {}
+        source = confirmed_source(category_data, confirm_threshold)
+        if not source:
+            continue
+        try:
+            key = image_hash(metadata['image_path'])
+            if key in index:
+                continue
+            index.add(
+                key, image_embedding(metadata['image_path']), metadata.get('brand', ''),
+                metadata.get('category', ''), metadata.get('sub_category', ''), source=source
+            )
+            added += 1
+        except Exception as e:
+            logger.warning("Skipping %s for the category index: %s", filename, e)
+
+    logger.info("Category index: %d examples added from %s", added, metadata_dir)
+    return added
+
+
+def confirm_category(metadata_path: str, category: str, sub_category: str) -> Dict:
+    """
+    Record a user-confirmed category in analysis metadata and train the local classifier with it.
+
+    The analysis versions are left as they are, so a changed category makes
+    the product attribute stage stale for re-analysis.
+
+    Args:
+        metadata_path: Analysis metadata JSON file (in the analyzer's output folder)
+        category: Confirmed main category
+        sub_category: Confirmed sub-category
+
+    Returns:
+        Updated metadata
+
+    Raises:
+        ValueError: If the file is not analysis metadata of an existing image
+    """
+    metadata = load_analysis_metadata(metadata_path)
+    if metadata is None or not os.path.exists(metadata['image_path']):
+        raise ValueError(f"Not analysis metadata of an existing image: {metadata_path}")
+
+    metadata['category'] = category
+    metadata['sub_category'] = sub_category
+    metadata['category_data'] = {
+        **(metadata.get('category_data') or {}),
+        'category': category,
+        'sub_category': sub_category,
+        'confidence': 1.0,
+        'reason': '사용자 확정',
+        'confirmed': True,
+        'source': SOURCE_USER,
+    }
+
+    temp_path = f"{metadata_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, metadata_path)
+    notify_file_written(metadata_path)
+
+    index = get_category_index(os.path.dirname(metadata_path))
+    index.add(
+        image_hash(metadata['image_path']), image_embedding(metadata['image_path']),
+        metadata.get('brand', ''), category, sub_category, source=SOURCE_USER
+    )
+    return metadata
+
+
+_instances: Dict[str, CategoryIndex] = {}
+_instances_lock = threading.Lock()
+
+
+def get_category_index(metadata_dir: str) -> CategoryIndex:
+    """
+    Get the shared CategoryIndex of a metadata folder.
+
+    Args:
+        metadata_dir: Folder the analysis metadata is saved to
+
+    Returns:
+        CategoryIndex instance
+    """
+    path = os.path.abspath(index_path_for(metadata_dir))
+    with _instances_lock:
+        index = _instances.get(path)
+        if index is None:
+            index = CategoryIndex(path)
+            _instances[path] = index
+            logger = get_logger()
+            logger.debug("Category index loaded: %s", path)
+        return index
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Context Cache for CEN AI DAM Editor
+
+Server-side cached content (Gemini context caching) for long system
+instructions that repeat on every request, such as the analyzer prompts
+carrying the brand taxonomy (category table per brand, attribute table per
+brand/category, common attribute options):
+- A context is created once per (client scope, model, content hash) and
+  passed by reference (`cached_content`) until shortly before its TTL ends;
+  it is then extended with `caches.update`, or recreated when it is gone
+- Text shorter than the model's minimum cacheable size (MIN_CACHE_TOKENS;
+  a token covers at least one character, so fewer characters than that can
+  never qualify) is sent inline without asking the API
+- When a context cannot be created (backend without a `caches` API, API
+  error), `resolve()` returns None so the caller sends the text inline as a
+  system instruction; creation is retried after `retry_after` seconds,
+  except for rejected content (HTTP 400), which stays inline
+- Hits, creations, refreshes and failures are counted in the
+  `gemini_context_cache_total` metric
+
+Caching is off by default: the analyzer prompts are a few hundred tokens
+per stage, far below the minimum (4,096 tokens for gemini-2.0-flash), so
+every context would be sent inline anyway. GEMINI_CONTEXT_CACHE=1 enables
+it for deployments with larger taxonomies or models with a lower minimum;
+GEMINI_CONTEXT_CACHE_TTL sets the TTL in seconds (default 3600).
+"""
+
+import os
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from .logger import get_logger
+from .metrics import inc
+from .tracing import span
+
+DEFAULT_TTL = 3600
+DEFAULT_RETRY_AFTER = 600
+
+CACHE_METRIC = 'gemini_context_cache_total'
+
+# Smallest cacheable content per model family, in tokens (longest prefix wins)
+MIN_CACHE_TOKENS = {
+    'gemini-2.0-flash': 4096,
+    'gemini-2.5-flash': 1024,
+    'gemini-2.5-pro': 2048,
+}
+DEFAULT_MIN_CACHE_TOKENS = 4096
+
+
+def min_cache_tokens(model: str) -> int:
+    """Minimum token count of a cached content for a model."""
+    name = model.rsplit('/', 1)[-1]
+    prefixes = [prefix for prefix in MIN_CACHE_TOKENS if name.startswith(prefix)]
+    return MIN_CACHE_TOKENS[max(prefixes, key=len)] if prefixes else DEFAULT_MIN_CACHE_TOKENS
+
+
+def is_missing_context_error(error: Exception) -> bool:
+    """Whether an API error means a referenced cached content no longer exists."""
+    message = str(error).lower()
+    return (
+        getattr(error, 'code', None) in (403, 404)
+        or 'cached content' in message
+        or 'cachedcontent' in message
+    )
+
+
+class _Entry:
+    __slots__ = ('name', 'expires_at', 'failed_until', 'hits')
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.expires_at = 0.0
+        self.failed_until = 0.0
+        self.hits = 0
+
+
+class ContextCache:
+    """
+    Registry of server-side cached contexts shared by all GeminiClients.
+
+    Thread-safe; concurrent callers for the same context wait for a single
+    create/refresh call.
+    """
+
+    def __init__(
+        self,
+        ttl: int = DEFAULT_TTL,
+        refresh_margin: Optional[float] = None,
+        retry_after: float = DEFAULT_RETRY_AFTER,
+        enabled: bool = True
+    ):
+        """
+        Initialize ContextCache.
+
+        Args:
+            ttl: Lifetime requested for each cached content in seconds
+            refresh_margin: Seconds before expiry at which the TTL is extended
+                (defaults to a fifth of the TTL, at most 5 minutes)
+            retry_after: Seconds to wait before retrying a failed creation
+            enabled: When False, resolve() always returns None
+        """
+        self.ttl = int(ttl)
+        self.refresh_margin = min(300, self.ttl / 5) if refresh_margin is None else refresh_margin
+        self.retry_after = retry_after
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._entries: Dict[tuple, _Entry] = {}
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+
+    def resolve(
+        self,
+        client,
+        scope: str,
+        model: str,
+        text: str,
+        display_name: str = ''
+    ) -> Optional[str]:
+        """
+        Get the cached content name for a system instruction, creating or refreshing it.
+
+        Args:
+            client: genai.Client (or compatible backend) exposing `caches`
+            scope: Key of the account the cache belongs to (API key or backend ID)
+            model: Model the cached content is used with
+            text: System instruction to cache
+            display_name: Human-readable cache label
+
+        Returns:
+            Cached content name, or None to send the text inline
+        """
+        if not self.enabled or len(text) < min_cache_tokens(model):
+            return None
+
+        key = (scope, model, hashlib.sha1(text.encode('utf-8')).hexdigest())
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            now = time.time()
+            if entry.name and now < entry.expires_at - self.refresh_margin:
+                entry.hits += 1
+                inc(CACHE_METRIC, event='hit')
+                return entry.name
+            if not entry.name and now < entry.failed_until:
+                return None
+
+            if entry.name and now < entry.expires_at and self._refresh(client, entry):
+                entry.hits += 1
+                return entry.name
+
+            self._create(client, entry, model, text, display_name)
+            return entry.name
+
+    def invalidate(self, name: str):
+        """Forget a cached content the API reported as missing; the next resolve() recreates it."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.name == name:
+                    entry.name = None
+                    entry.expires_at = 0.0
+                    inc(CACHE_METRIC, event='invalidate')
+
+    def entries(self) -> List[Dict]:
+        """List known contexts (name, seconds left, hits)."""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'model': model,
+                    'name': entry.name,
+                    'expires_in': max(entry.expires_at - now, 0) if entry.name else 0,
+                    'hits': entry.hits,
+                }
+                for (_, model, _), entry in self._entries.items()
+            ]
+
+    def _create(self, client, entry: _Entry, model: str, text: str, display_name: str):
+        logger = get_logger()
+        try:
+            with span('gemini.context_cache.create', model=model):
+                cached = client.caches.create(
+                    model=model,
+                    config={
+                        'system_instruction': text,
+                        'display_name': display_name,
+                        'ttl': f"{self.ttl}s",
+                    }
+                )
+        except Exception as e:
+            entry.name = None
+            # Rejected content (e.g. below the model's minimum size) will not become cacheable
+            permanent = getattr(e, 'code', None) == 400
+            entry.failed_until = float('inf') if permanent else time.time() + self.retry_after
+            inc(CACHE_METRIC, event='error')
+            logger.warning("Context cache unavailable for %s (%s); sending it inline", display_name or model, e)
+            return
+
+        entry.name = cached.name
+        entry.expires_at = time.time() + self.ttl
+        entry.failed_until = 0.0
+        inc(CACHE_METRIC, event='create')
+        logger.info("Context cache created: %s (%s, ttl %ds)", display_name or model, cached.name, self.ttl)
+
+    def _refresh(self, client, entry: _Entry) -> bool:
+        try:
+            with span('gemini.context_cache.refresh'):
+                client.caches.update(name=entry.name, config={'ttl': f"{self.ttl}s"})
+        except Exception as e:
+            logger = get_logger()
+            logger.warning("Context cache refresh failed for %s: %s", entry.name, e)
+            return False
+        entry.expires_at = time.time() + self.ttl
+        inc(CACHE_METRIC, event='refresh')
+        return True
+
+
+_context_cache: Optional[ContextCache] = None
+_context_cache_lock = threading.Lock()
+
+
+def get_context_cache() -> ContextCache:
+    """Get the process-wide ContextCache configured from the environment."""
+    global _context_cache
+    if _context_cache is None:
+        with _context_cache_lock:
+            if _context_cache is None:
+                _context_cache = ContextCache(
+                    ttl=int(os.getenv('GEMINI_CONTEXT_CACHE_TTL', DEFAULT_TTL) or DEFAULT_TTL),
+                    enabled=os.getenv('GEMINI_CONTEXT_CACHE', '0') == '1'
+                )
+    return _context_cache
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+"""
+Offline Gemini Backend for CEN AI DAM Editor
+
+Stand-in for `genai.Client` that replays recorded responses, so the full
+GeminiClient stack (encoding, retries, metrics, tracing, usage ledger) runs
+without network access:
+- `FakeGenaiClient` serves `models.generate_content`,
+  `models.generate_content_stream` and `files.upload` from a recordings
+  file, with configurable simulated latency and error rate
+- `caches` keeps cached contents in memory with their TTL, so context
+  caching (creation, reuse by name, refresh, expiry) behaves as on the API
+  and usage reports `cached_content_token_count`
+- `RecordingGenaiClient` wraps a live client and saves its responses in the
+  same format, so real traffic can be captured once and replayed
+- Without a recordings file, built-in responses cover the analyzer stages
+  and return a generated placeholder image for image generation
+
+Enable for the whole app with GEMINI_BACKEND=fake (see `from_env`).
+
+Recordings format:
+    {"responses": [{"call": "generate_content" | "generate_content_stream",
+                    "match": "<prompt substring>", "prompt_hash": "<sha1>",
+                    "text": "...", "images": [{"mime_type", "data" (base64)}],
+                    "usage": {"prompt_token_count", ...}}]}
+"""
+
+import io
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import itertools
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from .context_cache import min_cache_tokens
+
+CALL_CONTENT = 'generate_content'
+CALL_STREAM = 'generate_content_stream'
+
+# Approximate Gemini token accounting for synthesized usage
+CHARS_PER_TOKEN = 4
+IMAGE_INPUT_TOKENS = 258
+IMAGE_OUTPUT_TOKENS = 1290
+
+DEFAULT_RESPONSES = [
+    {
+        'call': CALL_CONTENT,
+        'match': '정확한 카테고리',
+        'text': json.dumps({
+            'category': '침대',
+            'sub_category': '수납 침대',
+            'confidence': 0.92,
+            'reason': '헤드보드와 프레임 구조가 보이는 침대 제품',
+            'key_features': ['특징1: 패널형 헤드보드', '특징2: 하단 수납 서랍']
+        }, ensure_ascii=False),
+    },
+    {
+        'call': CALL_CONTENT,
+        'match': '전용 속성',
+        'text': json.dumps({
+            '침구 사이즈': {'value': '퀸(Q)', 'confidence': 0.8, 'reason': '폭이 넓은 프레임'},
+            '헤드 유무': {'value': '헤드 있음', 'confidence': 0.95, 'reason': '헤드보드가 보임'},
+            '프레임 형태': {'value': '하단수납형', 'confidence': 0.7, 'reason': '서랍이 보임'},
+            '주요 소재': {'value': '원목', 'confidence': 0.75, 'reason': '나뭇결 질감'},
+            '우드톤': {'value': '중간 우드톤', 'confidence': 0.7, 'reason': '중간 밝기의 나뭇결'},
+            '헤드 형태': {'value': '패널형', 'confidence': 0.8, 'reason': '평평한 패널 헤드보드'},
+        }, ensure_ascii=False),
+    },
+    {
+        'call': CALL_CONTENT,
+        'match': '핵심 속성',
+        'text': json.dumps({
+            '스타일': {'value': '모던', 'confidence': 0.8, 'reason': '직선적인 디자인'},
+            '타겟 고객': {'value': '신혼부부', 'confidence': 0.6, 'reason': '퀸 사이즈'},
+            '타겟 연령층': {'value': '30대', 'confidence': 0.6, 'reason': '차분한 색감'},
+            '색상': {'value': '브라운', 'confidence': 0.85, 'reason': '주색상'},
+            '무늬': {'value': '우드그레인', 'confidence': 0.8, 'reason': '나뭇결'},
+        }, ensure_ascii=False),
+    },
+    {
+        'call': CALL_CONTENT,
+        'match': '상품 설명',
+        'text': json.dumps({
+            'description': '따뜻한 원목 결이 살아있는 모던 침대 프레임입니다. 넉넉한 하단 수납으로 침실을 깔끔하게 정리할 수 있습니다.'
+        }, ensure_ascii=False),
+    },
+    {
+        'call': CALL_STREAM,
+        'text': '요청하신 이미지를 생성했습니다.',
+        'images': [],  # placeholder image generated at load time
+    },
+]
+
+
+class FakeGeminiError(Exception):
+    """Simulated API failure (raised at the configured error rate)."""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def prompt_text(contents) -> str:
+    """Extract the text prompt from generate_content `contents`."""
+    for item in contents or []:
+        if isinstance(item, str):
+            return item
+        for part in getattr(item, 'parts', None) or []:
+            text = getattr(part, 'text', None)
+            if text:
+                return text
+    return ''
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha1(text.strip().encode('utf-8')).hexdigest()
+
+
+def _image_count(contents) -> int:
+    count = 0
+    for item in contents or []:
+        parts = getattr(item, 'parts', None)
+        if parts is not None:
+            count += sum(1 for part in parts if getattr(part, 'inline_data', None) is not None)
+        elif not isinstance(item, str):
+            count += 1
+    return count
+
+
+def placeholder_image(size: int = 512) -> Dict:
+    """A gradient PNG used when recordings contain no image data."""
+    image = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)
+    return {'mime_type': 'image/png', 'data': base64.b64encode(buffer.getvalue()).decode('ascii')}
+
+
+def _config_value(config, key: str):
+    if config is None:
+        return None
+    if isinstance(config, dict):
+        return config.get(key)
+    return getattr(config, key, None)
+
+
+def _ttl_seconds(ttl) -> float:
+    """Parse a '3600s' duration string (or a number of seconds)."""
+    if isinstance(ttl, str):
+        ttl = ttl.rstrip('s')
+    return float(ttl)
+
+
+def _usage(prompt_tokens: int, text_tokens: int, image_tokens: int, cached_tokens: int = 0):
+    details = []
+    if text_tokens:
+        details.append(SimpleNamespace(modality=SimpleNamespace(value='TEXT'), token_count=text_tokens))
+    if image_tokens:
+        details.append(SimpleNamespace(modality=SimpleNamespace(value='IMAGE'), token_count=image_tokens))
+    candidates = text_tokens + image_tokens
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        cached_content_token_count=cached_tokens or None,
+        candidates_token_count=candidates,
+        total_token_count=prompt_tokens + candidates,
+        candidates_tokens_details=details,
+    )
+
+
+def _usage_from_dict(usage: Dict):
+    details = [
+        SimpleNamespace(modality=SimpleNamespace(value=d.get('modality')), token_count=d.get('token_count'))
+        for d in usage.get('candidates_tokens_details') or []
+    ]
+    return SimpleNamespace(
+        prompt_token_count=usage.get('prompt_token_count'),
+        cached_content_token_count=usage.get('cached_content_token_count'),
+        candidates_token_count=usage.get('candidates_token_count'),
+        total_token_count=usage.get('total_token_count'),
+        candidates_tokens_details=details,
+    )
+
+
+def _text_response(text: str, usage):
+    part = SimpleNamespace(text=text, inline_data=None)
+    candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]))
+    return SimpleNamespace(candidates=[candidate], usage_metadata=usage, text=text)
+
+
+def _chunk(parts: List, usage=None):
+    candidate = SimpleNamespace(content=SimpleNamespace(parts=parts))
+    return SimpleNamespace(candidates=[candidate], usage_metadata=usage)
+
+
+class _Models:
+    def __init__(self, backend: 'FakeGenaiClient'):
+        self._backend = backend
+
+    def generate_content(self, model=None, contents=None, config=None):
+        return self._backend.generate_content(model, contents, config)
+
+    def generate_content_stream(self, model=None, contents=None, config=None):
+        return self._backend.generate_content_stream(model, contents, config)
+
+
+class _Files:
+    def __init__(self, backend: 'FakeGenaiClient'):
+        self._backend = backend
+
+    def upload(self, file=None, **kwargs):
+        return self._backend.upload(file)
+
+
+class _Caches:
+    def __init__(self, backend: 'FakeGenaiClient'):
+        self._backend = backend
+
+    def create(self, model=None, config=None):
+        return self._backend.create_cache(model, config)
+
+    def get(self, name=None, config=None):
+        return self._backend.get_cache(name)
+
+    def update(self, name=None, config=None):
+        return self._backend.update_cache(name, config)
+
+    def delete(self, name=None, config=None):
+        self._backend.delete_cache(name)
+
+    def list(self, config=None):
+        return self._backend.list_caches()
+
+
+class FakeGenaiClient:
+    """
+    Replaying stand-in for `genai.Client`.
+
+    Each call sleeps for a log-normally jittered latency around `latency`
+    and fails with FakeGeminiError at `error_rate`. Responses are matched by
+    exact prompt hash, then by prompt substring, then by call type.
+    """
+
+    def __init__(
+        self,
+        recordings: Optional[List[Dict]] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.3,
+        upload_latency: float = 0.0,
+        error_rate: float = 0.0,
+        image_size: int = 512,
+        stream_chunks: int = 3,
+        seed: Optional[int] = None,
+        retry_delay: float = 0.0,
+        cache_min_tokens: Optional[int] = None
+    ):
+        """
+        Initialize FakeGenaiClient.
+
+        Args:
+            recordings: Recorded responses (defaults to DEFAULT_RESPONSES)
+            latency: Median simulated model latency in seconds
+            latency_jitter: Log-normal sigma applied to the latency
+            upload_latency: Simulated file upload latency in seconds
+            error_rate: Probability (0-1) that a call fails
+            image_size: Side of the placeholder image for recordings without images
+            stream_chunks: Chunks per streamed response
+            seed: Random seed for reproducible latency/error sequences
+            retry_delay: Initial retry delay GeminiClient should use with this backend
+            cache_min_tokens: Smallest cacheable content; smaller caches.create
+                calls fail like the API's minimum-size check (defaults to
+                the model's real minimum, see context_cache.MIN_CACHE_TOKENS)
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.upload_latency = upload_latency
+        self.error_rate = error_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self.retry_delay = retry_delay
+        self.cache_min_tokens = cache_min_tokens
+        self.models = _Models(self)
+        self.files = _Files(self)
+        self.caches = _Caches(self)
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._placeholder = None
+        self._image_size = image_size
+        self.calls = {CALL_CONTENT: 0, CALL_STREAM: 0, 'upload': 0, 'cache_create': 0}
+        self._caches: Dict[str, Dict] = {}
+        self._cache_ids = itertools.count(1)
+        self._cache_lock = threading.Lock()
+
+        self._by_hash: Dict[str, Dict] = {}
+        self._by_match: List[Dict] = []
+        self._by_call: Dict[str, Dict] = {}
+        for entry in recordings if recordings is not None else DEFAULT_RESPONSES:
+            entry = dict(entry)
+            if entry['call'] == CALL_STREAM and not entry.get('images'):
+                entry['images'] = [self._placeholder_image()]
+            entry['_images'] = [
+                (image['mime_type'], base64.b64decode(image['data'])) for image in entry.get('images') or []
+            ]
+            if entry.get('prompt_hash'):
+                self._by_hash[entry['prompt_hash']] = entry
+            if entry.get('match'):
+                self._by_match.append(entry)
+            self._by_call.setdefault(entry['call'], entry)
+
+    @classmethod
+    def from_file(cls, recordings_path: str, **kwargs) -> 'FakeGenaiClient':
+        """Load recordings written by RecordingGenaiClient (or by hand)."""
+        with open(recordings_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(recordings=data.get('responses', []), **kwargs)
+
+    @classmethod
+    def from_env(cls) -> 'FakeGenaiClient':
+        """
+        Build from environment variables:
+            GEMINI_FAKE_RECORDINGS  Recordings JSON path (default: built-in)
+            GEMINI_FAKE_LATENCY     Median latency in seconds (default 0)
+            GEMINI_FAKE_ERROR_RATE  Failure probability (default 0)
+            GEMINI_FAKE_SEED        Random seed
+        """
+        kwargs = {
+            'latency': float(os.getenv('GEMINI_FAKE_LATENCY', '0') or 0),
+            'error_rate': float(os.getenv('GEMINI_FAKE_ERROR_RATE', '0') or 0),
+        }
+        seed = os.getenv('GEMINI_FAKE_SEED')
+        if seed:
+            kwargs['seed'] = int(seed)
+        recordings_path = os.getenv('GEMINI_FAKE_RECORDINGS')
+        if recordings_path:
+            return cls.from_file(recordings_path, **kwargs)
+        return cls(**kwargs)
+
+    def _placeholder_image(self) -> Dict:
+        if self._placeholder is None:
+            self._placeholder = placeholder_image(self._image_size)
+        return self._placeholder
+
+    # ================================================================
+    # SIMULATION
+    # ================================================================
+
+    def _simulate(self, latency: float, call: str):
+        with self._rng_lock:
+            self.calls[call] += 1
+            fail = self._rng.random() < self.error_rate
+            delay = latency * self._rng.lognormvariate(0, self.latency_jitter) if latency > 0 else 0
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise FakeGeminiError(f"Simulated {call} failure")
+
+    def _lookup(self, call: str, text: str) -> Dict:
+        entry = self._by_hash.get(prompt_hash(text))
+        if entry is not None and entry['call'] == call:
+            return entry
+        for entry in self._by_match:
+            if entry['call'] == call and entry['match'] in text:
+                return entry
+        entry = self._by_call.get(call)
+        if entry is None:
+            raise FakeGeminiError(f"No recorded response for {call}")
+        return entry
+
+    def _usage_for(self, entry: Dict, text: str, contents, image_count: int, config=None):
+        if entry.get('usage'):
+            return _usage_from_dict(entry['usage'])
+        cached_tokens = self._cached_context(config)
+        system_text = _config_value(config, 'system_instruction') or ''
+        prompt_tokens = (
+            (len(text) + len(system_text)) // CHARS_PER_TOKEN
+            + IMAGE_INPUT_TOKENS * _image_count(contents)
+            + cached_tokens
+        )
+        text_tokens = len(entry.get('text') or '') // CHARS_PER_TOKEN
+        return _usage(prompt_tokens, text_tokens, IMAGE_OUTPUT_TOKENS * image_count, cached_tokens)
+
+    def _cached_context(self, config) -> int:
+        """Token count of the cached content referenced by config (404 if missing/expired)."""
+        name = _config_value(config, 'cached_content')
+        if not name:
+            return 0
+        with self._cache_lock:
+            cache = self._caches.get(name)
+            if cache is not None and cache['expire_time'] <= time.time():
+                del self._caches[name]
+                cache = None
+        if cache is None:
+            raise FakeGeminiError(f"404 NOT_FOUND. Cached content {name} not found", code=404)
+        return cache['tokens']
+
+    # ================================================================
+    # genai.Client SURFACE
+    # ================================================================
+
+    def generate_content(self, model, contents, config):
+        self._simulate(self.latency, CALL_CONTENT)
+        text = prompt_text(contents)
+        entry = self._lookup(CALL_CONTENT, text)
+        return _text_response(entry.get('text', ''), self._usage_for(entry, text, contents, 0, config))
+
+    def generate_content_stream(self, model, contents, config):
+        self._simulate(self.latency, CALL_STREAM)
+        text = prompt_text(contents)
+        entry = self._lookup(CALL_STREAM, text)
+        usage = self._usage_for(entry, text, contents, len(entry['_images']), config)
+        return self._stream(entry, usage)
+
+    def _stream(self, entry: Dict, usage):
+        parts = [
+            SimpleNamespace(inline_data=SimpleNamespace(data=data, mime_type=mime_type), text=None)
+            for mime_type, data in entry['_images']
+        ]
+        if entry.get('text'):
+            parts.append(SimpleNamespace(inline_data=None, text=entry['text']))
+
+        # Spread parts over chunks; usage arrives with the last chunk
+        per_chunk = max(1, -(-len(parts) // self.stream_chunks))
+        chunks = [parts[i:i + per_chunk] for i in range(0, len(parts), per_chunk)] or [[]]
+        for index, chunk_parts in enumerate(chunks):
+            yield _chunk(chunk_parts, usage if index == len(chunks) - 1 else None)
+
+    def create_cache(self, model, config):
+        self._simulate(0, 'cache_create')
+        text = _config_value(config, 'system_instruction') or ''
+        tokens = len(prompt_text(_config_value(config, 'contents')) + text) // CHARS_PER_TOKEN
+        min_tokens = self.cache_min_tokens if self.cache_min_tokens is not None else min_cache_tokens(model or '')
+        if tokens < min_tokens:
+            raise FakeGeminiError(
+                f"400 INVALID_ARGUMENT. Cached content is too small. total_token_count={tokens}, "
+                f"min_total_token_count={min_tokens}", code=400
+            )
+        ttl = _ttl_seconds(_config_value(config, 'ttl') or 3600)
+        name = f"cachedContents/fake-{next(self._cache_ids)}"
+        with self._cache_lock:
+            self._caches[name] = {
+                'name': name,
+                'model': model,
+                'display_name': _config_value(config, 'display_name') or '',
+                'tokens': tokens,
+                'expire_time': time.time() + ttl,
+            }
+        return self.get_cache(name)
+
+    def get_cache(self, name):
+        with self._cache_lock:
+            cache = self._caches.get(name)
+            if cache is None or cache['expire_time'] <= time.time():
+                raise FakeGeminiError(f"404 NOT_FOUND. Cached content {name} not found", code=404)
+            return SimpleNamespace(
+                name=cache['name'],
+                model=cache['model'],
+                display_name=cache['display_name'],
+                expire_time=cache['expire_time'],
+                usage_metadata=SimpleNamespace(total_token_count=cache['tokens']),
+            )
+
+    def update_cache(self, name, config):
+        ttl = _ttl_seconds(_config_value(config, 'ttl') or 3600)
+        self.get_cache(name)
+        with self._cache_lock:
+            self._caches[name]['expire_time'] = time.time() + ttl
+        return self.get_cache(name)
+
+    def delete_cache(self, name):
+        with self._cache_lock:
+            if self._caches.pop(name, None) is None:
+                raise FakeGeminiError(f"404 NOT_FOUND. Cached content {name} not found", code=404)
+
+    def list_caches(self):
+        now = time.time()
+        with self._cache_lock:
+            names = [name for name, cache in self._caches.items() if cache['expire_time'] > now]
+        return [self.get_cache(name) for name in names]
+
+    def upload(self, file):
+        self._simulate(self.upload_latency, 'upload')
+        data = file.read() if hasattr(file, 'read') else b''
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        return SimpleNamespace(
+            name=f"files/{digest}",
+            uri=f"fake://files/{digest}",
+            mime_type='image/png',
+            size_bytes=len(data),
+        )
+
+
+class RecordingGenaiClient:
+    """
+    Proxy around a live `genai.Client` that appends every response to a
+    recordings file usable by FakeGenaiClient.
+    """
+
+    def __init__(self, client, recordings_path: str):
+        self._client = client
+        self.recordings_path = recordings_path
+        self.files = client.files
+        self.caches = client.caches
+        self.models = SimpleNamespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+        )
+        self._lock = threading.Lock()
+
+    def _generate_content(self, model=None, contents=None, config=None):
+        response = self._client.models.generate_content(model=model, contents=contents, config=config)
+        text = response.candidates[0].content.parts[0].text
+        self._append(CALL_CONTENT, contents, text, [], response.usage_metadata)
+        return response
+
+    def _generate_content_stream(self, model=None, contents=None, config=None):
+        texts, images, usage = [], [], None
+        for chunk in self._client.models.generate_content_stream(model=model, contents=contents, config=config):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+                for part in chunk.candidates[0].content.parts:
+                    if part.inline_data:
+                        images.append({
+                            'mime_type': part.inline_data.mime_type,
+                            'data': base64.b64encode(part.inline_data.data).decode('ascii'),
+                        })
+                    elif part.text:
+                        texts.append(part.text)
+            yield chunk
+        self._append(CALL_STREAM, contents, ''.join(texts), images, usage)
+
+    def _append(self, call: str, contents, text: str, images: List[Dict], usage):
+        prompt = prompt_text(contents)
+        entry = {
+            'call': call,
+            'prompt_hash': prompt_hash(prompt),
+            'match': prompt.strip()[:40],
+            'text': text,
+            'images': images,
+        }
+        if usage is not None:
+            entry['usage'] = {
+                'prompt_token_count': getattr(usage, 'prompt_token_count', None),
+                'cached_content_token_count': getattr(usage, 'cached_content_token_count', None),
+                'candidates_token_count': getattr(usage, 'candidates_token_count', None),
+                'total_token_count': getattr(usage, 'total_token_count', None),
+                'candidates_tokens_details': [
+                    {
+                        'modality': str(getattr(getattr(d, 'modality', None), 'value', d.modality)),
+                        'token_count': d.token_count,
+                    }
+                    for d in getattr(usage, 'candidates_tokens_details', None) or []
+                ],
+            }
+
+        with self._lock:
+            data = {'responses': []}
+            if os.path.exists(self.recordings_path):
+                with open(self.recordings_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            data['responses'].append(entry)
+            temp_path = f"{self.recordings_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.recordings_path)
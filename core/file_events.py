@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+File Event Hooks for CEN AI DAM Editor
+
+Lightweight publish/subscribe hooks for workspace file writes and removals.
+Writers (file handlers, generators, analyzers) call the notify functions;
+services such as workspace statistics subscribe with a listener.
+"""
+
+import threading
+from typing import Callable, List
+
+from .logger import get_logger
+
+# Event types
+FILE_WRITTEN = "written"
+FILE_REMOVED = "removed"
+
+_listeners: List[Callable[[str, str], None]] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener: Callable[[str, str], None]):
+    """
+    Register a file event listener.
+
+    Args:
+        listener: Callable receiving (event_type, file_path)
+    """
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[str, str], None]):
+    """Unregister a file event listener."""
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def _dispatch(event_type: str, file_path: str):
+    """Deliver an event to all listeners, isolating listener failures."""
+    with _listeners_lock:
+        listeners = list(_listeners)
+
+    for listener in listeners:
+        try:
+            listener(event_type, file_path)
+        except Exception as e:
+            logger = get_logger()
+            logger.warning(f"File event listener failed for {file_path}: {e}")
+
+
+def notify_file_written(file_path: str):
+    """Notify listeners that a file was created or overwritten."""
+    _dispatch(FILE_WRITTEN, file_path)
+
+
+def notify_file_removed(file_path: str):
+    """Notify listeners that a file was deleted."""
+    _dispatch(FILE_REMOVED, file_path)
@@ -8,7 +8,6 @@ Supports text generation, image generation, and multi-modal analysis.
 
 import os
 import time
-import mimetypes
 import base64
 from typing import List, Tuple, Optional
 
@@ -18,6 +17,11 @@ from dotenv import load_dotenv
 import vertexai
 
 from .logger import get_logger
+from .metrics import inc, timed, timer
+from .tracing import span, traced
+from .usage_ledger import current_labels, get_usage_ledger
+from .image_io import EncodedImage, ImageSource
+from .context_cache import get_context_cache, is_missing_context_error
 
 
 class GeminiClient:
@@ -29,21 +33,39 @@ class GeminiClient:
         - Image generation (gemini-2.5-flash-image-preview)
         - Multi-modal analysis (image + text)
         - Exponential backoff retry mechanism
+        - Per-method latency metrics and trace spans (see core.metrics, core.tracing)
+        - Token/cost ledger and daily budgets (see core.usage_ledger)
+        - Server-side cached system instructions (see core.context_cache)
     """
 
-    def __init__(self):
-        """Initialize Gemini client with API credentials from .env file."""
+    def __init__(self, backend=None):
+        """
+        Initialize Gemini client with API credentials from .env file.
+
+        Args:
+            backend: Object exposing the genai.Client surface (models, files, caches) to
+                use instead of the live API, e.g. core.fake_gemini.FakeGenaiClient.
+                GEMINI_BACKEND=fake selects the offline backend from the environment.
+        """
         load_dotenv()
 
-        # Initialize Vertex AI
-        vertexai.init(
-            project=os.getenv('PROJECT_ID'),
-            location=os.getenv('LOCATION')
-        )
+        if backend is None and os.getenv('GEMINI_BACKEND', '').lower() == 'fake':
+            from .fake_gemini import FakeGenaiClient
+            backend = FakeGenaiClient.from_env()
+
+        if backend is not None:
+            self.api_key = None
+            self.client = backend
+        else:
+            # Initialize Vertex AI
+            vertexai.init(
+                project=os.getenv('PROJECT_ID'),
+                location=os.getenv('LOCATION')
+            )
 
-        # Initialize Gemini Client
-        self.api_key = os.getenv('API_KEY')
-        self.client = genai.Client(api_key=self.api_key)
+            # Initialize Gemini Client
+            self.api_key = os.getenv('API_KEY')
+            self.client = genai.Client(api_key=self.api_key)
 
         # Model configuration
         self.model_text = "gemini-2.0-flash"
@@ -51,7 +73,16 @@ class GeminiClient:
 
         # Retry configuration
         self.max_retries = 3
-        self.initial_delay = 1
+        self.initial_delay = getattr(backend, 'retry_delay', 1)
+
+        # Context caching (cached contents belong to the API key's project)
+        self.context_cache = get_context_cache()
+        self.context_cache_scope = self.api_key or f"backend-{id(self.client)}"
+
+    @property
+    def context_caching(self) -> bool:
+        """Whether system contexts are served from server-side caches."""
+        return self.context_cache.enabled
 
     def _retry_with_delay(self, func, *args, **kwargs):
         """
@@ -71,20 +102,61 @@ class GeminiClient:
         delay = self.initial_delay
         for attempt in range(self.max_retries):
             try:
-                return func(*args, **kwargs)
+                with span('gemini.attempt', attempt=attempt + 1):
+                    return func(*args, **kwargs)
             except Exception as e:
                 if attempt == self.max_retries - 1:
                     raise e
+                inc('gemini_retries_total', error=type(e).__name__)
                 logger = get_logger()
-                logger.warning(f"Gemini API call failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                logger.warning("Gemini API call failed (attempt %d/%d): %s", attempt + 1, self.max_retries, e)
                 time.sleep(delay)
                 delay *= 2
 
+    def _metered_call(self, method: str, model: str, usage: dict, func):
+        """
+        Run func with retries under the daily budget and record its usage.
+
+        Args:
+            method: Public method name for the ledger
+            model: Model used by func
+            usage: Dict that func fills with the response's 'usage_metadata'
+            func: Zero-argument API call
+
+        Returns:
+            func result
+
+        Raises:
+            BudgetExceededError: If a daily budget is used up
+        """
+        ledger = get_usage_ledger()
+        labels = current_labels()
+        with ledger.reserve(labels['user']):
+            start_time = time.perf_counter()
+            status = 'ok'
+            try:
+                return self._retry_with_delay(func)
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                ledger.record_call(
+                    method=method,
+                    model=model,
+                    usage_metadata=usage.get('usage_metadata'),
+                    latency_ms=(time.perf_counter() - start_time) * 1000,
+                    status=status,
+                    **labels
+                )
+
+    @traced('gemini.generate_text')
+    @timed('gemini.generate_text')
     def generate_text(
         self,
         prompt: str,
         response_type: str = "application/json",
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        response_schema: Optional[dict] = None
     ) -> str:
         """
         Generate text using Gemini text model.
@@ -93,91 +165,142 @@ class GeminiClient:
             prompt: Text prompt for generation
             response_type: MIME type for response format
             model: Model name (defaults to self.model_text)
+            response_schema: Structured-output schema for JSON responses
+                (see core.structured_output)
 
         Returns:
             Generated text response
         """
+        usage = {}
+
+        config = {"response_mime_type": response_type}
+        if response_schema is not None:
+            config["response_schema"] = response_schema
+
         def _generate():
             response = self.client.models.generate_content(
                 model=model or self.model_text,
                 contents=[prompt],
-                config={"response_mime_type": response_type}
+                config=config
             )
+            usage['usage_metadata'] = response.usage_metadata
             return response.candidates[0].content.parts[0].text
 
-        return self._retry_with_delay(_generate)
+        return self._metered_call('generate_text', model or self.model_text, usage, _generate)
 
+    @traced('gemini.analyze_image')
+    @timed('gemini.analyze_image')
     def analyze_image(
         self,
         prompt: str,
-        image_path: str,
+        image_path: ImageSource,
         response_type: str = "application/json",
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        system_context: Optional[str] = None,
+        context_name: str = "",
+        response_schema: Optional[dict] = None
     ) -> str:
         """
         Analyze image with text prompt using multi-modal model.
 
         Args:
             prompt: Analysis prompt
-            image_path: Path to image file
+            image_path: Path to image file, or in-memory image (bytes, PIL image,
+                EncodedImage) which is sent inline without touching the disk
             response_type: MIME type for response format
             model: Model name (defaults to self.model_text)
+            system_context: Static system instruction shared by many calls; sent
+                by reference to a server-side cache when possible, inline otherwise
+            context_name: Display name for the cached system context
+            response_schema: Structured-output schema for JSON responses
+                (see core.structured_output)
 
         Returns:
             Analysis result as text
         """
+        inline_part = None
+        if not isinstance(image_path, str):
+            encoded = EncodedImage.from_source(image_path)
+            inline_part = types.Part.from_bytes(data=encoded.data, mime_type=encoded.mime_type)
+
+        usage = {}
+
         def _analyze():
-            # Upload image to Gemini
-            with open(image_path, "rb") as f:
-                uploaded_file = self.client.files.upload(file=f)
+            if inline_part is not None:
+                image_content = inline_part
+            else:
+                # Upload image to Gemini
+                with span('gemini.upload'), timer('gemini.upload'), open(image_path, "rb") as f:
+                    image_content = self.client.files.upload(file=f)
+
+            config = {
+                "response_mime_type": response_type,
+                "temperature": 0,
+                "top_p": 1,
+                "top_k": 1,
+            }
+            if response_schema is not None:
+                config["response_schema"] = response_schema
+            cached_name = None
+            if system_context:
+                cached_name = self.context_cache.resolve(
+                    self.client, self.context_cache_scope, model or self.model_text,
+                    system_context, display_name=context_name
+                )
+                if cached_name:
+                    config["cached_content"] = cached_name
+                else:
+                    config["system_instruction"] = system_context
 
             # Generate content
-            response = self.client.models.generate_content(
-                model=model or self.model_text,
-                contents=[prompt, uploaded_file],
-                config={
-                    "response_mime_type": response_type,
-                    "temperature": 0,
-                    "top_p": 1,
-                    "top_k": 1,
-                }
-            )
+            try:
+                response = self.client.models.generate_content(
+                    model=model or self.model_text,
+                    contents=[prompt, image_content],
+                    config=config
+                )
+            except Exception as e:
+                # Expired or deleted server-side; the retry recreates it
+                if cached_name and is_missing_context_error(e):
+                    self.context_cache.invalidate(cached_name)
+                raise
+            usage['usage_metadata'] = response.usage_metadata
             return response.candidates[0].content.parts[0].text
 
-        return self._retry_with_delay(_analyze)
+        return self._metered_call('analyze_image', model or self.model_text, usage, _analyze)
 
+    @traced('gemini.generate_image')
+    @timed('gemini.generate_image')
     def generate_image(
         self,
         prompt: str,
-        reference_images: List[str]
+        reference_images: List[ImageSource]
     ) -> Tuple[List, str]:
         """
         Generate images based on prompt and reference images.
 
         Args:
             prompt: Image generation prompt
-            reference_images: List of reference image file paths
+            reference_images: Reference images as file paths, bytes, PIL images
+                or EncodedImage buffers
 
         Returns:
             Tuple of (generated_image_data_list, generated_text_response)
         """
-        def _generate():
-            # Prepare content parts
-            parts = [types.Part.from_text(text=prompt)]
-
-            # Add reference images
-            for image_path in reference_images:
-                if not os.path.exists(image_path):
-                    logger = get_logger()
-                    logger.warning(f"Image not found: {image_path}")
+        # Encode reference images once; retries reuse the same parts
+        image_parts = []
+        with span('gemini.encode_references', count=len(reference_images)):
+            for image in reference_images:
+                encoded = EncodedImage.from_source(image)
+                if encoded is None:
                     continue
+                image_parts.append(types.Part.from_bytes(data=encoded.data, mime_type=encoded.mime_type))
 
-                with open(image_path, "rb") as f:
-                    image_data = f.read()
-                mime_type, _ = mimetypes.guess_type(image_path)
-                if not mime_type:
-                    mime_type = 'application/octet-stream'
-                parts.append(types.Part.from_bytes(data=image_data, mime_type=mime_type))
+        usage = {}
+
+        def _generate():
+            # Prepare content parts
+            parts = [types.Part.from_text(text=prompt)] + image_parts
 
             # Build content
             contents = [types.Content(role="user", parts=parts)]
@@ -197,7 +320,7 @@ class GeminiClient:
             )
 
             # Generate content stream
-            image_parts = []
+            generated_parts = []
             full_text_response = ""
 
             response_stream = self.client.models.generate_content_stream(
@@ -208,18 +331,21 @@ class GeminiClient:
 
             # Process stream
             for chunk in response_stream:
+                # Usage totals arrive on the final chunk(s)
+                if chunk.usage_metadata:
+                    usage['usage_metadata'] = chunk.usage_metadata
                 if not (chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts):
                     continue
 
                 for part in chunk.candidates[0].content.parts:
                     if part.inline_data:
-                        image_parts.append(part.inline_data)
+                        generated_parts.append(part.inline_data)
                     elif part.text:
                         full_text_response += part.text
 
-            return image_parts, full_text_response
+            return generated_parts, full_text_response
 
-        return self._retry_with_delay(_generate)
+        return self._metered_call('generate_image', self.model_image, usage, _generate)
 
 
 # Utility functions
@@ -7,16 +7,46 @@ This module provides AI-powered product image analysis:
 - Attribute extraction (product-specific and common)
 - Product description generation
 - Metadata generation for DAM system
+
+Completed stages are checkpointed per image (see `analysis_checkpoint`), so
+a failed or interrupted analysis resumes from the last completed stage.
+Saved metadata is stamped with the version (fingerprint) of every stage, so
+after a taxonomy or prompt change `stale_stages()` tells which stages of an
+asset are out of date and `reanalyze()` runs only those (see `reanalysis`).
+
+Category classification is a cascade: a local nearest-neighbour classifier
+over confirmed labels (see `category_classifier`) answers when it is
+confident enough, and the Gemini call runs only otherwise.
+ANALYZER_LOCAL_CLASSIFIER=0 disables the local step; ANALYZER_LOCAL_THRESHOLD
+sets the minimum local confidence, for the category and the sub-category
+(default 0.8).
 """
 
 import os
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from .gemini_client import GeminiClient
 from .prompt_templates import PromptTemplates
-from .config import PRODUCT_CATEGORY, PRODUCT_ATTRIBUTE, COMMON_ATTRIBUTE
-from .logger import get_logger
+from .prompt_registry import get_prompt_registry
+from .logger import get_logger, with_request_id
+from .metrics import inc, timed
+from .tracing import set_attribute, traced
+from .file_events import notify_file_written
+from .analysis_checkpoint import AnalysisCheckpoint, image_hash, stage_fingerprint
+from .category_classifier import (
+    DEFAULT_THRESHOLD, DEFAULT_CONFIRM_THRESHOLD, SOURCE_GEMINI,
+    confirmed_source, get_category_index, image_embedding
+)
+from .structured_output import (
+    ResponseFormatError, parse_response,
+    category_schema, attribute_schema, common_attribute_schema, description_schema
+)
+
+SEPARATOR = '=' * 60
+
+# Analysis stages in pipeline order (checkpoint and version keys)
+ANALYSIS_STAGES = ('category', 'product_attributes', 'common_attributes', 'description')
 
 
 class ImageAnalyzer:
@@ -30,22 +60,47 @@ class ImageAnalyzer:
     - Marketing description
     """
 
-    def __init__(self, output_dir: str):
+    def __init__(
+        self,
+        output_dir: str,
+        gemini: Optional[GeminiClient] = None,
+        local_threshold: Optional[float] = None
+    ):
         """
         Initialize ImageAnalyzer.
 
         Args:
             output_dir: Directory to save analysis results (JSON metadata)
+            gemini: Gemini client to use (defaults to a new GeminiClient)
+            local_threshold: Minimum local classifier confidence to skip the
+                Gemini category call (defaults to ANALYZER_LOCAL_THRESHOLD or 0.8)
         """
         self.output_dir = output_dir
-        self.gemini = GeminiClient()
+        self.gemini = gemini or GeminiClient()
+        self.prompts = get_prompt_registry()
+        # Model calls per stage when the response is malformed (API errors are retried by GeminiClient)
+        self.stage_attempts = 2
         os.makedirs(self.output_dir, exist_ok=True)
 
+        if local_threshold is None:
+            local_threshold = float(os.getenv('ANALYZER_LOCAL_THRESHOLD', DEFAULT_THRESHOLD) or DEFAULT_THRESHOLD)
+        self.local_threshold = local_threshold
+        # Gemini classifications at or above this confidence train the local classifier
+        self.confirm_threshold = DEFAULT_CONFIRM_THRESHOLD
+        self.category_index = (
+            get_category_index(self.output_dir)
+            if os.getenv('ANALYZER_LOCAL_CLASSIFIER', '1') != '0' else None
+        )
+
+    @with_request_id
+    @traced('analyzer.analyze_image')
+    @timed('analyzer.analyze_image')
     def analyze_image(
         self,
         image_path: str,
         brand: str = "Furniture",
-        save_metadata: bool = True
+        save_metadata: bool = True,
+        resume: bool = True
     ) -> Dict:
         """
         Perform complete analysis of a product image.
@@ -54,40 +109,48 @@ class ImageAnalyzer:
             image_path: Path to image file
             brand: Brand category ("Samsung Electronics", "Furniture", "Cosmetics")
             save_metadata: Whether to save metadata JSON file
+            resume: Reuse checkpointed stages whose prompt is unchanged
+                (False discards the checkpoint and analyzes from scratch)
 
         Returns:
             Dictionary containing all analysis results
         """
+        set_attribute('brand', brand)
+
         logger = get_logger()
-        logger.info(f"{'='*60}")
-        logger.info(f"Analyzing: {os.path.basename(image_path)}")
-        logger.info(f"{'='*60}")
+        logger.info(SEPARATOR)
+        logger.info("Analyzing: %s", os.path.basename(image_path))
+        logger.info(SEPARATOR)
 
         try:
+            checkpoint = AnalysisCheckpoint(self.output_dir, image_path)
+            if not resume:
+                checkpoint.clear()
+
             # Step 1: Category Classification
             logger.info("Step 1/4: Classifying product category...")
-            category_data = self._analyze_category(image_path, brand)
+            category_data = self._analyze_category(image_path, brand, checkpoint)
             main_category = category_data.get('category', '')
             sub_category = category_data.get('sub_category', '')
-            logger.info(f"  Category: {main_category} > {sub_category}")
+            logger.info("  Category: %s > %s", main_category, sub_category)
 
             # Step 2: Product-Specific Attributes
             logger.info("Step 2/4: Extracting product-specific attributes...")
             product_attributes = self._analyze_product_attributes(
-                image_path, brand, main_category
+                image_path, brand, main_category, checkpoint
             )
-            logger.info(f"  Found {len(product_attributes)} product attributes")
+            logger.info("  Found %d product attributes", len(product_attributes))
 
             # Step 3: Common Attributes
             logger.info("Step 3/4: Extracting common attributes...")
-            common_attributes = self._analyze_common_attributes(image_path)
-            logger.info(f"  Found {len(common_attributes)} common attributes")
+            common_attributes = self._analyze_common_attributes(image_path, checkpoint)
+            logger.info("  Found %d common attributes", len(common_attributes))
 
             # Step 4: Generate Description
             logger.info("Step 4/4: Generating product description...")
             all_attributes = {**product_attributes, **common_attributes}
             description = self._generate_description(
-                main_category, sub_category, all_attributes
+                main_category, sub_category, all_attributes, checkpoint
             )
             logger.info("  Description generated")
 
@@ -102,34 +165,43 @@ class ImageAnalyzer:
                 'product_attributes': product_attributes,
                 'common_attributes': common_attributes,
                 'all_attributes': all_attributes,
-                'description': description
+                'description': description,
+                'image_sha256': checkpoint.image_sha256,
+                'analysis_versions': self.stage_versions(brand, main_category, all_attributes)
             }
 
             # Save metadata
             if save_metadata:
                 self._save_metadata(result)
 
-            logger.info(f"{'='*60}")
+            logger.info(SEPARATOR)
             logger.info("Analysis complete!")
-            logger.info(f"{'='*60}")
+            logger.info(SEPARATOR)
 
             return result
 
         except Exception as e:
-            logger.error(f"Error analyzing {image_path}: {e}")
+            logger.error("Error analyzing %s: %s", image_path, e)
             raise
 
+    @traced('analyzer.analyze_batch')
+    @timed('analyzer.analyze_batch')
     def analyze_batch(
         self,
         image_paths: List[str],
-        brand: str = "Furniture"
+        brand: str = "Furniture",
+        resume: bool = True
     ) -> List[Dict]:
         """
         Analyze multiple images in batch.
 
+        An interrupted batch run again with the same images continues where
+        it stopped: finished images and stages come from their checkpoints.
+
         Args:
             image_paths: List of image file paths
             brand: Brand category
+            resume: Reuse checkpointed stages (see analyze_image)
 
         Returns:
             List of analysis result dictionaries
@@ -138,101 +210,359 @@ class ImageAnalyzer:
         total = len(image_paths)
         logger = get_logger()
 
-        logger.info(f"Starting batch analysis ({total} images)...")
+        logger.info("Starting batch analysis (%d images)...", total)
 
         for idx, image_path in enumerate(image_paths, 1):
-            logger.info(f"[{idx}/{total}] {os.path.basename(image_path)}")
+            logger.info("[%d/%d] %s", idx, total, os.path.basename(image_path))
             try:
-                result = self.analyze_image(image_path, brand=brand)
+                result = self.analyze_image(image_path, brand=brand, resume=resume)
                 results.append(result)
             except Exception as e:
-                logger.warning(f"  Skipping due to error: {e}")
+                logger.warning("  Skipping due to error: %s", e)
                 continue
 
-        logger.info(f"Batch analysis complete: {len(results)}/{total} succeeded")
+        logger.info("Batch analysis complete: %d/%d succeeded", len(results), total)
         return results
 
+    def reanalyze(self, metadata: Dict, save_metadata: bool = True) -> Dict:
+        """
+        Bring saved analysis metadata up to date, running only its stale stages.
+
+        The stages recorded in the metadata are checkpointed under their
+        stamped versions, then the image is analyzed with resume: stages whose
+        prompt is unchanged are kept, stale stages run again, and a later
+        stage runs again only if an earlier result it depends on changed.
+        If the image file changed since the analysis, every stage runs.
+
+        Args:
+            metadata: Metadata saved by analyze_image
+            save_metadata: Whether to save the updated metadata JSON file
+
+        Returns:
+            Updated analysis result
+        """
+        image_path = metadata['image_path']
+        versions = metadata.get('analysis_versions') or {}
+        recorded = {
+            'category': metadata.get('category_data'),
+            'product_attributes': metadata.get('product_attributes'),
+            'common_attributes': metadata.get('common_attributes'),
+            'description': {'description': metadata.get('description', '')},
+        }
+
+        checkpoint = AnalysisCheckpoint(self.output_dir, image_path)
+        if metadata.get('image_sha256') == checkpoint.image_sha256:
+            checkpoint.seed({
+                stage: (versions[stage], recorded[stage])
+                for stage in ANALYSIS_STAGES
+                if versions.get(stage) and recorded[stage] is not None
+            })
+
+        return self.analyze_image(
+            image_path,
+            brand=metadata.get('brand', 'Furniture'),
+            save_metadata=save_metadata,
+            resume=True
+        )
+
+    def stage_versions(self, brand: str, category: str, attributes: Dict) -> Dict[str, Optional[str]]:
+        """
+        Compute the current version of every stage for an asset's analysis inputs.
+
+        Args:
+            brand: Brand name
+            category: Main category from the category stage
+            attributes: Product-specific and common attributes (input of the description)
+
+        Returns:
+            Dict of stage name to fingerprint (None for product attributes when
+            the category has none defined)
+        """
+        model = self.gemini.model_text
+        attribute_prompt = self.prompts.attribute_prompt(brand, category, measure=False)
+        return {
+            'category': stage_fingerprint(
+                model, self.prompts.category_prompt(brand, measure=False), category_schema(brand)
+            ),
+            'product_attributes': stage_fingerprint(
+                model, attribute_prompt, attribute_schema(brand, category)
+            ) if attribute_prompt is not None else None,
+            'common_attributes': stage_fingerprint(
+                model, self.prompts.common_attribute_prompt(measure=False), common_attribute_schema()
+            ),
+            'description': stage_fingerprint(
+                model,
+                self.prompts.render('product_description', measure=False, attributes=attributes),
+                description_schema()
+            ),
+        }
+
+    def stale_stages(self, metadata: Dict) -> List[str]:
+        """
+        Find the stages of saved analysis metadata that the current taxonomy and prompts would change.
+
+        Metadata without stamped versions (saved before versioning) is stale
+        in every stage.
+
+        Args:
+            metadata: Metadata saved by analyze_image
+
+        Returns:
+            Stale stage names in pipeline order
+        """
+        recorded = metadata.get('analysis_versions') or {}
+        current = self.stage_versions(
+            metadata.get('brand', 'Furniture'),
+            metadata.get('category', ''),
+            metadata.get('all_attributes') or {}
+        )
+        return [
+            stage for stage in ANALYSIS_STAGES
+            if stage not in recorded or recorded[stage] != current[stage]
+        ]
+
     # ================================================================
     # PRIVATE ANALYSIS METHODS
     # ================================================================
 
-    def _analyze_category(self, image_path: str, brand: str) -> Dict:
-        """Classify product category and sub-category."""
-        brand_categories = PRODUCT_CATEGORY.get(brand, {})
-
-        prompt_text = PromptTemplates.product_category_analysis(
-            product_categories=json.dumps(brand_categories, ensure_ascii=False, indent=2)
+    @traced('analyzer.category')
+    @timed('analyzer.category')
+    def _analyze_category(
+        self,
+        image_path: str,
+        brand: str,
+        checkpoint: Optional[AnalysisCheckpoint] = None
+    ) -> Dict:
+        """Classify product category and sub-category (local classifier first, then Gemini)."""
+        prompt_text = self.prompts.category_prompt(brand)
+        schema = category_schema(brand)
+        call = self._model_call(
+            image_path,
+            prompt_text,
+            schema,
+            request=PromptTemplates.CONTEXT_CATEGORY_REQUEST,
+            context_name=f"category-{brand}"
         )
 
-        response = self.gemini.analyze_image(
-            prompt=prompt_text,
-            image_path=image_path
-        )
+        def _classify() -> Dict:
+            if self.category_index is None:
+                return self._call_with_stage_retry('category', call, schema)
+
+            embedding = image_embedding(image_path)
+            prediction = self.category_index.predict(embedding, brand)
+            # The sub-category is saved too, so it must be as certain as the category
+            if (prediction is not None
+                    and prediction['confidence'] >= self.local_threshold
+                    and prediction['sub_confidence'] >= self.local_threshold):
+                inc('analyzer_category_source_total', source='local')
+                return prediction
+
+            result = self._call_with_stage_retry('category', call, schema)
+            result['source'] = SOURCE_GEMINI
+            inc('analyzer_category_source_total', source='gemini')
+            source = confirmed_source(result, self.confirm_threshold)
+            if source:
+                key = checkpoint.image_sha256 if checkpoint is not None else image_hash(image_path)
+                self.category_index.add(
+                    key, embedding, brand,
+                    result.get('category', ''), result.get('sub_category', ''), source=source
+                )
+            return result
 
-        return json.loads(response)
+        return self._run_stage('category', prompt_text, schema, _classify, checkpoint)
 
+    @traced('analyzer.product_attributes')
+    @timed('analyzer.product_attributes')
     def _analyze_product_attributes(
         self,
         image_path: str,
         brand: str,
-        category: str
+        category: str,
+        checkpoint: Optional[AnalysisCheckpoint] = None
     ) -> Dict:
         """Extract product-specific attributes based on category."""
-        brand_attributes = PRODUCT_ATTRIBUTE.get(brand, {})
+        prompt_text = self.prompts.attribute_prompt(brand, category)
 
-        if category not in brand_attributes:
+        if prompt_text is None:
             logger = get_logger()
-            logger.warning(f"No specific attributes defined for {category}")
+            logger.warning("No specific attributes defined for %s", category)
             return {}
 
-        attributes_config = brand_attributes[category]
+        return self._analyze_structured(
+            'product_attributes',
+            image_path,
+            prompt_text,
+            schema=attribute_schema(brand, category),
+            request=PromptTemplates.CONTEXT_ATTRIBUTE_REQUEST.format(category=category),
+            context_name=f"attributes-{brand}-{category}",
+            checkpoint=checkpoint
+        )
 
-        prompt_text = PromptTemplates.product_attribute_analysis(
-            category=category,
-            attributes_config=json.dumps(attributes_config, ensure_ascii=False, indent=2)
+    @traced('analyzer.common_attributes')
+    @timed('analyzer.common_attributes')
+    def _analyze_common_attributes(
+        self,
+        image_path: str,
+        checkpoint: Optional[AnalysisCheckpoint] = None
+    ) -> Dict:
+        """Extract common attributes (style, color, pattern, target)."""
+        prompt_text = self.prompts.common_attribute_prompt()
+
+        return self._analyze_structured(
+            'common_attributes',
+            image_path,
+            prompt_text,
+            schema=common_attribute_schema(),
+            request=PromptTemplates.CONTEXT_COMMON_REQUEST,
+            context_name="common-attributes",
+            checkpoint=checkpoint
         )
 
-        response = self.gemini.analyze_image(
-            prompt=prompt_text,
-            image_path=image_path
+    def _analyze_structured(
+        self,
+        stage: str,
+        image_path: str,
+        prompt_text: str,
+        schema: Dict,
+        request: str,
+        context_name: str,
+        checkpoint: Optional[AnalysisCheckpoint] = None
+    ) -> Dict:
+        """Run an analysis prompt that is static per brand/category and parse its JSON."""
+        call = self._model_call(image_path, prompt_text, schema, request, context_name)
+        return self._run_stage(
+            stage, prompt_text, schema,
+            lambda: self._call_with_stage_retry(stage, call, schema),
+            checkpoint
         )
 
-        return json.loads(response)
+    def _model_call(
+        self,
+        image_path: str,
+        prompt_text: str,
+        schema: Dict,
+        request: str,
+        context_name: str
+    ):
+        """
+        Build the model call of a static analysis prompt.
+
+        With context caching the prompt (option tables, guide, response
+        format) is sent as a cached system context and only the short
+        request goes with each image; otherwise the prompt is sent as is.
+        """
+        def _call():
+            if not self.gemini.context_caching:
+                return self.gemini.analyze_image(
+                    prompt=prompt_text,
+                    image_path=image_path,
+                    response_schema=schema
+                )
+            return self.gemini.analyze_image(
+                prompt=request,
+                image_path=image_path,
+                system_context=prompt_text,
+                context_name=context_name,
+                response_schema=schema
+            )
 
-    def _analyze_common_attributes(self, image_path: str) -> Dict:
-        """Extract common attributes (style, color, pattern, target)."""
-        prompt_text = PromptTemplates.common_attribute_analysis(
-            colors=COMMON_ATTRIBUTE['색상'],
-            patterns=COMMON_ATTRIBUTE['무늬'],
-            styles=COMMON_ATTRIBUTE['스타일'],
-            target_customers=COMMON_ATTRIBUTE['타겟 고객'],
-            target_ages=COMMON_ATTRIBUTE['타겟 연령층']
-        )
+        return _call
 
-        response = self.gemini.analyze_image(
-            prompt=prompt_text,
-            image_path=image_path
-        )
+    def _run_stage(
+        self,
+        stage: str,
+        prompt_text: str,
+        schema: Dict,
+        run,
+        checkpoint: Optional[AnalysisCheckpoint]
+    ) -> Dict:
+        """
+        Return a stage's checkpointed result, or run it and checkpoint the result.
 
-        return json.loads(response)
+        Args:
+            stage: Stage name
+            prompt_text: Full prompt of the stage (part of its fingerprint)
+            schema: Response schema
+            run: Zero-argument function returning the parsed stage result
+            checkpoint: Checkpoint of the analyzed image (None disables checkpointing)
+
+        Returns:
+            Parsed stage result
+        """
+        if checkpoint is None:
+            return run()
+
+        fingerprint = stage_fingerprint(self.gemini.model_text, prompt_text, schema)
+        result = checkpoint.get(stage, fingerprint)
+        if result is not None:
+            inc('analyzer_stage_resumed_total', stage=stage)
+            logger = get_logger()
+            logger.info("  Resumed %s from checkpoint", stage)
+            return result
+
+        result = run()
+        checkpoint.put(stage, fingerprint, result)
+        return result
+
+    def _call_with_stage_retry(self, stage: str, call, schema: Dict) -> Dict:
+        """
+        Call the model and parse the response, repeating only this stage on malformed output.
 
+        Args:
+            stage: Stage name for logs and metrics
+            call: Zero-argument model call returning the response text
+            schema: Response schema to parse against
+
+        Returns:
+            Parsed response
+
+        Raises:
+            ResponseFormatError: If every attempt returned malformed output
+        """
+        for attempt in range(1, self.stage_attempts + 1):
+            response = call()
+            try:
+                return parse_response(response, schema)
+            except ResponseFormatError as e:
+                if attempt == self.stage_attempts:
+                    raise
+                inc('analyzer_stage_retries_total', stage=stage)
+                logger = get_logger()
+                logger.warning(
+                    "Malformed %s response (attempt %d/%d): %s",
+                    stage, attempt, self.stage_attempts, e
+                )
+
+    @traced('analyzer.description')
+    @timed('analyzer.description')
     def _generate_description(
         self,
         category: str,
         sub_category: str,
-        attributes: Dict
+        attributes: Dict,
+        checkpoint: Optional[AnalysisCheckpoint] = None
     ) -> str:
         """Generate marketing description from attributes."""
-        prompt_text = PromptTemplates.product_description(attributes=attributes)
+        prompt_text = self.prompts.render('product_description', attributes=attributes)
 
-        response = self.gemini.generate_text(
-            prompt=prompt_text,
-            response_type="application/json"
-        )
+        schema = description_schema()
 
-        description_data = json.loads(response)
+        def _call():
+            return self.gemini.generate_text(
+                prompt=prompt_text,
+                response_type="application/json",
+                response_schema=schema
+            )
+
+        description_data = self._run_stage(
+            'description', prompt_text, schema,
+            lambda: self._call_with_stage_retry('description', _call, schema),
+            checkpoint
+        )
         return description_data.get("description", "")
 
+    @traced('analyzer.save_metadata')
+    @timed('analyzer.save_metadata')
     def _save_metadata(self, result: Dict) -> str:
         """Save analysis result as JSON metadata file."""
         filename = result['filename']
@@ -241,7 +571,8 @@ class ImageAnalyzer:
 
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(result, f, ensure_ascii=False, indent=2)
+        notify_file_written(metadata_path)
 
         logger = get_logger()
-        logger.info(f"Metadata saved: {metadata_path}")
+        logger.info("Metadata saved: %s", metadata_path)
         return metadata_path
\ No newline at end of file
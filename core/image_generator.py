@@ -8,12 +8,17 @@ Supports various templates: SNS/Marketing, Detail Page, Studio Shooting, etc.
 
 import os
 import json
+import uuid
 from datetime import datetime
 from typing import List, Dict, Optional
 
 from .gemini_client import GeminiClient
-from .prompt_templates import PromptTemplates
+from .prompt_registry import get_prompt_registry
 from .logger import get_logger
+from .metrics import timed
+from .tracing import traced
+from .file_events import notify_file_written
+from .image_io import ImageSource, describe_source
 
 
 class ImageGenerator:
@@ -26,37 +31,41 @@ class ImageGenerator:
     - Advanced features (Multilingual conversion, Infographics)
     """
 
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, gemini: Optional[GeminiClient] = None):
         """
         Initialize ImageGenerator.
 
         Args:
             output_dir: Directory to save generated images
+            gemini: Gemini client to use (defaults to a new GeminiClient)
         """
         self.output_dir = output_dir
-        self.gemini = GeminiClient()
+        self.gemini = gemini or GeminiClient()
+        self.prompts = get_prompt_registry()
         os.makedirs(self.output_dir, exist_ok=True)
 
     # ================================================================
     # BASIC GENERATION METHODS
     # ================================================================
 
+    @traced('generator.change_attributes')
+    @timed('generator.change_attributes')
     def change_attributes(
         self,
-        image_path: str,
+        image_path: ImageSource,
         instructions: List[str]
     ) -> List[str]:
         """
         Change specific attributes (color, angle, etc.) of an image.
 
         Args:
-            image_path: Path to source image
+            image_path: Path to source image, or in-memory image (bytes, PIL image, EncodedImage)
             instructions: List of change instructions
 
         Returns:
             List of paths to saved generated images
         """
-        prompt_text = PromptTemplates.change_attributes(", ".join(instructions))
+        prompt_text = self.prompts.render('change_attributes', instructions=", ".join(instructions))
         generated_image_data, _ = self.gemini.generate_image(
             prompt=prompt_text,
             reference_images=[image_path]
@@ -65,16 +74,18 @@ class ImageGenerator:
         output_path = self._get_output_path(image_path, "_changed")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.create_thumbnail_with_metadata')
+    @timed('generator.create_thumbnail_with_metadata')
     def create_thumbnail_with_metadata(
         self,
-        image_path: str,
+        image_path: ImageSource,
         metadata_path: str
     ) -> List[str]:
         """
         Generate thumbnail with metadata overlay.
 
         Args:
-            image_path: Path to product image
+            image_path: Path to product image, or in-memory image
             metadata_path: Path to JSON metadata file
 
         Returns:
@@ -87,7 +98,7 @@ class ImageGenerator:
         if isinstance(description, dict):
             description = description.get("description", "")
 
-        prompt_text = PromptTemplates.create_thumbnail_with_metadata(metadata=description)
+        prompt_text = self.prompts.render('create_thumbnail_with_metadata', metadata=description)
         generated_image_data, _ = self.gemini.generate_image(
             prompt=prompt_text,
             reference_images=[image_path]
@@ -96,10 +107,12 @@ class ImageGenerator:
         output_path = self._get_output_path(image_path, "_thumbnail_meta")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.apply_style_from_reference')
+    @timed('generator.apply_style_from_reference')
     def apply_style_from_reference(
         self,
-        product_image_path: str,
-        reference_image_paths: List[str]
+        product_image_path: ImageSource,
+        reference_image_paths: List[ImageSource]
     ) -> List[str]:
         """
         Apply style from reference images to product image.
@@ -111,7 +124,7 @@ class ImageGenerator:
         Returns:
             List of paths to saved styled images
         """
-        prompt_text = PromptTemplates.apply_style_from_reference()
+        prompt_text = self.prompts.render('apply_style_from_reference')
         all_images = [product_image_path] + reference_image_paths
 
         generated_image_data, _ = self.gemini.generate_image(
@@ -122,10 +135,12 @@ class ImageGenerator:
         output_path = self._get_output_path(product_image_path, "_styled")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.replace_object_in_reference')
+    @timed('generator.replace_object_in_reference')
     def replace_object_in_reference(
         self,
-        product_image_path: str,
-        reference_image_paths: List[str]
+        product_image_path: ImageSource,
+        reference_image_paths: List[ImageSource]
     ) -> List[str]:
         """
         Replace/composite product into reference scene.
@@ -137,8 +152,9 @@ class ImageGenerator:
         Returns:
             List of paths to saved composite images
         """
-        prompt_text = PromptTemplates.replace_object_in_reference(
-            object_to_replace=product_image_path
+        prompt_text = self.prompts.render(
+            'replace_object_in_reference',
+            object_to_replace=describe_source(product_image_path)
         )
         all_images = [product_image_path] + reference_image_paths
 
@@ -150,9 +166,11 @@ class ImageGenerator:
         output_path = self._get_output_path(product_image_path, "_replaced")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.create_interior_scene')
+    @timed('generator.create_interior_scene')
     def create_interior_scene(
         self,
-        product_image_paths: List[str]
+        product_image_paths: List[ImageSource]
     ) -> List[str]:
         """
         Combine multiple products into harmonious interior scene.
@@ -163,7 +181,7 @@ class ImageGenerator:
         Returns:
             List of paths to saved scene images
         """
-        prompt_text = PromptTemplates.create_interior_scene()
+        prompt_text = self.prompts.render('create_interior_scene')
         generated_image_data, _ = self.gemini.generate_image(
             prompt=prompt_text,
             reference_images=product_image_paths
@@ -176,6 +194,8 @@ class ImageGenerator:
     # TEMPLATE-BASED GENERATION METHODS
     # ================================================================
 
+    @traced('generator.generate_sns_marketing')
+    @timed('generator.generate_sns_marketing')
     def generate_sns_marketing(
         self,
         product_name: str,
@@ -199,7 +219,8 @@ class ImageGenerator:
         Returns:
             List of paths to generated marketing images
         """
-        prompt_text = PromptTemplates.sns_marketing_template(
+        prompt_text = self.prompts.render(
+            'sns_marketing_template',
             product_name=product_name,
             target_audience=target_audience,
             layout=layout,
@@ -216,6 +237,8 @@ class ImageGenerator:
         output_path = os.path.join(self.output_dir, f"sns_marketing_{timestamp}.png")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.generate_detail_page')
+    @timed('generator.generate_detail_page')
     def generate_detail_page(
         self,
         product_name: str,
@@ -235,7 +258,8 @@ class ImageGenerator:
         Returns:
             List of paths to generated detail page images
         """
-        prompt_text = PromptTemplates.detail_page_template(
+        prompt_text = self.prompts.render(
+            'detail_page_template',
             product_name=product_name,
             product_images=product_images,
             layout_ratio=layout_ratio,
@@ -251,6 +275,8 @@ class ImageGenerator:
         output_path = os.path.join(self.output_dir, f"detail_page_{timestamp}.png")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.generate_studio_shooting')
+    @timed('generator.generate_studio_shooting')
     def generate_studio_shooting(
         self,
         product_image: str,
@@ -274,7 +300,8 @@ class ImageGenerator:
         if combination_products:
             all_images.extend(combination_products)
 
-        prompt_text = PromptTemplates.studio_shooting_template(
+        prompt_text = self.prompts.render(
+            'studio_shooting_template',
             product_image=product_image,
             model_setting=model_setting,
             combination_products=combination_products,
@@ -294,11 +321,23 @@ class ImageGenerator:
     # HELPER METHODS
     # ================================================================
 
-    def _get_output_path(self, original_path: str, suffix: str) -> str:
-        """Generate output file path with suffix."""
-        base, ext = os.path.splitext(os.path.basename(original_path))
-        return os.path.join(self.output_dir, f"{base}{suffix}{ext}")
+    def _get_output_path(self, original_path: ImageSource, suffix: str) -> str:
+        """
+        Generate a unique output file path with suffix.
+
+        Every name ends in a short UUID, so same-named inputs from different
+        folders, concurrent requests and re-runs never overwrite each other.
+        In-memory inputs have no file name and get a timestamp based one.
+        """
+        if isinstance(original_path, str):
+            base, ext = os.path.splitext(os.path.basename(original_path))
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            base, ext = f"edit_{timestamp}", ".png"
+        return os.path.join(self.output_dir, f"{base}{suffix}_{uuid.uuid4().hex[:8]}{ext}")
 
+    @traced('generator.save_images')
+    @timed('generator.save_images')
     def _save_images(self, image_data: List, output_path: str) -> List[str]:
         """
         Save generated image data to files.
@@ -324,21 +363,25 @@ class ImageGenerator:
                 indexed_path = f"{base}_{idx + 1}{ext}"
                 with open(indexed_path, 'wb') as f:
                     f.write(data.data)
-                logger.info(f"Image saved: {indexed_path}")
+                notify_file_written(indexed_path)
+                logger.info("Image saved: %s", indexed_path)
                 saved_files.append(indexed_path)
         else:
             # Single image
             with open(output_path, 'wb') as f:
                 f.write(image_data[0].data)
-            logger.info(f"Image saved: {output_path}")
+            notify_file_written(output_path)
+            logger.info("Image saved: %s", output_path)
             saved_files.append(output_path)
 
         return saved_files
 
+    @traced('generator.generate_style_based_image')
+    @timed('generator.generate_style_based_image')
     def generate_style_based_image(
         self,
-        product_image: str,
-        reference_images: List[str],
+        product_image: ImageSource,
+        reference_images: List[ImageSource],
         placement: str,
         environment: str,
         mood: List[str],
@@ -358,29 +401,13 @@ class ImageGenerator:
         Returns:
             List of paths to generated images
         """
-        mood_text = ", ".join(mood) if mood else "자연스러운"
-
-        prompt_text = f"""
-Product Placement & Style-based Image Generation
-
-Create a realistic lifestyle image featuring the product in the specified environment.
-
-**Product**: Use the uploaded product image
-**Environment**: {environment}
-**Placement**: {placement}
-**Style Reference**: Apply the visual style, composition, and atmosphere from the reference images
-**Mood**: {mood_text}
-**Lighting**: {lighting}
-
-Requirements:
-1. Place the product naturally in the environment
-2. Match the style, color palette, and atmosphere of reference images
-3. Ensure realistic lighting and shadows
-4. Maintain product visibility and focus
-5. Create a cohesive, magazine-quality composition
-
-Generate a high-quality lifestyle image that showcases the product in an appealing context.
-"""
+        prompt_text = self.prompts.render(
+            'style_based_image_template',
+            placement=placement,
+            environment=environment,
+            mood=mood,
+            lighting=lighting
+        )
 
         # Combine product and reference images
         all_images = [product_image] + reference_images
@@ -394,6 +421,8 @@ Generate a high-quality lifestyle image that showcases the product in an appeali
         output_path = os.path.join(self.output_dir, f"style_based_{timestamp}.png")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.generate_illustration')
+    @timed('generator.generate_illustration')
     def generate_illustration(
         self,
         content_type: str,
@@ -423,31 +452,18 @@ Generate a high-quality lifestyle image that showcases the product in an appeali
         Returns:
             List of paths to generated images
         """
-        prompt_text = f"""
-Illustration Image Generation for {content_type}
-
-Create an illustration that visually represents the following text content:
-
-**Text Content**:
-{text_content}
-
-**Main Subject/Theme**: {subject}
-**Visual Style**: {visual_style}
-**Color Palette**: {color_palette}
-**Composition**: {composition}
-**Aspect Ratio**: {aspect_ratio}
-**Mood/Atmosphere**: {mood if mood else "자연스럽고 몰입감 있는"}
-**Additional Details**: {details if details else "없음"}
-
-Requirements:
-1. Capture the essence and key elements of the text
-2. Create a compelling visual narrative
-3. Use the specified visual style consistently
-4. Apply appropriate color palette and composition
-5. Ensure the illustration complements and enhances the text content
-
-Generate a professional-quality illustration suitable for {content_type}.
-"""
+        prompt_text = self.prompts.render(
+            'illustration_template',
+            content_type=content_type,
+            text_content=text_content,
+            subject=subject,
+            visual_style=visual_style,
+            color_palette=color_palette,
+            composition=composition,
+            aspect_ratio=aspect_ratio,
+            mood=mood,
+            details=details
+        )
 
         generated_image_data, _ = self.gemini.generate_image(
             prompt=prompt_text,
@@ -458,9 +474,11 @@ Generate a professional-quality illustration suitable for {content_type}.
         output_path = os.path.join(self.output_dir, f"illustration_{timestamp}.png")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.complete_artwork')
+    @timed('generator.complete_artwork')
     def complete_artwork(
         self,
-        sketch_image: str,
+        sketch_image: ImageSource,
         artwork_type: str,
         coloring_style: str,
         color_scheme: Dict,
@@ -489,51 +507,18 @@ Generate a professional-quality illustration suitable for {content_type}.
         Returns:
             List of paths to completed images
         """
-        # Build color instructions
-        color_instruction = ""
-        if color_scheme['method'] == 'palette':
-            color_instruction = f"Use the following color palette: Primary {color_scheme.get('primary', '')}, Secondary {color_scheme.get('secondary', '')}, Accent {color_scheme.get('accent', '')}"
-        elif color_scheme['method'] == 'reference':
-            color_instruction = "Extract and apply colors from the reference image"
-        else:
-            color_instruction = "Use AI-recommended harmonious color palette"
-
-        # Build texture instruction
-        texture_list = texture if texture and texture != ["없음"] else []
-        texture_instruction = f"Add textures: {', '.join(texture_list)}" if texture_list else "No additional texture"
-
-        # Build effects instruction
-        effects_list = []
-        if effects:
-            if effects.get('glow'): effects_list.append("glow effect")
-            if effects.get('blur'): effects_list.append("background blur")
-            if effects.get('grain'): effects_list.append("film grain")
-        effects_instruction = f"Apply effects: {', '.join(effects_list)}" if effects_list else "No special effects"
-
-        prompt_text = f"""
-Artwork Completion and Coloring
-
-Transform the uploaded sketch into a fully completed, professionally colored illustration.
-
-**Artwork Type**: {artwork_type}
-**Coloring Style**: {coloring_style}
-**Detail Level**: {detail_level}
-**Color Scheme**: {color_instruction}
-**Shading**: {"Add realistic shading with light source from " + light_source if shading else "Flat coloring without shading"}
-**Texture**: {texture_instruction}
-**Effects**: {effects_instruction}
-**Additional Instructions**: {instructions if instructions else "없음"}
-
-Requirements:
-1. Preserve the original sketch's composition and line work
-2. Apply professional-quality coloring
-3. Add appropriate depth and dimension
-4. Ensure color harmony and visual appeal
-5. Maintain the artistic intent of the original sketch
-6. Apply the specified detail level consistently
-
-Complete the artwork with the highest quality, ready for final use.
-"""
+        prompt_text = self.prompts.render(
+            'artwork_completion_template',
+            artwork_type=artwork_type,
+            coloring_style=coloring_style,
+            color_scheme=color_scheme,
+            detail_level=detail_level,
+            shading=shading,
+            light_source=light_source,
+            texture=texture,
+            effects=effects,
+            instructions=instructions
+        )
 
         # Add reference color image if provided
         reference_images = [sketch_image]
@@ -549,9 +534,11 @@ Complete the artwork with the highest quality, ready for final use.
         output_path = os.path.join(self.output_dir, f"artwork_complete_{timestamp}.png")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.generate_multilingual_image')
+    @timed('generator.generate_multilingual_image')
     def generate_multilingual_image(
         self,
-        original_image: str,
+        original_image: ImageSource,
         target_language: str,
         font_family: str = "",
         emphasis_keywords: str = "",
@@ -572,29 +559,14 @@ Complete the artwork with the highest quality, ready for final use.
         Returns:
             List of paths to generated images
         """
-        prompt_text = f"""
-Multilingual Image Conversion
-
-Create a new version of this image with all text translated to {target_language}.
-
-**Original Image**: Contains text that needs translation
-**Target Language**: {target_language}
-**Font Settings**: {font_family if font_family else "Auto-select appropriate font for target language"}
-**Emphasis Keywords**: {emphasis_keywords if emphasis_keywords else "None"}
-**Translation Tone**: {translation_tone}
-**Additional Requirements**: {requirements if requirements else "None"}
-
-Requirements:
-1. Translate all visible text in the image to {target_language}
-2. Maintain the original layout and design
-3. Use culturally appropriate fonts and typography
-4. Preserve image quality and visual hierarchy
-5. Ensure translations are contextually accurate
-6. Apply appropriate text formatting for the target language
-7. Maintain brand consistency and visual appeal
-
-Generate a professional-quality multilingual version suitable for {target_language} markets.
-"""
+        prompt_text = self.prompts.render(
+            'multilingual_image_template',
+            target_language=target_language,
+            font_family=font_family,
+            emphasis_keywords=emphasis_keywords,
+            translation_tone=translation_tone,
+            requirements=requirements
+        )
 
         generated_image_data, _ = self.gemini.generate_image(
             prompt=prompt_text,
@@ -605,6 +577,8 @@ Generate a professional-quality multilingual version suitable for {target_langua
         output_path = os.path.join(self.output_dir, f"multilingual_{target_language}_{timestamp}.png")
         return self._save_images(generated_image_data, output_path)
 
+    @traced('generator.generate_infographic')
+    @timed('generator.generate_infographic')
     def generate_infographic(
         self,
         data_source_description: str,
@@ -628,39 +602,15 @@ Generate a professional-quality multilingual version suitable for {target_langua
         Returns:
             List of paths to generated images
         """
-        prompt_text = f"""
-Infographic Image Generation
-
-Create a professional infographic that visualizes the following information:
-
-**Data/Content**:
-{data_source_description}
-
-**Content Type**: {content_type}
-**Purpose**: {purpose}
-**Target Audience**: {target_audience if target_audience else "General audience"}
-**Visual Style**: {visual_style}
-**Key Message**: {key_message if key_message else "Clearly communicate the data"}
-
-Requirements:
-1. Create a visually compelling infographic design
-2. Use appropriate charts, graphs, icons, and visual elements
-3. Ensure information hierarchy and flow
-4. Apply consistent color scheme and typography
-5. Make data easy to understand at a glance
-6. Include clear labels and legends
-7. Optimize for readability and engagement
-8. Match the specified visual style: {visual_style}
-
-Visual Style Guidelines:
-- 프레젠테이션 슬라이드: Clean, professional, suitable for presentations
-- 그리드형: Organized grid layout with clear sections
-- 타임라인: Chronological flow with timeline visualization
-- 플로우차트: Process flow with connected steps
-- 인포그래픽 차트: Data-driven charts and visualizations
-
-Generate a high-quality infographic optimized for {purpose}.
-"""
+        prompt_text = self.prompts.render(
+            'infographic_image_template',
+            data_source_description=data_source_description,
+            content_type=content_type,
+            purpose=purpose,
+            target_audience=target_audience,
+            visual_style=visual_style,
+            key_message=key_message
+        )
 
         generated_image_data, _ = self.gemini.generate_image(
             prompt=prompt_text,
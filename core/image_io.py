@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+In-Memory Image Inputs for CEN AI DAM Editor
+
+Lets the generator and Gemini client accept images as file paths, raw bytes,
+PIL images or pre-encoded buffers. Each input is encoded exactly once and the
+same buffer is reused for every API call and retry, so the interactive editor
+path never round-trips the canvas through temp files.
+"""
+
+import io
+import os
+import mimetypes
+from typing import Optional, Union
+
+from PIL import Image
+
+from .logger import get_logger
+from .metrics import timer
+
+
+class EncodedImage:
+    """
+    Image bytes plus MIME type, encoded once and shared down the call stack.
+
+    Attributes:
+        data: Encoded image bytes
+        mime_type: MIME type of the encoded bytes
+        name: Optional display name (original file name if any)
+    """
+
+    __slots__ = ('data', 'mime_type', 'name')
+
+    def __init__(self, data: bytes, mime_type: str = 'image/png', name: Optional[str] = None):
+        self.data = data
+        self.mime_type = mime_type
+        self.name = name
+
+    @classmethod
+    def from_path(cls, image_path: str) -> Optional['EncodedImage']:
+        """Read an image file once; returns None if the file does not exist."""
+        if not os.path.exists(image_path):
+            logger = get_logger()
+            logger.warning(f"Image not found: {image_path}")
+            return None
+
+        with timer('image_io.read'), open(image_path, 'rb') as f:
+            data = f.read()
+
+        mime_type, _ = mimetypes.guess_type(image_path)
+        return cls(data, mime_type or sniff_mime_type(data), os.path.basename(image_path))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, name: Optional[str] = None) -> 'EncodedImage':
+        """Wrap already-encoded image bytes, detecting the format from the header."""
+        return cls(bytes(data), sniff_mime_type(data), name)
+
+    @classmethod
+    def from_pil(cls, image: Image.Image, compress_level: int = 1) -> 'EncodedImage':
+        """
+        Encode a PIL image as PNG.
+
+        Args:
+            image: PIL image
+            compress_level: zlib level; 1 keeps interactive encodes fast
+
+        Returns:
+            EncodedImage with PNG data
+        """
+        buffer = io.BytesIO()
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+            image = image.convert('RGBA')
+        with timer('image_io.encode'):
+            image.save(buffer, format='PNG', compress_level=compress_level)
+        return cls(buffer.getvalue(), 'image/png', getattr(image, 'filename', None) or None)
+
+    @classmethod
+    def from_source(cls, source: 'ImageSource') -> Optional['EncodedImage']:
+        """
+        Normalize any supported image input to an EncodedImage.
+
+        Args:
+            source: File path, bytes, PIL image or EncodedImage
+
+        Returns:
+            EncodedImage, or None if a file path does not exist
+        """
+        if isinstance(source, EncodedImage):
+            return source
+        if isinstance(source, str):
+            return cls.from_path(source)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls.from_bytes(bytes(source))
+        if isinstance(source, Image.Image):
+            return cls.from_pil(source)
+        raise TypeError(f"Unsupported image source type: {type(source).__name__}")
+
+    def to_pil(self) -> Image.Image:
+        """Decode the buffer into a PIL image."""
+        with timer('image_io.decode'):
+            image = Image.open(io.BytesIO(self.data))
+            image.load()
+        return image
+
+
+ImageSource = Union[str, bytes, Image.Image, EncodedImage]
+
+
+def sniff_mime_type(data: bytes) -> str:
+    """Detect an image MIME type from its magic bytes."""
+    header = bytes(data[:12])
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if header.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+        return 'image/webp'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    return 'application/octet-stream'
+
+
+def describe_source(source: ImageSource) -> str:
+    """Return a short human-readable label for an image input (for prompts/logs)."""
+    if isinstance(source, str):
+        return source
+    if isinstance(source, EncodedImage) and source.name:
+        return source.name
+    return "uploaded image"
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Local Image Operations for CEN AI DAM Editor
+
+Deterministic NumPy/Pillow implementations of edits that do not need a
+generative model: color adjustment, auto levels, crop/resize/upscale,
+canvas padding and mask-based background compositing. These run in
+milliseconds locally instead of a paid Gemini round-trip.
+"""
+
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageColor, ImageFilter
+
+# Rec. 601 luma weights
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+# Largest output the local resize/upscale will produce (in pixels)
+MAX_OUTPUT_PIXELS = 100_000_000
+
+# Fully transparent share of the image that makes its alpha channel a cutout
+MIN_CUTOUT_TRANSPARENT = 0.05
+
+ColorLike = Union[str, Tuple[int, int, int]]
+MaskLike = Union[Image.Image, np.ndarray]
+
+
+# ================================================================
+# ARRAY CONVERSION
+# ================================================================
+
+def _split_alpha(image: Image.Image) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Return (RGB float32 array, alpha uint8 array or None)."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = np.asarray(image.convert('RGBA'))
+        return rgba[..., :3].astype(np.float32), rgba[..., 3].copy()
+    return np.asarray(image.convert('RGB'), dtype=np.float32), None
+
+
+def _merge_alpha(rgb: np.ndarray, alpha: Optional[np.ndarray]) -> Image.Image:
+    """Clip an RGB float array back to uint8 and reattach alpha."""
+    np.clip(rgb, 0, 255, out=rgb)
+    rgb8 = rgb.astype(np.uint8)
+    if alpha is None:
+        return Image.fromarray(rgb8, 'RGB')
+    return Image.fromarray(np.dstack((rgb8, alpha)), 'RGBA')
+
+
+def to_mask(mask: MaskLike, size: Tuple[int, int]) -> Image.Image:
+    """
+    Normalize a mask to an 'L' image of `size`.
+
+    Args:
+        mask: PIL image (alpha or luminance used) or array (bool, uint8 or 0..1 float); 255 = keep
+        size: Target (width, height)
+
+    Returns:
+        'L' mask image
+    """
+    if isinstance(mask, np.ndarray):
+        if mask.dtype == bool:
+            mask = mask.astype(np.uint8) * 255
+        elif mask.dtype != np.uint8:
+            mask = (np.clip(mask, 0, 1) * 255).astype(np.uint8)
+        mask = Image.fromarray(mask, 'L')
+    elif mask.mode != 'L':
+        mask = mask.getchannel('A') if 'A' in mask.getbands() else mask.convert('L')
+
+    if mask.size != size:
+        mask = mask.resize(size, Image.Resampling.BILINEAR)
+    return mask
+
+
+# ================================================================
+# COLOR
+# ================================================================
+
+def adjust_colors(
+    image: Image.Image,
+    brightness: float = 0,
+    contrast: float = 0,
+    saturation: float = 0
+) -> Image.Image:
+    """
+    Adjust brightness, contrast and saturation.
+
+    Args:
+        image: Source image (alpha is preserved)
+        brightness: Percent change, e.g. -50..50
+        contrast: Percent change around mean luminance
+        saturation: Percent change away from per-pixel gray
+
+    Returns:
+        Adjusted image
+    """
+    if not (brightness or contrast or saturation):
+        return image.copy()
+
+    rgb, alpha = _split_alpha(image)
+
+    if brightness:
+        rgb *= 1 + brightness / 100.0
+
+    if contrast:
+        mean = float((rgb @ LUMA_WEIGHTS).mean())
+        rgb -= mean
+        rgb *= 1 + contrast / 100.0
+        rgb += mean
+
+    if saturation:
+        gray = (rgb @ LUMA_WEIGHTS)[..., np.newaxis]
+        rgb -= gray
+        rgb *= 1 + saturation / 100.0
+        rgb += gray
+
+    return _merge_alpha(rgb, alpha)
+
+
+def auto_levels(image: Image.Image, cutoff: float = 1.0) -> Image.Image:
+    """
+    Stretch each channel so the darkest/brightest `cutoff` percent clip.
+
+    Uses per-channel histograms and a lookup table, so cost is one pass
+    over the pixels regardless of image size.
+
+    Args:
+        image: Source image (alpha is preserved)
+        cutoff: Percent of pixels to clip at each end
+
+    Returns:
+        Level-corrected image
+    """
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    data = np.asarray(image.convert('RGBA' if has_alpha else 'RGB'))
+    out = data.copy()
+    levels = np.arange(256, dtype=np.float32)
+
+    for channel in range(3):
+        values = data[..., channel]
+        hist = np.bincount(values.ravel(), minlength=256)
+        cdf = np.cumsum(hist)
+        total = cdf[-1]
+        low = int(np.searchsorted(cdf, total * cutoff / 100.0))
+        high = int(np.searchsorted(cdf, total * (1 - cutoff / 100.0)))
+        if high <= low:
+            continue
+        lut = np.clip((levels - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+        out[..., channel] = lut[values]
+
+    return Image.fromarray(out, 'RGBA' if has_alpha else 'RGB')
+
+
+# ================================================================
+# GEOMETRY
+# ================================================================
+
+def crop(image: Image.Image, box: Tuple[int, int, int, int]) -> Image.Image:
+    """
+    Crop to (left, top, right, bottom), clamped to the image bounds.
+
+    Raises:
+        ValueError: If the clamped box is empty
+    """
+    left, top, right, bottom = box
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(image.width, right), min(image.height, bottom)
+    if right <= left or bottom <= top:
+        raise ValueError(f"Empty crop box: {box}")
+    return image.crop((left, top, right, bottom))
+
+
+def resize(
+    image: Image.Image,
+    size: Tuple[int, int],
+    keep_aspect: bool = False
+) -> Image.Image:
+    """
+    Resize with Lanczos resampling.
+
+    Args:
+        image: Source image
+        size: Target (width, height); with keep_aspect, the bounding box
+        keep_aspect: Fit inside `size` preserving aspect ratio
+
+    Returns:
+        Resized image
+
+    Raises:
+        ValueError: If the target size is empty or exceeds MAX_OUTPUT_PIXELS
+    """
+    width, height = size
+    if keep_aspect:
+        ratio = min(width / image.width, height / image.height)
+        width, height = round(image.width * ratio), round(image.height * ratio)
+
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid target size: {width}x{height}")
+    if width * height > MAX_OUTPUT_PIXELS:
+        raise ValueError(f"Target size too large: {width}x{height}")
+
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def upscale(image: Image.Image, scale_factor: float) -> Image.Image:
+    """Upscale by a factor with Lanczos resampling."""
+    return resize(image, (round(image.width * scale_factor), round(image.height * scale_factor)))
+
+
+def expand_canvas(
+    image: Image.Image,
+    left: int = 0,
+    right: int = 0,
+    top: int = 0,
+    bottom: int = 0,
+    fill: ColorLike = '#FFFFFF'
+) -> Image.Image:
+    """
+    Pad the image with a solid color on each side.
+
+    Args:
+        image: Source image
+        left, right, top, bottom: Padding in pixels
+        fill: Padding color (hex string or RGB tuple)
+
+    Returns:
+        Padded image
+    """
+    mode = 'RGBA' if 'A' in image.getbands() else 'RGB'
+    color = _parse_color(fill, mode)
+    canvas = Image.new(mode, (image.width + left + right, image.height + top + bottom), color)
+    canvas.paste(image.convert(mode), (left, top))
+    return canvas
+
+
+# ================================================================
+# BACKGROUND COMPOSITING
+# ================================================================
+
+def mask_from_alpha(image: Image.Image, min_transparent: float = MIN_CUTOUT_TRANSPARENT) -> Optional[Image.Image]:
+    """
+    Return the alpha channel as a subject mask if the image is a cutout.
+
+    Soft edges or a few translucent pixels do not make a cutout; at least
+    `min_transparent` of the image must be fully transparent background.
+
+    Returns:
+        'L' mask (255 = subject) or None if the image is not a cutout
+    """
+    if 'A' not in image.getbands() and not (image.mode == 'P' and 'transparency' in image.info):
+        return None
+    alpha = image.convert('RGBA').getchannel('A')
+    transparent = alpha.histogram()[0]
+    return alpha if transparent >= min_transparent * alpha.width * alpha.height and transparent > 0 else None
+
+
+def blur_background(image: Image.Image, mask: MaskLike, radius: float) -> Image.Image:
+    """
+    Keep the masked subject sharp and Gaussian-blur everything else.
+
+    Args:
+        image: Source image
+        mask: Subject mask (255 = subject); soft edges blend smoothly
+        radius: Gaussian blur radius in pixels
+
+    Returns:
+        Opaque RGB composite
+    """
+    rgb = image.convert('RGB')
+    blurred = rgb.filter(ImageFilter.GaussianBlur(radius))
+    return Image.composite(rgb, blurred, to_mask(mask, rgb.size))
+
+
+def fill_background(image: Image.Image, mask: MaskLike, color: ColorLike = '#FFFFFF') -> Image.Image:
+    """
+    Replace everything outside the mask with a solid color.
+
+    Args:
+        image: Source image
+        mask: Subject mask (255 = subject)
+        color: Background color (hex string or RGB tuple)
+
+    Returns:
+        Opaque RGB composite
+    """
+    rgb = image.convert('RGB')
+    background = Image.new('RGB', rgb.size, _parse_color(color, 'RGB'))
+    return Image.composite(rgb, background, to_mask(mask, rgb.size))
+
+
+def _parse_color(color: ColorLike, mode: str) -> Sequence[int]:
+    if isinstance(color, str):
+        color = ImageColor.getrgb(color)
+    color = tuple(color)
+    if mode == 'RGBA' and len(color) == 3:
+        return color + (255,)
+    return color[:3] if mode == 'RGB' else color
@@ -2,52 +2,269 @@
 """
 Logging Module for CEN AI DAM Editor
 
-Provides centralized logging functionality with colored output.
+Provides centralized logging functionality:
+- Colored console output or JSON lines (one object per record)
+- Non-blocking: callers only enqueue records; formatting and I/O run on a
+  background QueueListener thread
+- Optional rotating file sink
+- Request / job correlation IDs attached to every record via `log_context`
+
+Configuration comes from `init_logger` arguments or, when omitted, from the
+environment (.env), so call sites never change:
+    LOG_LEVEL             DEBUG / INFO / WARNING / ... (default INFO)
+    LOG_FORMAT            'text' or 'json' (default text)
+    LOG_FILE              Path of a rotating log file (default: none)
+    LOG_FILE_MAX_BYTES    Rotation size (default 10 MB)
+    LOG_FILE_BACKUP_COUNT Rotated files kept (default 5)
+    LOG_ASYNC             '0' to log synchronously (default 1)
+
+Use %-style arguments (`logger.info("Saved %s", path)`) on hot paths so the
+message is only built if the record is actually emitted.
 """
 
+import os
+import json
+import queue
+import atexit
 import logging
+import logging.handlers
+import threading
+import contextvars
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
 from colorlog import ColoredFormatter
 import time
 import functools
 
+from dotenv import load_dotenv
+
+from . import metrics
+
 APP_LOGGER_NAME = 'ITCEN CLOIT'
 
+DEFAULT_LOG_FORMAT = (
+    '%(asctime)s - '
+    '%(name)s - '
+    '%(funcName)s - '
+    '%(log_color)s%(levelname)s - '
+    '%(message)s%(context)s'
+)
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+CONTEXT_FIELDS = ('request_id', 'job_id')
+
 _logger_initialized = False
+_init_lock = threading.Lock()
+_listener = None
+
+_log_context = contextvars.ContextVar('log_context', default={})
+
+
+# ================================================================
+# CORRELATION IDS
+# ================================================================
+
+def new_request_id() -> str:
+    """Generate a short random request ID."""
+    return uuid.uuid4().hex[:12]
+
+
+def get_log_context() -> dict:
+    """Return the correlation IDs bound to the current thread / task."""
+    return dict(_log_context.get())
+
+
+@contextmanager
+def log_context(**ids):
+    """
+    Bind correlation IDs (e.g. request_id, job_id) to every record logged
+    inside the block. Nested blocks inherit and may override outer IDs;
+    None values are ignored.
+
+    Context variables do not follow work into thread pools, so re-enter
+    the context inside worker functions.
+
+    Example:
+        with log_context(job_id=job_id, request_id=new_request_id()):
+            ...
+    """
+    merged = {**_log_context.get(), **{k: v for k, v in ids.items() if v is not None}}
+    token = _log_context.set(merged)
+    try:
+        yield merged
+    finally:
+        _log_context.reset(token)
+
+
+def with_request_id(fn):
+    """
+    Decorator that binds a fresh request_id for the duration of the call,
+    unless the caller already bound one.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _log_context.get().get('request_id'):
+            return fn(*args, **kwargs)
+        with log_context(request_id=new_request_id()):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current correlation IDs onto the record (runs in the caller's thread)."""
+
+    def filter(self, record):
+        context = _log_context.get()
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, context.get(field))
+        if not hasattr(record, 'context'):
+            record.context = (
+                ' [' + ', '.join(f"{k}={v}" for k, v in context.items()) + ']'
+                if context else ''
+            )
+        return True
+
+
+# ================================================================
+# HANDLERS / FORMATTERS
+# ================================================================
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'function': record.funcName,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _PlainFormatter(logging.Formatter):
+    """Non-colored formatter that tolerates the colorlog-only fields in a format string."""
+
+    def format(self, record):
+        record.log_color = ''
+        return super().format(record)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for an in-process listener.
+
+    The stock handler formats the message in the caller's thread so records
+    can be pickled; ours keeps msg/args as-is and leaves formatting to the
+    listener thread. Arguments must therefore not be mutated after logging.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def _build_formatter(json_format: bool, log_format: str, colored: bool):
+    if json_format:
+        return JsonFormatter()
+    if colored:
+        return ColoredFormatter(
+            log_format,
+            reset=True,
+            log_colors={
+                'DEBUG': 'cyan',
+                'INFO': 'green',
+                'WARNING': 'yellow',
+                'ERROR': 'red',
+                'CRITICAL': 'bold_red',
+            }
+        )
+    return _PlainFormatter(log_format.replace('%(reset)s', ''))
+
 
+def shutdown_logger():
+    """Flush queued records and stop the background listener (safe to call twice)."""
+    global _listener
 
-def init_logger(log_level=logging.INFO, log_format=None):
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(shutdown_logger)
+
+
+def init_logger(
+    log_level=None,
+    log_format=None,
+    json_format=None,
+    log_file=None,
+    max_bytes=None,
+    backup_count=None,
+    async_logging=None
+):
     """
     Initialize the application logger.
 
+    Arguments left as None fall back to the LOG_* environment variables
+    (see module docstring), then to the defaults.
+
     Args:
         log_level: Logging level (default: INFO)
-        log_format: Custom log format string
+        log_format: Custom log format string for text output
+        json_format: Emit JSON lines instead of text
+        log_file: Path of a rotating log file sink
+        max_bytes: Log file size that triggers rotation
+        backup_count: Number of rotated log files to keep
+        async_logging: Hand records to a background thread (default: True)
 
     Returns:
         Configured logger instance
     """
-    global _logger_initialized
+    global _logger_initialized, _listener
 
-    if log_format is None:
-        log_format = (
-            '%(asctime)s - '
-            '%(name)s - '
-            '%(funcName)s - '
-            '%(log_color)s%(levelname)s - '
-            '%(message)s'
-        )
+    load_dotenv()
 
-    formatter = ColoredFormatter(
-        log_format,
-        reset=True,
-        log_colors={
-            'DEBUG': 'cyan',
-            'INFO': 'green',
-            'WARNING': 'yellow',
-            'ERROR': 'red',
-            'CRITICAL': 'bold_red',
-        }
-    )
+    if log_level is None:
+        log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    if isinstance(log_level, str):
+        log_level = logging.getLevelName(log_level)
+        if not isinstance(log_level, int):
+            log_level = logging.INFO
+    if log_format is None:
+        log_format = DEFAULT_LOG_FORMAT
+    if json_format is None:
+        json_format = os.getenv('LOG_FORMAT', 'text').strip().lower() == 'json'
+    if log_file is None:
+        log_file = os.getenv('LOG_FILE') or None
+    if max_bytes is None:
+        max_bytes = int(os.getenv('LOG_FILE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    if backup_count is None:
+        backup_count = int(os.getenv('LOG_FILE_BACKUP_COUNT', DEFAULT_BACKUP_COUNT))
+    if async_logging is None:
+        async_logging = _env_flag('LOG_ASYNC', True)
 
     logger = logging.getLogger(APP_LOGGER_NAME)
     logger.setLevel(log_level)
@@ -55,15 +272,40 @@ def init_logger(log_level=logging.INFO, log_format=None):
     # 부모 로거로의 전파 방지
     logger.propagate = False
 
-    # 기존 핸들러 제거
+    # 기존 핸들러 및 리스너 제거
+    shutdown_logger()
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+        handler.close()
 
     # 콘솔 출력 설정
+    sinks = []
     ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
+    ch.setFormatter(_build_formatter(json_format, log_format, colored=True))
     ch.setLevel(log_level)
-    logger.addHandler(ch)
+    sinks.append(ch)
+
+    # 파일 출력 설정 (용량 기준 로테이션)
+    if log_file:
+        log_dir = os.path.dirname(os.path.abspath(log_file))
+        os.makedirs(log_dir, exist_ok=True)
+        fh = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+        fh.setFormatter(_build_formatter(json_format, log_format, colored=False))
+        fh.setLevel(log_level)
+        sinks.append(fh)
+
+    if async_logging:
+        qh = LazyQueueHandler(queue.SimpleQueue())
+        qh.addFilter(ContextFilter())
+        logger.addHandler(qh)
+        _listener = logging.handlers.QueueListener(qh.queue, *sinks, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in sinks:
+            handler.addFilter(ContextFilter())
+            logger.addHandler(handler)
 
     _logger_initialized = True
 
@@ -77,10 +319,10 @@ def get_logger():
     Returns:
         Logger instance (initializes if not already done)
     """
-    global _logger_initialized
-
     if not _logger_initialized:
-        return init_logger()
+        with _init_lock:
+            if not _logger_initialized:
+                return init_logger()
 
     return logging.getLogger(APP_LOGGER_NAME)
 
@@ -93,24 +335,36 @@ def is_initialized(logger_name=None):
     return len(logger.handlers) > 0
 
 
-def timefn(fn):
+def timefn(fn=None, *, operation=None):
     """
     Decorator to measure and log function execution time.
 
+    Each call is also recorded in the metrics registry (see `core.metrics`)
+    as one sample of `operation`, so latency percentiles are available
+    beyond the log line.
+
     Args:
         fn: Function to wrap
+        operation: Metrics operation name (defaults to the function's
+            qualified name); usable as `@timefn(operation="...")`
 
     Returns:
         Wrapped function
     """
+    if fn is None:
+        return functools.partial(timefn, operation=operation)
+
+    name = operation or f"{fn.__module__}.{fn.__qualname__}"
+
     @functools.wraps(fn)
     def measure_time(*args, **kwargs):
         logger = get_logger()
         start_time = time.time()
-        result = fn(*args, **kwargs)
-        end_time = time.time()
-        execution_time = end_time - start_time
-        logger.info(f"함수 {fn.__name__} 실행 시간: {execution_time:.2f}초")
-        return result
+        try:
+            with metrics.timer(name):
+                return fn(*args, **kwargs)
+        finally:
+            execution_time = time.time() - start_time
+            logger.info("함수 %s 실행 시간: %.2f초", fn.__name__, execution_time)
 
-    return measure_time
\ No newline at end of file
+    return measure_time
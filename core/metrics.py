@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics Registry for CEN AI DAM Editor
+
+Process-wide counters and latency histograms for Gemini calls, analysis
+stages, generation templates and image I/O:
+- Histograms use fixed log-spaced buckets, so recording is O(1) and memory
+  does not grow with traffic; percentiles are interpolated from the buckets
+- `timer()` / `timed()` record one duration sample plus a success/error
+  call count per operation (`core.logger.timefn` is built on them)
+- Snapshots export as Prometheus text format or JSON
+
+This module must not import `core.logger` at module level (the logger
+imports it).
+"""
+
+import os
+import json
+import math
+import time
+import bisect
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DURATION_METRIC = 'operation_duration_seconds'
+CALLS_METRIC = 'operation_calls_total'
+
+PERCENTILES = (50, 95, 99)
+
+
+def _log_buckets(low_exp: int, high_exp: int) -> Tuple[float, ...]:
+    """Upper bounds at 1, 1.5, 2, 3, 5, 7 per decade from 10**low_exp to 10**high_exp."""
+    bounds = []
+    for exp in range(low_exp, high_exp):
+        for step in (1, 1.5, 2, 3, 5, 7):
+            bounds.append(round(step * 10 ** exp, 6))
+    bounds.append(float(10 ** high_exp))
+    return tuple(bounds)
+
+
+# 1 ms .. 1000 s
+DEFAULT_BUCKETS = _log_buckets(-3, 3)
+
+# 10 B .. 10 MB, for payload sizes
+BYTE_BUCKETS = _log_buckets(1, 7)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str = ''):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def series(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class _HistogramSeries:
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def copy(self) -> '_HistogramSeries':
+        clone = _HistogramSeries(0)
+        clone.counts = list(self.counts)
+        clone.count = self.count
+        clone.total = self.total
+        clone.min = self.min
+        clone.max = self.max
+        return clone
+
+
+class Histogram:
+    """
+    Bucketed distribution with optional labels.
+
+    Bucket bounds are upper bounds; one extra overflow bucket catches values
+    above the last bound.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str = '', buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.count += 1
+            series.total += value
+            if value < series.min:
+                series.min = value
+            if value > series.max:
+                series.max = value
+
+    def series(self) -> Dict[LabelKey, _HistogramSeries]:
+        with self._lock:
+            return {key: series.copy() for key, series in self._series.items()}
+
+    def percentile(self, q: float, **labels) -> Optional[float]:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            series = series.copy() if series else None
+        return self._percentile(series, q) if series else None
+
+    def _percentile(self, series: _HistogramSeries, q: float) -> Optional[float]:
+        """
+        Estimate the q-th percentile (0-100) by log interpolation within the
+        bucket that contains it, clamped to the observed min/max.
+        """
+        if not series.count:
+            return None
+        rank = max(q / 100.0 * series.count, 1e-9)
+        cumulative = 0
+        for index, count in enumerate(series.counts):
+            if not count:
+                continue
+            if cumulative + count >= rank:
+                low = self.buckets[index - 1] if index > 0 else series.min
+                high = self.buckets[index] if index < len(self.buckets) else series.max
+                low = max(low, series.min)
+                high = min(high, series.max)
+                if high <= low or low <= 0:
+                    return high
+                fraction = (rank - cumulative) / count
+                return low * (high / low) ** fraction
+            cumulative += count
+        return series.max
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """
+    Named collection of counters and histograms.
+
+    Metrics are created on first use; all methods are thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+
+    def counter(self, name: str, description: str = '') -> Counter:
+        return self._get_or_create(name, Counter, description)
+
+    def histogram(self, name: str, description: str = '', buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, Histogram, description, buckets)
+
+    def _get_or_create(self, name, cls, description, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def metrics(self) -> List:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def reset(self):
+        """Clear all recorded values (metric definitions are kept)."""
+        for metric in self.metrics():
+            metric.reset()
+
+    # ================================================================
+    # EXPORT
+    # ================================================================
+
+    def snapshot(self) -> Dict:
+        """
+        Return all metric values as a JSON-serializable dictionary.
+
+        Returns:
+            {'generated_at', 'started_at', 'counters': {...}, 'histograms': {...}}
+            where each histogram series carries count, sum, mean, min, max
+            and p50/p95/p99
+        """
+        counters = {}
+        histograms = {}
+        for metric in self.metrics():
+            if isinstance(metric, Counter):
+                counters[metric.name] = [
+                    {'labels': dict(key), 'value': value}
+                    for key, value in sorted(metric.series().items())
+                ]
+            else:
+                entries = []
+                for key, series in sorted(metric.series().items()):
+                    entry = {
+                        'labels': dict(key),
+                        'count': series.count,
+                        'sum': series.total,
+                        'mean': series.total / series.count if series.count else None,
+                        'min': series.min if series.count else None,
+                        'max': series.max if series.count else None,
+                    }
+                    for q in PERCENTILES:
+                        entry[f'p{q}'] = metric._percentile(series, q)
+                    entries.append(entry)
+                histograms[metric.name] = entries
+
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'started_at': self.started_at,
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            if metric.description:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            if isinstance(metric, Counter):
+                for key, value in sorted(metric.series().items()):
+                    lines.append(f"{metric.name}{_format_labels(key)} {_format_value(value)}")
+                continue
+
+            for key, series in sorted(metric.series().items()):
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), series.counts):
+                    cumulative += count
+                    labels = _format_labels(key, [('le', _format_value(bound))])
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {_format_value(series.total)}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {series.count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def operation_summary(self) -> List[Dict]:
+        """
+        Per-operation latency and call counts from the timer metrics.
+
+        Returns:
+            List of {'operation', 'count', 'errors', 'mean', 'p50', 'p95',
+            'p99', 'max'} sorted by total time spent, largest first
+        """
+        snapshot = self.snapshot()
+        errors = {}
+        for entry in snapshot['counters'].get(CALLS_METRIC, []):
+            if entry['labels'].get('status') == 'error':
+                operation = entry['labels'].get('operation')
+                errors[operation] = errors.get(operation, 0) + entry['value']
+
+        rows = []
+        for entry in snapshot['histograms'].get(DURATION_METRIC, []):
+            operation = entry['labels'].get('operation', '')
+            rows.append({
+                'operation': operation,
+                'count': entry['count'],
+                'errors': int(errors.get(operation, 0)),
+                'total': entry['sum'],
+                'mean': entry['mean'],
+                'p50': entry['p50'],
+                'p95': entry['p95'],
+                'p99': entry['p99'],
+                'max': entry['max'],
+            })
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows
+
+    def save_snapshot(self, file_path: str, format: str = 'json') -> str:
+        """
+        Write the current snapshot to disk atomically.
+
+        Args:
+            file_path: Destination file
+            format: 'json' or 'prometheus'
+
+        Returns:
+            file_path
+        """
+        if format == 'json':
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        elif format == 'prometheus':
+            content = self.to_prometheus()
+        else:
+            raise ValueError(f"Unsupported metrics format: {format}")
+
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, file_path)
+        return file_path
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+def inc(name: str, amount: float = 1, **labels):
+    """Increment a counter in the default registry."""
+    _registry.counter(name).inc(amount, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """Record a histogram sample in the default registry."""
+    _registry.histogram(name).observe(value, **labels)
+
+
+def record_operation(operation: str, duration: float, status: str = 'ok'):
+    """Record one timed call of an operation."""
+    _registry.histogram(
+        DURATION_METRIC, 'Wall time per operation call in seconds'
+    ).observe(duration, operation=operation)
+    _registry.counter(
+        CALLS_METRIC, 'Operation calls by outcome'
+    ).inc(operation=operation, status=status)
+
+
+@contextmanager
+def timer(operation: str):
+    """
+    Context manager that times a block as one call of `operation`.
+
+    Exceptions are recorded with status 'error' and re-raised.
+
+    Example:
+        with timer('gemini.upload'):
+            client.files.upload(file=f)
+    """
+    start_time = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        record_operation(operation, time.perf_counter() - start_time, status)
+
+
+def timed(operation: Optional[str] = None):
+    """
+    Decorator form of `timer`.
+
+    Args:
+        operation: Operation name (defaults to the function's qualified name)
+    """
+    def decorator(fn):
+        name = operation or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
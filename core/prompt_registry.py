@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Prompt Registry for CEN AI DAM Editor
+
+Precompiled and memoized prompt rendering on top of `PromptTemplates`:
+- Analysis prompts whose only inputs are the brand config tables (category
+  per brand, product attributes per brand/category, common attributes) are
+  rendered once when the registry is built, so the tables are not
+  re-serialized with `json.dumps` for every analyzed image
+- Any other template is rendered through `render()`, which memoizes the
+  text in a bounded LRU cache keyed by the template name and its parameters
+- Every prompt handed out is measured in UTF-8 bytes and recorded in the
+  `prompt_bytes` histogram, and `stats()` / `static_sizes()` report the
+  largest prompts so token-heavy templates can be found and trimmed
+
+Rendered text is byte-identical to calling the `PromptTemplates` method
+directly.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .config import PRODUCT_CATEGORY, PRODUCT_ATTRIBUTE, COMMON_ATTRIBUTE
+from .prompt_templates import PromptTemplates
+from .metrics import BYTE_BUCKETS, get_registry
+
+PROMPT_BYTES_METRIC = 'prompt_bytes'
+CACHE_SIZE = 512
+
+# Leaf parameter types that can be part of a cache key. Anything else
+# (in-memory images, custom objects) renders uncached.
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+class _Uncacheable(Exception):
+    """Raised while building a cache key from a parameter that cannot be keyed."""
+
+
+def _freeze(value):
+    """
+    Convert a template parameter into a hashable cache key component.
+
+    Container types are kept in the key because `str()` of a list and a
+    tuple differ, and dict insertion order is kept because templates embed
+    dicts verbatim.
+    """
+    if isinstance(value, _KEY_TYPES):
+        return value
+    if isinstance(value, dict):
+        return ('dict', tuple((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(item) for item in value))
+    raise _Uncacheable(type(value).__name__)
+
+
+def prompt_bytes(text: str) -> int:
+    """Return the UTF-8 size of a prompt in bytes."""
+    return len(text.encode('utf-8'))
+
+
+class PromptRegistry:
+    """
+    Precompiled and memoized prompt renderer.
+
+    Thread-safe; one instance is shared by all analyzers and generators in
+    the process (see `get_prompt_registry`).
+    """
+
+    def __init__(
+        self,
+        product_category: Optional[Dict] = None,
+        product_attribute: Optional[Dict] = None,
+        common_attribute: Optional[Dict] = None,
+        cache_size: int = CACHE_SIZE
+    ):
+        """
+        Initialize PromptRegistry and precompile the analysis prompts.
+
+        Args:
+            product_category: Categories per brand (defaults to config.PRODUCT_CATEGORY)
+            product_attribute: Attributes per brand and category (defaults to config.PRODUCT_ATTRIBUTE)
+            common_attribute: Common attribute options (defaults to config.COMMON_ATTRIBUTE)
+            cache_size: Maximum number of memoized `render()` results
+        """
+        self.product_category = PRODUCT_CATEGORY if product_category is None else product_category
+        self.product_attribute = PRODUCT_ATTRIBUTE if product_attribute is None else product_attribute
+        self.common_attribute = COMMON_ATTRIBUTE if common_attribute is None else common_attribute
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._static: Dict[tuple, str] = {}
+        self._rendered: 'OrderedDict[tuple, str]' = OrderedDict()
+        self._stats: Dict[str, Dict] = {}
+        self._size_histogram = get_registry().histogram(
+            PROMPT_BYTES_METRIC, 'Rendered prompt size in UTF-8 bytes', BYTE_BUCKETS
+        )
+
+        self.precompile()
+
+    def precompile(self):
+        """Render the brand/category analysis prompts from the config tables."""
+        static = {}
+        for brand, categories in self.product_category.items():
+            static[('product_category_analysis', brand)] = self._category_text(categories)
+        for brand, categories in self.product_attribute.items():
+            for category, attributes_config in categories.items():
+                static[('product_attribute_analysis', brand, category)] = \
+                    self._attribute_text(category, attributes_config)
+        static[('common_attribute_analysis',)] = PromptTemplates.common_attribute_analysis(
+            colors=self.common_attribute['색상'],
+            patterns=self.common_attribute['무늬'],
+            styles=self.common_attribute['스타일'],
+            target_customers=self.common_attribute['타겟 고객'],
+            target_ages=self.common_attribute['타겟 연령층']
+        )
+
+        with self._lock:
+            self._static = static
+            self._rendered.clear()
+
+    # ================================================================
+    # ANALYSIS PROMPTS
+    # ================================================================
+
+    def category_prompt(self, brand: str, measure: bool = True) -> str:
+        """
+        Get the category classification prompt for a brand.
+
+        Args:
+            brand: Brand name (key of PRODUCT_CATEGORY)
+            measure: Record the prompt in the size statistics (False for
+                lookups that do not send it, e.g. version checks)
+
+        Returns:
+            Prompt text; brands without categories get an empty option table
+        """
+        key = ('product_category_analysis', brand)
+        text = self._static.get(key)
+        if text is None:
+            text = self._category_text({})
+        return self._measure(key[0], text, hit=True) if measure else text
+
+    def attribute_prompt(self, brand: str, category: str, measure: bool = True) -> Optional[str]:
+        """
+        Get the product-specific attribute prompt for a brand category.
+
+        Args:
+            brand: Brand name (key of PRODUCT_ATTRIBUTE)
+            category: Product category within the brand
+            measure: Record the prompt in the size statistics
+
+        Returns:
+            Prompt text, or None when no attributes are defined for the category
+        """
+        key = ('product_attribute_analysis', brand, category)
+        text = self._static.get(key)
+        if text is None or not measure:
+            return text
+        return self._measure(key[0], text, hit=True)
+
+    def common_attribute_prompt(self, measure: bool = True) -> str:
+        """Get the common attribute (style, color, pattern, target) prompt."""
+        key = ('common_attribute_analysis',)
+        text = self._static[key]
+        return self._measure(key[0], text, hit=True) if measure else text
+
+    # ================================================================
+    # MEMOIZED RENDERING
+    # ================================================================
+
+    def render(self, template: str, measure: bool = True, **params) -> str:
+        """
+        Render a PromptTemplates method, reusing earlier renders of the same parameters.
+
+        Args:
+            template: Name of the PromptTemplates static method
+            measure: Record the prompt in the size statistics
+            **params: Keyword arguments for the template
+
+        Returns:
+            Prompt text
+        """
+        build = getattr(PromptTemplates, template)
+        try:
+            key = (template, tuple((name, _freeze(params[name])) for name in sorted(params)))
+        except _Uncacheable:
+            text = build(**params)
+            return self._measure(template, text, hit=False) if measure else text
+
+        with self._lock:
+            text = self._rendered.get(key)
+            if text is not None:
+                self._rendered.move_to_end(key)
+        if text is not None:
+            return self._measure(template, text, hit=True) if measure else text
+
+        text = build(**params)
+        with self._lock:
+            self._rendered[key] = text
+            while len(self._rendered) > self.cache_size:
+                self._rendered.popitem(last=False)
+        return self._measure(template, text, hit=False) if measure else text
+
+    def clear(self):
+        """Drop memoized renders and statistics (precompiled prompts are kept)."""
+        with self._lock:
+            self._rendered.clear()
+            self._stats.clear()
+
+    # ================================================================
+    # SIZE REPORTING
+    # ================================================================
+
+    def stats(self) -> List[Dict]:
+        """
+        Summarize prompt usage per template, largest first.
+
+        Returns:
+            List of dicts with template, renders, cache_hits, last_bytes and max_bytes
+        """
+        with self._lock:
+            rows = [dict(template=name, **entry) for name, entry in self._stats.items()]
+        return sorted(rows, key=lambda row: row['max_bytes'], reverse=True)
+
+    def static_sizes(self) -> Dict[str, int]:
+        """
+        Get the UTF-8 size of every precompiled prompt.
+
+        Returns:
+            Dict of "template[/brand[/category]]" to size in bytes
+        """
+        return {'/'.join(key): prompt_bytes(text) for key, text in self._static.items()}
+
+    def _measure(self, template: str, text: str, hit: bool) -> str:
+        size = prompt_bytes(text)
+        self._size_histogram.observe(size, template=template)
+        with self._lock:
+            entry = self._stats.setdefault(
+                template, {'renders': 0, 'cache_hits': 0, 'last_bytes': 0, 'max_bytes': 0}
+            )
+            entry['renders'] += 1
+            entry['cache_hits'] += int(hit)
+            entry['last_bytes'] = size
+            entry['max_bytes'] = max(entry['max_bytes'], size)
+        return text
+
+    @staticmethod
+    def _category_text(categories: Dict) -> str:
+        return PromptTemplates.product_category_analysis(
+            product_categories=json.dumps(categories, ensure_ascii=False, indent=2)
+        )
+
+    @staticmethod
+    def _attribute_text(category: str, attributes_config: Dict) -> str:
+        return PromptTemplates.product_attribute_analysis(
+            category=category,
+            attributes_config=json.dumps(attributes_config, ensure_ascii=False, indent=2)
+        )
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get the process-wide PromptRegistry, precompiling it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
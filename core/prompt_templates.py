@@ -10,6 +10,11 @@ Organized by feature category as defined in the specification document.
 class PromptTemplates:
     """Collection of AI prompt templates for various image generation and analysis tasks."""
 
+    # Requests sent with a cached analysis prompt as system context
+    CONTEXT_CATEGORY_REQUEST = "시스템 지침에 따라 이미지의 정확한 카테고리를 결정해주세요."
+    CONTEXT_ATTRIBUTE_REQUEST = "시스템 지침에 따라 이미지의 {category} 전용 속성을 분석해주세요."
+    CONTEXT_COMMON_REQUEST = "시스템 지침에 따라 이미지에서 상품의 핵심 속성을 분석해주세요."
+
     # ================================================================
     # PRODUCT ANALYSIS PROMPTS
     # ================================================================
@@ -392,4 +397,210 @@ class PromptTemplates:
         제공된 여러 제품 이미지들을 활용하여 조화로운 인테리어 장면을 연출해주세요.
         반드시, **제품의 고유 속성(색상,형태)**는 유지되어야 합니다.
         모든 제품이 하나의 공간에 자연스럽게 배치된 것처럼 보이게 해주세요.
-        """
\ No newline at end of file
+        """
+    # ================================================================
+    # ADVANCED GENERATION PROMPTS
+    # ================================================================
+
+    @staticmethod
+    def style_based_image_template(
+        placement: str,
+        environment: str,
+        mood: list,
+        lighting: str = "자연광"
+    ) -> str:
+        """Place the product in an environment styled after reference images."""
+        mood_text = ", ".join(mood) if mood else "자연스러운"
+
+        return f"""
+Product Placement & Style-based Image Generation
+
+Create a realistic lifestyle image featuring the product in the specified environment.
+
+**Product**: Use the uploaded product image
+**Environment**: {environment}
+**Placement**: {placement}
+**Style Reference**: Apply the visual style, composition, and atmosphere from the reference images
+**Mood**: {mood_text}
+**Lighting**: {lighting}
+
+Requirements:
+1. Place the product naturally in the environment
+2. Match the style, color palette, and atmosphere of reference images
+3. Ensure realistic lighting and shadows
+4. Maintain product visibility and focus
+5. Create a cohesive, magazine-quality composition
+
+Generate a high-quality lifestyle image that showcases the product in an appealing context.
+"""
+
+    @staticmethod
+    def illustration_template(
+        content_type: str,
+        text_content: str,
+        subject: str,
+        visual_style: str,
+        color_palette: str,
+        composition: str = "자동",
+        aspect_ratio: str = "16:9 와이드",
+        mood: str = "",
+        details: str = ""
+    ) -> str:
+        """Illustrate a piece of text content."""
+        return f"""
+Illustration Image Generation for {content_type}
+
+Create an illustration that visually represents the following text content:
+
+**Text Content**:
+{text_content}
+
+**Main Subject/Theme**: {subject}
+**Visual Style**: {visual_style}
+**Color Palette**: {color_palette}
+**Composition**: {composition}
+**Aspect Ratio**: {aspect_ratio}
+**Mood/Atmosphere**: {mood if mood else "자연스럽고 몰입감 있는"}
+**Additional Details**: {details if details else "없음"}
+
+Requirements:
+1. Capture the essence and key elements of the text
+2. Create a compelling visual narrative
+3. Use the specified visual style consistently
+4. Apply appropriate color palette and composition
+5. Ensure the illustration complements and enhances the text content
+
+Generate a professional-quality illustration suitable for {content_type}.
+"""
+
+    @staticmethod
+    def artwork_completion_template(
+        artwork_type: str,
+        coloring_style: str,
+        color_scheme: dict,
+        detail_level: str,
+        shading: bool = True,
+        light_source: str = "자동",
+        texture: list = None,
+        effects: dict = None,
+        instructions: str = ""
+    ) -> str:
+        """Complete and colorize a sketch."""
+        if color_scheme['method'] == 'palette':
+            color_instruction = f"Use the following color palette: Primary {color_scheme.get('primary', '')}, Secondary {color_scheme.get('secondary', '')}, Accent {color_scheme.get('accent', '')}"
+        elif color_scheme['method'] == 'reference':
+            color_instruction = "Extract and apply colors from the reference image"
+        else:
+            color_instruction = "Use AI-recommended harmonious color palette"
+
+        texture_list = texture if texture and texture != ["없음"] else []
+        texture_instruction = f"Add textures: {', '.join(texture_list)}" if texture_list else "No additional texture"
+
+        effects_list = []
+        if effects:
+            if effects.get('glow'): effects_list.append("glow effect")
+            if effects.get('blur'): effects_list.append("background blur")
+            if effects.get('grain'): effects_list.append("film grain")
+        effects_instruction = f"Apply effects: {', '.join(effects_list)}" if effects_list else "No special effects"
+
+        return f"""
+Artwork Completion and Coloring
+
+Transform the uploaded sketch into a fully completed, professionally colored illustration.
+
+**Artwork Type**: {artwork_type}
+**Coloring Style**: {coloring_style}
+**Detail Level**: {detail_level}
+**Color Scheme**: {color_instruction}
+**Shading**: {"Add realistic shading with light source from " + light_source if shading else "Flat coloring without shading"}
+**Texture**: {texture_instruction}
+**Effects**: {effects_instruction}
+**Additional Instructions**: {instructions if instructions else "없음"}
+
+Requirements:
+1. Preserve the original sketch's composition and line work
+2. Apply professional-quality coloring
+3. Add appropriate depth and dimension
+4. Ensure color harmony and visual appeal
+5. Maintain the artistic intent of the original sketch
+6. Apply the specified detail level consistently
+
+Complete the artwork with the highest quality, ready for final use.
+"""
+
+    @staticmethod
+    def multilingual_image_template(
+        target_language: str,
+        font_family: str = "",
+        emphasis_keywords: str = "",
+        translation_tone: str = "일반",
+        requirements: str = ""
+    ) -> str:
+        """Translate the text in an image while keeping its layout."""
+        return f"""
+Multilingual Image Conversion
+
+Create a new version of this image with all text translated to {target_language}.
+
+**Original Image**: Contains text that needs translation
+**Target Language**: {target_language}
+**Font Settings**: {font_family if font_family else "Auto-select appropriate font for target language"}
+**Emphasis Keywords**: {emphasis_keywords if emphasis_keywords else "None"}
+**Translation Tone**: {translation_tone}
+**Additional Requirements**: {requirements if requirements else "None"}
+
+Requirements:
+1. Translate all visible text in the image to {target_language}
+2. Maintain the original layout and design
+3. Use culturally appropriate fonts and typography
+4. Preserve image quality and visual hierarchy
+5. Ensure translations are contextually accurate
+6. Apply appropriate text formatting for the target language
+7. Maintain brand consistency and visual appeal
+
+Generate a professional-quality multilingual version suitable for {target_language} markets.
+"""
+
+    @staticmethod
+    def infographic_image_template(
+        data_source_description: str,
+        content_type: str,
+        purpose: str,
+        target_audience: str = "",
+        visual_style: str = "프레젠테이션 슬라이드",
+        key_message: str = ""
+    ) -> str:
+        """Visualize described data as an infographic."""
+        return f"""
+Infographic Image Generation
+
+Create a professional infographic that visualizes the following information:
+
+**Data/Content**:
+{data_source_description}
+
+**Content Type**: {content_type}
+**Purpose**: {purpose}
+**Target Audience**: {target_audience if target_audience else "General audience"}
+**Visual Style**: {visual_style}
+**Key Message**: {key_message if key_message else "Clearly communicate the data"}
+
+Requirements:
+1. Create a visually compelling infographic design
+2. Use appropriate charts, graphs, icons, and visual elements
+3. Ensure information hierarchy and flow
+4. Apply consistent color scheme and typography
+5. Make data easy to understand at a glance
+6. Include clear labels and legends
+7. Optimize for readability and engagement
+8. Match the specified visual style: {visual_style}
+
+Visual Style Guidelines:
+- 프레젠테이션 슬라이드: Clean, professional, suitable for presentations
+- 그리드형: Organized grid layout with clear sections
+- 타임라인: Chronological flow with timeline visualization
+- 플로우차트: Process flow with connected steps
+- 인포그래픽 차트: Data-driven charts and visualizations
+
+Generate a high-quality infographic optimized for {purpose}.
+"""
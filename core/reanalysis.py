@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Re-analysis for CEN AI DAM Editor
+
+Keeps DAM analysis metadata in step with the taxonomy in `core.config` and
+the analysis prompts without re-running the whole 4-stage analysis:
+- Every analysis is stamped with the version of each stage
+  (`analysis_versions`); `find_stale_assets()` scans a metadata folder and
+  compares the stamps with the versions the current config and prompts give
+  for each asset, e.g. adding an attribute to Furniture/소파 makes only the
+  product attribute stage of sofa assets stale
+- `reanalyze_assets()` re-runs only the stale stages of each asset; a later
+  stage runs again only when an earlier result it depends on changes (new
+  attributes give the description different input)
+
+Only records produced by `ImageAnalyzer` are considered; metadata of
+derived images (batch tool outputs) carries no analysis of its own.
+"""
+
+import os
+import json
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from .logger import get_logger, log_context, new_request_id
+from .tracing import span
+
+
+def load_analysis_metadata(metadata_path: str) -> Optional[Dict]:
+    """
+    Load an analysis metadata record produced by ImageAnalyzer.
+
+    Args:
+        metadata_path: Metadata JSON file
+
+    Returns:
+        Metadata dict, or None for unreadable files and other metadata
+    """
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except Exception as e:
+        logger = get_logger()
+        logger.warning("Failed to read metadata %s: %s", metadata_path, e)
+        return None
+    if not isinstance(metadata, dict) or 'category_data' not in metadata or not metadata.get('image_path'):
+        return None
+    return metadata
+
+
+def find_stale_assets(metadata_dir: str, analyzer) -> List[Dict]:
+    """
+    Find analyzed assets whose metadata is out of date with the current taxonomy and prompts.
+
+    Args:
+        metadata_dir: Folder of analysis metadata JSON files
+        analyzer: ImageAnalyzer whose prompts and model define the current versions
+
+    Returns:
+        List of dicts with metadata_path, image_path, brand, category,
+        stages (stale stage names) and image_exists
+    """
+    if not os.path.isdir(metadata_dir):
+        return []
+
+    stale = []
+    for filename in sorted(os.listdir(metadata_dir)):
+        if not filename.endswith('.json'):
+            continue
+        metadata_path = os.path.join(metadata_dir, filename)
+        metadata = load_analysis_metadata(metadata_path)
+        if metadata is None:
+            continue
+        stages = analyzer.stale_stages(metadata)
+        if stages:
+            stale.append({
+                'metadata_path': metadata_path,
+                'image_path': metadata['image_path'],
+                'brand': metadata.get('brand', ''),
+                'category': metadata.get('category', ''),
+                'stages': stages,
+                'image_exists': os.path.exists(metadata['image_path'])
+            })
+    return stale
+
+
+def summarize_stale(stale_assets: List[Dict]) -> List[Dict]:
+    """
+    Count stale assets per brand, category and stage.
+
+    Args:
+        stale_assets: Result of find_stale_assets
+
+    Returns:
+        List of dicts with brand, category, stage and assets, largest first
+    """
+    counts = Counter(
+        (asset['brand'], asset['category'], stage)
+        for asset in stale_assets
+        for stage in asset['stages']
+    )
+    return [
+        {'brand': brand, 'category': category, 'stage': stage, 'assets': count}
+        for (brand, category, stage), count in counts.most_common()
+    ]
+
+
+def reanalyze_assets(
+    stale_assets: List[Dict],
+    analyzer,
+    progress_callback: Optional[Callable[[int, int, Dict], None]] = None,
+    trace_dir: Optional[str] = None,
+    trace_attributes: Optional[Dict] = None
+) -> Dict:
+    """
+    Re-run the stale stages of each asset and save the updated metadata.
+
+    The analyzer's output_dir should be the folder the metadata was read
+    from, so each record is updated in place. Each asset is its own trace
+    (root span 'reanalysis.item'), so a large run does not collect every
+    asset's spans into one trace.
+
+    Args:
+        stale_assets: Result of find_stale_assets
+        analyzer: ImageAnalyzer to run the stages with
+        progress_callback: Called as (completed_count, total_count, asset) after each asset
+        trace_dir: Directory the per-asset traces are written to
+        trace_attributes: Extra attributes of each asset's root span
+
+    Returns:
+        Dict with done, failed and skipped (image missing) counts
+    """
+    logger = get_logger()
+    summary = {'done': 0, 'failed': 0, 'skipped': 0}
+    total = len(stale_assets)
+
+    for index, asset in enumerate(stale_assets, 1):
+        metadata = load_analysis_metadata(asset['metadata_path']) if asset['image_exists'] else None
+        if metadata is None:
+            summary['skipped'] += 1
+        else:
+            try:
+                with log_context(request_id=new_request_id()), \
+                        span('reanalysis.item', trace_dir=trace_dir,
+                             source=os.path.basename(asset['image_path']),
+                             stages=','.join(asset['stages']), **(trace_attributes or {})):
+                    analyzer.reanalyze(metadata)
+                summary['done'] += 1
+            except Exception as e:
+                logger.warning("Re-analysis failed for %s: %s", asset['image_path'], e)
+                summary['failed'] += 1
+        if progress_callback:
+            progress_callback(index, total, asset)
+
+    logger.info(
+        "Re-analysis complete: %d updated, %d failed, %d skipped",
+        summary['done'], summary['failed'], summary['skipped']
+    )
+    return summary
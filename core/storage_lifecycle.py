@@ -0,0 +1,518 @@
+# -*- coding: utf-8 -*-
+"""
+Storage Lifecycle Manager for CEN AI DAM Editor
+
+Applies per-folder retention policies to a user workspace:
+- Retention by age, file count and total size quota
+- Tiering of old files into compressed monthly archives
+- Protection of assets referenced by projects or DAM metadata
+- Safe scheduled execution in a background thread
+"""
+
+import os
+import json
+import time
+import zipfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from .file_events import notify_file_written, notify_file_removed
+from .logger import get_logger
+
+ARCHIVE_FOLDER = 'archive'
+TEMP_FOLDER = 'temp'
+POLICY_FILENAME = '.lifecycle_policies.json'
+LOCK_FILENAME = '.lifecycle.lock'
+
+# Retention policies per workspace folder.
+#   max_age_days: files older than this are expired
+#   max_count:    keep at most this many files (oldest go first)
+#   max_total_mb: keep the folder under this size (oldest go first)
+#   action:       'archive' (move into compressed archive) or 'delete'
+# Uploads are user originals: age-based archiving is opt-in (workspace override),
+# only the size cap applies by default. Archived files can be restored from Settings.
+DEFAULT_RETENTION_POLICIES = {
+    'uploads': {
+        'max_age_days': None,
+        'max_count': None,
+        'max_total_mb': 10240,
+        'action': 'archive'
+    },
+    'generated': {
+        'max_age_days': 180,
+        'max_count': 5000,
+        'max_total_mb': 10240,
+        'action': 'archive'
+    },
+    TEMP_FOLDER: {
+        'max_age_days': 1,
+        'max_count': None,
+        'max_total_mb': None,
+        'action': 'delete'
+    },
+}
+
+
+class StorageLifecycleManager:
+    """
+    Retention, archiving and cleanup for one workspace.
+
+    Files modified within the grace period and files referenced by a project
+    or by DAM metadata are never deleted or archived.
+    """
+
+    def __init__(
+        self,
+        workspace_dir: str,
+        policies: Optional[Dict[str, Dict]] = None,
+        grace_period_minutes: int = 10
+    ):
+        """
+        Initialize StorageLifecycleManager.
+
+        Args:
+            workspace_dir: Path to user's workspace directory
+            policies: Retention policies per folder (defaults + workspace overrides)
+            grace_period_minutes: Files modified more recently are never touched
+        """
+        self.workspace_dir = os.path.abspath(workspace_dir)
+        self.archive_dir = os.path.join(self.workspace_dir, ARCHIVE_FOLDER)
+        self.grace_period_seconds = grace_period_minutes * 60
+
+        if policies is None:
+            policies = self._load_policies()
+        self.policies = policies
+
+        self.last_report: Optional[Dict] = None
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ================================================================
+    # POLICY MANAGEMENT
+    # ================================================================
+
+    def _load_policies(self) -> Dict[str, Dict]:
+        """Merge workspace policy overrides into the defaults."""
+        policies = {folder: dict(policy) for folder, policy in DEFAULT_RETENTION_POLICIES.items()}
+        policy_path = os.path.join(self.workspace_dir, POLICY_FILENAME)
+
+        if os.path.exists(policy_path):
+            try:
+                with open(policy_path, 'r', encoding='utf-8') as f:
+                    overrides = json.load(f)
+                for folder, policy in overrides.items():
+                    policies.setdefault(folder, {}).update(policy)
+            except Exception as e:
+                logger = get_logger()
+                logger.warning(f"Failed to load lifecycle policies: {e}")
+
+        return policies
+
+    def save_policies(self, policies: Dict[str, Dict]):
+        """
+        Persist retention policies for this workspace.
+
+        Args:
+            policies: Retention policies per folder
+        """
+        self.policies = policies
+        policy_path = os.path.join(self.workspace_dir, POLICY_FILENAME)
+        with open(policy_path, 'w', encoding='utf-8') as f:
+            json.dump(policies, f, ensure_ascii=False, indent=2)
+
+    # ================================================================
+    # EXECUTION
+    # ================================================================
+
+    def run(self, dry_run: bool = False) -> Dict:
+        """
+        Apply all retention policies once.
+
+        Args:
+            dry_run: Only report what would be removed or archived
+
+        Returns:
+            Report dictionary per folder
+        """
+        logger = get_logger()
+
+        if not self._run_lock.acquire(blocking=False):
+            logger.info("Lifecycle run already in progress, skipping")
+            return {}
+
+        lock_path = os.path.join(self.workspace_dir, LOCK_FILENAME)
+        lock_fd = None
+        try:
+            # Cross-process guard: only one app instance sweeps a workspace at a time
+            try:
+                lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if time.time() - os.path.getmtime(lock_path) < 3600:
+                    logger.info("Lifecycle lock held by another process, skipping")
+                    return {}
+                os.remove(lock_path)
+                lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+
+            protected = self.get_protected_paths()
+            report = {
+                'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'dry_run': dry_run,
+                'folders': {}
+            }
+
+            for folder, policy in self.policies.items():
+                report['folders'][folder] = self._apply_policy(folder, policy, protected, dry_run)
+
+            if not dry_run:
+                self._cleanup_legacy_temp_files(report)
+
+            report['finished_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.last_report = report
+            return report
+
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+            self._run_lock.release()
+
+    def _apply_policy(self, folder: str, policy: Dict, protected: Set[str], dry_run: bool) -> Dict:
+        """Select and process expired / over-quota files for one folder."""
+        result = {'deleted': 0, 'archived': 0, 'freed_bytes': 0, 'protected': 0, 'files': []}
+        folder_path = os.path.join(self.workspace_dir, folder)
+
+        if not os.path.isdir(folder_path):
+            return result
+
+        # (mtime, size, path), oldest first
+        files = []
+        for root, _, filenames in os.walk(folder_path):
+            for filename in filenames:
+                file_path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, file_path))
+        files.sort()
+
+        now = time.time()
+        max_age_days = policy.get('max_age_days')
+        max_count = policy.get('max_count')
+        max_total_mb = policy.get('max_total_mb')
+
+        # Protected files can never be removed, so they do not count toward the quotas
+        unprotected = [(size, path) for _, size, path in files if os.path.abspath(path) not in protected]
+        remaining_count = len(unprotected)
+        remaining_bytes = sum(size for size, _ in unprotected)
+        max_total_bytes = max_total_mb * 1024 * 1024 if max_total_mb else None
+
+        selected = []
+        for mtime, size, file_path in files:
+            age_seconds = now - mtime
+            expired = max_age_days is not None and age_seconds > max_age_days * 86400
+            over_count = max_count is not None and remaining_count > max_count
+            over_size = max_total_bytes is not None and remaining_bytes > max_total_bytes
+
+            if not (expired or over_count or over_size):
+                continue
+
+            if age_seconds < self.grace_period_seconds:
+                continue
+
+            if os.path.abspath(file_path) in protected:
+                result['protected'] += 1
+                continue
+
+            selected.append((size, file_path))
+            remaining_count -= 1
+            remaining_bytes -= size
+
+        action = policy.get('action', 'delete')
+        for size, file_path in selected:
+            result['files'].append(os.path.relpath(file_path, self.workspace_dir))
+            if dry_run:
+                continue
+
+            try:
+                if action == 'archive':
+                    self._archive_file(folder, file_path)
+                    result['archived'] += 1
+                else:
+                    os.remove(file_path)
+                    notify_file_removed(file_path)
+                    result['deleted'] += 1
+                result['freed_bytes'] += size
+            except Exception as e:
+                logger = get_logger()
+                logger.error(f"Lifecycle {action} failed for {file_path}: {e}")
+
+        return result
+
+    def _archive_file(self, folder: str, file_path: str):
+        """Move a file into the folder's compressed monthly archive."""
+        month = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m')
+        archive_folder = os.path.join(self.archive_dir, folder)
+        os.makedirs(archive_folder, exist_ok=True)
+        archive_path = os.path.join(archive_folder, f"{month}.zip")
+
+        arcname = os.path.relpath(file_path, os.path.join(self.workspace_dir, folder))
+        with zipfile.ZipFile(archive_path, 'a', compression=zipfile.ZIP_DEFLATED) as zf:
+            if arcname in zf.namelist():
+                base, ext = os.path.splitext(arcname)
+                arcname = f"{base}_{int(time.time())}{ext}"
+            zf.write(file_path, arcname)
+
+        os.remove(file_path)
+        notify_file_removed(file_path)
+        notify_file_written(archive_path)
+
+    def _cleanup_legacy_temp_files(self, report: Dict):
+        """Remove stale fixed-name temp files left in the workspace root."""
+        now = time.time()
+        removed = 0
+        for filename in os.listdir(self.workspace_dir):
+            if not (filename.startswith('temp_') and filename.endswith('.png')):
+                continue
+            file_path = os.path.join(self.workspace_dir, filename)
+            try:
+                if now - os.path.getmtime(file_path) > 86400:
+                    os.remove(file_path)
+                    notify_file_removed(file_path)
+                    removed += 1
+            except OSError:
+                continue
+        report['legacy_temp_removed'] = removed
+
+    def restore_archived(self, folder: str, month: str, arcname: str) -> Optional[str]:
+        """
+        Restore a single archived file back into its folder.
+
+        Args:
+            folder: Original folder name ('uploads', 'generated', ...)
+            month: Archive month ('YYYY-MM')
+            arcname: File name inside the archive
+
+        Returns:
+            Path to the restored file or None if not found
+        """
+        archive_path = os.path.join(self.archive_dir, folder, f"{month}.zip")
+        if not os.path.exists(archive_path):
+            return None
+
+        target_dir = os.path.join(self.workspace_dir, folder)
+        with zipfile.ZipFile(archive_path, 'r') as zf:
+            if arcname not in zf.namelist():
+                return None
+            restored_path = zf.extract(arcname, target_dir)
+
+        notify_file_written(restored_path)
+        return restored_path
+
+    def list_archived_files(self, folder: str, month: str) -> List[str]:
+        """
+        List file names inside one archive bundle.
+
+        Args:
+            folder: Original folder name ('uploads', 'generated', ...)
+            month: Archive month ('YYYY-MM')
+
+        Returns:
+            Archive member names (usable with restore_archived)
+        """
+        archive_path = os.path.join(self.archive_dir, folder, f"{month}.zip")
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as zf:
+                return sorted(name for name in zf.namelist() if not name.endswith('/'))
+        except (OSError, zipfile.BadZipFile):
+            return []
+
+    def list_archives(self) -> List[Dict]:
+        """
+        List archive bundles in this workspace.
+
+        Returns:
+            List of dictionaries with folder, month, file count and size
+        """
+        archives = []
+        if not os.path.isdir(self.archive_dir):
+            return archives
+
+        for folder in sorted(os.listdir(self.archive_dir)):
+            folder_path = os.path.join(self.archive_dir, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for filename in sorted(os.listdir(folder_path)):
+                if not filename.endswith('.zip'):
+                    continue
+                archive_path = os.path.join(folder_path, filename)
+                try:
+                    with zipfile.ZipFile(archive_path, 'r') as zf:
+                        file_count = len(zf.namelist())
+                except zipfile.BadZipFile:
+                    continue
+                archives.append({
+                    'folder': folder,
+                    'month': os.path.splitext(filename)[0],
+                    'files': file_count,
+                    'bytes': os.path.getsize(archive_path)
+                })
+
+        return archives
+
+    # ================================================================
+    # PROTECTION
+    # ================================================================
+
+    def get_protected_paths(self) -> Set[str]:
+        """
+        Collect absolute paths of assets that must not be removed.
+
+        An asset is protected if a project file references it (absolute
+        paths, or paths relative to the project or workspace directory), or
+        if DAM metadata exists for it (by 'image_path' or by matching file
+        name).
+
+        Returns:
+            Set of absolute file paths
+        """
+        protected: Set[str] = set()
+
+        # Project references
+        projects_dir = os.path.join(self.workspace_dir, 'projects')
+        if os.path.isdir(projects_dir):
+            for item in os.listdir(projects_dir):
+                project_file = os.path.join(projects_dir, item, 'project.json')
+                if not os.path.exists(project_file):
+                    continue
+                try:
+                    with open(project_file, 'r', encoding='utf-8') as f:
+                        project_data = json.load(f)
+                except Exception:
+                    continue
+                project_dir = os.path.dirname(project_file)
+                for value in self._iter_strings(project_data):
+                    if os.path.isabs(value):
+                        protected.add(os.path.abspath(value))
+                    elif value:
+                        protected.add(os.path.abspath(os.path.join(project_dir, value)))
+                        protected.add(os.path.abspath(os.path.join(self.workspace_dir, value)))
+
+        # DAM metadata references
+        metadata_dir = os.path.join(self.workspace_dir, 'metadata')
+        if os.path.isdir(metadata_dir):
+            metadata_bases = set()
+            for filename in os.listdir(metadata_dir):
+                if not filename.endswith('.json'):
+                    continue
+                metadata_bases.add(os.path.splitext(filename)[0])
+                try:
+                    with open(os.path.join(metadata_dir, filename), 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                except Exception:
+                    continue
+                image_path = metadata.get('image_path') if isinstance(metadata, dict) else None
+                if image_path:
+                    protected.add(os.path.abspath(image_path))
+
+            for folder in ('uploads', 'generated'):
+                folder_path = os.path.join(self.workspace_dir, folder)
+                if not os.path.isdir(folder_path):
+                    continue
+                for filename in os.listdir(folder_path):
+                    if os.path.splitext(filename)[0] in metadata_bases:
+                        protected.add(os.path.abspath(os.path.join(folder_path, filename)))
+
+        return protected
+
+    @classmethod
+    def _iter_strings(cls, value):
+        """Yield every string found in a nested JSON structure."""
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from cls._iter_strings(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from cls._iter_strings(item)
+
+    # ================================================================
+    # SCHEDULING
+    # ================================================================
+
+    def start(self, interval_hours: float = 6):
+        """
+        Start scheduled background execution (idempotent).
+
+        Args:
+            interval_hours: Hours between lifecycle runs
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run_scheduled,
+            args=(interval_hours * 3600,),
+            name=f"storage-lifecycle-{os.path.basename(self.workspace_dir)}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop scheduled background execution."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run_scheduled(self, interval_seconds: float):
+        """Background loop running the lifecycle at a fixed interval."""
+        logger = get_logger()
+        # Let the app finish starting up before the first sweep
+        if self._stop.wait(timeout=60):
+            return
+
+        while not self._stop.is_set():
+            try:
+                report = self.run()
+                if report:
+                    logger.info(f"Lifecycle run complete: {self._summarize(report)}")
+            except Exception as e:
+                logger.error(f"Lifecycle run failed: {e}")
+
+            self._stop.wait(timeout=interval_seconds)
+
+    @staticmethod
+    def _summarize(report: Dict) -> str:
+        """Build a one-line summary of a lifecycle report."""
+        parts = []
+        for folder, result in report.get('folders', {}).items():
+            parts.append(f"{folder}: -{result['deleted']} / archived {result['archived']}")
+        return ", ".join(parts)
+
+
+_instances: Dict[str, StorageLifecycleManager] = {}
+_instances_lock = threading.Lock()
+
+
+def get_lifecycle_manager(workspace_dir: str) -> StorageLifecycleManager:
+    """
+    Get the shared lifecycle manager for a workspace.
+
+    Args:
+        workspace_dir: Path to user's workspace directory
+
+    Returns:
+        StorageLifecycleManager instance (created on first use)
+    """
+    key = os.path.abspath(workspace_dir)
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = StorageLifecycleManager(key)
+        return _instances[key]
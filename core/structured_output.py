@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Structured Output for CEN AI DAM Editor
+
+Response schemas for the analyzer stages and tolerant parsing of the JSON
+the model returns:
+- Schemas are generated from `core.config` (category options per brand,
+  attribute options per brand/category, common attribute options) in the
+  OpenAPI subset Gemini's structured-output mode accepts (`response_schema`),
+  and cached per brand/category
+- `parse_response()` takes the fast path (`json.loads`) first; only on
+  failure does it repair common defects (markdown fences, text around the
+  JSON, trailing commas, responses cut off mid-object) and retry
+- The parsed value is checked against the schema: numbers given as strings
+  or percentages are converted and clamped, enum values are matched
+  ignoring case and spacing, scalars are wrapped where a list is expected.
+  Missing required fields raise ResponseFormatError so the caller can
+  retry just that stage
+"""
+
+import re
+import json
+import functools
+from typing import Dict, List
+
+from .config import PRODUCT_CATEGORY, PRODUCT_ATTRIBUTE, COMMON_ATTRIBUTE
+
+_FENCE = re.compile(r'^```[a-zA-Z]*\s*|\s*```$')
+
+
+class ResponseFormatError(ValueError):
+    """Raised when a model response cannot be parsed into the expected structure."""
+
+
+# ================================================================
+# SCHEMAS
+# ================================================================
+
+def _confidence() -> Dict:
+    return {'type': 'NUMBER', 'minimum': 0, 'maximum': 1}
+
+
+def _choice(options: List[str]) -> Dict:
+    """An attribute answer: one of the options with confidence and reason."""
+    return {
+        'type': 'OBJECT',
+        'properties': {
+            'value': {'type': 'STRING', 'enum': list(options)},
+            'confidence': _confidence(),
+            'reason': {'type': 'STRING'},
+        },
+        'required': ['value', 'confidence'],
+    }
+
+
+def _choices(options_by_name: Dict[str, List[str]]) -> Dict:
+    # Attributes are not required: a response missing one is still usable
+    return {
+        'type': 'OBJECT',
+        'properties': {name: _choice(options) for name, options in options_by_name.items()},
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def category_schema(brand: str) -> Dict:
+    """
+    Response schema for category classification.
+
+    Args:
+        brand: Brand name (key of PRODUCT_CATEGORY)
+
+    Returns:
+        Schema dict (category/sub_category restricted to the brand's options)
+    """
+    categories = PRODUCT_CATEGORY.get(brand, {})
+    sub_categories = list(dict.fromkeys(sub for subs in categories.values() for sub in subs))
+    category = {'type': 'STRING'}
+    sub_category = {'type': 'STRING'}
+    if categories:
+        category['enum'] = list(categories)
+    if sub_categories:
+        sub_category['enum'] = sub_categories
+    return {
+        'type': 'OBJECT',
+        'properties': {
+            'category': category,
+            'sub_category': sub_category,
+            'confidence': _confidence(),
+            'reason': {'type': 'STRING'},
+            'key_features': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+        },
+        'required': ['category', 'sub_category', 'confidence'],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def attribute_schema(brand: str, category: str) -> Dict:
+    """
+    Response schema for product-specific attributes.
+
+    Args:
+        brand: Brand name (key of PRODUCT_ATTRIBUTE)
+        category: Product category within the brand
+
+    Returns:
+        Schema dict with one choice object per attribute (empty when none are defined)
+    """
+    return _choices(PRODUCT_ATTRIBUTE.get(brand, {}).get(category, {}))
+
+
+@functools.lru_cache(maxsize=None)
+def common_attribute_schema() -> Dict:
+    """Response schema for the common attributes (style, color, pattern, target)."""
+    return _choices(COMMON_ATTRIBUTE)
+
+
+@functools.lru_cache(maxsize=None)
+def description_schema() -> Dict:
+    """Response schema for the product description."""
+    return {
+        'type': 'OBJECT',
+        'properties': {'description': {'type': 'STRING'}},
+        'required': ['description'],
+    }
+
+
+# ================================================================
+# PARSING
+# ================================================================
+
+def repair_json(text: str) -> str:
+    """
+    Fix common defects in model JSON output.
+
+    Strips markdown fences and surrounding text, drops trailing commas and
+    closes strings/objects/arrays left open by a truncated response
+    (discarding a trailing member that was cut off).
+
+    Args:
+        text: Raw model response
+
+    Returns:
+        JSON text (not guaranteed to parse)
+    """
+    text = _FENCE.sub('', text.strip())
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        raise ResponseFormatError("No JSON object in response")
+    text = text[min(starts):]
+
+    out: List[str] = []
+    stack: List[str] = []
+    # (output length, open brackets) after each member separator, to cut back to
+    cuts = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            out.append(char)
+        elif char in '}]':
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                return ''.join(out)
+        elif char == ',':
+            cuts.append((len(out), list(stack)))
+            out.append(char)
+        else:
+            out.append(char)
+
+    # Truncated: close what is open, cutting back member by member until it parses
+    if in_string:
+        out.append('"')
+    candidates = [(len(out), stack)] + [(length, list(open_stack)) for length, open_stack in reversed(cuts)]
+    for length, open_stack in candidates:
+        head = out[:length]
+        _drop_trailing_comma(head)
+        closed = ''.join(head) + ''.join(reversed(open_stack))
+        try:
+            json.loads(closed)
+            return closed
+        except ValueError:
+            continue
+    return ''.join(out)
+
+
+def _drop_trailing_comma(out: List[str]):
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ',':
+        del out[index:]
+
+
+def parse_response(text: str, schema: Dict) -> Dict:
+    """
+    Parse a model response and check it against a response schema.
+
+    Args:
+        text: Raw model response
+        schema: Schema dict from this module
+
+    Returns:
+        Parsed (and coerced) value
+
+    Raises:
+        ResponseFormatError: If the response cannot be parsed or lacks required fields
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        if not isinstance(text, str):
+            raise ResponseFormatError(f"Empty response ({type(text).__name__})")
+        try:
+            data = json.loads(repair_json(text))
+        except ValueError as e:
+            raise ResponseFormatError(f"Unparseable JSON response: {e}") from e
+    return coerce(data, schema)
+
+
+def coerce(value, schema: Dict, path: str = '$'):
+    """
+    Convert a parsed value to the shape of a schema.
+
+    Args:
+        value: Parsed JSON value
+        schema: Schema dict
+        path: Location used in error messages
+
+    Returns:
+        Coerced value
+
+    Raises:
+        ResponseFormatError: If the value cannot take the schema's shape
+    """
+    kind = schema.get('type')
+    if kind == 'OBJECT':
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+            value = value[0]
+        if not isinstance(value, dict):
+            raise ResponseFormatError(f"{path}: expected an object, got {type(value).__name__}")
+        missing = [key for key in schema.get('required', []) if key not in value]
+        if missing:
+            raise ResponseFormatError(f"{path}: missing {', '.join(missing)}")
+        properties = schema.get('properties', {})
+        return {
+            key: coerce(item, properties[key], f"{path}.{key}") if key in properties else item
+            for key, item in value.items()
+        }
+    if kind == 'ARRAY':
+        items = value if isinstance(value, list) else [value]
+        return [coerce(item, schema.get('items', {}), f"{path}[{index}]") for index, item in enumerate(items)]
+    if kind == 'NUMBER':
+        return _number(value, schema, path)
+    if kind == 'STRING':
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        return _match_enum(text, schema.get('enum'))
+    return value
+
+
+def _number(value, schema: Dict, path: str) -> float:
+    try:
+        if isinstance(value, str):
+            stripped = value.strip()
+            number = float(stripped.rstrip('%')) / (100 if stripped.endswith('%') else 1)
+        else:
+            number = float(value)
+    except (TypeError, ValueError):
+        raise ResponseFormatError(f"{path}: expected a number, got {value!r}")
+    if 'minimum' in schema:
+        number = max(number, schema['minimum'])
+    if 'maximum' in schema:
+        number = min(number, schema['maximum'])
+    return number
+
+
+def _match_enum(text: str, options) -> str:
+    """Map text to the option it names (ignoring case and spacing), else keep it."""
+    if not options or text in options:
+        return text
+    key = re.sub(r'\s+', '', text).casefold()
+    for option in options:
+        if re.sub(r'\s+', '', option).casefold() == key:
+            return option
+    return text
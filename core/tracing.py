@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Request Tracing for CEN AI DAM Editor
+
+Lightweight span tracing for analyzer, generator and Gemini client calls:
+- Spans follow the OpenTelemetry data model (trace/span/parent IDs, unix-nano
+  timestamps, attributes, events, status) and serialize with OTLP JSON
+  field names
+- The current span is tracked with contextvars; a span opened with no
+  current span starts a new trace
+- Finished traces are kept in a small in-memory ring and, when the root
+  span was given a `trace_dir`, written there as one JSON file per trace
+
+Example:
+    with span('ui.apply_prompt', trace_dir=trace_dir_for(workspace_dir)):
+        generator.change_attributes(...)
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .logger import get_logger, get_log_context
+
+TRACES_FOLDER = '.traces'
+
+# Finished traces kept in memory / on disk per directory
+MAX_RECENT_TRACES = 50
+MAX_TRACE_FILES = 500
+
+STATUS_UNSET = 'STATUS_CODE_UNSET'
+STATUS_OK = 'STATUS_CODE_OK'
+STATUS_ERROR = 'STATUS_CODE_ERROR'
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+_recent_traces = deque(maxlen=MAX_RECENT_TRACES)
+_recent_lock = threading.Lock()
+
+
+def trace_dir_for(workspace_dir: str) -> str:
+    """Return the trace directory inside a user workspace."""
+    return os.path.join(workspace_dir, TRACES_FOLDER)
+
+
+class _Trace:
+    """Spans of one trace, collected until the root span ends."""
+
+    __slots__ = ('trace_id', 'trace_dir', 'spans', 'lock')
+
+    def __init__(self, trace_dir: Optional[str]):
+        self.trace_id = uuid.uuid4().hex
+        self.trace_dir = trace_dir
+        self.spans: List['Span'] = []
+        self.lock = threading.Lock()
+
+
+class Span:
+    """
+    One timed unit of work.
+
+    Attributes:
+        name: Operation name (e.g. 'gemini.generate_image')
+        trace_id: 32-hex trace ID shared by all spans in the trace
+        span_id: 16-hex span ID
+        parent_span_id: Parent span ID ('' for the root span)
+        attributes: Key/value attributes (str, int, float or bool)
+        events: [{'name', 'timeUnixNano', 'attributes'}]
+    """
+
+    def __init__(self, name: str, trace: _Trace, parent: Optional['Span'], attributes: Dict):
+        self.name = name
+        self.trace = trace
+        self.trace_id = trace.trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.parent_span_id = parent.span_id if parent else ''
+        self.thread = threading.current_thread().name
+        self.attributes = dict(attributes)
+        self.events: List[Dict] = []
+        self.status_code = STATUS_UNSET
+        self.status_message = ''
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({
+            'name': name,
+            'timeUnixNano': time.time_ns(),
+            'attributes': attributes
+        })
+
+    def set_status(self, code: str, message: str = ''):
+        self.status_code = code
+        self.status_message = message
+
+    def end(self):
+        if self.end_time is not None:
+            return
+        self.end_time = time.time_ns()
+        with self.trace.lock:
+            self.trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end_time = self.end_time if self.end_time is not None else time.time_ns()
+        return (end_time - self.start_time) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id,
+            'name': self.name,
+            'startTimeUnixNano': self.start_time,
+            'endTimeUnixNano': self.end_time,
+            'attributes': {**self.attributes, 'thread.name': self.thread},
+            'events': self.events,
+            'status': {'code': self.status_code, 'message': self.status_message},
+        }
+
+
+def current_span() -> Optional[Span]:
+    """Return the active span in this thread/context, if any."""
+    return _current_span.get()
+
+
+def find_attribute(key: str, default=None):
+    """Return `key` from the active span or its nearest ancestor that sets it."""
+    active = _current_span.get()
+    while active is not None:
+        if key in active.attributes:
+            return active.attributes[key]
+        active = active.parent
+    return default
+
+
+def enclosing_span_name(skip_prefix: str = '') -> Optional[str]:
+    """Return the name of the innermost active span not starting with skip_prefix."""
+    active = _current_span.get()
+    while active is not None:
+        if not (skip_prefix and active.name.startswith(skip_prefix)):
+            return active.name
+        active = active.parent
+    return None
+
+
+def set_attribute(key: str, value):
+    """Set an attribute on the active span (no-op outside a span)."""
+    active = _current_span.get()
+    if active is not None:
+        active.set_attribute(key, value)
+
+
+def add_event(name: str, **attributes):
+    """Record a point-in-time event on the active span (no-op outside a span)."""
+    active = _current_span.get()
+    if active is not None:
+        active.add_event(name, **attributes)
+
+
+@contextmanager
+def span(name: str, trace_dir: Optional[str] = None, **attributes):
+    """
+    Open a span as a child of the active span, or as the root of a new trace.
+
+    Args:
+        name: Operation name
+        trace_dir: Directory the finished trace is written to (root spans only)
+        **attributes: Span attributes
+
+    Yields:
+        Span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        trace = _Trace(trace_dir)
+        request_id = get_log_context().get('request_id')
+        if request_id:
+            attributes.setdefault('request_id', request_id)
+    else:
+        trace = parent.trace
+
+    new_span = Span(name, trace, parent, attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.set_status(STATUS_ERROR, f"{type(e).__name__}: {e}")
+        raise
+    else:
+        if new_span.status_code == STATUS_UNSET:
+            new_span.set_status(STATUS_OK)
+    finally:
+        _current_span.reset(token)
+        new_span.end()
+        if parent is None:
+            _finish_trace(new_span)
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator that runs the function inside a span.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+    """
+    def decorator(fn):
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def bind_context(fn):
+    """
+    Wrap fn so it runs in the caller's context (active span and log IDs)
+    when submitted to another thread.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A Context can only be entered by one thread at a time
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+# ================================================================
+# EXPORT
+# ================================================================
+
+def _finish_trace(root: Span):
+    trace = root.trace
+    with trace.lock:
+        spans = sorted(trace.spans, key=lambda s: s.start_time)
+    document = {
+        'traceId': trace.trace_id,
+        'name': root.name,
+        'startedAt': datetime.fromtimestamp(root.start_time / 1e9).isoformat(timespec='milliseconds'),
+        'durationMs': root.duration_ms,
+        'status': root.status_code,
+        'spans': [s.to_dict() for s in spans],
+    }
+
+    with _recent_lock:
+        _recent_traces.append(document)
+
+    if trace.trace_dir:
+        try:
+            _write_trace(trace.trace_dir, document)
+        except OSError as e:
+            logger = get_logger()
+            logger.warning("Failed to export trace %s: %s", trace.trace_id, e)
+
+
+def _write_trace(trace_dir: str, document: Dict):
+    os.makedirs(trace_dir, exist_ok=True)
+    stamp = datetime.fromtimestamp(document['spans'][0]['startTimeUnixNano'] / 1e9).strftime('%Y%m%d_%H%M%S_%f')
+    trace_path = os.path.join(trace_dir, f"{stamp}_{document['traceId']}.json")
+    temp_path = f"{trace_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, default=str)
+    os.replace(temp_path, trace_path)
+
+    # File names sort by start time; drop the oldest beyond the cap
+    names = sorted(n for n in os.listdir(trace_dir) if n.endswith('.json'))
+    for old_name in names[:-MAX_TRACE_FILES]:
+        try:
+            os.remove(os.path.join(trace_dir, old_name))
+        except OSError:
+            pass
+
+
+def recent_traces() -> List[Dict]:
+    """Return traces finished in this process, newest first."""
+    with _recent_lock:
+        return list(reversed(_recent_traces))
+
+
+def list_traces(trace_dir: str, limit: int = 100) -> List[Dict]:
+    """
+    Summarize trace files in a directory.
+
+    Args:
+        trace_dir: Directory written by the exporter
+        limit: Maximum number of traces to return (newest first)
+
+    Returns:
+        List of {'path', 'traceId', 'name', 'startedAt', 'durationMs',
+        'status', 'spanCount'}
+    """
+    if not os.path.isdir(trace_dir):
+        return []
+
+    summaries = []
+    names = sorted((n for n in os.listdir(trace_dir) if n.endswith('.json')), reverse=True)
+    for name in names[:limit]:
+        path = os.path.join(trace_dir, name)
+        try:
+            document = load_trace(path)
+        except (OSError, ValueError):
+            continue
+        summaries.append({
+            'path': path,
+            'traceId': document.get('traceId'),
+            'name': document.get('name'),
+            'startedAt': document.get('startedAt'),
+            'durationMs': document.get('durationMs'),
+            'status': document.get('status'),
+            'spanCount': len(document.get('spans', [])),
+        })
+    return summaries
+
+
+def load_trace(trace_path: str) -> Dict:
+    """Load one exported trace document."""
+    with open(trace_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def waterfall(document: Dict) -> List[Dict]:
+    """
+    Flatten a trace into waterfall rows in call-tree order.
+
+    Returns:
+        List of {'name', 'depth', 'offsetMs', 'durationMs', 'selfMs',
+        'status', 'attributes'}; offsets are relative to the root start
+    """
+    spans = document.get('spans', [])
+    if not spans:
+        return []
+
+    children: Dict[str, List[Dict]] = {}
+    span_ids = {s['spanId'] for s in spans}
+    roots = []
+    for s in spans:
+        if s['parentSpanId'] and s['parentSpanId'] in span_ids:
+            children.setdefault(s['parentSpanId'], []).append(s)
+        else:
+            roots.append(s)
+
+    origin = min(s['startTimeUnixNano'] for s in spans)
+    rows = []
+
+    def _visit(s: Dict, depth: int):
+        kids = sorted(children.get(s['spanId'], []), key=lambda c: c['startTimeUnixNano'])
+        duration = (s['endTimeUnixNano'] - s['startTimeUnixNano']) / 1e6
+        child_time = sum((c['endTimeUnixNano'] - c['startTimeUnixNano']) / 1e6 for c in kids)
+        rows.append({
+            'name': s['name'],
+            'depth': depth,
+            'offsetMs': (s['startTimeUnixNano'] - origin) / 1e6,
+            'durationMs': duration,
+            'selfMs': max(duration - child_time, 0.0),
+            'status': s['status']['code'],
+            'attributes': s['attributes'],
+        })
+        for kid in kids:
+            _visit(kid, depth + 1)
+
+    for root in sorted(roots, key=lambda r: r['startTimeUnixNano']):
+        _visit(root, 0)
+    return rows
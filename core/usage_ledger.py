@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+Gemini Usage Ledger for CEN AI DAM Editor
+
+Records token usage, latency and estimated cost of every Gemini call and
+enforces daily budgets:
+- One row per call (prompt / cached / candidate / image tokens, model,
+  template, user, brand, latency, status) in SQLite; rows are queued by the caller
+  and written in batches by a background thread
+- Template, user and brand are taken from the active trace spans, so call
+  sites only need to open a span with those attributes
+- Today's totals are kept in memory, so budget checks never hit the disk
+- Budgets (global or per user): past the soft ratio calls are queued one at
+  a time with a minimum interval; at 100% calls are refused
+- Budgets are operator settings, not user settings: the global default
+  comes from GEMINI_DAILY_TOKEN_BUDGET / GEMINI_DAILY_COST_BUDGET_USD, and
+  stored budgets are set with core.budget_admin (the app only shows them);
+  running processes pick up changes within BUDGET_RELOAD_INTERVAL seconds
+"""
+
+import os
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from .logger import get_logger
+from .metrics import inc
+from .tracing import enclosing_span_name, find_attribute
+
+LEDGER_FILENAME = 'usage_ledger.db'
+
+GLOBAL_SCOPE = '*'
+
+# USD per 1M tokens (input, input served from a context cache, text output, image output)
+MODEL_PRICING = {
+    'gemini-2.0-flash': {'input': 0.10, 'cached_input': 0.025, 'output': 0.40, 'image_output': 0.40},
+    'gemini-2.5-flash-image-preview': {'input': 0.30, 'cached_input': 0.075, 'output': 2.50, 'image_output': 30.0},
+}
+DEFAULT_PRICING = {'input': 0.30, 'cached_input': 0.075, 'output': 2.50, 'image_output': 30.0}
+
+GROUP_COLUMNS = ('day', 'user', 'template', 'brand', 'model', 'method', 'status')
+
+DEFAULT_SOFT_RATIO = 0.8
+DEFAULT_THROTTLE_INTERVAL = 2.0
+# Seconds between re-reads of the budgets table (set by other processes)
+BUDGET_RELOAD_INTERVAL = 60.0
+
+INSERT_SQL = '''
+    INSERT INTO gemini_calls (
+        ts, day, user, brand, template, model, method, status,
+        prompt_tokens, candidate_tokens, image_tokens, total_tokens,
+        cost_usd, latency_ms, cached_tokens
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_FLUSH = object()
+_STOP = object()
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a daily Gemini budget is used up."""
+
+
+def default_ledger_path() -> str:
+    """USAGE_LEDGER_PATH, or workspace/usage_ledger.db under the project root."""
+    path = os.getenv('USAGE_LEDGER_PATH')
+    if path:
+        return path
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(root_dir, 'workspace', LEDGER_FILENAME)
+
+
+def extract_usage(usage_metadata) -> Dict[str, int]:
+    """
+    Read token counts from a Gemini response's usage_metadata.
+
+    Args:
+        usage_metadata: GenerateContentResponseUsageMetadata or None
+
+    Returns:
+        {'prompt_tokens', 'cached_tokens', 'candidate_tokens', 'image_tokens',
+        'total_tokens'}; prompt_tokens includes cached_tokens
+    """
+    usage = {'prompt_tokens': 0, 'cached_tokens': 0, 'candidate_tokens': 0, 'image_tokens': 0, 'total_tokens': 0}
+    if usage_metadata is None:
+        return usage
+
+    usage['prompt_tokens'] = getattr(usage_metadata, 'prompt_token_count', None) or 0
+    usage['cached_tokens'] = getattr(usage_metadata, 'cached_content_token_count', None) or 0
+    usage['candidate_tokens'] = getattr(usage_metadata, 'candidates_token_count', None) or 0
+    for detail in getattr(usage_metadata, 'candidates_tokens_details', None) or []:
+        modality = getattr(detail, 'modality', None)
+        modality = getattr(modality, 'value', modality)
+        if str(modality).upper().endswith('IMAGE'):
+            usage['image_tokens'] += getattr(detail, 'token_count', None) or 0
+    usage['total_tokens'] = (
+        getattr(usage_metadata, 'total_token_count', None)
+        or usage['prompt_tokens'] + usage['candidate_tokens']
+    )
+    return usage
+
+
+def estimate_cost(model: str, usage: Dict[str, int]) -> float:
+    """Estimated USD cost of one call from MODEL_PRICING."""
+    pricing = MODEL_PRICING.get(model, DEFAULT_PRICING)
+    text_output = max(usage['candidate_tokens'] - usage['image_tokens'], 0)
+    cached = usage.get('cached_tokens', 0)
+    return (
+        (usage['prompt_tokens'] - cached) * pricing['input']
+        + cached * pricing['cached_input']
+        + text_output * pricing['output']
+        + usage['image_tokens'] * pricing['image_output']
+    ) / 1e6
+
+
+def current_labels() -> Dict[str, Optional[str]]:
+    """Attribution for a call made now: template, user and brand from the active spans."""
+    return {
+        'template': enclosing_span_name(skip_prefix='gemini.'),
+        'user': find_attribute('user'),
+        'brand': find_attribute('brand'),
+    }
+
+
+class UsageLedger:
+    """
+    SQLite ledger of Gemini calls with daily budgets.
+
+    Rows are written by a background thread; call flush() before reading
+    if the most recent calls must be included.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        throttle_interval: float = DEFAULT_THROTTLE_INTERVAL
+    ):
+        """
+        Initialize UsageLedger.
+
+        Args:
+            db_path: SQLite database file
+            batch_size: Maximum rows per write transaction
+            flush_interval: Seconds queued rows may wait before being written
+            throttle_interval: Minimum seconds between calls once a budget
+                passes its soft ratio
+        """
+        self.db_path = os.path.abspath(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.throttle_interval = throttle_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._throttle_lock = threading.Lock()
+        self._last_throttled_call = 0.0
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._init_database()
+
+        self._budgets: Dict[str, Dict] = self._load_budgets()
+        self._budgets_loaded_at = time.monotonic()
+        self._day = None
+        self._today: Dict[str, List[float]] = {}
+        self._roll_day()
+
+        self._queue = queue.Queue()
+        self._flushed = threading.Condition()
+        self._flush_seq = 0
+        self._writer = threading.Thread(target=self._writer_loop, name='usage-ledger', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ================================================================
+    # DATABASE
+    # ================================================================
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_database(self):
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS gemini_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                day TEXT NOT NULL,
+                user TEXT,
+                brand TEXT,
+                template TEXT,
+                model TEXT,
+                method TEXT,
+                status TEXT,
+                prompt_tokens INTEGER DEFAULT 0,
+                candidate_tokens INTEGER DEFAULT 0,
+                image_tokens INTEGER DEFAULT 0,
+                total_tokens INTEGER DEFAULT 0,
+                cost_usd REAL DEFAULT 0,
+                latency_ms REAL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_gemini_calls_day ON gemini_calls (day);
+            CREATE INDEX IF NOT EXISTS idx_gemini_calls_user_day ON gemini_calls (user, day);
+
+            CREATE TABLE IF NOT EXISTS budgets (
+                scope TEXT PRIMARY KEY,
+                daily_tokens INTEGER,
+                daily_cost_usd REAL,
+                soft_ratio REAL DEFAULT 0.8
+            );
+        ''')
+        # Ledgers created before context caching lack cached_tokens
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(gemini_calls)')}
+        if 'cached_tokens' not in columns:
+            conn.execute('ALTER TABLE gemini_calls ADD COLUMN cached_tokens INTEGER DEFAULT 0')
+        conn.commit()
+
+    def _load_budgets(self) -> Dict[str, Dict]:
+        rows = self._connection().execute(
+            'SELECT scope, daily_tokens, daily_cost_usd, soft_ratio FROM budgets'
+        ).fetchall()
+        budgets = {
+            scope: {'daily_tokens': tokens, 'daily_cost_usd': cost, 'soft_ratio': ratio}
+            for scope, tokens, cost, ratio in rows
+        }
+
+        # Environment defaults for the global budget (stored budgets win)
+        if GLOBAL_SCOPE not in budgets:
+            tokens = os.getenv('GEMINI_DAILY_TOKEN_BUDGET')
+            cost = os.getenv('GEMINI_DAILY_COST_BUDGET_USD')
+            if tokens or cost:
+                budgets[GLOBAL_SCOPE] = {
+                    'daily_tokens': int(tokens) if tokens else None,
+                    'daily_cost_usd': float(cost) if cost else None,
+                    'soft_ratio': DEFAULT_SOFT_RATIO,
+                }
+        return budgets
+
+    def _roll_day(self):
+        """Reload today's in-memory totals when the date changes (caller holds no lock)."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        if self._day == today:
+            return
+        rows = self._connection().execute(
+            'SELECT user, SUM(total_tokens), SUM(cost_usd) FROM gemini_calls WHERE day = ? GROUP BY user',
+            (today,)
+        ).fetchall()
+        totals = {GLOBAL_SCOPE: [0, 0.0]}
+        for user, tokens, cost in rows:
+            totals.setdefault(user or '', [0, 0.0])
+            totals[user or ''][0] += tokens or 0
+            totals[user or ''][1] += cost or 0.0
+            totals[GLOBAL_SCOPE][0] += tokens or 0
+            totals[GLOBAL_SCOPE][1] += cost or 0.0
+        with self._lock:
+            if self._day != today:
+                self._day = today
+                self._today = totals
+
+    # ================================================================
+    # RECORDING
+    # ================================================================
+
+    def record_call(
+        self,
+        method: str,
+        model: str,
+        usage_metadata=None,
+        latency_ms: float = 0.0,
+        status: str = 'ok',
+        template: Optional[str] = None,
+        user: Optional[str] = None,
+        brand: Optional[str] = None
+    ) -> Dict:
+        """
+        Queue one Gemini call for the ledger and update today's totals.
+
+        Args:
+            method: GeminiClient method name
+            model: Model name
+            usage_metadata: Response usage_metadata (None if the call failed)
+            latency_ms: Wall time including retries
+            status: 'ok' or 'error'
+            template: Generator template / analyzer stage
+            user: User ID
+            brand: Brand category
+
+        Returns:
+            Recorded usage dictionary (token counts and cost_usd)
+        """
+        usage = extract_usage(usage_metadata)
+        usage['cost_usd'] = estimate_cost(model, usage)
+        now = datetime.now()
+        day = now.strftime('%Y-%m-%d')
+
+        self._roll_day()
+        with self._lock:
+            for scope in (GLOBAL_SCOPE, user or ''):
+                totals = self._today.setdefault(scope, [0, 0.0])
+                totals[0] += usage['total_tokens']
+                totals[1] += usage['cost_usd']
+
+        inc('gemini_tokens_total', usage['prompt_tokens'], model=model, kind='prompt')
+        inc('gemini_tokens_total', usage['cached_tokens'], model=model, kind='cached')
+        inc('gemini_tokens_total', usage['candidate_tokens'] - usage['image_tokens'], model=model, kind='output')
+        inc('gemini_tokens_total', usage['image_tokens'], model=model, kind='image')
+
+        self._queue.put((
+            now.timestamp(), day, user, brand, template, model, method, status,
+            usage['prompt_tokens'], usage['candidate_tokens'], usage['image_tokens'],
+            usage['total_tokens'], usage['cost_usd'], latency_ms, usage['cached_tokens']
+        ))
+        return usage
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row queued so far is written."""
+        if not self._writer.is_alive():
+            return True
+        with self._flushed:
+            target = self._flush_seq + 1
+            self._queue.put(_FLUSH)
+            return self._flushed.wait_for(lambda: self._flush_seq >= target, timeout)
+
+    def close(self):
+        """Write pending rows and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(timeout=10)
+
+    def _writer_loop(self):
+        conn = self._connection()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _FLUSH and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows = [row for row in batch if row is not _FLUSH and row is not _STOP]
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(INSERT_SQL, rows)
+                except sqlite3.Error as e:
+                    logger = get_logger()
+                    logger.error("Failed to write %d usage rows: %s", len(rows), e)
+
+            if any(row is _FLUSH or row is _STOP for row in batch):
+                with self._flushed:
+                    self._flush_seq += sum(1 for row in batch if row is _FLUSH)
+                    self._flushed.notify_all()
+            if batch[-1] is _STOP:
+                conn.close()
+                return
+
+    # ================================================================
+    # BUDGETS
+    # ================================================================
+
+    def _reload_budgets(self):
+        """Re-read budgets stored by other processes at most every BUDGET_RELOAD_INTERVAL."""
+        if time.monotonic() - self._budgets_loaded_at < BUDGET_RELOAD_INTERVAL:
+            return
+        budgets = self._load_budgets()
+        with self._lock:
+            self._budgets = budgets
+            self._budgets_loaded_at = time.monotonic()
+
+    def get_budgets(self) -> Dict[str, Dict]:
+        self._reload_budgets()
+        with self._lock:
+            return {scope: dict(budget) for scope, budget in self._budgets.items()}
+
+    def set_budget(
+        self,
+        scope: str = GLOBAL_SCOPE,
+        daily_tokens: Optional[int] = None,
+        daily_cost_usd: Optional[float] = None,
+        soft_ratio: float = DEFAULT_SOFT_RATIO
+    ):
+        """
+        Set (or clear, when both limits are None) a daily budget.
+
+        Args:
+            scope: GLOBAL_SCOPE or a user ID
+            daily_tokens: Maximum total tokens per day
+            daily_cost_usd: Maximum estimated cost per day
+            soft_ratio: Fraction of the budget after which calls are throttled
+        """
+        conn = self._connection()
+        with conn:
+            if daily_tokens is None and daily_cost_usd is None:
+                conn.execute('DELETE FROM budgets WHERE scope = ?', (scope,))
+            else:
+                conn.execute(
+                    'INSERT OR REPLACE INTO budgets (scope, daily_tokens, daily_cost_usd, soft_ratio) '
+                    'VALUES (?, ?, ?, ?)',
+                    (scope, daily_tokens, daily_cost_usd, soft_ratio)
+                )
+        with self._lock:
+            if daily_tokens is None and daily_cost_usd is None:
+                self._budgets.pop(scope, None)
+            else:
+                self._budgets[scope] = {
+                    'daily_tokens': daily_tokens,
+                    'daily_cost_usd': daily_cost_usd,
+                    'soft_ratio': soft_ratio,
+                }
+
+    def budget_status(self, user: Optional[str] = None) -> List[Dict]:
+        """
+        Today's usage against the global budget and the user's budget.
+
+        Returns:
+            List of {'scope', 'tokens', 'cost_usd', 'daily_tokens',
+            'daily_cost_usd', 'ratio', 'soft_ratio'}; ratio is the larger of
+            the token and cost fractions used
+        """
+        self._roll_day()
+        self._reload_budgets()
+        statuses = []
+        with self._lock:
+            for scope in (GLOBAL_SCOPE, user):
+                if scope is None:
+                    continue
+                budget = self._budgets.get(scope)
+                tokens, cost = self._today.get(scope, [0, 0.0])
+                ratio = 0.0
+                if budget:
+                    if budget['daily_tokens']:
+                        ratio = max(ratio, tokens / budget['daily_tokens'])
+                    if budget['daily_cost_usd']:
+                        ratio = max(ratio, cost / budget['daily_cost_usd'])
+                statuses.append({
+                    'scope': scope,
+                    'tokens': tokens,
+                    'cost_usd': cost,
+                    'daily_tokens': budget['daily_tokens'] if budget else None,
+                    'daily_cost_usd': budget['daily_cost_usd'] if budget else None,
+                    'ratio': ratio,
+                    'soft_ratio': budget['soft_ratio'] if budget else None,
+                })
+        return statuses
+
+    @contextmanager
+    def reserve(self, user: Optional[str] = None):
+        """
+        Guard one Gemini call against the daily budgets.
+
+        Below the soft ratio this is free. Past it, calls are queued one at
+        a time and spaced by throttle_interval.
+
+        Raises:
+            BudgetExceededError: If a budget is used up
+        """
+        throttle = False
+        for status in self.budget_status(user):
+            if status['ratio'] >= 1.0:
+                scope = 'global' if status['scope'] == GLOBAL_SCOPE else f"user {status['scope']}"
+                raise BudgetExceededError(f"Daily Gemini budget exceeded ({scope})")
+            if status['soft_ratio'] is not None and status['ratio'] >= status['soft_ratio']:
+                throttle = True
+
+        if not throttle:
+            yield
+            return
+
+        inc('gemini_throttled_calls_total')
+        with self._throttle_lock:
+            wait = self._last_throttled_call + self.throttle_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                yield
+            finally:
+                self._last_throttled_call = time.monotonic()
+
+    # ================================================================
+    # REPORTS
+    # ================================================================
+
+    def summarize(
+        self,
+        group_by: str = 'day',
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None,
+        user: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Aggregate calls by one column.
+
+        Args:
+            group_by: One of GROUP_COLUMNS
+            start_day: First day (YYYY-MM-DD, inclusive)
+            end_day: Last day (YYYY-MM-DD, inclusive)
+            user: Restrict to one user
+
+        Returns:
+            List of {group_by, 'calls', 'errors', 'prompt_tokens',
+            'cached_tokens', 'candidate_tokens', 'image_tokens', 'total_tokens',
+            'cost_usd', 'avg_latency_ms'} ordered by cost (by day for group_by='day')
+        """
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unsupported group_by: {group_by}")
+
+        where, params = [], []
+        if start_day:
+            where.append('day >= ?')
+            params.append(start_day)
+        if end_day:
+            where.append('day <= ?')
+            params.append(end_day)
+        if user is not None:
+            where.append('user IS ?')
+            params.append(user)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        order_sql = 'day' if group_by == 'day' else 'cost_usd DESC'
+
+        rows = self._connection().execute(f'''
+            SELECT {group_by},
+                   COUNT(*),
+                   SUM(status != 'ok'),
+                   SUM(prompt_tokens),
+                   SUM(cached_tokens),
+                   SUM(candidate_tokens),
+                   SUM(image_tokens),
+                   SUM(total_tokens),
+                   SUM(cost_usd) AS cost_usd,
+                   AVG(latency_ms)
+            FROM gemini_calls
+            {where_sql}
+            GROUP BY {group_by}
+            ORDER BY {order_sql}
+        ''', params).fetchall()
+
+        keys = (group_by, 'calls', 'errors', 'prompt_tokens', 'cached_tokens', 'candidate_tokens',
+                'image_tokens', 'total_tokens', 'cost_usd', 'avg_latency_ms')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def daily_totals(self, days: int = 30, user: Optional[str] = None) -> List[Dict]:
+        """Per-day totals for the last `days` days (days without calls included as zero)."""
+        start = datetime.now().date() - timedelta(days=days - 1)
+        by_day = {
+            row['day']: row
+            for row in self.summarize('day', start_day=start.isoformat(), user=user)
+        }
+        totals = []
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            row = by_day.get(day, {})
+            totals.append({
+                'day': day,
+                'calls': row.get('calls', 0),
+                'total_tokens': row.get('total_tokens', 0) or 0,
+                'cost_usd': row.get('cost_usd', 0.0) or 0.0,
+            })
+        return totals
+
+
+_instances: Dict[str, UsageLedger] = {}
+_instances_lock = threading.Lock()
+
+
+def get_usage_ledger(db_path: Optional[str] = None) -> UsageLedger:
+    """
+    Get the shared UsageLedger for a database file.
+
+    Args:
+        db_path: SQLite file (defaults to default_ledger_path())
+
+    Returns:
+        UsageLedger instance
+    """
+    path = os.path.abspath(db_path or default_ledger_path())
+    with _instances_lock:
+        ledger = _instances.get(path)
+        if ledger is None:
+            ledger = UsageLedger(path)
+            _instances[path] = ledger
+        return ledger
+
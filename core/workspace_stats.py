@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""
+Workspace Statistics Service for CEN AI DAM Editor
+
+Keeps running file counts and byte totals for a user workspace so the
+Settings page never has to walk the whole directory tree:
+- Totals are updated incrementally from file write/remove hooks
+- A background thread periodically reconciles totals against the disk
+- Snapshots (including daily growth samples) are persisted to the workspace
+"""
+
+import os
+import json
+import stat
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from .file_events import add_listener, remove_listener, FILE_WRITTEN, FILE_REMOVED
+from .logger import get_logger
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif')
+METADATA_EXTENSIONS = ('.json',)
+
+STATS_FILENAME = '.workspace_stats.json'
+ROOT_FOLDER = '(root)'
+
+
+def classify_asset(file_path: str) -> str:
+    """
+    Classify a file into an asset type by extension.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        'image', 'metadata' or 'other'
+    """
+    lower = file_path.lower()
+    if lower.endswith(IMAGE_EXTENSIONS):
+        return 'image'
+    if lower.endswith(METADATA_EXTENSIONS):
+        return 'metadata'
+    return 'other'
+
+
+class WorkspaceStatistics:
+    """
+    Incrementally maintained disk usage statistics for one workspace.
+
+    Statistics are kept per top-level folder and per asset type. Reads are
+    served from memory; the disk is only walked by the background reconcile.
+    """
+
+    def __init__(
+        self,
+        workspace_dir: str,
+        reconcile_interval: int = 600,
+        persist_interval: int = 30,
+        history_days: int = 90
+    ):
+        """
+        Initialize WorkspaceStatistics.
+
+        Args:
+            workspace_dir: Path to user's workspace directory
+            reconcile_interval: Seconds between full background reconciles
+            persist_interval: Seconds between snapshot writes when totals changed
+            history_days: Number of daily growth samples to keep
+        """
+        self.workspace_dir = os.path.abspath(workspace_dir)
+        self.stats_path = os.path.join(self.workspace_dir, STATS_FILENAME)
+        self.reconcile_interval = reconcile_interval
+        self.persist_interval = persist_interval
+        self.history_days = history_days
+
+        self._lock = threading.RLock()
+        self._folders: Dict[str, Dict] = {}
+        self._index: Dict[str, int] = {}
+        self._index_ready = False
+        self._growth: List[Dict] = []
+        self._dirty = False
+        self._last_reconciled: Optional[str] = None
+        # Paths changed by file events while a reconcile scan is running
+        self._scan_touched: Optional[Set[str]] = None
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._reconcile_requested = True
+
+        self._load_snapshot()
+
+        add_listener(self._on_file_event)
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"workspace-stats-{os.path.basename(self.workspace_dir)}",
+            daemon=True
+        )
+        self._thread.start()
+
+    # ================================================================
+    # PUBLIC API
+    # ================================================================
+
+    def get_summary(self) -> Dict:
+        """
+        Get current workspace statistics without touching the disk.
+
+        Returns:
+            Dictionary with legacy totals, per-folder and per-type breakdowns,
+            growth history and reconcile status
+        """
+        with self._lock:
+            folders = {
+                name: {
+                    'count': data['count'],
+                    'bytes': data['bytes'],
+                    'types': {t: dict(v) for t, v in data['types'].items()}
+                }
+                for name, data in self._folders.items()
+            }
+            growth = [dict(sample) for sample in self._growth]
+            last_reconciled = self._last_reconciled
+            ready = self._index_ready or last_reconciled is not None
+
+        types: Dict[str, Dict] = {}
+        total_bytes = 0
+        total_count = 0
+        for data in folders.values():
+            total_bytes += data['bytes']
+            total_count += data['count']
+            for asset_type, type_data in data['types'].items():
+                entry = types.setdefault(asset_type, {'count': 0, 'bytes': 0})
+                entry['count'] += type_data['count']
+                entry['bytes'] += type_data['bytes']
+
+        def _type_count(folder: str, asset_type: str) -> int:
+            return folders.get(folder, {}).get('types', {}).get(asset_type, {}).get('count', 0)
+
+        return {
+            'total_uploads': _type_count('uploads', 'image'),
+            'total_generated': _type_count('generated', 'image'),
+            'total_metadata': _type_count('metadata', 'metadata'),
+            'total_files': total_count,
+            'total_bytes': total_bytes,
+            'total_size_mb': round(total_bytes / (1024 * 1024), 2),
+            'folders': folders,
+            'types': types,
+            'growth': growth,
+            'last_reconciled': last_reconciled,
+            'ready': ready
+        }
+
+    def reconcile(self):
+        """
+        Walk the workspace and replace running totals with exact values.
+
+        The walk runs outside the lock, so paths reported by file events in
+        the meantime are re-stated before the new totals are published.
+        """
+        folders: Dict[str, Dict] = {}
+        index: Dict[str, int] = {}
+
+        with self._lock:
+            self._scan_touched = set()
+        try:
+            for file_path, size in self._scan():
+                rel_path = os.path.relpath(file_path, self.workspace_dir)
+                index[rel_path] = size
+                self._apply(folders, rel_path, size, 1)
+        except BaseException:
+            with self._lock:
+                self._scan_touched = None
+            raise
+
+        with self._lock:
+            for rel_path in self._scan_touched:
+                self._restat(folders, index, rel_path)
+            self._scan_touched = None
+            self._folders = folders
+            self._index = index
+            self._index_ready = True
+            self._last_reconciled = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._record_growth_sample()
+            self._dirty = True
+
+        self._persist()
+
+        logger = get_logger()
+        logger.info(f"Workspace statistics reconciled: {len(index)} files")
+
+    def request_reconcile(self):
+        """Ask the background thread to reconcile as soon as possible."""
+        self._reconcile_requested = True
+        self._wake.set()
+
+    def close(self):
+        """Stop the background thread and flush pending changes."""
+        remove_listener(self._on_file_event)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._persist()
+
+    # ================================================================
+    # EVENT HANDLING
+    # ================================================================
+
+    def _on_file_event(self, event_type: str, file_path: str):
+        """Apply a file write/remove hook to the running totals."""
+        abs_path = os.path.abspath(file_path)
+        if not abs_path.startswith(self.workspace_dir + os.sep):
+            return
+
+        rel_path = os.path.relpath(abs_path, self.workspace_dir)
+        if rel_path == STATS_FILENAME:
+            return
+
+        with self._lock:
+            if self._scan_touched is not None:
+                self._scan_touched.add(rel_path)
+            previous_size = self._index.get(rel_path)
+
+            if event_type == FILE_WRITTEN:
+                try:
+                    new_size = os.path.getsize(abs_path)
+                except OSError:
+                    return
+
+                if previous_size is not None:
+                    self._apply(self._folders, rel_path, new_size - previous_size, 0)
+                else:
+                    self._apply(self._folders, rel_path, new_size, 1)
+                self._index[rel_path] = new_size
+
+            elif event_type == FILE_REMOVED:
+                if previous_size is None:
+                    # Size unknown until the first reconcile has indexed the file
+                    self._reconcile_requested = True
+                    self._wake.set()
+                    return
+                self._apply(self._folders, rel_path, -previous_size, -1)
+                del self._index[rel_path]
+
+            self._dirty = True
+
+    def _restat(self, folders: Dict[str, Dict], index: Dict[str, int], rel_path: str):
+        """Bring one path in a scanned index up to date with the disk."""
+        previous_size = index.pop(rel_path, None)
+        if previous_size is not None:
+            self._apply(folders, rel_path, -previous_size, -1)
+        try:
+            st = os.lstat(os.path.join(self.workspace_dir, rel_path))
+        except OSError:
+            return
+        if stat.S_ISREG(st.st_mode):
+            index[rel_path] = st.st_size
+            self._apply(folders, rel_path, st.st_size, 1)
+
+    @staticmethod
+    def _apply(folders: Dict[str, Dict], rel_path: str, size_delta: int, count_delta: int):
+        """Add size/count deltas to the folder and asset-type buckets."""
+        parts = rel_path.split(os.sep)
+        folder = parts[0] if len(parts) > 1 else ROOT_FOLDER
+        asset_type = classify_asset(rel_path)
+
+        folder_entry = folders.setdefault(folder, {'count': 0, 'bytes': 0, 'types': {}})
+        folder_entry['count'] = max(0, folder_entry['count'] + count_delta)
+        folder_entry['bytes'] = max(0, folder_entry['bytes'] + size_delta)
+
+        type_entry = folder_entry['types'].setdefault(asset_type, {'count': 0, 'bytes': 0})
+        type_entry['count'] = max(0, type_entry['count'] + count_delta)
+        type_entry['bytes'] = max(0, type_entry['bytes'] + size_delta)
+
+    # ================================================================
+    # BACKGROUND WORK
+    # ================================================================
+
+    def _run(self):
+        """Background loop: persist dirty totals and reconcile periodically."""
+        logger = get_logger()
+        last_reconcile = time.monotonic()
+
+        while not self._stop.is_set():
+            if self._reconcile_requested or time.monotonic() - last_reconcile >= self.reconcile_interval:
+                self._reconcile_requested = False
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logger.error(f"Workspace statistics reconcile failed: {e}")
+                last_reconcile = time.monotonic()
+            else:
+                self._persist()
+
+            self._wake.wait(timeout=self.persist_interval)
+            self._wake.clear()
+
+    def _scan(self):
+        """Yield (path, size) for every file in the workspace using scandir."""
+        stack = [self.workspace_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                if current == self.workspace_dir and entry.name == STATS_FILENAME:
+                                    continue
+                                yield entry.path, entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    def _record_growth_sample(self):
+        """Update today's growth sample with the current totals."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        total_bytes = sum(data['bytes'] for data in self._folders.values())
+        total_count = sum(data['count'] for data in self._folders.values())
+        sample = {'date': today, 'bytes': total_bytes, 'count': total_count}
+
+        if self._growth and self._growth[-1]['date'] == today:
+            self._growth[-1] = sample
+        else:
+            self._growth.append(sample)
+
+        self._growth = self._growth[-self.history_days:]
+
+    # ================================================================
+    # PERSISTENCE
+    # ================================================================
+
+    def _load_snapshot(self):
+        """Load the last persisted snapshot so the first render is instant."""
+        if not os.path.exists(self.stats_path):
+            return
+
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self._folders = snapshot.get('folders', {})
+            self._growth = snapshot.get('growth', [])
+            self._last_reconciled = snapshot.get('last_reconciled')
+        except Exception as e:
+            logger = get_logger()
+            logger.warning(f"Failed to load workspace statistics snapshot: {e}")
+
+    def _persist(self):
+        """Write the snapshot atomically if totals changed since the last write."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._record_growth_sample()
+            snapshot = {
+                'folders': self._folders,
+                'growth': self._growth,
+                'last_reconciled': self._last_reconciled,
+                'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            payload = json.dumps(snapshot, ensure_ascii=False)
+            self._dirty = False
+
+        if not os.path.isdir(self.workspace_dir):
+            return
+
+        temp_path = f"{self.stats_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(temp_path, self.stats_path)
+        except Exception as e:
+            logger = get_logger()
+            logger.warning(f"Failed to save workspace statistics snapshot: {e}")
+
+
+_instances: Dict[str, WorkspaceStatistics] = {}
+_instances_lock = threading.Lock()
+
+
+def get_workspace_stats(workspace_dir: str) -> WorkspaceStatistics:
+    """
+    Get the shared statistics service for a workspace.
+
+    Args:
+        workspace_dir: Path to user's workspace directory
+
+    Returns:
+        WorkspaceStatistics instance (created on first use)
+    """
+    key = os.path.abspath(workspace_dir)
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = WorkspaceStatistics(key)
+        return _instances[key]
@@ -1,18 +1,183 @@
 # -*- coding: utf-8 -*-
 import os
 import json
+import queue
+import atexit
 import sqlite3
 import csv
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QScrollArea, QLineEdit, QComboBox,
                              QMessageBox, QFileDialog, QDialog, QTextEdit,
-                             QCheckBox, QSpinBox, QDateEdit, QTabWidget)
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QTimer, QThread
+                             QCheckBox, QSpinBox, QDateEdit, QTabWidget,
+                             QProgressDialog)
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QTimer, QThread, QDate
 from PyQt5.QtGui import QFont, QIcon
 
+# 자주 실행되는 쿼리 (sqlite3 모듈이 연결별로 prepared statement를 캐시함)
+INSERT_SQL = '''
+    INSERT INTO history (user_id, timestamp, action_type, action_description, status, details, project_id, session_id, duration_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+TRIM_SQL = '''
+    DELETE FROM history
+    WHERE id IN (
+        SELECT id FROM history
+        WHERE user_id IS ?
+        ORDER BY timestamp DESC, id DESC
+        LIMIT -1 OFFSET ?
+    )
+'''
+
+# 통계 집계 테이블의 익명 사용자 키 (user_id가 NULL인 경우)
+NO_USER_KEY = -1
+
+# 소요 시간 히스토그램 구간 상한 (ms, 10배마다 1-1.5-2-3-5-7 간격). 마지막 구간은 상한 없음
+DURATION_BUCKET_BOUNDS = [int(step * 10 ** exp) for exp in range(1, 6) for step in (1, 1.5, 2, 3, 5, 7)] + [1000000]
+
+
+def _duration_bucket_sql(column):
+    """소요 시간을 히스토그램 구간 번호로 변환하는 SQL 식"""
+    cases = ' '.join(f'WHEN {column} < {bound} THEN {i}' for i, bound in enumerate(DURATION_BUCKET_BOUNDS))
+    return f'(CASE {cases} ELSE {len(DURATION_BUCKET_BOUNDS)} END)'
+
+
+def _utc_timestamp(dt):
+    """로컬 datetime을 timestamp 컬럼과 같은 형식(UTC 문자열)으로 변환"""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def duration_percentile(bucket_counts, percentile):
+    """
+    히스토그램 {구간 번호: 개수}에서 백분위 소요 시간(ms)을 추정합니다. (구간 내 로그 보간)
+    """
+    total = sum(bucket_counts.values())
+    if total <= 0:
+        return None
+
+    rank = total * percentile / 100.0
+    seen = 0
+    for bucket in sorted(bucket_counts):
+        count = bucket_counts[bucket]
+        if count <= 0:
+            continue
+        if seen + count >= rank:
+            lower = DURATION_BUCKET_BOUNDS[bucket - 1] if bucket > 0 else 0
+            if bucket >= len(DURATION_BUCKET_BOUNDS):
+                return lower
+            upper = DURATION_BUCKET_BOUNDS[bucket]
+            fraction = (rank - seen) / count
+            if lower <= 0:
+                return round(upper * fraction)
+            return round(lower * (upper / lower) ** fraction)
+        seen += count
+    return None
+
+
+# 내보내기 컬럼 (history 테이블 순서)
+EXPORT_COLUMNS = ['id', 'user_id', 'timestamp', 'action_type', 'action_description',
+                  'status', 'details', 'project_id', 'session_id', 'duration_ms']
+
+# 내보내기 형식 -> (파일 확장자, 파일 대화상자 필터)
+EXPORT_FORMATS = {
+    'json': ('json', 'JSON Files (*.json)'),
+    'ndjson': ('ndjson', 'NDJSON Files (*.ndjson)'),
+    'csv': ('csv', 'CSV Files (*.csv)'),
+    'parquet': ('parquet', 'Parquet Files (*.parquet)'),
+}
+
+
+class _JsonArrayWriter:
+    """JSON 배열을 항목 단위로 기록 (기존 json 형식과 호환)"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('[')
+        self.first = True
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write('\n  ' if self.first else ',\n  ')
+            self.file.write(json.dumps(row, ensure_ascii=False))
+            self.first = False
+
+    def close(self):
+        self.file.write('\n]\n' if not self.first else ']\n')
+        self.file.close()
+
+
+class _NdjsonWriter:
+    """한 줄에 한 항목씩 기록 (Newline-delimited JSON)"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.DictWriter(self.file, fieldnames=EXPORT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """청크마다 row group 하나를 기록"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ('id', pa.int64()), ('user_id', pa.int64()), ('timestamp', pa.string()),
+            ('action_type', pa.string()), ('action_description', pa.string()), ('status', pa.string()),
+            ('details', pa.string()), ('project_id', pa.string()), ('session_id', pa.string()),
+            ('duration_ms', pa.int64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+_EXPORT_WRITERS = {
+    'json': _JsonArrayWriter,
+    'ndjson': _NdjsonWriter,
+    'csv': _CsvWriter,
+    'parquet': _ParquetWriter,
+}
+
+
+# 쓰기 스레드 제어용 (배치를 즉시 기록)
+_FLUSH = object()
+_STOP = object()
+
+
 class HistoryManager(QObject):
-    """히스토리 데이터 관리 클래스"""
+    """
+    히스토리 데이터 관리 클래스
+
+    add_entry는 행을 큐에 넣기만 하고 즉시 반환합니다. 백그라운드 쓰기 스레드가
+    큐에 쌓인 행을 한 트랜잭션으로 묶어 기록하며, 최대 개수 정리는
+    trim_interval 건마다 한 번 수행합니다. 조회/삭제 전에는 큐를 비워(flush)
+    방금 추가한 항목도 보이도록 합니다.
+    """
 
     history_updated = pyqtSignal()
 
@@ -22,13 +187,40 @@ class HistoryManager(QObject):
         self.path_manager = path_manager
         self.db_path = './data/history.db'
         self.max_entries = 1000  # 최대 저장 엔트리 수
+        self.batch_size = 200  # 한 트랜잭션에 기록할 최대 행 수
+        self.flush_interval = 0.5  # 쓰기 지연 최대 시간 (초)
+        self.trim_interval = 100  # 최대 개수 정리 주기 (추가된 행 수)
+
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._closed = False
         self.init_database()
 
+        self._writer = threading.Thread(target=self._writer_loop, name='HistoryWriter', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connection(self):
+        """현재 스레드 전용 연결 (스레드마다 한 번만 생성)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # WAL에서는 NORMAL로도 DB 손상이 없으며, 커밋마다 fsync하지 않음
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _current_user_id(self):
+        if self.user_manager and self.user_manager.get_current_user():
+            return self.user_manager.get_current_user().get('id')
+        return None
+
     def init_database(self):
         """히스토리 데이터베이스를 초기화하고 필요한 테이블과 인덱스를 생성합니다."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
 
         # 히스토리 테이블 생성
@@ -52,65 +244,203 @@ class HistoryManager(QObject):
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_action_type ON history(action_type)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_status ON history(status)')
 
+        self._init_rollups(cursor)
+
         conn.commit()
-        conn.close()
+
+    def _init_rollups(self, cursor):
+        """
+        통계용 집계 테이블과 이를 유지하는 트리거를 생성합니다.
+
+        history_rollup: (사용자, 날짜, 액션 타입, 상태)별 건수와 소요 시간 합계
+        history_duration_hist: (사용자, 액션 타입)별 소요 시간 히스토그램
+        행 추가/삭제 시 트리거가 갱신하므로 통계 조회는 원본 테이블을 스캔하지 않습니다.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_rollup'")
+        needs_backfill = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS history_rollup (
+                user_key INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                action_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                entry_count INTEGER NOT NULL DEFAULT 0,
+                duration_sum INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_key, day, action_type, status)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS history_duration_hist (
+                user_key INTEGER NOT NULL,
+                action_type TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                entry_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_key, action_type, bucket)
+            )
+        ''')
+
+        if needs_backfill:
+            # 기존 데이터베이스: 현재 행으로 집계 테이블을 채움
+            cursor.execute(f'''
+                INSERT INTO history_rollup (user_key, day, action_type, status, entry_count, duration_sum)
+                SELECT IFNULL(user_id, {NO_USER_KEY}), substr(timestamp, 1, 10), action_type, IFNULL(status, ''),
+                       COUNT(*), SUM(IFNULL(duration_ms, 0))
+                FROM history
+                GROUP BY 1, 2, 3, 4
+            ''')
+            cursor.execute(f'''
+                INSERT INTO history_duration_hist (user_key, action_type, bucket, entry_count)
+                SELECT IFNULL(user_id, {NO_USER_KEY}), action_type, {_duration_bucket_sql('IFNULL(duration_ms, 0)')}, COUNT(*)
+                FROM history
+                GROUP BY 1, 2, 3
+            ''')
+
+        new_bucket = _duration_bucket_sql('IFNULL(NEW.duration_ms, 0)')
+        old_bucket = _duration_bucket_sql('IFNULL(OLD.duration_ms, 0)')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS history_rollup_insert AFTER INSERT ON history
+            BEGIN
+                INSERT INTO history_rollup (user_key, day, action_type, status, entry_count, duration_sum)
+                VALUES (IFNULL(NEW.user_id, {NO_USER_KEY}), substr(NEW.timestamp, 1, 10), NEW.action_type,
+                        IFNULL(NEW.status, ''), 1, IFNULL(NEW.duration_ms, 0))
+                ON CONFLICT (user_key, day, action_type, status) DO UPDATE SET
+                    entry_count = entry_count + 1,
+                    duration_sum = duration_sum + excluded.duration_sum;
+                INSERT INTO history_duration_hist (user_key, action_type, bucket, entry_count)
+                VALUES (IFNULL(NEW.user_id, {NO_USER_KEY}), NEW.action_type, {new_bucket}, 1)
+                ON CONFLICT (user_key, action_type, bucket) DO UPDATE SET
+                    entry_count = entry_count + 1;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS history_rollup_delete AFTER DELETE ON history
+            BEGIN
+                UPDATE history_rollup SET
+                    entry_count = entry_count - 1,
+                    duration_sum = duration_sum - IFNULL(OLD.duration_ms, 0)
+                WHERE user_key = IFNULL(OLD.user_id, {NO_USER_KEY}) AND day = substr(OLD.timestamp, 1, 10)
+                  AND action_type = OLD.action_type AND status = IFNULL(OLD.status, '');
+                UPDATE history_duration_hist SET entry_count = entry_count - 1
+                WHERE user_key = IFNULL(OLD.user_id, {NO_USER_KEY}) AND action_type = OLD.action_type
+                  AND bucket = {old_bucket};
+            END
+        ''')
 
     def add_entry(self, action_type, description, status='success', details=None, project_id=None, duration_ms=0):
-        """새로운 히스토리 엔트리를 데이터베이스에 추가합니다."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """새로운 히스토리 엔트리를 쓰기 큐에 추가합니다. (디스크 기록은 백그라운드에서 수행)"""
+        if self._closed:
+            return
 
-        user_id = None
-        if self.user_manager and self.user_manager.get_current_user():
-            user_id = self.user_manager.get_current_user().get('id')
+        user_id = self._current_user_id()
 
         # 세션 ID 생성 (오늘 날짜 기반)
         session_id = datetime.now().strftime('%Y%m%d')
+        # CURRENT_TIMESTAMP와 같은 형식(UTC)으로, 기록 시점이 아닌 호출 시점을 저장
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
 
-        cursor.execute('''
-            INSERT INTO history (user_id, action_type, action_description, status, details, project_id, session_id, duration_ms)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, action_type, description, status, json.dumps(details) if details else None, project_id, session_id, duration_ms))
-
-        conn.commit()
-
-        # 최대 엔트리 수 초과 시 가장 오래된 항목부터 삭제
-        cursor.execute('SELECT COUNT(*) FROM history WHERE user_id = ? OR (user_id IS NULL AND ? IS NULL)', (user_id, user_id))
-        count = cursor.fetchone()[0]
+        row = (user_id, timestamp, action_type, description, status,
+               json.dumps(details) if details else None, project_id, session_id, duration_ms)
 
-        if count > self.max_entries:
-            cursor.execute('''
-                DELETE FROM history 
-                WHERE id IN (
-                    SELECT id FROM history 
-                    WHERE user_id = ? OR (user_id IS NULL AND ? IS NULL)
-                    ORDER BY timestamp ASC 
-                    LIMIT ?
-                )
-            ''', (user_id, user_id, count - self.max_entries))
-            conn.commit()
-
-        conn.close()
-        
-        # JSON 파일로도 저장 (새로운 기능)
+        # JSON 파일로도 저장 (경로는 호출 시점의 프로젝트 기준)
+        history_json = None
         if self.path_manager:
-            self.save_history_json(action_type, description, status, details, project_id, duration_ms)
-        
-        self.history_updated.emit()
+            history_json = self._build_history_json(action_type, description, status, details, project_id, duration_ms)
+
+        self._queue.put((row, history_json))
+
+    def flush(self, timeout=None):
+        """
+        큐에 쌓인 항목이 모두 기록될 때까지 기다립니다.
+
+        Returns:
+            모두 기록되었으면 True
+        """
+        if not self._writer.is_alive():
+            return self._queue.unfinished_tasks == 0
+        if self._queue.unfinished_tasks == 0:
+            return True
+
+        # 배치 대기 중인 항목을 바로 기록하도록 알림
+        self._queue.put(_FLUSH)
+        if timeout is None:
+            self._queue.join()
+            return True
+        # Queue.join()은 timeout을 지원하지 않으므로 unfinished_tasks를 확인
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: self._queue.unfinished_tasks == 0, timeout)
+
+    def close(self):
+        """남은 항목을 기록하고 쓰기 스레드를 종료합니다."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout=10)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _writer_loop(self):
+        conn = self._connection()
+        added_since_trim = 0
+        touched_users = set()
+
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 짧은 시간 동안 추가로 들어오는 항목을 모아 한 번에 기록
+            while len(batch) < self.batch_size and batch[-1] not in (_FLUSH, _STOP):
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            entries = [entry for entry in batch if entry not in (_FLUSH, _STOP)]
+            try:
+                if entries:
+                    with conn:
+                        conn.executemany(INSERT_SQL, [row for row, _ in entries])
+                    touched_users.update(row[0] for row, _ in entries)
+                    added_since_trim += len(entries)
+
+                    for _, history_json in entries:
+                        if history_json:
+                            self._write_history_json(*history_json)
+
+                # 최대 엔트리 수 초과분 정리 (일정 건수마다 한 번)
+                if added_since_trim >= self.trim_interval or (stop and added_since_trim):
+                    with conn:
+                        for user_id in touched_users:
+                            conn.execute(TRIM_SQL, (user_id, self.max_entries))
+                    added_since_trim = 0
+                    touched_users.clear()
+            except sqlite3.Error as e:
+                print(f"히스토리 기록 실패: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if entries:
+                self.history_updated.emit()
+            if stop:
+                conn.close()
+                return
 
     def get_entries(self, limit=100, action_type=None, status=None, start_date=None, end_date=None):
         """지정된 조건에 맞는 히스토리 엔트리를 조회합니다."""
-        conn = sqlite3.connect(self.db_path)
+        self.flush()
+        cursor = self._connection().cursor()
         # 딕셔너리 형태로 결과를 받기 위해 row_factory 설정
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
-        user_id = None
-        if self.user_manager and self.user_manager.get_current_user():
-            user_id = self.user_manager.get_current_user().get('id')
+        user_id = self._current_user_id()
 
-        query = 'SELECT * FROM history WHERE (user_id = ? OR (user_id IS NULL AND ? IS NULL))'
-        params = [user_id, user_id]
+        # user_id IS ? 는 NULL도 비교하면서 idx_user_timestamp 인덱스를 사용함
+        query = 'SELECT * FROM history WHERE user_id IS ?'
+        params = [user_id]
 
         if action_type:
             query += ' AND action_type = ?'
@@ -123,118 +453,247 @@ class HistoryManager(QObject):
         if start_date:
             # start_date를 datetime 객체로 가정
             query += ' AND timestamp >= ?'
-            params.append(start_date)
+            params.append(_utc_timestamp(start_date))
 
         if end_date:
             # end_date를 datetime 객체로 가정
             query += ' AND timestamp <= ?'
-            params.append(end_date)
+            params.append(_utc_timestamp(end_date))
 
-        query += ' ORDER BY timestamp DESC LIMIT ?'
+        query += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
         params.append(limit)
 
         cursor.execute(query, params)
         # row 객체를 딕셔너리로 변환
         entries = [dict(row) for row in cursor.fetchall()]
-        conn.close()
 
         return entries
 
     def get_statistics(self):
-        """현재 사용자의 히스토리 통계 정보를 반환합니다."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """
+        현재 사용자의 히스토리 통계 정보를 반환합니다.
 
-        user_id = None
-        if self.user_manager and self.user_manager.get_current_user():
-            user_id = self.user_manager.get_current_user().get('id')
+        오늘 활동 수는 인덱스 범위 조회로, 나머지는 집계 테이블에서 계산하므로
+        전체 행 수와 무관하게 빠르게 반환됩니다.
+        """
+        self.flush()
+        cursor = self._connection().cursor()
+
+        user_id = self._current_user_id()
+        user_key = NO_USER_KEY if user_id is None else user_id
 
-        # 오늘 활동 수
+        # 오늘 활동 수 (로컬 자정 이후, idx_user_timestamp 범위 조회)
         today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        cursor.execute('''
-            SELECT COUNT(*) FROM history 
-            WHERE (user_id = ? OR (user_id IS NULL AND ? IS NULL)) AND timestamp >= ?
-        ''', (user_id, user_id, today_start))
+        cursor.execute(
+            'SELECT COUNT(*) FROM history WHERE user_id IS ? AND timestamp >= ?',
+            (user_id, _utc_timestamp(today_start))
+        )
         today_count = cursor.fetchone()[0]
 
         # 총 활동 수
-        cursor.execute('SELECT COUNT(*) FROM history WHERE user_id = ? OR (user_id IS NULL AND ? IS NULL)', (user_id, user_id))
-        total_count = cursor.fetchone()[0]
+        cursor.execute('SELECT IFNULL(SUM(entry_count), 0), IFNULL(SUM(duration_sum), 0) FROM history_rollup WHERE user_key = ?',
+                       (user_key,))
+        total_count, duration_sum = cursor.fetchone()
 
         # 상태별 통계
         cursor.execute('''
-            SELECT status, COUNT(*) FROM history 
-            WHERE user_id = ? OR (user_id IS NULL AND ? IS NULL)
+            SELECT status, SUM(entry_count) FROM history_rollup
+            WHERE user_key = ?
             GROUP BY status
-        ''', (user_id, user_id))
+            HAVING SUM(entry_count) > 0
+        ''', (user_key,))
         status_stats = dict(cursor.fetchall())
 
         # 액션 타입별 통계
         cursor.execute('''
-            SELECT action_type, COUNT(*) FROM history 
-            WHERE user_id = ? OR (user_id IS NULL AND ? IS NULL)
-            GROUP BY action_type 
-            ORDER BY COUNT(*) DESC 
+            SELECT action_type, SUM(entry_count) FROM history_rollup
+            WHERE user_key = ?
+            GROUP BY action_type
+            HAVING SUM(entry_count) > 0
+            ORDER BY SUM(entry_count) DESC
             LIMIT 10
-        ''', (user_id, user_id))
+        ''', (user_key,))
         action_stats = dict(cursor.fetchall())
 
-        conn.close()
+        # 소요 시간 백분위 (히스토그램 기반 추정)
+        cursor.execute('''
+            SELECT bucket, SUM(entry_count) FROM history_duration_hist
+            WHERE user_key = ?
+            GROUP BY bucket
+        ''', (user_key,))
+        bucket_counts = dict(cursor.fetchall())
 
         return {
             'today_count': today_count,
             'total_count': total_count,
             'status_stats': status_stats,
-            'action_stats': action_stats
+            'action_stats': action_stats,
+            'avg_duration_ms': round(duration_sum / total_count) if total_count else 0,
+            'duration_percentiles': {
+                f'p{p}': duration_percentile(bucket_counts, p) for p in (50, 90, 99)
+            }
         }
 
-    def export_history(self, file_path, format='json'):
-        """히스토리를 JSON 또는 CSV 파일로 내보냅니다."""
-        try:
-            entries = self.get_entries(limit=10000)  # 내보내기 시에는 더 많은 데이터를 가져옴
-
-            if format.lower() == 'json':
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(entries, f, ensure_ascii=False, indent=2)
+    def get_daily_counts(self, days=30):
+        """최근 days일의 일별 활동 수를 반환합니다. (UTC 날짜 기준, 집계 테이블 사용)"""
+        self.flush()
+        cursor = self._connection().cursor()
 
-            elif format.lower() == 'csv':
-                if not entries:
-                    return True, "내보낼 히스토리가 없습니다."
-                
-                with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
-                    writer = csv.DictWriter(f, fieldnames=entries[0].keys())
-                    writer.writeheader()
-                    writer.writerows(entries)
+        user_id = self._current_user_id()
+        user_key = NO_USER_KEY if user_id is None else user_id
+        first_day = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime('%Y-%m-%d')
 
-            return True, f"히스토리가 {file_path} (으)로 내보내졌습니다."
+        cursor.execute('''
+            SELECT day, SUM(entry_count) FROM history_rollup
+            WHERE user_key = ? AND day >= ?
+            GROUP BY day
+            HAVING SUM(entry_count) > 0
+            ORDER BY day
+        ''', (user_key, first_day))
+        return dict(cursor.fetchall())
+
+    def _export_filter(self, start_date=None, end_date=None):
+        """내보내기/개수 조회용 WHERE 절과 파라미터 (idx_user_timestamp 사용)"""
+        where = 'WHERE user_id IS ?'
+        params = [self._current_user_id()]
+        if start_date:
+            where += ' AND timestamp >= ?'
+            params.append(_utc_timestamp(start_date))
+        if end_date:
+            where += ' AND timestamp <= ?'
+            params.append(_utc_timestamp(end_date))
+        return where, params
+
+    def count_entries(self, start_date=None, end_date=None):
+        """기간 내 히스토리 수를 반환합니다."""
+        self.flush()
+        where, params = self._export_filter(start_date, end_date)
+        return self._connection().execute(f'SELECT COUNT(*) FROM history {where}', params).fetchone()[0]
+
+    def iter_entry_chunks(self, start_date=None, end_date=None, chunk_size=1000):
+        """
+        기간 내 히스토리를 최신순으로 chunk_size개씩 나눠 반환합니다. (행 수 제한 없음)
+
+        전용 커서에서 fetchmany로 읽으므로 전체 결과를 메모리에 올리지 않습니다.
+        """
+        self.flush()
+        where, params = self._export_filter(start_date, end_date)
+        cursor = self._connection().cursor()
+        cursor.execute(
+            f'SELECT {", ".join(EXPORT_COLUMNS)} FROM history {where} ORDER BY timestamp DESC, id DESC',
+            params
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+        finally:
+            cursor.close()
+
+    def export_history(self, file_path, format='json', start_date=None, end_date=None,
+                       progress_callback=None, cancel_event=None, chunk_size=1000):
+        """
+        히스토리를 JSON, NDJSON, CSV 또는 Parquet 파일로 내보냅니다.
+
+        청크 단위로 읽고 쓰므로 행 수 제한이 없으며, 임시 파일(.part)에 기록한 뒤
+        완료 시 교체하므로 취소/오류 시 불완전한 파일이 남지 않습니다.
+
+        Args:
+            file_path: 저장 경로
+            format: 'json', 'ndjson', 'csv', 'parquet'
+            start_date, end_date: 기간 필터 (datetime, 선택)
+            progress_callback: callback(exported_count, total_count)
+            cancel_event: threading.Event - 설정되면 중단
+
+        Returns:
+            (성공 여부, 메시지)
+        """
+        format = format.lower()
+        if format not in _EXPORT_WRITERS:
+            return False, f"지원하지 않는 형식입니다: {format}"
+
+        part_path = file_path + '.part'
+        writer = None
+        try:
+            total = self.count_entries(start_date, end_date)
+            if total == 0 and format == 'csv':
+                return True, "내보낼 히스토리가 없습니다."
+
+            try:
+                writer = _EXPORT_WRITERS[format](part_path)
+            except ImportError:
+                return False, "Parquet 내보내기에는 pyarrow 패키지가 필요합니다."
+
+            exported = 0
+            if progress_callback:
+                progress_callback(0, total)
+            for rows in self.iter_entry_chunks(start_date, end_date, chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    writer.close()
+                    writer = None
+                    os.remove(part_path)
+                    return False, "내보내기가 취소되었습니다."
+
+                writer.write(rows)
+                exported += len(rows)
+                if progress_callback:
+                    progress_callback(exported, max(total, exported))
+
+            writer.close()
+            writer = None
+            os.replace(part_path, file_path)
+            return True, f"히스토리 {exported}건이 {file_path} (으)로 내보내졌습니다."
 
         except Exception as e:
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            if os.path.exists(part_path):
+                os.remove(part_path)
             return False, f"내보내기 중 오류가 발생했습니다: {str(e)}"
 
     def clear_history(self, older_than_days=None):
         """지정된 기간보다 오래된 히스토리를 삭제하거나 전체 히스토리를 삭제합니다."""
-        conn = sqlite3.connect(self.db_path)
+        self.flush()
+        conn = self._connection()
         cursor = conn.cursor()
 
-        user_id = None
-        if self.user_manager and self.user_manager.get_current_user():
-            user_id = self.user_manager.get_current_user().get('id')
+        user_id = self._current_user_id()
 
         if older_than_days:
             cutoff_date = datetime.now() - timedelta(days=older_than_days)
             cursor.execute('''
                 DELETE FROM history 
-                WHERE (user_id = ? OR (user_id IS NULL AND ? IS NULL)) AND timestamp < ?
-            ''', (user_id, user_id, cutoff_date))
+                WHERE user_id IS ? AND timestamp < ?
+            ''', (user_id, _utc_timestamp(cutoff_date)))
         else:
-            cursor.execute('DELETE FROM history WHERE user_id = ? OR (user_id IS NULL AND ? IS NULL)', (user_id, user_id))
+            cursor.execute('DELETE FROM history WHERE user_id IS ?', (user_id,))
+
+        # 트리거가 차감한 뒤 남은 빈 집계 행 정리
+        cursor.execute('DELETE FROM history_rollup WHERE entry_count <= 0')
+        cursor.execute('DELETE FROM history_duration_hist WHERE entry_count <= 0')
 
         conn.commit()
-        conn.close()
         self.history_updated.emit()
 
     def save_history_json(self, action_type, description, status='success', details=None, project_id=None, duration_ms=0):
         """히스토리를 JSON 파일로 저장"""
+        history_json = self._build_history_json(action_type, description, status, details, project_id, duration_ms)
+        if not history_json:
+            return None
+        return self._write_history_json(*history_json)
+
+    def _build_history_json(self, action_type, description, status='success', details=None, project_id=None, duration_ms=0):
+        """
+        JSON 히스토리 데이터와 저장 경로를 만듭니다.
+
+        Returns:
+            (history_dir, timestamp, history_data) 또는 None
+        """
         if not self.path_manager or not self.path_manager.get_current_project_root():
             return None
             
@@ -260,7 +719,12 @@ class HistoryManager(QObject):
         history_dir = self.path_manager.get_history_dir()
         if not history_dir:
             return None
-            
+
+        return history_dir, timestamp, history_data
+
+    def _write_history_json(self, history_dir, timestamp, history_data):
+        step_id = history_data["step"]
+
         # 파일명: {step}_{timestamp}.json
         filename = f"{step_id}_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
         file_path = os.path.join(history_dir, filename)
@@ -353,6 +817,11 @@ class HistoryPanel(QWidget):
         header_widget = self.create_header_widget()
         layout.addWidget(header_widget)
 
+        # 통계 요약
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("QLabel { color: #555; font-size: 11px; padding: 2px 8px; }")
+        layout.addWidget(self.stats_label)
+
         # 필터 영역
         filter_widget = self.create_filter_widget()
         layout.addWidget(filter_widget)
@@ -444,8 +913,18 @@ class HistoryPanel(QWidget):
 
     def load_history(self):
         """데이터베이스에서 히스토리를 로드하여 화면에 표시합니다."""
+        self.update_statistics()
         self.apply_filters()
 
+    def update_statistics(self):
+        """통계 요약 라벨을 갱신합니다. (집계 테이블 조회)"""
+        stats = self.history_manager.get_statistics()
+        percentiles = stats['duration_percentiles']
+        text = f"오늘 {stats['today_count']}건 · 전체 {stats['total_count']}건"
+        if percentiles['p50'] is not None:
+            text += f" · 소요 시간 p50 {percentiles['p50']}ms / p90 {percentiles['p90']}ms / p99 {percentiles['p99']}ms"
+        self.stats_label.setText(text)
+
     def apply_filters(self):
         """현재 필터 조건에 따라 히스토리를 다시 로드하고 표시합니다."""
         search_text = self.search_input.text().lower()
@@ -546,13 +1025,36 @@ class HistoryPanel(QWidget):
         return {'success': '✅', 'error': '❌', 'warning': '⚠️', 'info': 'ℹ️'}.get(status, '•')
 
     def export_history(self):
-        """히스토리 내보내기 대화상자를 엽니다."""
-        file_path, file_filter = QFileDialog.getSaveFileName(self, '히스토리 내보내기', f'history_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}', 'JSON Files (*.json);;CSV Files (*.csv)')
-        if file_path:
-            format_type = 'json' if 'json' in file_filter else 'csv'
-            success, message = self.history_manager.export_history(file_path, format_type)
+        """히스토리 내보내기 대화상자를 열고 백그라운드에서 내보냅니다."""
+        options_dialog = HistoryExportDialog(self)
+        if options_dialog.exec_() != QDialog.Accepted:
+            return
+        format_type, start_date, end_date = options_dialog.get_options()
+
+        extension, file_filter = EXPORT_FORMATS[format_type]
+        default_name = f'history_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+        file_path, _ = QFileDialog.getSaveFileName(self, '히스토리 내보내기', default_name, file_filter)
+        if not file_path:
+            return
+
+        progress = QProgressDialog('히스토리를 내보내는 중...', '취소', 0, 0, self)
+        progress.setWindowTitle('히스토리 내보내기')
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setMinimumDuration(300)
+
+        self.export_thread = HistoryExportThread(self.history_manager, file_path, format_type, start_date, end_date)
+        self.export_thread.progress.connect(lambda done, total: (progress.setMaximum(max(total, 1)), progress.setValue(done)))
+        progress.canceled.connect(self.export_thread.cancel)
+
+        def on_finished(success, message):
+            progress.close()
             QMessageBox.information(self, '내보내기 완료' if success else '내보내기 실패', message)
 
+        self.export_thread.export_finished.connect(on_finished)
+        self.export_thread.start()
+
     def show_settings(self):
         """설정 다이얼로그를 엽니다."""
         dialog = HistorySettingsDialog(self.history_manager, self)
@@ -563,6 +1065,97 @@ class HistoryPanel(QWidget):
         return f"QPushButton {{ background-color: {color}; color: white; padding: 5px 10px; border: none; border-radius: 3px; font-weight: bold; font-size: 11px; }} QPushButton:hover {{ background-color: {color}dd; }}"
 
 
+class HistoryExportThread(QThread):
+    """HistoryManager.export_history를 백그라운드에서 실행합니다."""
+
+    progress = pyqtSignal(int, int)  # exported, total
+    export_finished = pyqtSignal(bool, str)  # success, message
+
+    def __init__(self, history_manager, file_path, format_type, start_date=None, end_date=None):
+        super().__init__()
+        self.history_manager = history_manager
+        self.file_path = file_path
+        self.format_type = format_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        success, message = self.history_manager.export_history(
+            self.file_path,
+            self.format_type,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            progress_callback=self.progress.emit,
+            cancel_event=self._cancel_event
+        )
+        self.export_finished.emit(success, message)
+
+
+class HistoryExportDialog(QDialog):
+    """내보내기 형식과 기간을 선택하는 다이얼로그"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('히스토리 내보내기')
+        self.setModal(True)
+        layout = QVBoxLayout(self)
+
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel('형식:'))
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(list(EXPORT_FORMATS.keys()))
+        format_layout.addWidget(self.format_combo)
+        layout.addLayout(format_layout)
+
+        self.range_check = QCheckBox('기간 지정')
+        layout.addWidget(self.range_check)
+
+        range_layout = QHBoxLayout()
+        today = QDate.currentDate()
+        self.start_date_edit = QDateEdit(today.addDays(-30))
+        self.end_date_edit = QDateEdit(today)
+        for date_edit in (self.start_date_edit, self.end_date_edit):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat('yyyy-MM-dd')
+            date_edit.setEnabled(False)
+        self.range_check.toggled.connect(self.start_date_edit.setEnabled)
+        self.range_check.toggled.connect(self.end_date_edit.setEnabled)
+        range_layout.addWidget(self.start_date_edit)
+        range_layout.addWidget(QLabel('~'))
+        range_layout.addWidget(self.end_date_edit)
+        layout.addLayout(range_layout)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        cancel_btn = QPushButton('취소')
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_btn)
+        export_btn = QPushButton('내보내기')
+        export_btn.setDefault(True)
+        export_btn.clicked.connect(self.accept)
+        button_layout.addWidget(export_btn)
+        layout.addLayout(button_layout)
+
+    def get_options(self):
+        """
+        Returns:
+            (format_type, start_date, end_date) - 기간 미지정 시 날짜는 None
+        """
+        format_type = self.format_combo.currentText()
+        if not self.range_check.isChecked():
+            return format_type, None, None
+
+        start = self.start_date_edit.date().toPyDate()
+        end = self.end_date_edit.date().toPyDate()
+        start_date = datetime(start.year, start.month, start.day)
+        end_date = datetime(end.year, end.month, end.day, 23, 59, 59)
+        return format_type, start_date, end_date
+
+
 class HistorySettingsDialog(QDialog):
     """히스토리 설정을 위한 다이얼로그"""
 
@@ -0,0 +1,170 @@
+"""
+마스크 레이어 실행 취소/다시 실행 (더티 타일 차분)
+
+획마다 마스크 전체를 복사하는 대신, 획이 지나간 타일의 변경 전/후 픽셀만
+zlib으로 압축해 저장합니다. 메모리 사용량은 이미지 크기가 아니라 실제로 칠한
+면적에 비례하므로 단계 수 제한 없이 기록할 수 있습니다.
+
+    history.begin()
+    history.touch(mask_image, stroke_rect)  # 칠하기 직전에 호출
+    ...
+    history.commit(mask_image)
+"""
+import zlib
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QPainter
+
+TILE_SIZE = 128
+
+# 기록 전체의 압축 크기 상한 (초과 시 가장 오래된 기록부터 삭제)
+MAX_HISTORY_BYTES = 256 * 1024 * 1024
+
+
+def _encode_tile(image, rect):
+    tile = image.copy(rect)
+    if tile.format() != QImage.Format_ARGB32:
+        tile = tile.convertToFormat(QImage.Format_ARGB32)
+    bits = tile.constBits()
+    bits.setsize(tile.byteCount())
+    return zlib.compress(bytes(bits), 1)
+
+
+def _decode_tile(data, width, height):
+    raw = zlib.decompress(data)
+    # copy()로 raw 버퍼와 분리
+    return QImage(raw, width, height, width * 4, QImage.Format_ARGB32).copy()
+
+
+class MaskEdit:
+    """
+    한 번의 편집(획, 세그멘테이션 합성 등)으로 바뀐 타일 목록
+    """
+    __slots__ = ("tiles", "nbytes")
+
+    def __init__(self, tiles):
+        self.tiles = tiles  # [(QRect, before, after)]
+        self.nbytes = sum(len(before) + len(after) for _, before, after in tiles)
+
+    def bounding_rect(self):
+        rect = QRect()
+        for tile_rect, _, _ in self.tiles:
+            rect = rect.united(tile_rect)
+        return rect
+
+    def apply(self, image, after):
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for rect, before_data, after_data in self.tiles:
+            tile = _decode_tile(after_data if after else before_data, rect.width(), rect.height())
+            painter.drawImage(rect.topLeft(), tile)
+        painter.end()
+
+
+class MaskHistory:
+    """
+    마스크 편집 기록 (타일 단위 차분)
+    """
+
+    def __init__(self, tile_size=TILE_SIZE, max_bytes=MAX_HISTORY_BYTES):
+        self.tile_size = tile_size
+        self.max_bytes = max_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+        self._pending = None  # {(col, row): (QRect, before)}
+        self._nbytes = 0
+
+    def reset(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self._pending = None
+        self._nbytes = 0
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def memory_usage(self):
+        """저장된 기록의 압축 크기 (bytes)"""
+        return self._nbytes
+
+    def begin(self):
+        """새 편집을 시작합니다."""
+        self._pending = {}
+
+    def touch(self, image, rect):
+        """
+        rect 영역을 칠하기 직전에 호출하여, 아직 저장하지 않은 타일의 변경 전 픽셀을 저장합니다.
+        """
+        if self._pending is None or image.isNull():
+            return
+        rect = rect.intersected(image.rect())
+        if rect.isEmpty():
+            return
+
+        size = self.tile_size
+        for row in range(rect.top() // size, rect.bottom() // size + 1):
+            for col in range(rect.left() // size, rect.right() // size + 1):
+                if (col, row) in self._pending:
+                    continue
+                tile_rect = QRect(col * size, row * size, size, size).intersected(image.rect())
+                self._pending[(col, row)] = (tile_rect, _encode_tile(image, tile_rect))
+
+    def commit(self, image):
+        """
+        편집을 마치고 실제로 바뀐 타일만 기록합니다.
+
+        Returns:
+            기록이 추가되었으면 True (변경이 없으면 False)
+        """
+        pending, self._pending = self._pending, None
+        if not pending:
+            return False
+
+        tiles = []
+        for key in sorted(pending):
+            rect, before = pending[key]
+            after = _encode_tile(image, rect)
+            if after != before:
+                tiles.append((rect, before, after))
+        if not tiles:
+            return False
+
+        edit = MaskEdit(tiles)
+        self.undo_stack.append(edit)
+        self._nbytes += edit.nbytes - sum(e.nbytes for e in self.redo_stack)
+        self.redo_stack.clear()
+        self._trim()
+        return True
+
+    def undo(self, image):
+        """
+        Returns:
+            되돌린 MaskEdit (기록이 없으면 None)
+        """
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        edit.apply(image, after=False)
+        self.redo_stack.append(edit)
+        return edit
+
+    def redo(self, image):
+        """
+        Returns:
+            다시 적용한 MaskEdit (기록이 없으면 None)
+        """
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        edit.apply(image, after=True)
+        self.undo_stack.append(edit)
+        return edit
+
+    def _trim(self):
+        while self._nbytes > self.max_bytes and len(self.undo_stack) > 1:
+            self._nbytes -= self.undo_stack.pop(0).nbytes
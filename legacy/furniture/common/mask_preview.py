@@ -0,0 +1,91 @@
+"""
+축소 보기용 마스크 캐시 (타일 단위 갱신)
+
+화면 배율이 1보다 작을 때 전체 해상도 마스크를 매번 축소해 그리는 대신,
+2의 거듭제곱 배율로 축소한 마스크를 캐시해 두고 칠해진 타일만 다시 축소합니다.
+브러시 한 번의 이동으로 갱신되는 양은 이미지 크기와 무관하게 몇 개의 타일입니다.
+"""
+import math
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPainter
+
+TILE_SIZE = 256
+
+# 이보다 작은 배율은 캐시하지 않음 (TILE_SIZE * MIN_SCALE >= 1)
+MIN_SCALE = 1.0 / 64
+
+
+class MaskPreview:
+    """
+    마스크 이미지의 축소본과 갱신이 필요한 타일 목록
+    """
+
+    def __init__(self, tile_size=TILE_SIZE):
+        self.tile_size = tile_size
+        self.image = None
+        self.scale = 1.0
+        self._dirty = set()  # {(col, row)}
+
+    def invalidate(self):
+        """마스크가 통째로 바뀌었을 때 (새 이미지 로드 등) 캐시를 버립니다."""
+        self.image = None
+        self._dirty.clear()
+
+    def mark_dirty(self, rect):
+        """마스크 좌표계의 rect 영역이 바뀌었음을 기록합니다."""
+        if self.image is None or rect.isEmpty():
+            return
+        size = self.tile_size
+        for row in range(max(rect.top(), 0) // size, max(rect.bottom(), 0) // size + 1):
+            for col in range(max(rect.left(), 0) // size, max(rect.right(), 0) // size + 1):
+                self._dirty.add((col, row))
+
+    @staticmethod
+    def cache_scale(view_scale):
+        """화면 배율 이상인 가장 작은 2의 거듭제곱 배율 (1 이상이면 1)"""
+        if view_scale >= 1.0 or view_scale <= 0:
+            return 1.0
+        return max(2.0 ** math.ceil(math.log2(view_scale)), MIN_SCALE)
+
+    def source_for(self, mask_image, view_scale):
+        """
+        현재 화면 배율로 그릴 원본 이미지와 그 배율을 반환합니다.
+
+        Returns:
+            (QImage, scale) - scale은 마스크 대비 반환 이미지의 배율
+        """
+        scale = self.cache_scale(view_scale)
+        if scale == 1.0:
+            return mask_image, 1.0
+
+        width = max(1, round(mask_image.width() * scale))
+        height = max(1, round(mask_image.height() * scale))
+        if self.image is None or self.scale != scale or self.image.size().width() != width \
+                or self.image.size().height() != height:
+            self.image = mask_image.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self.scale = scale
+            self._dirty.clear()
+        elif self._dirty:
+            self._refresh_tiles(mask_image)
+
+        return self.image, self.scale
+
+    def _refresh_tiles(self, mask_image):
+        size = self.tile_size
+        scaled_size = max(1, round(size * self.scale))
+        bounds = mask_image.rect()
+
+        painter = QPainter(self.image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for col, row in self._dirty:
+            source = QRect(col * size, row * size, size, size).intersected(bounds)
+            if source.isEmpty():
+                continue
+            target = QRect(col * scaled_size, row * scaled_size,
+                           max(1, round(source.width() * self.scale)),
+                           max(1, round(source.height() * self.scale)))
+            tile = mask_image.copy(source).scaled(target.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            painter.drawImage(target.topLeft(), tile)
+        painter.end()
+        self._dirty.clear()
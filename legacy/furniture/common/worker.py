@@ -0,0 +1,117 @@
+"""
+백그라운드 작업 프레임워크 (QThreadPool + QRunnable)
+
+Gemini 호출처럼 오래 걸리는 작업을 UI 스레드 밖에서 실행합니다.
+작업 함수는 첫 번째 인자로 Worker를 받아 진행률 보고와 취소 확인에 사용합니다.
+
+    def task(worker, image_bytes):
+        worker.report_progress(50, "분석 중")
+        worker.check_cancelled()
+        return result
+
+    worker = Worker(task, image_bytes)
+    worker.signals.result.connect(on_result)
+    pool.start(worker)
+"""
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class CancelledError(Exception):
+    """작업이 취소되었음을 나타냅니다."""
+
+
+class WorkerSignals(QObject):
+    """
+    Worker 시그널 (UI 스레드의 슬롯으로 큐잉되어 전달됨)
+
+    started: 작업 시작
+    progress: (percent, message)
+    result: 작업 함수의 반환값
+    error: 오류 메시지
+    cancelled: 작업 취소
+    finished: 성공/실패/취소와 관계없이 항상 마지막에 발생
+    """
+    started = pyqtSignal()
+    progress = pyqtSignal(int, str)
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """
+    함수 하나를 스레드 풀에서 실행하는 작업 래퍼
+
+    진행 중인 네트워크 호출 자체는 중단할 수 없으므로, 취소 시 다음
+    check_cancelled() 지점에서 중단되며 결과는 전달되지 않습니다.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """취소 요청이 있으면 CancelledError를 발생시킵니다."""
+        if self._cancel_event.is_set():
+            raise CancelledError()
+
+    def report_progress(self, percent, message=""):
+        self.signals.progress.emit(int(percent), message)
+
+    def run(self):
+        self.signals.started.emit()
+        try:
+            self.check_cancelled()
+            result = self.fn(self, *self.args, **self.kwargs)
+            self.check_cancelled()
+        except CancelledError:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            print(f"작업 실행 중 오류 발생: {e}\n{traceback.format_exc()}")
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class WorkerPool:
+    """
+    Worker 실행 및 추적 (여러 작업 동시 실행 가능)
+    """
+
+    def __init__(self, max_threads=4):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._active = set()
+
+    def start(self, worker):
+        # 실행이 끝날 때까지 Python 참조를 유지
+        self._active.add(worker)
+        worker.signals.finished.connect(lambda: self._active.discard(worker))
+        self.pool.start(worker)
+        return worker
+
+    def active_count(self):
+        return len(self._active)
+
+    def cancel_all(self):
+        for worker in list(self._active):
+            worker.cancel()
+
+    def wait_for_done(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
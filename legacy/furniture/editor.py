@@ -19,10 +19,15 @@ from PyQt5.QtWidgets import (
     QDialog, QScrollArea, QInputDialog, QGridLayout, QCheckBox
 )
 
-from PyQt5.QtCore import Qt, QPoint, QRectF, pyqtSignal, QThread, QBuffer, QIODevice, QSize
+from PyQt5.QtCore import Qt, QPoint, QRect, QRectF, pyqtSignal, QThread, QBuffer, QIODevice, QSize, QTimer
 from PyQt5.QtGui import  QPixmap, QImage, QPainter, QPen, QColor, QKeySequence, QIcon
 
 from common import timefn
+from common.history_model import HistoryModel
+from common.mask import build_segmentation_overlay
+from common.mask_history import MaskHistory
+from common.mask_preview import MaskPreview
+from common.worker import Worker, WorkerPool
 
 class ImagePopup(QDialog):
     def __init__(self, image_bytes, parent=None):
@@ -84,11 +89,10 @@ class FinalSaveDialog(QDialog):
             container_layout = QVBoxLayout(container)
             container.setContentsMargins(0,0,0,0)
 
-            pixmap = item["pixmap"]
             image_path = item["image_path"]
 
             img_label = QLabel()
-            img_label.setPixmap(pixmap.scaled(150, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            img_label.setPixmap(item["thumbnail"])
             img_label.setAlignment(Qt.AlignCenter)
 
             checkbox = QCheckBox(f"Step {i+1}")
@@ -169,20 +173,19 @@ class PhotoViewer(QGraphicsView):
 
         # Mask layer
         self.mask_image = QImage()
+        self.mask_preview = MaskPreview()  # 축소 보기용 캐시
 
-        # Undo/Redo
-        self.undo_stack = []
-        self.redo_stack = []
-        self.image_before_draw = None
+        # Undo/Redo (변경된 타일만 기록)
+        self.history = MaskHistory()
 
     def set_photo(self, pixmap):
         self._photo.setPixmap(pixmap)
         self.mask_image = QImage(pixmap.size(), QImage.Format_ARGB32)
         self.mask_image.fill(Qt.transparent)
+        self.mask_preview.invalidate()
 
         # Reset history
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history.reset()
         self.historyChanged.emit(False, False)
 
         self.setSceneRect(QRectF(pixmap.rect()))
@@ -221,30 +224,60 @@ class PhotoViewer(QGraphicsView):
             self.brush_color = self.drawing_color
 
     def undo(self):
-        if self.undo_stack:
-            self.redo_stack.append(self.mask_image.copy())
-            self.mask_image = self.undo_stack.pop()
-            self.viewport().update()
-            self.historyChanged.emit(bool(self.undo_stack), True)
+        edit = self.history.undo(self.mask_image)
+        if edit is not None:
+            self.mark_mask_dirty(edit.bounding_rect())
+            self.historyChanged.emit(self.history.can_undo, True)
 
     def redo(self):
-        if self.redo_stack:
-            self.undo_stack.append(self.mask_image.copy())
-            self.mask_image = self.redo_stack.pop()
-            self.viewport().update()
-            self.historyChanged.emit(True, bool(self.redo_stack))
+        edit = self.history.redo(self.mask_image)
+        if edit is not None:
+            self.mark_mask_dirty(edit.bounding_rect())
+            self.historyChanged.emit(True, self.history.can_redo)
+
+    def mark_mask_dirty(self, rect):
+        """
+        마스크의 rect 영역(이미지 좌표)이 바뀌었음을 알리고 해당 화면 영역만 다시 그립니다.
+        """
+        self.mask_preview.mark_dirty(rect)
+        view_rect = self.mapFromScene(QRectF(rect)).boundingRect()
+        self.viewport().update(view_rect.adjusted(-2, -2, 2, 2))
+
+    def _cursor_rect(self, pos):
+        size = max(self.brush_size, self.eraser_size) * self.transform().m11()
+        radius = int(size / 2) + 2
+        return QRect(pos.x() - radius, pos.y() - radius, radius * 2, radius * 2)
+
+    def composite_mask(self, overlay):
+        """
+        오버레이 이미지를 마스크 레이어에 합성합니다. (실행 취소 가능)
+        """
+        self.history.begin()
+        self.history.touch(self.mask_image, overlay.rect())
+
+        painter = QPainter(self.mask_image)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.drawImage(0, 0, overlay)
+        painter.end()
+
+        if self.history.commit(self.mask_image):
+            self.historyChanged.emit(True, False)
+        self.mark_mask_dirty(overlay.rect())
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.drawing = True
             self.last_point = self.mapToScene(event.pos()).toPoint()
-            self.image_before_draw = self.mask_image.copy()
+            self.history.begin()
         elif event.button() == Qt.RightButton:
             self.last_pan_pos = event.pos() # Store position for panning
             event.accept() # Accept the event
 
     def mouseMoveEvent(self, event):
+        # 이전/현재 커서 영역만 다시 그림
+        self.viewport().update(self._cursor_rect(self.cursor_pos))
         self.cursor_pos = event.pos()
+        self.viewport().update(self._cursor_rect(self.cursor_pos))
 
         if event.buttons() == Qt.RightButton and not self.last_pan_pos.isNull():
             # Panning
@@ -252,10 +285,18 @@ class PhotoViewer(QGraphicsView):
             self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
             self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
             self.last_pan_pos = event.pos()
+            self.viewport().update()
             event.accept()
         elif event.buttons() and Qt.LeftButton and self.drawing:
             # Drawing
             current_point = self.mapToScene(event.pos()).toPoint()
+
+            # 이번 선분이 칠할 영역의 변경 전 타일을 기록
+            pen_size = self.eraser_size if self.draw_mode == 'eraser' else self.brush_size
+            margin = pen_size // 2 + 2
+            stroke_rect = QRect(self.last_point, current_point).normalized().adjusted(-margin, -margin, margin, margin)
+            self.history.touch(self.mask_image, stroke_rect)
+
             painter = QPainter(self.mask_image)
 
             if self.draw_mode == 'eraser':
@@ -267,24 +308,17 @@ class PhotoViewer(QGraphicsView):
 
             painter.setPen(pen)
             painter.drawLine(self.last_point, current_point)
+            painter.end()
 
+            self.mark_mask_dirty(stroke_rect)
             self.last_point = current_point
             event.accept() # Accept drawing event
 
-        self.viewport().update() # Update to draw cursor
-
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton and self.drawing:
             self.drawing = False
-            # Check if the image was actually modified to avoid empty history states
-            if self.image_before_draw is not None and self.image_before_draw != self.mask_image:
-                self.undo_stack.append(self.image_before_draw)
-                self.redo_stack.clear() # Clear redo stack on new action
-
-                # Limit undo stack size
-                if len(self.undo_stack) > 20:
-                    self.undo_stack.pop(0)
-
+            # 실제로 바뀐 타일이 있을 때만 기록 (redo 기록은 초기화됨)
+            if self.history.commit(self.mask_image):
                 self.historyChanged.emit(True, False)
             event.accept() # Accept the event
         elif event.button() == Qt.RightButton:
@@ -301,11 +335,22 @@ class PhotoViewer(QGraphicsView):
 
         painter = QPainter(self.viewport())
 
-        # Draw mask
+        # Draw mask (다시 그릴 영역만, 축소 보기에서는 캐시된 축소 마스크 사용)
         if not self.mask_image.isNull():
-            source_rect = self.mask_image.rect()
             target_rect = self.mapFromScene(self.sceneRect()).boundingRect()
-            painter.drawImage(target_rect, self.mask_image, source_rect)
+            exposed = event.rect().intersected(target_rect)
+            if not exposed.isEmpty():
+                view_scale = target_rect.width() / self.mask_image.width()
+                source, scale = self.mask_preview.source_for(self.mask_image, view_scale)
+                ratio_x = source.width() / target_rect.width()
+                ratio_y = source.height() / target_rect.height()
+                source_rect = QRectF(
+                    (exposed.x() - target_rect.x()) * ratio_x,
+                    (exposed.y() - target_rect.y()) * ratio_y,
+                    exposed.width() * ratio_x,
+                    exposed.height() * ratio_y
+                )
+                painter.drawImage(QRectF(exposed), source, source_rect)
 
         # Draw cursor preview
         if self.cursor_pos.x() > 0:
@@ -429,10 +474,15 @@ class AiEditorWidget(QWidget):
         self.reference_paths = []
         self.original_image_path = None
         self.vision_editor = VisionEditor()
+        self.worker_pool = WorkerPool()
+        self.active_tasks = {}  # name -> (worker, button)
 
-        # Image History
-        self.image_history = []
-        self.history_index = -1
+        # Image History (썸네일만 보관, 전체 이미지는 선택 시 로드)
+        self.history_model = HistoryModel(parent=self)
+        self.history_widgets = []
+        self.history_model.rowAppended.connect(self._on_history_row_appended)
+        self.history_model.rowsRemoved.connect(self._on_history_rows_removed)
+        self.history_model.currentChanged.connect(self._on_history_current_changed)
 
 
 
@@ -440,57 +490,82 @@ class AiEditorWidget(QWidget):
         self.init_ui()
 
     def segment_foreground(self):
+        if self.cancel_task("segment"):
+            return
         if not self.original_image_path:
             QMessageBox.warning(self, "이미지 없음", "편집할 이미지를 먼저 로드해주세요.")
             return
 
-        try:
-            self.segment_button.setEnabled(False)
-            self.segment_button.setText("분리 중...")
-            QApplication.processEvents() # Update UI
-
-            # Get original image bytes
-            original_pixmap = self.image_viewer._photo.pixmap()
-            buffer = QBuffer()
-            buffer.open(QIODevice.WriteOnly)
-            original_pixmap.save(buffer, "PNG")
-            image_bytes = buffer.data()
-
-            # Call segmentation
-            mask_bytes = self.vision_editor.segment_image(image_bytes)
-
-            if mask_bytes:
-                mask_image = QImage()
-                mask_image.loadFromData(mask_bytes)
-
-                # The generated mask is likely black and white. We need to make it transparent where it's black.
-                processed_mask = QImage(mask_image.size(), QImage.Format_ARGB32)
-                processed_mask.fill(Qt.transparent)
-                painter = QPainter(processed_mask)
-                for y in range(mask_image.height()):
-                    for x in range(mask_image.width()):
-                        pixel_color = QColor(mask_image.pixel(x, y))
-                        if pixel_color.red() <= 128: # If black
-                            painter.setPen(self.image_viewer.drawing_color)
-                            painter.drawPoint(x, y)
-                painter.end()
-
-                # Combine with existing mask
-                final_painter = QPainter(self.image_viewer.mask_image)
-                final_painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-                final_painter.drawImage(0, 0, processed_mask)
-                final_painter.end()
-
-                self.image_viewer.viewport().update()
-                QMessageBox.information(self, "완료", "전경/배경 분리가 완료되었습니다.")
-            else:
-                QMessageBox.warning(self, "오류", "전경/배경 분리에 실패했습니다.")
+        # QPixmap은 UI 스레드 전용이므로 QImage로 변환해 작업 스레드에 전달
+        source_image = self.image_viewer._photo.pixmap().toImage()
+        color = self.image_viewer.drawing_color
+
+        # 배경(검은색) 영역을 칠함
+        self.run_task(
+            "segment", self.segment_button, "분리 중...",
+            segmentation_task, self.vision_editor, source_image,
+            (color.red(), color.green(), color.blue(), color.alpha()),
+            select_foreground=False,
+            on_result=self.on_segmentation_completed,
+            error_message="세그멘테이션 중 오류 발생"
+        )
+
+    def on_segmentation_completed(self, overlay):
+        if overlay is None:
+            QMessageBox.warning(self, "오류", "전경/배경 분리에 실패했습니다.")
+            return
+        if overlay.size() != self.image_viewer.mask_image.size():
+            # 분리 중 다른 이미지가 로드된 경우
+            return
 
-        except Exception as e:
-            QMessageBox.critical(self, "오류", f"세그멘테이션 중 오류 발생: {e}")
-        finally:
-            self.segment_button.setEnabled(True)
-            self.segment_button.setText("전경/배경 분리")
+        # Combine with existing mask
+        self.image_viewer.composite_mask(overlay)
+        QMessageBox.information(self, "완료", "전경/배경 분리가 완료되었습니다.")
+
+    def run_task(self, name, button, busy_text, fn, *args, on_result=None,
+                 error_message="작업 중 오류 발생", **kwargs):
+        """
+        Gemini 작업을 워커 풀에서 실행합니다.
+        실행 중에는 버튼이 취소 버튼으로 동작하며, 서로 다른 작업은 동시에 실행될 수 있습니다.
+        """
+        idle_text = button.text() if button is not None else ""
+        worker = Worker(fn, *args, **kwargs)
+
+        if button is not None:
+            button.setText(f"{busy_text} (취소)")
+            worker.signals.progress.connect(
+                lambda percent, message: button.setText(f"{message or busy_text} {percent}% (취소)")
+            )
+        if on_result is not None:
+            worker.signals.result.connect(on_result)
+        worker.signals.error.connect(
+            lambda message: QMessageBox.critical(self, "오류", f"{error_message}: {message}")
+        )
+        worker.signals.finished.connect(lambda: self._on_task_finished(name, worker, button, idle_text))
+
+        self.active_tasks[name] = (worker, button)
+        self.worker_pool.start(worker)
+        return worker
+
+    def cancel_task(self, name):
+        """
+        실행 중인 작업이 있으면 취소를 요청하고 True를 반환합니다.
+        """
+        if name not in self.active_tasks:
+            return False
+        worker, button = self.active_tasks[name]
+        worker.cancel()
+        if button is not None:
+            button.setEnabled(False)
+            button.setText("취소 중...")
+        return True
+
+    def _on_task_finished(self, name, worker, button, idle_text):
+        if self.active_tasks.get(name, (None, None))[0] is worker:
+            del self.active_tasks[name]
+        if button is not None:
+            button.setEnabled(True)
+            button.setText(idle_text)
 
 
 
@@ -848,67 +923,53 @@ class AiEditorWidget(QWidget):
         layout.addStretch()
 
     def new_from_text(self):
+        if self.cancel_task("text_to_image"):
+            return
         text, ok = QInputDialog.getText(self, '텍스트로 새로 만들기', '생성할 이미지에 대한 프롬프트를 입력하세요:')
         if ok and text:
-            try:
-                self.text_to_image_btn.setEnabled(False)
-                self.text_to_image_btn.setText("생성 중...")
-                QApplication.processEvents() # Update UI
-
-                # Call text_to_image
-                image_bytes = self.vision_editor.text_to_image(text)
-
-                if image_bytes:
-                    # Save to a temporary file and load it
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as f:
-                        f.write(image_bytes)
-                        self.load_image(f.name)
-                    QMessageBox.information(self, "완료", "이미지 생성이 완료되었습니다.")
-                else:
-                    QMessageBox.warning(self, "오류", "이미지 생성에 실패했습니다.")
+            self.run_task(
+                "text_to_image", getattr(self, "text_to_image_btn", None), "생성 중...",
+                text_to_image_task, self.vision_editor, text,
+                on_result=self.on_text_to_image_completed,
+                error_message="이미지 생성 중 오류 발생"
+            )
 
-            except Exception as e:
-                QMessageBox.critical(self, "오류", f"이미지 생성 중 오류 발생: {e}")
-            finally:
-                self.text_to_image_btn.setEnabled(True)
-                self.text_to_image_btn.setText("텍스트로 새로 만들기")
+    def on_text_to_image_completed(self, image_bytes):
+        if image_bytes:
+            # Save to a temporary file and load it
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as f:
+                f.write(image_bytes)
+            self.load_image(f.name)
+            QMessageBox.information(self, "완료", "이미지 생성이 완료되었습니다.")
+        else:
+            QMessageBox.warning(self, "오류", "이미지 생성에 실패했습니다.")
 
 
 
     def upscale_image(self):
+        if self.cancel_task("upscale"):
+            return
         if not self.original_image_path:
             QMessageBox.warning(self, "이미지 없음", "편집할 이미지를 먼저 로드해주세요.")
             return
 
-        try:
-            self.upscale_btn.setEnabled(False)
-            self.upscale_btn.setText("업스케일 중...")
-            QApplication.processEvents() # Update UI
-
-            # Get original image bytes
-            original_pixmap = self.image_viewer._photo.pixmap()
-            buffer = QBuffer()
-            buffer.open(QIODevice.WriteOnly)
-            original_pixmap.save(buffer, "PNG")
-            image_bytes = buffer.data()
-
-            # Call upscale
-            upscaled_bytes = self.vision_editor.upscale_image(image_bytes)
-
-            if upscaled_bytes:
-                image_applied = self._show_image_popup(upscaled_bytes, "업스케일된 이미지")
-                if image_applied:
-                    print("업스케일된 이미지가 편집기에 적용되었습니다.")
-                else:
-                    print("사용자가 이미지 적용을 취소했습니다.")
+        source_image = self.image_viewer._photo.pixmap().toImage()
+        self.run_task(
+            "upscale", self.upscale_btn, "업스케일 중...",
+            upscale_task, self.vision_editor, source_image,
+            on_result=self.on_upscale_completed,
+            error_message="업스케일 중 오류 발생"
+        )
+
+    def on_upscale_completed(self, upscaled_bytes):
+        if upscaled_bytes:
+            image_applied = self._show_image_popup(upscaled_bytes, "업스케일된 이미지")
+            if image_applied:
+                print("업스케일된 이미지가 편집기에 적용되었습니다.")
             else:
-                QMessageBox.warning(self, "오류", "이미지 업스케일에 실패했습니다.")
-
-        except Exception as e:
-            QMessageBox.critical(self, "오류", f"업스케일 중 오류 발생: {e}")
-        finally:
-            self.upscale_btn.setEnabled(True)
-            self.upscale_btn.setText("업스케일")
+                print("사용자가 이미지 적용을 취소했습니다.")
+        else:
+            QMessageBox.warning(self, "오류", "이미지 업스케일에 실패했습니다.")
 
     def open_color_picker(self):
         color = QColorDialog.getColor()
@@ -937,10 +998,10 @@ class AiEditorWidget(QWidget):
         pixmap = QPixmap(image_path)
         if not pixmap.isNull():
             # This is a new image, so it starts a new history
-            self.image_history = []
-            self.history_index = -1
+            self.history_model.clear()
             self.image_viewer.set_photo(pixmap) # set_photo must be called before add_to_history
-            self.add_to_history(pixmap, "원본 이미지 로드")
+            # 원본 파일을 그대로 히스토리 파일로 사용 (복사본을 만들지 않음)
+            self.add_to_history(pixmap, "원본 이미지 로드", image_path=image_path)
 
     # yhkim1
     def _show_image_popup(self, image_bytes: bytes, title: str = "Image Popup", save_path: str = None):
@@ -996,15 +1057,12 @@ class AiEditorWidget(QWidget):
 
 
     def start_image_regeneration(self):
+        if self.cancel_task("regenerate"):
+            return
         if not self.original_image_path:
             QMessageBox.warning(self, "이미지 없음", "편집할 이미지를 먼저 로드해주세요.")
             return
 
-        # 버튼 비활성화 및 로딩 표시
-        self.apply_button.setEnabled(False)
-        self.apply_button.setText("생성 중...")
-        QApplication.processEvents()  # UI 업데이트
-
         print("Collecting editor data...")
         edit_data = self.collect_editor_data()
         print(f"edit_data:\n{edit_data}")
@@ -1046,119 +1104,92 @@ class AiEditorWidget(QWidget):
         ]
         reference_images = [img for img in reference_images if img is not None]
 
-        try:
-            generated_image = self.vision_editor.regenerate_image(
-                source_image=original_image,
-                mask_image=mask_image,
-                reference_images=reference_images,
-                user_prompt=edit_data.get('user_prompt', ''),
-                annotation=False
-            )
-
-            if not generated_image:
-                QMessageBox.warning(self, "오류", "첫 번째 이미지 생성에 실패했습니다.")
-                return
-
-            # 기존
-            # generated_image_shot = self.vision_editor.regenerate_image_shot(
-            #     source_image=generated_image,
-            #     regen_data=edit_data,
-            #     reference_images=reference_images
-            # )
-            # yhkim1 - 구조 변경 가정
-            # edit_data = {
-            #     "action": {
-            #         "option": "앉은 포즈",
-            #         "description": "",
-            #         "reference": "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/reference_test_1.png"
-            #     },
-            #     "framing": {
-            #         "option": "클로즈업",
-            #         "description": "",
-            #         "reference": ""
-            #     },
-            #     "angle": {
-            #         "option": "로우 앵글",
-            #         "description": "",
-            #         "reference": ""
-            #     },
-            #     "mood": {
-            #         "option": "캐주얼/데일리",
-            #         "description": "",
-            #         "reference": "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/mood_2.jpg"
-            #     },
-            #     "reference": [
-            #         "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/reference_test_2.jpg",
-            #         "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/05_숏바지.png",
-            #         "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/01_부츠.png"
-            #     ],
-            #     "original_image": "C:\\Users\\USER\\PycharmProjects\\GenCommerce\\output\\guest\\lookbook_demo\\recommend\\modelshot\\model_shot_20250918_134009.png",
-            #     "mask_image": "b""'\\x89PNG\r\...\\x00\\x00"}
-
-            # edit_data에서 사용할 옵션값만 추출
-            keys_to_extract = ['action', 'framing', 'angle', 'mood', 'user_prompt']
-            extracted_edit_data = {key: edit_data.get(key) for key in keys_to_extract}
-            extracted_edit_data = {k: v for k, v in extracted_edit_data.items() if v is not None}
-
-            generated_image_shot = self.vision_editor.regenerate_image_shot(
-                source_image=generated_image,
-                regen_data=extracted_edit_data
-            )
+        # yhkim1 - 구조 변경 가정
+        # edit_data = {
+        #     "action": {
+        #         "option": "앉은 포즈",
+        #         "description": "",
+        #         "reference": "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/reference_test_1.png"
+        #     },
+        #     "framing": {
+        #         "option": "클로즈업",
+        #         "description": "",
+        #         "reference": ""
+        #     },
+        #     "angle": {
+        #         "option": "로우 앵글",
+        #         "description": "",
+        #         "reference": ""
+        #     },
+        #     "mood": {
+        #         "option": "캐주얼/데일리",
+        #         "description": "",
+        #         "reference": "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/mood_2.jpg"
+        #     },
+        #     "reference": [
+        #         "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/reference_test_2.jpg",
+        #         "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/05_숏바지.png",
+        #         "C:/Users/USER/PycharmProjects/GenCommerce/resource/test/01_부츠.png"
+        #     ],
+        #     "original_image": "C:\\Users\\USER\\PycharmProjects\\GenCommerce\\output\\guest\\lookbook_demo\\recommend\\modelshot\\model_shot_20250918_134009.png",
+        #     "mask_image": "b""'\\x89PNG\r\...\\x00\\x00"}
+
+        # edit_data에서 사용할 옵션값만 추출
+        keys_to_extract = ['action', 'framing', 'angle', 'mood', 'user_prompt']
+        extracted_edit_data = {key: edit_data.get(key) for key in keys_to_extract}
+        extracted_edit_data = {k: v for k, v in extracted_edit_data.items() if v is not None}
+
+        self.run_task(
+            "regenerate", self.apply_button, "생성 중...",
+            regeneration_task, self.vision_editor,
+            original_image, mask_image, reference_images,
+            edit_data.get('user_prompt', ''), extracted_edit_data,
+            on_result=self.on_regeneration_completed,
+            error_message="이미지 재생성 중 오류가 발생했습니다"
+        )
+
+    def on_regeneration_completed(self, result):
+        generated_image_shot = result["image"]
+        if not generated_image_shot:
+            QMessageBox.warning(self, "오류", result["message"])
+            return
 
-            if not generated_image_shot:
-                QMessageBox.warning(self, "오류", "최종 이미지 생성에 실패했습니다.")
-                return
+        print("Image regenerated successfully.")
 
-            if generated_image_shot:
-                print("Image regenerated successfully.")
+        # 먼저 파일 경로 생성 (저장은 사용자가 확인을 눌렀을 때만)
+        # 원본 이미지 경로를 기반으로 새 파일명 생성
+        original_dir = os.path.dirname(self.original_image_path)
+        original_name = os.path.splitext(os.path.basename(self.original_image_path))[0]
+        original_ext = os.path.splitext(self.original_image_path)[1]
 
-                # 먼저 파일 경로 생성 (저장은 사용자가 확인을 눌렀을 때만)
-                # 원본 이미지 경로를 기반으로 새 파일명 생성
-                original_dir = os.path.dirname(self.original_image_path)
-                original_name = os.path.splitext(os.path.basename(self.original_image_path))[0]
-                original_ext = os.path.splitext(self.original_image_path)[1]
+        # 기존 파일명에서 숫자 접미사와 히스토리 접미사 제거 (예: _changed_1, _history_0 -> _changed)
+        import re
+        base_name = re.sub(r'(_\d+|_history_\d+)$', '', original_name)
 
-                # 기존 파일명에서 숫자 접미사와 히스토리 접미사 제거 (예: _changed_1, _history_0 -> _changed)
-                import re
-                base_name = re.sub(r'(_\d+|_history_\d+)$', '', original_name)
+        # 같은 디렉토리에서 다음 번호 찾기
+        counter = 1
+        while True:
+            new_file_path = os.path.join(original_dir, f"{base_name}_{counter}{original_ext}")
+            if not os.path.exists(new_file_path):
+                break
+            counter += 1
 
-                # 같은 디렉토리에서 다음 번호 찾기
-                counter = 1
-                while True:
-                    new_file_path = os.path.join(original_dir, f"{base_name}_{counter}{original_ext}")
-                    if not os.path.exists(new_file_path):
-                        break
-                    counter += 1
+        # 팝업으로 이미지 확인 및 저장 경로 전달
+        image_applied = self._show_image_popup(generated_image_shot, "재생성된 이미지", save_path=new_file_path)
 
-                # 팝업으로 이미지 확인 및 저장 경로 전달
-                image_applied = self._show_image_popup(generated_image_shot, "재생성된 이미지", save_path=new_file_path)
+        if image_applied:
+            # 확인을 눌렀을 때만 파일 저장
+            self._save_bytes_as_png(generated_image_shot, new_file_path)
+            print(f"이미지 저장됨: {new_file_path}")
+            print("재생성된 이미지가 편집기에 적용되었습니다.")
 
-                if image_applied:
-                    # 확인을 눌렀을 때만 파일 저장
-                    self._save_bytes_as_png(generated_image_shot, new_file_path)
-                    print(f"이미지 저장됨: {new_file_path}")
-                    print("재생성된 이미지가 편집기에 적용되었습니다.")
-
-                    # 현재 작업 중인 이미지 경로 업데이트
-                    self.original_image_path = new_file_path
-
-                    # 입력창 초기화
-                    self.user_prompt_input.clear()
-                else:
-                    print("사용자가 이미지 적용을 취소했습니다.")
-            else:
-                print("실패", "이미지 재생성에 실패했습니다. (결과 없음)")
+            # 현재 작업 중인 이미지 경로 업데이트
+            self.original_image_path = new_file_path
 
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"An error occurred during regeneration: {e}")
-            print(f"Traceback:\n{error_details}")
-            QMessageBox.critical(self, "오류", f"이미지 재생성 중 오류가 발생했습니다:\n{str(e)}")
-        finally:
-            # 버튼 다시 활성화
-            self.apply_button.setEnabled(True)
-            self.apply_button.setText("적용하기")
+            # 입력창 초기화
+            self.user_prompt_input.clear()
+        else:
+            print("사용자가 이미지 적용을 취소했습니다.")
 
 
 
@@ -1210,10 +1241,6 @@ class AiEditorWidget(QWidget):
         }
 
     def add_to_history(self, pixmap, description="", image_path=None):
-        # If we are not at the end of the history (i.e., we did an undo), truncate the future
-        if self.history_index < len(self.image_history) - 1:
-            self.image_history = self.image_history[:self.history_index + 1]
-
         # 이미지 파일 경로가 제공되지 않으면 히스토리용 임시 파일로 저장
         if not image_path:
             # 원본 이미지 디렉토리에 히스토리 파일 저장
@@ -1222,68 +1249,71 @@ class AiEditorWidget(QWidget):
                 original_name = os.path.splitext(os.path.basename(self.original_image_path))[0]
                 original_ext = os.path.splitext(self.original_image_path)[1]
 
-                # 히스토리 인덱스를 파일명에 포함
-                history_num = len(self.image_history)
+                # 히스토리 인덱스를 파일명에 포함 (현재 위치 이후 항목은 잘려나감)
+                history_num = self.history_model.current_index + 1
                 image_path = os.path.join(original_dir, f"{original_name}_history_{history_num}{original_ext}")
 
                 # Pixmap을 파일로 저장
                 pixmap.save(image_path)
 
-        # Add new state
-        self.image_history.append({
-            "pixmap": pixmap.copy(),
-            "description": description,
-            "image_path": image_path
-        })
-        self.history_index = len(self.image_history) - 1
+        # Add new state (패널에는 추가된 행만 반영됨)
+        self.history_model.append(pixmap, description, image_path)
 
         # 현재 작업 중인 이미지 경로 업데이트
         if image_path:
             self.original_image_path = image_path
 
-        # Update UI
-        self.update_history_panel()
         self.update_history_buttons(False, False)
 
-    def update_history_panel(self):
-        # Clear existing widgets
-        while self.history_layout.count() > 1: # Keep the stretch
-            child = self.history_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
-        for i, item in enumerate(self.image_history):
-            is_selected = (i == self.history_index)
-            thumbnail = HistoryThumbnail(i, item["pixmap"], item["description"], is_selected)
-            thumbnail.clicked.connect(self.load_from_history)
-            self.history_layout.insertWidget(self.history_layout.count() - 1, thumbnail)
-
-        # Ensure the selected item is visible
-        if self.history_index >= 0:
-            QApplication.processEvents()
-            last_added_widget = self.history_layout.itemAt(self.history_index).widget()
-            if last_added_widget:
-                self.history_scroll_area.ensureWidgetVisible(last_added_widget)
+    def _on_history_row_appended(self, index):
+        item = self.history_model[index]
+        thumbnail = HistoryThumbnail(index, item["thumbnail"], item["description"])
+        thumbnail.clicked.connect(self.load_from_history)
+        self.history_layout.insertWidget(self.history_layout.count() - 1, thumbnail) # Keep the stretch
+        self.history_widgets.append(thumbnail)
+
+    def _on_history_rows_removed(self, first):
+        for thumbnail in self.history_widgets[first:]:
+            self.history_layout.removeWidget(thumbnail)
+            thumbnail.deleteLater()
+        del self.history_widgets[first:]
+
+    def _on_history_current_changed(self, previous, current):
+        if 0 <= previous < len(self.history_widgets):
+            self.history_widgets[previous].set_selected(False)
+        if 0 <= current < len(self.history_widgets):
+            thumbnail = self.history_widgets[current]
+            thumbnail.set_selected(True)
+            # Ensure the selected item is visible (레이아웃 갱신 후)
+            QTimer.singleShot(0, lambda: self._ensure_history_visible(thumbnail))
+
+    def _ensure_history_visible(self, thumbnail):
+        if thumbnail in self.history_widgets:
+            self.history_scroll_area.ensureWidgetVisible(thumbnail)
 
     def load_from_history(self, index):
-        if 0 <= index < len(self.image_history):
-            self.history_index = index
-            item = self.image_history[index]
-            self.image_viewer.set_photo(item["pixmap"]) # This resets mask history, which is fine
+        if 0 <= index < len(self.history_model):
+            pixmap = self.history_model.pixmap(index)
+            if pixmap.isNull():
+                QMessageBox.warning(self, "오류", "히스토리 이미지를 불러올 수 없습니다.")
+                return
+
+            self.image_viewer.set_photo(pixmap) # This resets mask history, which is fine
+            self.history_model.set_current(index)
 
             # 현재 작업 중인 이미지 경로 업데이트
-            if "image_path" in item and item["image_path"]:
+            item = self.history_model[index]
+            if item["image_path"]:
                 self.original_image_path = item["image_path"]
 
-            self.update_history_panel()
             self.update_history_buttons(False, False)
 
     def open_final_save_dialog(self):
-        if not self.image_history:
+        if not len(self.history_model):
             QMessageBox.warning(self, "히스토리 없음", "저장할 히스토리가 없습니다.")
             return
 
-        dialog = FinalSaveDialog(self.image_history, self)
+        dialog = FinalSaveDialog(self.history_model, self)
         if dialog.exec_() == QDialog.Accepted:
             selected_paths = dialog.get_selected_paths()
             self.process_final_save(selected_paths)
@@ -1295,8 +1325,8 @@ class AiEditorWidget(QWidget):
         final_image_paths = []
         try:
             # Determine the base name from the very first image in the history
-            if self.image_history:
-                first_image_path = self.image_history[0]["image_path"]
+            if len(self.history_model):
+                first_image_path = self.history_model[0]["image_path"]
                 original_dir = os.path.dirname(first_image_path)
                 original_name_ext = os.path.basename(first_image_path)
                 original_name, original_ext = os.path.splitext(original_name_ext)
@@ -1309,15 +1339,16 @@ class AiEditorWidget(QWidget):
                 final_name = f"{original_name}_final_{i+1}{original_ext}"
                 final_path = os.path.join(original_dir, final_name)
                 
-                # Find the corresponding pixmap and save it
-                for item in self.image_history:
+                # Find the corresponding image and save it (디스크에서 로드)
+                for index, item in enumerate(self.history_model):
                     if item["image_path"] == path_to_copy:
-                        item["pixmap"].save(final_path)
+                        self.history_model.pixmap(index).save(final_path)
                         final_image_paths.append(final_path)
                         break
             
             # Delete all _history_ files
-            for item in self.image_history:
+            # (0번 항목은 불러온 원본 파일이므로 제외)
+            for item in list(self.history_model)[1:]:
                 history_path = item["image_path"]
                 if "_history_" in history_path and os.path.exists(history_path):
                     try:
@@ -1398,6 +1429,78 @@ class ImageRegenerationThread(QThread):
             error_msg = result.get('error', '알 수 없는 오류가 발생했습니다.') if result else '재생성에 실패했습니다.'
             QMessageBox.critical(self, '재생성 실패', error_msg)
 
+def _encode_png(image):
+    """QImage를 PNG 바이트로 인코딩합니다. (작업 스레드에서 사용 가능)"""
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    data = buffer.data().data()
+    buffer.close()
+    return data
+
+
+def segmentation_task(worker, vision_editor, source_image, color, select_foreground=False,
+                      clean_radius=2, feather_radius=2):
+    """전경/배경 분리 작업 (Gemini 세그멘테이션 + NumPy 마스크 후처리)"""
+    worker.report_progress(10, "분리 중...")
+    mask_bytes = vision_editor.segment_image(_encode_png(source_image))
+    worker.check_cancelled()
+    if not mask_bytes:
+        return None
+
+    worker.report_progress(80, "마스크 처리 중...")
+    return build_segmentation_overlay(
+        mask_bytes,
+        (source_image.width(), source_image.height()),
+        color,
+        select_foreground=select_foreground,
+        clean_radius=clean_radius,
+        feather_radius=feather_radius
+    )
+
+
+def upscale_task(worker, vision_editor, source_image):
+    """업스케일 작업"""
+    worker.report_progress(10, "업스케일 중...")
+    return vision_editor.upscale_image(_encode_png(source_image))
+
+
+def text_to_image_task(worker, vision_editor, text):
+    """텍스트로 이미지 생성 작업"""
+    worker.report_progress(10, "생성 중...")
+    return vision_editor.text_to_image(text)
+
+
+def regeneration_task(worker, vision_editor, source_image, mask_image, reference_images, user_prompt, regen_data):
+    """
+    이미지 재생성 작업 (1단계: 선택 영역 재생성, 2단계: 촬영기법 반영)
+
+    Returns:
+        {"image": 최종 이미지 바이트 또는 None, "message": 실패 메시지}
+    """
+    worker.report_progress(10, "1/2 생성 중...")
+    generated_image = vision_editor.regenerate_image(
+        source_image=source_image,
+        mask_image=mask_image,
+        reference_images=reference_images,
+        user_prompt=user_prompt,
+        annotation=False
+    )
+    if not generated_image:
+        return {"image": None, "message": "첫 번째 이미지 생성에 실패했습니다."}
+
+    worker.check_cancelled()
+    worker.report_progress(50, "2/2 생성 중...")
+    generated_image_shot = vision_editor.regenerate_image_shot(
+        source_image=generated_image,
+        regen_data=regen_data
+    )
+    if not generated_image_shot:
+        return {"image": None, "message": "최종 이미지 생성에 실패했습니다."}
+
+    return {"image": generated_image_shot, "message": ""}
+
+
 class VisionEditor():
     def __init__(self):
         # Gemini models
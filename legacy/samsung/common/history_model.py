@@ -0,0 +1,103 @@
+"""
+편집기 이미지 히스토리 뷰 모델
+
+히스토리 항목은 썸네일과 파일 경로만 메모리에 보관하고, 전체 해상도 이미지는
+선택 시 디스크에서 불러옵니다 (최근 항목 몇 개만 캐시).
+변경 사항은 시그널로 알리므로 패널은 바뀐 행만 추가/삭제/갱신할 수 있습니다.
+"""
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QPixmap
+
+THUMBNAIL_SIZE = 150
+
+# 메모리에 유지할 전체 해상도 이미지 수
+PIXMAP_CACHE_SIZE = 2
+
+
+class HistoryModel(QObject):
+    """
+    이미지 히스토리 목록과 현재 선택 위치
+
+    항목: {"thumbnail": QPixmap, "description": str, "image_path": str}
+    """
+    rowAppended = pyqtSignal(int)          # index
+    rowsRemoved = pyqtSignal(int)          # 삭제된 첫 index (이후 모든 행 삭제)
+    currentChanged = pyqtSignal(int, int)  # previous, current
+
+    def __init__(self, thumbnail_size=THUMBNAIL_SIZE, cache_size=PIXMAP_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.thumbnail_size = thumbnail_size
+        self.cache_size = cache_size
+        self.items = []
+        self.current_index = -1
+        self._pixmap_cache = OrderedDict()  # image_path -> QPixmap
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def clear(self):
+        self._pixmap_cache.clear()
+        if self.items:
+            self.items = []
+            self.rowsRemoved.emit(0)
+        previous, self.current_index = self.current_index, -1
+        if previous != -1:
+            self.currentChanged.emit(previous, -1)
+
+    def append(self, pixmap, description, image_path):
+        """
+        현재 위치 뒤의 항목을 잘라내고 새 항목을 추가한 뒤 선택합니다.
+        """
+        # If we are not at the end of the history (i.e., we did an undo), truncate the future
+        if self.current_index < len(self.items) - 1:
+            del self.items[self.current_index + 1:]
+            self.rowsRemoved.emit(self.current_index + 1)
+
+        self.items.append({
+            "thumbnail": pixmap.scaled(self.thumbnail_size, self.thumbnail_size,
+                                       Qt.KeepAspectRatio, Qt.SmoothTransformation),
+            "description": description,
+            "image_path": image_path
+        })
+        index = len(self.items) - 1
+        self._cache_pixmap(image_path, pixmap)
+        self.rowAppended.emit(index)
+        self.set_current(index)
+        return index
+
+    def set_current(self, index):
+        if not 0 <= index < len(self.items) or index == self.current_index:
+            return
+        previous, self.current_index = self.current_index, index
+        self.currentChanged.emit(previous, index)
+
+    def pixmap(self, index):
+        """
+        index 항목의 전체 해상도 이미지 (캐시에 없으면 디스크에서 로드)
+        """
+        image_path = self.items[index]["image_path"]
+        pixmap = self._pixmap_cache.get(image_path)
+        if pixmap is not None:
+            self._pixmap_cache.move_to_end(image_path)
+            return pixmap
+
+        pixmap = QPixmap(image_path) if image_path else QPixmap()
+        if not pixmap.isNull():
+            self._cache_pixmap(image_path, pixmap)
+        return pixmap
+
+    def _cache_pixmap(self, image_path, pixmap):
+        if not image_path:
+            return
+        self._pixmap_cache[image_path] = pixmap
+        self._pixmap_cache.move_to_end(image_path)
+        while len(self._pixmap_cache) > self.cache_size:
+            self._pixmap_cache.popitem(last=False)
@@ -0,0 +1,143 @@
+"""
+세그멘테이션 마스크 후처리 (NumPy 벡터 연산)
+
+흑백 세그멘테이션 마스크를 편집기 마스크 레이어용 RGBA 오버레이로 변환합니다.
+픽셀 단위 루프 없이 배열 연산으로 처리하므로 12MP 마스크도 1초 이내에 처리되며,
+QPixmap을 사용하지 않아 작업 스레드에서 실행할 수 있습니다.
+"""
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtGui import QImage
+
+
+def load_mask_array(mask_bytes: bytes, size=None) -> np.ndarray:
+    """
+    마스크 이미지 바이트를 회색조(uint8) 배열로 디코딩합니다.
+
+    Args:
+        mask_bytes: 마스크 이미지 바이트 (PNG/JPEG)
+        size: (width, height) - 지정 시 원본 이미지 크기에 맞게 리사이즈
+    """
+    mask = Image.open(BytesIO(mask_bytes)).convert("L")
+    if size is not None and mask.size != tuple(size):
+        mask = mask.resize(tuple(size), Image.BILINEAR)
+    return np.asarray(mask)
+
+
+def threshold_mask(gray: np.ndarray, threshold: int = 128, select_foreground: bool = True) -> np.ndarray:
+    """
+    회색조 마스크를 이진 마스크로 변환합니다. (흰색 = 전경)
+
+    Args:
+        select_foreground: True면 전경(흰색), False면 배경(검은색) 영역을 선택
+    """
+    foreground = gray > threshold
+    return foreground if select_foreground else ~foreground
+
+
+def _dilate_axis(mask: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    out = mask.copy()
+    src = mask if axis == 0 else mask.T
+    dst = out if axis == 0 else out.T
+    for k in range(1, min(radius, src.shape[0] - 1) + 1):
+        dst[k:] |= src[:-k]
+        dst[:-k] |= src[k:]
+    return out
+
+
+def dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """정사각형 구조 요소로 팽창합니다. (축 분리 처리)"""
+    if radius <= 0:
+        return mask
+    return _dilate_axis(_dilate_axis(mask, radius, 0), radius, 1)
+
+
+def erode(mask: np.ndarray, radius: int) -> np.ndarray:
+    """정사각형 구조 요소로 침식합니다."""
+    if radius <= 0:
+        return mask
+    return ~dilate(~mask, radius)
+
+
+def clean_mask(mask: np.ndarray, radius: int = 2) -> np.ndarray:
+    """
+    모폴로지 열림/닫힘으로 작은 잡티와 구멍을 제거합니다.
+    """
+    if radius <= 0:
+        return mask
+    opened = dilate(erode(mask, radius), radius)
+    return erode(dilate(opened, radius), radius)
+
+
+def _box_blur_axis(values: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius + 1, radius)
+    padded = np.pad(values, pad, mode="edge")
+    summed = np.cumsum(padded, axis=axis, dtype=np.float32)
+    width = 2 * radius + 1
+    if axis == 0:
+        return (summed[width:] - summed[:-width]) / width
+    return (summed[:, width:] - summed[:, :-width]) / width
+
+
+def feather_mask(mask: np.ndarray, radius: int = 2) -> np.ndarray:
+    """
+    가장자리를 부드럽게 처리한 알파(0.0~1.0) 배열을 반환합니다.
+    누적합 기반 박스 블러 2회 (가우시안 근사) 로 처리합니다.
+    """
+    alpha = mask.astype(np.float32)
+    if radius <= 0:
+        return alpha
+    for _ in range(2):
+        alpha = _box_blur_axis(alpha, radius, 0)
+        alpha = _box_blur_axis(alpha, radius, 1)
+    return np.clip(alpha, 0.0, 1.0, out=alpha)
+
+
+def build_overlay(alpha: np.ndarray, color) -> np.ndarray:
+    """
+    알파 배열과 색상 (r, g, b, a) 으로 RGBA 오버레이 배열을 생성합니다.
+    """
+    r, g, b, a = color
+    height, width = alpha.shape
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[..., 0] = r
+    rgba[..., 1] = g
+    rgba[..., 2] = b
+    rgba[..., 3] = (alpha * a + 0.5).astype(np.uint8)
+    return rgba
+
+
+def array_to_qimage(rgba: np.ndarray) -> QImage:
+    """
+    RGBA 배열을 한 번에 QImage(ARGB32)로 변환합니다.
+    """
+    rgba = np.ascontiguousarray(rgba)
+    height, width = rgba.shape[:2]
+    image = QImage(rgba.data, width, height, rgba.strides[0], QImage.Format_RGBA8888)
+    # convertToFormat은 새 버퍼를 만들므로 NumPy 배열과 분리됩니다.
+    return image.convertToFormat(QImage.Format_ARGB32)
+
+
+def build_segmentation_overlay(mask_bytes: bytes, size, color, select_foreground: bool = True,
+                               threshold: int = 128, clean_radius: int = 2,
+                               feather_radius: int = 2) -> QImage:
+    """
+    세그멘테이션 결과를 마스크 레이어에 합성할 오버레이 QImage로 변환합니다.
+
+    Args:
+        mask_bytes: 흑백 세그멘테이션 마스크 바이트 (흰색 = 전경)
+        size: 편집 중인 이미지 크기 (width, height)
+        color: 오버레이 색상 (r, g, b, a)
+        select_foreground: True면 전경, False면 배경을 칠함
+        threshold: 이진화 임계값
+        clean_radius: 모폴로지 정리 반경 (0이면 생략)
+        feather_radius: 가장자리 페더링 반경 (0이면 생략)
+    """
+    gray = load_mask_array(mask_bytes, size)
+    mask = threshold_mask(gray, threshold, select_foreground)
+    mask = clean_mask(mask, clean_radius)
+    alpha = feather_mask(mask, feather_radius)
+    return array_to_qimage(build_overlay(alpha, color))
@@ -37,7 +37,9 @@ def show_sidebar():
             "🏠 홈": "app.py",
             "🎨 Image Editor": "pages/01_Image_Editor.py",
             "📊 DAM System": "pages/02_DAM_System.py",
-            "⚙️ Settings": "pages/03_Settings.py"
+            "⚙️ Settings": "pages/03_Settings.py",
+            "📈 Metrics": "pages/04_Metrics.py",
+            "🔍 Traces": "pages/05_Traces.py"
         }
 
         # Get the current script path to determine the active page
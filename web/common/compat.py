@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+CEN AI DAM Editor - Third-party Component Compatibility
+
+streamlit-drawable-canvas 0.9.3 converts the background image with
+`streamlit.elements.image.image_to_url(image, width, clamp, channels,
+output_format, image_id)`, which newer Streamlit releases moved to
+`streamlit.elements.lib.image_utils` with a LayoutConfig in place of width.
+"""
+
+import streamlit.elements.image as st_image
+
+
+def patch_drawable_canvas():
+    """Restore the image_to_url entry point st_canvas expects (idempotent)."""
+    if hasattr(st_image, 'image_to_url'):
+        return
+
+    from streamlit.elements.lib.image_utils import image_to_url
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+
+    def _image_to_url(image, width, clamp, channels, output_format, image_id):
+        return image_to_url(image, LayoutConfig(width=width), clamp, channels, output_format, image_id)
+
+    st_image.image_to_url = _image_to_url
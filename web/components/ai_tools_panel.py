@@ -14,6 +14,8 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from core import ImageGenerator
+from core.ai_tools import AI_TOOLS, FILL_GENERATIVE, FILL_SOLID, apply_local_tool, build_tool_instruction
+from core.tracing import span, trace_dir_for
 
 
 @st.dialog("🤖 AI 도구", width="large")
@@ -29,14 +31,7 @@ def show_ai_tools_panel() -> Optional[Dict]:
     # Tool selection
     selected_tool = st.selectbox(
         "도구 선택",
-        [
-            "배경 제거",
-            "스타일 전환",
-            "이미지 업스케일링",
-            "객체 교체",
-            "색상 보정",
-            "이미지 확장"
-        ],
+        AI_TOOLS,
         key="ai_tool_selector"
     )
 
@@ -190,12 +185,24 @@ def show_ai_tools_panel() -> Optional[Dict]:
             expand_top = st.number_input("위쪽 확장 (px)", 0, 500, 0, key="expand_top")
             expand_bottom = st.number_input("아래쪽 확장 (px)", 0, 500, 0, key="expand_bottom")
 
-        expansion_prompt = st.text_area(
-            "확장 영역 설명 (선택사항)",
-            placeholder="예: 자연스러운 배경 확장, 동일한 스타일 유지",
-            height=80,
-            key="expansion_prompt"
+        fill_mode = st.radio(
+            "채우기 방식",
+            [FILL_GENERATIVE, FILL_SOLID],
+            horizontal=True,
+            key="expansion_fill_mode"
         )
+        tool_params['fill_mode'] = fill_mode
+
+        expansion_prompt = ""
+        if fill_mode == FILL_SOLID:
+            tool_params['fill_color'] = st.color_picker("여백 색상", "#FFFFFF", key="expansion_fill_color")
+        else:
+            expansion_prompt = st.text_area(
+                "확장 영역 설명 (선택사항)",
+                placeholder="예: 자연스러운 배경 확장, 동일한 스타일 유지",
+                height=80,
+                key="expansion_prompt"
+            )
 
         tool_params['expand_left'] = expand_left
         tool_params['expand_right'] = expand_right
@@ -237,91 +244,40 @@ def apply_ai_tool(tool_data: Dict, current_image: Image.Image, workspace_dir: st
     tool = tool_data['tool']
     params = tool_data['params']
 
-    try:
-        # Save current image temporarily
-        temp_path = os.path.join(workspace_dir, 'temp_ai_tool.png')
-        current_image.save(temp_path)
-
-        # Initialize generator
-        output_dir = os.path.join(workspace_dir, 'generated')
-        generator = ImageGenerator(output_dir)
-
-        # Build AI instruction based on tool type
-        if tool == "배경 제거":
-            if params['background_type'] == "투명 배경":
-                instruction = "Remove the background completely and make it transparent, keeping only the main subject"
-            elif params['background_type'] == "단색 배경":
-                bg_color = params.get('background_color', '#FFFFFF')
-                instruction = f"Remove the background and replace it with a solid {bg_color} color background"
-            else:  # 블러 배경
-                blur = params.get('blur_intensity', 5)
-                instruction = f"Apply a blur effect to the background with intensity level {blur}, keeping the main subject sharp"
-
-        elif tool == "스타일 전환":
-            if 'preset_style' in params:
-                style = params['preset_style']
-                intensity = params['intensity']
-                instruction = f"Transform this image into {style} style with {intensity}% intensity, maintaining the main composition"
-            else:
-                instruction = "Apply the style from the reference image to this image while preserving the content"
-                # TODO: Handle reference image upload
-
-        elif tool == "이미지 업스케일링":
-            scale = params['scale_factor']
-            enhance = params.get('enhance', True)
-            instruction = f"Upscale this image by {scale}x using AI super-resolution"
-            if enhance:
-                instruction += " with additional quality enhancement and detail restoration"
-
-        elif tool == "객체 교체":
-            remove_obj = params.get('remove_object', '')
-            add_obj = params.get('add_object', '')
-            if remove_obj and add_obj:
-                instruction = f"Replace the {remove_obj} in the image with {add_obj}, maintaining natural lighting and perspective"
-            else:
-                instruction = "Perform object replacement based on the provided specifications"
+    with span('ui.apply_ai_tool', trace_dir=trace_dir_for(workspace_dir), tool=tool,
+              user=os.path.basename(workspace_dir)):
+        try:
+            # Deterministic edits run locally in milliseconds
+            local_result = apply_local_tool(tool, params, current_image)
+            if local_result is not None:
+                return local_result
+
+            # Initialize generator
+            output_dir = os.path.join(workspace_dir, 'generated')
+            generator = ImageGenerator(output_dir)
+
+            # Build AI instruction based on tool type
+            try:
+                instruction = build_tool_instruction(tool, params)
+            except ValueError:
+                st.error(f"알 수 없는 도구: {tool}")
+                return None
+
+            # Apply AI tool via generator
+            # Current image is encoded in memory; no temp file round-trip
+            generated_paths = generator.change_attributes(
+                image_path=current_image,
+                instructions=[instruction]
+            )
 
-        elif tool == "색상 보정":
-            if params['mode'] == "자동 보정":
-                level = params.get('auto_level', '보통')
-                instruction = f"Automatically adjust colors, brightness, and contrast with {level} enhancement level"
+            if generated_paths:
+                # Load and return processed image
+                processed_image = Image.open(generated_paths[0])
+                return processed_image
             else:
-                brightness = params.get('brightness', 0)
-                contrast = params.get('contrast', 0)
-                saturation = params.get('saturation', 0)
-                instruction = f"Adjust image: brightness {brightness:+d}, contrast {contrast:+d}, saturation {saturation:+d}"
-
-        elif tool == "이미지 확장":
-            left = params.get('expand_left', 0)
-            right = params.get('expand_right', 0)
-            top = params.get('expand_top', 0)
-            bottom = params.get('expand_bottom', 0)
-            custom_prompt = params.get('prompt', '')
-
-            instruction = f"Expand the image outward: {left}px left, {right}px right, {top}px top, {bottom}px bottom"
-            if custom_prompt:
-                instruction += f". {custom_prompt}"
-            else:
-                instruction += ". Fill the expanded areas naturally based on the existing image context"
-
-        else:
-            st.error(f"알 수 없는 도구: {tool}")
-            return None
-
-        # Apply AI tool via generator
-        generated_paths = generator.change_attributes(
-            image_path=temp_path,
-            instructions=[instruction]
-        )
-
-        if generated_paths:
-            # Load and return processed image
-            processed_image = Image.open(generated_paths[0])
-            return processed_image
-        else:
-            st.error("AI 도구 적용 실패")
-            return None
+                st.error("AI 도구 적용 실패")
+                return None
 
-    except Exception as e:
-        st.error(f"AI 도구 적용 중 오류 발생: {str(e)}")
-        return None
\ No newline at end of file
+        except Exception as e:
+            st.error(f"AI 도구 적용 중 오류 발생: {str(e)}")
+            return None
\ No newline at end of file
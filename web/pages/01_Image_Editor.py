@@ -26,13 +26,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from streamlit_drawable_canvas import st_canvas
 import numpy as np
 
+from web.common.compat import patch_drawable_canvas
+
 from core import ImageGenerator, ImageAnalyzer
+from core.tracing import span, trace_dir_for
 from utils.session import init_session_state
 from utils.file_handler import save_uploaded_file
 from components.ai_tools_panel import show_ai_tools_panel, apply_ai_tool
 from components.template_form import show_template_dialog
 from utils.project_manager import ProjectManager
 
+patch_drawable_canvas()
+
 # Page configuration
 st.set_page_config(
     page_title="이미지 에디터 - CEN AI DAM Editor",
@@ -528,16 +533,15 @@ def show_prompt_area():
         elif st.session_state.current_canvas_image is None:
             st.warning("먼저 이미지를 업로드해주세요")
         else:
-            with st.spinner("AI가 이미지를 생성하고 있습니다..."):
+            workspace_dir = st.session_state.user['workspace_dir']
+            with st.spinner("AI가 이미지를 생성하고 있습니다..."), \
+                    span('ui.apply_prompt', trace_dir=trace_dir_for(workspace_dir),
+                         user=os.path.basename(workspace_dir)):
                 try:
-                    workspace_dir = st.session_state.user['workspace_dir']
                     generator = ImageGenerator(os.path.join(workspace_dir, 'generated'))
 
-                    temp_path = os.path.join(workspace_dir, 'temp_canvas.png')
-                    st.session_state.current_canvas_image.save(temp_path)
-
                     generated_paths = generator.change_attributes(
-                        image_path=temp_path,
+                        image_path=st.session_state.current_canvas_image,
                         instructions=[prompt]
                     )
 
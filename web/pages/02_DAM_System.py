@@ -9,15 +9,16 @@ Features:
 - Advanced search and filtering
 - Metadata management and viewing
 - Asset upload and organization
-- Batch operations (delete, move, tag)
+- Batch operations (delete, move, tag, AI tools)
 - AI-powered metadata extraction
+- Incremental re-analysis after taxonomy/prompt changes
+- Category confirmation (trains the local category classifier)
 """
 
 import streamlit as st
 import os
 import sys
 from PIL import Image
-from datetime import datetime
 from typing import List, Dict
 import json
 
@@ -26,6 +27,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from core import ImageAnalyzer
 from core.logger import get_logger
+from core.file_events import notify_file_written, notify_file_removed
+from core.ai_tools import TOOL_BACKGROUND_REMOVAL, TOOL_UPSCALE, TOOL_COLOR_CORRECTION, TOOL_STYLE_TRANSFER
+from core.batch_runner import BatchToolRunner, create_batch_job, list_batch_jobs, JOB_COMPLETED
+from core.tracing import span, trace_dir_for
+from core.asset_catalog import load_assets_from_workspace, filter_assets
+from core.reanalysis import find_stale_assets, summarize_stale, reanalyze_assets
+from core.category_classifier import confirm_category, SOURCE_LOCAL
+from core.config import PRODUCT_CATEGORY
 from web.utils.session import init_session_state
 from web.utils.file_handler import save_uploaded_file
 
@@ -149,71 +158,8 @@ def init_dam_state():
     if 'batch_mode' not in st.session_state:
         st.session_state.batch_mode = False
 
-
-def load_assets_from_workspace(workspace_dir: str, folder: str = 'all') -> List[Dict]:
-    """
-    Load assets from user workspace.
-
-    Args:
-        workspace_dir: User workspace directory
-        folder: Folder to load from ('all', 'uploads', 'generated', etc.)
-
-    Returns:
-        List of asset dictionaries with metadata
-    """
-    assets = []
-
-    # Determine which folders to scan
-    if folder == 'all':
-        folders_to_scan = ['uploads', 'generated']
-    else:
-        folders_to_scan = [folder]
-
-    for folder_name in folders_to_scan:
-        folder_path = os.path.join(workspace_dir, folder_name)
-
-        if not os.path.exists(folder_path):
-            continue
-
-        # Scan for image files
-        for filename in os.listdir(folder_path):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                file_path = os.path.join(folder_path, filename)
-
-                # Get file stats
-                stats = os.stat(file_path)
-                created_time = datetime.fromtimestamp(stats.st_ctime)
-                modified_time = datetime.fromtimestamp(stats.st_mtime)
-                file_size = stats.st_size
-
-                # Try to load metadata
-                metadata_path = os.path.join(workspace_dir, 'metadata', f"{os.path.splitext(filename)[0]}.json")
-                metadata = {}
-
-                if os.path.exists(metadata_path):
-                    try:
-                        with open(metadata_path, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                    except:
-                        pass
-
-                # Build asset info
-                asset = {
-                    'filename': filename,
-                    'path': file_path,
-                    'folder': folder_name,
-                    'created': created_time,
-                    'modified': modified_time,
-                    'size': file_size,
-                    'metadata': metadata,
-                    'category': metadata.get('category', '미분류'),
-                    'tags': metadata.get('tags', []),
-                    'description': metadata.get('description', '')
-                }
-
-                assets.append(asset)
-
-    return assets
+    if 'stale_assets' not in st.session_state:
+        st.session_state.stale_assets = None
 
 
 def show_search_and_filters():
@@ -259,49 +205,6 @@ def show_search_and_filters():
     return search_query, folder_filter, category_filter, sort_order
 
 
-def filter_assets(assets: List[Dict], search_query: str, category_filter: str, sort_order: str) -> List[Dict]:
-    """
-    Filter and sort assets based on search and filter criteria.
-
-    Args:
-        assets: List of asset dictionaries
-        search_query: Search query string
-        category_filter: Category filter
-        sort_order: Sort order
-
-    Returns:
-        Filtered and sorted list of assets
-    """
-    filtered = assets
-
-    # Apply search filter
-    if search_query:
-        query_lower = search_query.lower()
-        filtered = [
-            asset for asset in filtered
-            if query_lower in asset['filename'].lower()
-            or query_lower in asset['category'].lower()
-            or any(query_lower in tag.lower() for tag in asset['tags'])
-            or query_lower in asset['description'].lower()
-        ]
-
-    # Apply category filter
-    if category_filter != "전체":
-        filtered = [asset for asset in filtered if asset['category'] == category_filter]
-
-    # Apply sorting
-    if sort_order == "최근 수정":
-        filtered.sort(key=lambda x: x['modified'], reverse=True)
-    elif sort_order == "최근 생성":
-        filtered.sort(key=lambda x: x['created'], reverse=True)
-    elif sort_order == "이름순":
-        filtered.sort(key=lambda x: x['filename'])
-    elif sort_order == "크기순":
-        filtered.sort(key=lambda x: x['size'], reverse=True)
-
-    return filtered
-
-
 def show_asset_grid(assets: List[Dict]):
     """Render assets in grid view."""
     if not assets:
@@ -523,6 +426,7 @@ def batch_delete_assets(assets: List[Dict], workspace_dir: str) -> int:
             # Delete image file
             if os.path.exists(asset['path']):
                 os.remove(asset['path'])
+                notify_file_removed(asset['path'])
                 deleted_count += 1
 
             # Delete metadata file if exists
@@ -533,6 +437,7 @@ def batch_delete_assets(assets: List[Dict], workspace_dir: str) -> int:
             )
             if os.path.exists(metadata_path):
                 os.remove(metadata_path)
+                notify_file_removed(metadata_path)
 
         except Exception as e:
             logger = get_logger()
@@ -579,6 +484,7 @@ def batch_add_tags(assets: List[Dict], tags: List[str], workspace_dir: str) -> i
             os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False, indent=2)
+            notify_file_written(metadata_path)
 
             updated_count += 1
 
@@ -623,6 +529,8 @@ def batch_move_assets(assets: List[Dict], target_folder: str, workspace_dir: str
                 counter += 1
 
             os.rename(asset['path'], new_path)
+            notify_file_removed(asset['path'])
+            notify_file_written(new_path)
             moved_count += 1
 
         except Exception as e:
@@ -632,6 +540,107 @@ def batch_move_assets(assets: List[Dict], target_folder: str, workspace_dir: str
     return moved_count
 
 
+def run_batch_job(workspace_dir: str, job_id: str, max_workers: int) -> Dict:
+    """
+    Run (or resume) a batch AI tool job with a progress bar.
+
+    Args:
+        workspace_dir: User workspace directory
+        job_id: Batch job ID
+        max_workers: Maximum concurrent requests
+
+    Returns:
+        Job summary
+    """
+    runner = BatchToolRunner(workspace_dir, job_id, max_workers=max_workers)
+    progress_bar = st.progress(0.0, text="배치 작업 준비 중...")
+
+    def _on_progress(completed: int, total: int, item: Dict):
+        progress_bar.progress(
+            completed / total if total else 1.0,
+            text=f"{completed}/{total} 처리됨 - {os.path.basename(item['source'])}"
+        )
+
+    summary = runner.run(progress_callback=_on_progress)
+    progress_bar.progress(1.0, text="배치 작업 완료")
+    return summary
+
+
+def show_batch_ai_tool_popover(selected_assets: List[Dict], workspace_dir: str):
+    """
+    Show the batch AI tool popover (apply one tool to all selected assets).
+
+    Args:
+        selected_assets: List of selected asset dictionaries
+        workspace_dir: User workspace directory
+    """
+    with st.popover("🤖 AI 도구"):
+        st.markdown("**AI 도구 일괄 적용**")
+
+        tool = st.selectbox(
+            "도구 선택",
+            [TOOL_BACKGROUND_REMOVAL, TOOL_UPSCALE, TOOL_COLOR_CORRECTION, TOOL_STYLE_TRANSFER],
+            key="batch_ai_tool"
+        )
+
+        params = {}
+        if tool == TOOL_BACKGROUND_REMOVAL:
+            params['background_type'] = st.radio(
+                "배경 옵션", ["투명 배경", "단색 배경", "블러 배경"], horizontal=True, key="batch_bg_type"
+            )
+            if params['background_type'] == "단색 배경":
+                params['background_color'] = st.color_picker("배경 색상", "#FFFFFF", key="batch_bg_color")
+            elif params['background_type'] == "블러 배경":
+                params['blur_intensity'] = st.slider("블러 강도", 1, 10, 5, key="batch_blur")
+        elif tool == TOOL_UPSCALE:
+            params['scale_factor'] = st.select_slider("확대 배율", options=[2, 3, 4, 8], value=2, key="batch_scale")
+            params['enhance'] = st.checkbox("추가 품질 향상", value=True, key="batch_enhance")
+        elif tool == TOOL_COLOR_CORRECTION:
+            params['mode'] = "자동 보정"
+            params['auto_level'] = st.select_slider(
+                "보정 강도", options=["약하게", "보통", "강하게"], value="보통", key="batch_auto_level"
+            )
+        elif tool == TOOL_STYLE_TRANSFER:
+            params['preset_style'] = st.selectbox(
+                "스타일 프리셋",
+                ["유화 스타일", "수채화 스타일", "만화/애니메이션 스타일", "미니멀리즘", "사실주의", "팝아트"],
+                key="batch_style"
+            )
+            params['intensity'] = st.slider("스타일 강도", 0, 100, 70, key="batch_style_intensity")
+
+        max_workers = st.slider("동시 처리 수", 1, 8, 4, key="batch_max_workers")
+
+        if st.button("일괄 적용 실행", key="batch_ai_tool_confirm", type="primary"):
+            job_id = create_batch_job(
+                workspace_dir,
+                {'tool': tool, 'params': params},
+                [asset['path'] for asset in selected_assets]
+            )
+            summary = run_batch_job(workspace_dir, job_id, max_workers)
+            st.success(f"✅ {summary['done']}개 완료, {summary['failed']}개 실패")
+            st.session_state.selected_assets = []
+
+        # Interrupted or partially failed jobs can be resumed
+        unfinished = [
+            job for job in list_batch_jobs(workspace_dir)
+            if job['status'] != JOB_COMPLETED or job['failed'] > 0
+        ]
+        if unfinished:
+            st.markdown("---")
+            st.markdown("**미완료 작업**")
+            for job in unfinished[:5]:
+                st.caption(
+                    f"{job['job_id']} · {job['tool']} · "
+                    f"{job['done']}/{job['total']} 완료, 실패 {job['failed']}"
+                )
+                if st.button("이어서 실행", key=f"batch_resume_{job['job_id']}"):
+                    try:
+                        summary = run_batch_job(workspace_dir, job['job_id'], max_workers)
+                        st.success(f"✅ {summary['done']}개 완료, {summary['failed']}개 실패")
+                    except RuntimeError:
+                        st.warning("이미 실행 중인 작업입니다.")
+
+
 def show_batch_operations_bar(selected_count: int, selected_assets: List[Dict], workspace_dir: str):
     """
     Show batch operations toolbar when assets are selected.
@@ -647,7 +656,7 @@ def show_batch_operations_bar(selected_count: int, selected_assets: List[Dict],
     st.markdown("---")
     st.markdown(f"### 🔧 배치 작업 ({selected_count}개 선택됨)")
 
-    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 2])
+    col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 2, 2, 2, 2])
 
     with col1:
         if st.button("🗑️ 삭제", use_container_width=True, type="primary"):
@@ -691,10 +700,13 @@ def show_batch_operations_bar(selected_count: int, selected_assets: List[Dict],
                 st.rerun()
 
     with col4:
+        show_batch_ai_tool_popover(selected_assets, workspace_dir)
+
+    with col5:
         if st.button("⬇️ 일괄 다운로드", use_container_width=True):
             st.info("일괄 다운로드 기능 (향후 구현)")
 
-    with col5:
+    with col6:
         if st.button("❌ 선택 해제", use_container_width=True):
             st.session_state.selected_assets = []
             st.rerun()
@@ -738,6 +750,115 @@ def show_upload_section():
                         st.rerun()
 
 
+STAGE_LABELS = {
+    'category': '카테고리',
+    'product_attributes': '제품 속성',
+    'common_attributes': '공통 속성',
+    'description': '상품 설명',
+}
+
+
+def show_reanalysis_section():
+    """Render re-analysis of metadata made stale by taxonomy or prompt changes."""
+    with st.expander("🧬 분류 체계 변경 반영", expanded=False):
+        st.markdown("카테고리/속성 설정이나 분석 프롬프트가 바뀐 경우, 영향을 받는 분석 단계만 다시 실행합니다.")
+
+        workspace_dir = st.session_state.user['workspace_dir']
+        metadata_dir = os.path.join(workspace_dir, 'metadata')
+
+        if st.button("변경 영향 확인", key="reanalysis_scan"):
+            analyzer = ImageAnalyzer(metadata_dir)
+            st.session_state.stale_assets = find_stale_assets(metadata_dir, analyzer)
+
+        stale_assets = st.session_state.stale_assets
+        if stale_assets is None:
+            return
+        if not stale_assets:
+            st.success("✅ 모든 메타데이터가 최신 상태입니다.")
+            return
+
+        st.caption(f"{len(stale_assets)}개 자산의 메타데이터가 최신이 아닙니다.")
+        st.table([
+            {
+                '브랜드': row['brand'],
+                '카테고리': row['category'],
+                '분석 단계': STAGE_LABELS.get(row['stage'], row['stage']),
+                '자산 수': row['assets'],
+            }
+            for row in summarize_stale(stale_assets)
+        ])
+
+        if st.button("변경된 단계만 재분석", key="reanalysis_run", type="primary"):
+            analyzer = ImageAnalyzer(metadata_dir)
+            progress_bar = st.progress(0.0, text="재분석 준비 중...")
+
+            def _on_progress(completed: int, total: int, asset: Dict):
+                progress_bar.progress(
+                    completed / total if total else 1.0,
+                    text=f"{completed}/{total} 처리됨 - {os.path.basename(asset['image_path'])}"
+                )
+
+            summary = reanalyze_assets(
+                stale_assets, analyzer, progress_callback=_on_progress,
+                trace_dir=trace_dir_for(workspace_dir),
+                trace_attributes={'user': os.path.basename(workspace_dir)}
+            )
+            st.session_state.stale_assets = None
+            st.success(
+                f"✅ {summary['done']}개 갱신, {summary['failed']}개 실패, "
+                f"{summary['skipped']}개 건너뜀 (원본 없음)"
+            )
+
+
+def show_category_confirmation(asset: Dict):
+    """
+    Let the user confirm or correct an analyzed asset's category.
+
+    Confirmed categories train the local category classifier.
+
+    Args:
+        asset: Asset dictionary with analysis metadata
+    """
+    metadata = asset['metadata']
+    categories = PRODUCT_CATEGORY.get(metadata.get('brand', ''), {})
+    if 'category_data' not in metadata or not categories:
+        return
+
+    category_data = metadata['category_data']
+    if category_data.get('confirmed'):
+        st.caption("✅ 확정된 분류")
+    elif category_data.get('source') == SOURCE_LOCAL:
+        st.caption(f"🖥️ 로컬 분류기 추정 (신뢰도 {category_data.get('confidence', 0):.0%})")
+
+    with st.expander("🏷️ 분류 확정", expanded=False):
+        options = list(categories)
+        current = metadata.get('category')
+        category = st.selectbox(
+            "카테고리", options,
+            index=options.index(current) if current in options else 0,
+            key=f"confirm_category_{asset['filename']}"
+        )
+        sub_options = categories[category]
+        current_sub = metadata.get('sub_category')
+        sub_category = st.selectbox(
+            "세부 카테고리", sub_options,
+            index=sub_options.index(current_sub) if current_sub in sub_options else 0,
+            key=f"confirm_sub_category_{asset['filename']}"
+        )
+
+        if st.button("분류 확정", key=f"confirm_category_btn_{asset['filename']}", use_container_width=True):
+            workspace_dir = st.session_state.user['workspace_dir']
+            metadata_path = os.path.join(
+                workspace_dir, 'metadata', f"{os.path.splitext(asset['filename'])[0]}.json"
+            )
+            try:
+                asset['metadata'] = confirm_category(metadata_path, category, sub_category)
+                asset['category'] = category
+                st.success("✅ 분류가 확정되었습니다. 속성이 달라졌다면 '분류 체계 변경 반영'에서 재분석하세요.")
+            except ValueError as e:
+                st.error(f"분류 확정 실패: {str(e)}")
+
+
 def show_sidebar():
     """Show sidebar with navigation and asset preview."""
     with st.sidebar:
@@ -746,7 +867,9 @@ def show_sidebar():
             "🏠 홈": "app.py",
             "🎨 Image Editor": "pages/01_Image_Editor.py",
             "📊 DAM System": "pages/02_DAM_System.py",
-            "⚙️ Settings": "pages/03_Settings.py"
+            "⚙️ Settings": "pages/03_Settings.py",
+            "📈 Metrics": "pages/04_Metrics.py",
+            "🔍 Traces": "pages/05_Traces.py"
         }
 
         try:
@@ -819,6 +942,8 @@ def show_sidebar():
                 with st.expander("📊 전체 메타데이터"):
                     st.json(asset['metadata'])
 
+            show_category_confirmation(asset)
+
             st.markdown("---")
 
             # Actions
@@ -838,10 +963,15 @@ def show_sidebar():
                     st.error(f"이미지 로드 실패: {str(e)}")
 
             if st.button("🔄 메타데이터 재생성", use_container_width=True):
-                with st.spinner("AI가 메타데이터를 분석하고 있습니다..."):
+                workspace_dir = st.session_state.user['workspace_dir']
+                with st.spinner("AI가 메타데이터를 분석하고 있습니다..."), \
+                        span('ui.regenerate_metadata', trace_dir=trace_dir_for(workspace_dir),
+                             user=os.path.basename(workspace_dir)):
                     try:
-                        analyzer = ImageAnalyzer(st.session_state.user['workspace_dir'])
-                        new_metadata = analyzer.analyze_image(asset['path'], save_metadata=True)
+                        analyzer = ImageAnalyzer(os.path.join(workspace_dir, 'metadata'))
+                        new_metadata = analyzer.analyze_image(
+                            asset['path'], save_metadata=True, resume=False
+                        )
                         asset['metadata'] = new_metadata
                         st.success("✅ 메타데이터 재생성 완료!")
                         st.rerun()
@@ -870,6 +1000,9 @@ def main():
     # Upload section
     show_upload_section()
 
+    # Re-analysis after taxonomy changes
+    show_reanalysis_section()
+
     st.markdown("---")
 
     # Search and filters
@@ -13,6 +13,9 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from utils.session import init_session_state, get_user_workspace_dir
+from core.workspace_stats import get_workspace_stats
+from core.storage_lifecycle import get_lifecycle_manager
+from core.usage_ledger import get_usage_ledger, GLOBAL_SCOPE
 
 # Page configuration
 st.set_page_config(
@@ -66,51 +69,16 @@ def get_workspace_statistics(workspace_dir: str) -> dict:
     """
     Get statistics about user's workspace.
 
+    Served from the incrementally maintained statistics service, so this
+    never walks the workspace on the render path.
+
     Args:
         workspace_dir: Path to user's workspace
 
     Returns:
         Dictionary with statistics
     """
-    stats = {
-        'total_uploads': 0,
-        'total_generated': 0,
-        'total_metadata': 0,
-        'total_size_mb': 0
-    }
-
-    # Count uploads
-    uploads_dir = os.path.join(workspace_dir, 'uploads')
-    if os.path.exists(uploads_dir):
-        stats['total_uploads'] = len([f for f in os.listdir(uploads_dir)
-                                       if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))])
-
-    # Count generated images
-    generated_dir = os.path.join(workspace_dir, 'generated')
-    if os.path.exists(generated_dir):
-        stats['total_generated'] = len([f for f in os.listdir(generated_dir)
-                                         if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))])
-
-    # Count metadata files
-    metadata_dir = os.path.join(workspace_dir, 'metadata')
-    if os.path.exists(metadata_dir):
-        stats['total_metadata'] = len([f for f in os.listdir(metadata_dir)
-                                        if f.endswith('.json')])
-
-    # Calculate total size
-    total_size = 0
-    for folder in ['uploads', 'generated', 'metadata', 'projects']:
-        folder_path = os.path.join(workspace_dir, folder)
-        if os.path.exists(folder_path):
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if os.path.exists(file_path):
-                        total_size += os.path.getsize(file_path)
-
-    stats['total_size_mb'] = round(total_size / (1024 * 1024), 2)
-
-    return stats
+    return get_workspace_stats(workspace_dir).get_summary()
 
 
 def show_user_profile():
@@ -186,8 +154,190 @@ def show_workspace_stats():
         </div>
         """, unsafe_allow_html=True)
 
+    if not stats['ready']:
+        st.caption("⏳ 워크스페이스 용량을 백그라운드에서 집계하고 있습니다.")
+    elif stats['last_reconciled']:
+        st.caption(f"마지막 전체 집계: {stats['last_reconciled']}")
+
+    with st.expander("📁 폴더별 / 유형별 사용량"):
+        col_folder, col_type = st.columns(2)
+
+        with col_folder:
+            st.markdown("**폴더별**")
+            st.table([
+                {
+                    '폴더': name,
+                    '파일 수': data['count'],
+                    '용량 (MB)': round(data['bytes'] / (1024 * 1024), 2)
+                }
+                for name, data in sorted(stats['folders'].items())
+            ])
+
+        with col_type:
+            st.markdown("**유형별**")
+            st.table([
+                {
+                    '유형': asset_type,
+                    '파일 수': data['count'],
+                    '용량 (MB)': round(data['bytes'] / (1024 * 1024), 2)
+                }
+                for asset_type, data in sorted(stats['types'].items())
+            ])
+
+        if len(stats['growth']) > 1:
+            st.markdown("**용량 증가 추이 (MB)**")
+            st.line_chart(
+                {
+                    'date': [sample['date'] for sample in stats['growth']],
+                    'size_mb': [round(sample['bytes'] / (1024 * 1024), 2) for sample in stats['growth']]
+                },
+                x='date',
+                y='size_mb'
+            )
+
     st.markdown('</div>', unsafe_allow_html=True)
 
+def show_storage_lifecycle():
+    """Render storage lifecycle (retention / archive) section."""
+    st.markdown('<div class="setting-card">', unsafe_allow_html=True)
+    st.markdown('<div class="setting-title">🗄️ 스토리지 관리</div>', unsafe_allow_html=True)
+
+    workspace_dir = st.session_state.user['workspace_dir']
+    manager = get_lifecycle_manager(workspace_dir)
+
+    st.caption("프로젝트나 DAM 메타데이터에서 참조 중인 자산은 정리 대상에서 제외됩니다.")
+
+    action_labels = {'archive': '압축 보관', 'delete': '삭제'}
+    st.table([
+        {
+            '폴더': folder,
+            '보관 기간 (일)': str(policy.get('max_age_days') or '-'),
+            '최대 개수': str(policy.get('max_count') or '-'),
+            '최대 용량 (MB)': str(policy.get('max_total_mb') or '-'),
+            '처리': action_labels.get(policy.get('action'), policy.get('action'))
+        }
+        for folder, policy in manager.policies.items()
+    ])
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        if st.button("🔍 정리 대상 미리보기", use_container_width=True):
+            report = manager.run(dry_run=True)
+            for folder, result in report.get('folders', {}).items():
+                st.caption(f"{folder}: {len(result['files'])}개 대상 (보호됨 {result['protected']}개)")
+
+    with col2:
+        if st.button("🧹 지금 정리 실행", use_container_width=True):
+            with st.spinner("스토리지를 정리하고 있습니다..."):
+                report = manager.run()
+            if report:
+                archived = sum(r['archived'] for r in report['folders'].values())
+                deleted = sum(r['deleted'] for r in report['folders'].values())
+                freed_mb = sum(r['freed_bytes'] for r in report['folders'].values()) / (1024 * 1024)
+                st.success(f"✅ 보관 {archived}개, 삭제 {deleted}개 ({freed_mb:.1f} MB 정리)")
+            else:
+                st.info("다른 정리 작업이 진행 중입니다.")
+
+    archives = manager.list_archives()
+    if archives:
+        with st.expander(f"📦 압축 보관함 ({len(archives)}개)"):
+            st.table([
+                {
+                    '폴더': archive['folder'],
+                    '월': archive['month'],
+                    '파일 수': archive['files'],
+                    '용량 (MB)': round(archive['bytes'] / (1024 * 1024), 2)
+                }
+                for archive in archives
+            ])
+
+            st.markdown("**파일 복원**")
+            archive = st.selectbox(
+                "보관함",
+                archives,
+                format_func=lambda a: f"{a['folder']} / {a['month']} ({a['files']}개)",
+                key="restore_archive"
+            )
+            archived_files = manager.list_archived_files(archive['folder'], archive['month'])
+            arcname = st.selectbox("파일", archived_files, key="restore_file") if archived_files else None
+            if st.button("♻️ 복원", disabled=arcname is None, key="restore_button"):
+                restored_path = manager.restore_archived(archive['folder'], archive['month'], arcname)
+                if restored_path:
+                    st.success(f"✅ 복원되었습니다: {os.path.relpath(restored_path, workspace_dir)}")
+                else:
+                    st.error("보관함에서 파일을 찾을 수 없습니다.")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+def show_gemini_usage():
+    """Render Gemini token / cost report and today's usage against the (read-only) daily budgets."""
+    st.markdown('<div class="setting-card">', unsafe_allow_html=True)
+    st.markdown('<div class="setting-title">💰 Gemini 사용량 및 비용</div>', unsafe_allow_html=True)
+
+    ledger = get_usage_ledger()
+    ledger.flush(timeout=2)
+    user_id = os.path.basename(st.session_state.user['workspace_dir'])
+
+    # Today's usage against budgets
+    for status in ledger.budget_status(user_id):
+        scope_label = "전체" if status['scope'] == GLOBAL_SCOPE else f"사용자 {status['scope']}"
+        limits = []
+        if status['daily_tokens']:
+            limits.append(f"{status['tokens']:,} / {status['daily_tokens']:,} 토큰")
+        if status['daily_cost_usd']:
+            limits.append(f"${status['cost_usd']:.2f} / ${status['daily_cost_usd']:.2f}")
+        if limits:
+            st.progress(min(status['ratio'], 1.0), text=f"오늘 {scope_label}: " + " · ".join(limits))
+        else:
+            st.caption(f"오늘 {scope_label}: {status['tokens']:,} 토큰 · ${status['cost_usd']:.2f} (한도 없음)")
+
+    period_days = st.selectbox("기간", [7, 30, 90], index=1, format_func=lambda d: f"최근 {d}일",
+                               key="usage_period")
+    daily = ledger.daily_totals(days=period_days)
+    if any(row['calls'] for row in daily):
+        st.markdown("**일별 예상 비용 (USD)**")
+        st.bar_chart(
+            {
+                'date': [row['day'] for row in daily],
+                'cost_usd': [round(row['cost_usd'], 4) for row in daily]
+            },
+            x='date',
+            y='cost_usd'
+        )
+
+        start_day = daily[0]['day']
+        group_labels = {'template': '템플릿', 'user': '사용자', 'brand': '브랜드', 'model': '모델'}
+        tabs = st.tabs([f"{label}별" for label in group_labels.values()])
+        for tab, (group_by, label) in zip(tabs, group_labels.items()):
+            with tab:
+                st.table([
+                    {
+                        label: row[group_by] or '-',
+                        '호출 수': row['calls'],
+                        '오류': row['errors'],
+                        '입력 토큰': f"{row['prompt_tokens']:,}",
+                        '캐시 입력 토큰': f"{row['cached_tokens'] or 0:,}",
+                        '출력 토큰': f"{row['candidate_tokens'] - row['image_tokens']:,}",
+                        '이미지 토큰': f"{row['image_tokens']:,}",
+                        '예상 비용 ($)': round(row['cost_usd'], 4),
+                        '평균 지연 (ms)': round(row['avg_latency_ms'] or 0)
+                    }
+                    for row in ledger.summarize(group_by, start_day=start_day)
+                ])
+    else:
+        st.info("선택한 기간에 기록된 Gemini 호출이 없습니다.")
+
+    st.caption(
+        "일일 사용 한도는 관리자가 설정합니다 (환경 변수 GEMINI_DAILY_TOKEN_BUDGET / "
+        "GEMINI_DAILY_COST_BUDGET_USD 또는 `python -m core.budget_admin`). "
+        "한도의 일정 비율을 넘으면 요청을 하나씩 순서대로 처리하고, 한도에 도달하면 요청을 거부합니다."
+    )
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
 def show_app_preferences():
     """Render application preferences."""
     st.markdown('<div class="setting-card">', unsafe_allow_html=True)
@@ -263,6 +413,7 @@ def show_danger_zone():
                     import shutil
                     shutil.rmtree(generated_dir)
                     os.makedirs(generated_dir, exist_ok=True)
+                    get_workspace_stats(workspace_dir).request_reconcile()
                     st.success("✅ 모든 생성 이미지가 삭제되었습니다.")
                     st.session_state.confirm_delete_generated = False
                     st.rerun()
@@ -280,6 +431,7 @@ def show_danger_zone():
                     shutil.rmtree(workspace_dir)
                     # Recreate empty workspace
                     get_user_workspace_dir(st.session_state.user['email'])
+                    get_workspace_stats(workspace_dir).request_reconcile()
                     st.success("✅ 워크스페이스가 초기화되었습니다.")
                     st.session_state.confirm_reset_workspace = False
                     st.rerun()
@@ -295,7 +447,9 @@ def show_sidebar():
             "🏠 홈": "app.py",
             "🎨 Image Editor": "pages/01_Image_Editor.py",
             "📊 DAM System": "pages/02_DAM_System.py",
-            "⚙️ Settings": "pages/03_Settings.py"
+            "⚙️ Settings": "pages/03_Settings.py",
+            "📈 Metrics": "pages/04_Metrics.py",
+            "🔍 Traces": "pages/05_Traces.py"
         }
 
         try:
@@ -338,6 +492,12 @@ def main():
     # Workspace Statistics
     show_workspace_stats()
 
+    # Storage Lifecycle
+    show_storage_lifecycle()
+
+    # Gemini Usage
+    show_gemini_usage()
+
     # App Preferences
     show_app_preferences()
 
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+CEN AI DAM Editor - Metrics Page
+
+Latency percentiles and call counts per operation (Gemini calls, analysis
+stages, generation templates, image I/O) from the in-process metrics registry.
+"""
+
+import streamlit as st
+import os
+import sys
+import json
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.session import init_session_state
+from core.metrics import get_registry
+from core.prompt_registry import get_prompt_registry
+
+# Page configuration
+st.set_page_config(
+    page_title="메트릭 - CEN AI DAM Editor",
+    page_icon="📈",
+    layout="wide"
+)
+
+# Custom CSS
+st.markdown("""
+<style>
+    .setting-card {
+        background: white;
+        border-radius: 8px;
+        padding: 20px;
+        margin-bottom: 20px;
+        border: 1px solid #e0e0e0;
+    }
+
+    .setting-title {
+        font-size: 18px;
+        font-weight: 600;
+        color: #273444;
+        margin-bottom: 16px;
+    }
+
+    .stat-box {
+        background: #f8f9fa;
+        border-radius: 8px;
+        padding: 16px;
+        text-align: center;
+        border: 1px solid #e0e0e0;
+    }
+
+    .stat-value {
+        font-size: 32px;
+        font-weight: 700;
+        color: #A23B72;
+        margin-bottom: 4px;
+    }
+
+    .stat-label {
+        font-size: 14px;
+        color: #666;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+
+def format_ms(seconds) -> str:
+    """Format a duration in seconds as milliseconds for display."""
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:,.1f}"
+
+
+def show_summary(rows: list):
+    """Render overall call / error counters."""
+    total_calls = sum(row['count'] for row in rows)
+    total_errors = sum(row['errors'] for row in rows)
+    gemini_calls = sum(row['count'] for row in rows if row['operation'].startswith('gemini.'))
+
+    col1, col2, col3, col4 = st.columns(4)
+    for col, value, label in (
+        (col1, len(rows), "측정된 작업"),
+        (col2, f"{total_calls:,}", "전체 호출"),
+        (col3, f"{gemini_calls:,}", "Gemini 호출"),
+        (col4, f"{total_errors:,}", "오류"),
+    ):
+        with col:
+            st.markdown(f"""
+            <div class="stat-box">
+                <div class="stat-value">{value}</div>
+                <div class="stat-label">{label}</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+
+def show_operation_latency(rows: list):
+    """Render per-operation latency table (p50/p95/p99) and p95 chart."""
+    st.markdown('<div class="setting-card">', unsafe_allow_html=True)
+    st.markdown('<div class="setting-title">⏱️ 작업별 응답 시간 (ms)</div>', unsafe_allow_html=True)
+
+    groups = sorted({row['operation'].split('.', 1)[0] for row in rows})
+    selected_groups = st.multiselect("작업 그룹", groups, default=groups, key="metrics_groups")
+    rows = [row for row in rows if row['operation'].split('.', 1)[0] in selected_groups]
+
+    if not rows:
+        st.info("선택한 그룹에 기록된 작업이 없습니다.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+
+    st.table([
+        {
+            '작업': row['operation'],
+            '호출 수': row['count'],
+            '오류': row['errors'],
+            '평균': format_ms(row['mean']),
+            'p50': format_ms(row['p50']),
+            'p95': format_ms(row['p95']),
+            'p99': format_ms(row['p99']),
+            '최대': format_ms(row['max']),
+            '누적 (s)': round(row['total'], 2)
+        }
+        for row in rows
+    ])
+
+    st.markdown("**p95 응답 시간 (ms)**")
+    st.bar_chart(
+        {
+            'operation': [row['operation'] for row in rows],
+            'p95_ms': [round(row['p95'] * 1000, 1) for row in rows]
+        },
+        x='operation',
+        y='p95_ms'
+    )
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+def show_counters(snapshot: dict):
+    """Render raw counters other than per-operation call counts."""
+    counters = {
+        name: entries for name, entries in snapshot['counters'].items()
+        if name != 'operation_calls_total'
+    }
+    if not counters:
+        return
+
+    with st.expander("🔢 기타 카운터"):
+        st.table([
+            {
+                '이름': name,
+                '레이블': ", ".join(f"{k}={v}" for k, v in entry['labels'].items()) or "-",
+                '값': entry['value']
+            }
+            for name, entries in sorted(counters.items())
+            for entry in entries
+        ])
+
+
+def show_prompt_sizes():
+    """Render prompt sizes per template (largest first) to spot token-heavy prompts."""
+    prompts = get_prompt_registry()
+    rows = prompts.stats()
+
+    with st.expander("📝 프롬프트 크기"):
+        if rows:
+            st.table([
+                {
+                    '템플릿': row['template'],
+                    '호출': row['renders'],
+                    '캐시 적중': row['cache_hits'],
+                    '최근 (bytes)': row['last_bytes'],
+                    '최대 (bytes)': row['max_bytes']
+                }
+                for row in rows
+            ])
+        st.markdown("**사전 컴파일된 분석 프롬프트 (bytes)**")
+        st.table([
+            {'프롬프트': name, '크기 (bytes)': size}
+            for name, size in sorted(prompts.static_sizes().items(), key=lambda item: -item[1])
+        ])
+
+
+def show_export():
+    """Render snapshot download / reset controls."""
+    st.markdown('<div class="setting-card">', unsafe_allow_html=True)
+    st.markdown('<div class="setting-title">📤 내보내기</div>', unsafe_allow_html=True)
+
+    registry = get_registry()
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.download_button(
+            "JSON 스냅샷 다운로드",
+            data=json.dumps(registry.snapshot(), ensure_ascii=False, indent=2),
+            file_name=f"metrics_{timestamp}.json",
+            mime="application/json",
+            use_container_width=True
+        )
+
+    with col2:
+        st.download_button(
+            "Prometheus 텍스트 다운로드",
+            data=registry.to_prometheus(),
+            file_name=f"metrics_{timestamp}.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+    with col3:
+        if st.button("메트릭 초기화", use_container_width=True):
+            registry.reset()
+            st.success("✅ 메트릭이 초기화되었습니다.")
+            st.rerun()
+
+    st.caption(f"집계 시작: {registry.started_at} (서버 프로세스 기준)")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+def show_sidebar():
+    """Show sidebar with navigation."""
+    with st.sidebar:
+        # Page navigation
+        page_options = {
+            "🏠 홈": "app.py",
+            "🎨 Image Editor": "pages/01_Image_Editor.py",
+            "📊 DAM System": "pages/02_DAM_System.py",
+            "⚙️ Settings": "pages/03_Settings.py",
+            "📈 Metrics": "pages/04_Metrics.py",
+            "🔍 Traces": "pages/05_Traces.py"
+        }
+
+        try:
+            current_script_path = os.path.basename(__file__)
+        except NameError:
+            current_script_path = "04_Metrics.py"
+
+        page_titles = list(page_options.keys())
+        current_page_index = 4  # Default to Metrics
+        for i, path in enumerate(page_options.values()):
+            if path.endswith(current_script_path):
+                current_page_index = i
+                break
+
+        selected_page = st.radio(
+            "메뉴",
+            page_titles,
+            index=current_page_index,
+            key="sidebar_radio",
+            label_visibility="collapsed"
+        )
+        st.sidebar.markdown("---")
+
+        # Switch page if selection changes
+        selected_page_path = page_options[selected_page]
+        if not selected_page_path.endswith(current_script_path):
+            st.switch_page(selected_page_path)
+
+
+def main():
+    """Main entry point for Metrics page."""
+    init_session_state()
+    show_sidebar()
+
+    st.title("📈 성능 메트릭")
+
+    registry = get_registry()
+    rows = registry.operation_summary()
+
+    if not rows:
+        st.info("아직 기록된 작업이 없습니다. 이미지 분석이나 생성을 실행하면 여기에 표시됩니다.")
+    else:
+        show_summary(rows)
+        show_operation_latency(rows)
+        show_counters(registry.snapshot())
+
+    show_prompt_sizes()
+    show_export()
+
+
+if __name__ == "__main__":
+    main()
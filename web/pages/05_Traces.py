@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+CEN AI DAM Editor - Trace Viewer Page
+
+Waterfall timings per request (prompt building, file reads, upload, model
+latency, saving) from the traces exported to the user's workspace.
+"""
+
+import streamlit as st
+import os
+import sys
+import json
+import html
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.session import init_session_state
+from core.tracing import trace_dir_for, list_traces, load_trace, waterfall, STATUS_ERROR
+
+# Page configuration
+st.set_page_config(
+    page_title="트레이스 - CEN AI DAM Editor",
+    page_icon="🔍",
+    layout="wide"
+)
+
+# Custom CSS
+st.markdown("""
+<style>
+    .wf-row {
+        display: flex;
+        align-items: center;
+        height: 26px;
+        font-size: 13px;
+        border-bottom: 1px solid #f0f0f0;
+    }
+
+    .wf-name {
+        width: 32%;
+        white-space: nowrap;
+        overflow: hidden;
+        text-overflow: ellipsis;
+        color: #273444;
+    }
+
+    .wf-track {
+        position: relative;
+        width: 56%;
+        height: 14px;
+        background: #f8f9fa;
+    }
+
+    .wf-bar {
+        position: absolute;
+        height: 14px;
+        border-radius: 3px;
+        background: #A23B72;
+        min-width: 2px;
+    }
+
+    .wf-bar.error {
+        background: #d9534f;
+    }
+
+    .wf-time {
+        width: 12%;
+        text-align: right;
+        color: #666;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+
+def render_waterfall(rows: list):
+    """Render span rows as a horizontal waterfall."""
+    total = max((row['offsetMs'] + row['durationMs'] for row in rows), default=0) or 1.0
+
+    lines = []
+    for row in rows:
+        left = row['offsetMs'] / total * 100
+        width = row['durationMs'] / total * 100
+        bar_class = "wf-bar error" if row['status'] == STATUS_ERROR else "wf-bar"
+        indent = "&nbsp;" * 4 * row['depth']
+        lines.append(f"""
+        <div class="wf-row">
+            <div class="wf-name" title="{html.escape(row['name'])}">{indent}{html.escape(row['name'])}</div>
+            <div class="wf-track"><div class="{bar_class}" style="left:{left:.2f}%;width:{width:.2f}%"></div></div>
+            <div class="wf-time">{row['durationMs']:,.1f} ms</div>
+        </div>
+        """)
+    st.markdown("".join(lines), unsafe_allow_html=True)
+
+
+def show_trace_detail(trace_path: str):
+    """Render waterfall, per-span table and raw JSON for one trace."""
+    try:
+        document = load_trace(trace_path)
+    except (OSError, ValueError) as e:
+        st.error(f"트레이스를 불러올 수 없습니다: {str(e)}")
+        return
+
+    rows = waterfall(document)
+    st.markdown(f"**{document.get('name')}** · {document.get('startedAt')} · "
+                f"{document.get('durationMs', 0):,.1f} ms · 스팬 {len(rows)}개")
+
+    render_waterfall(rows)
+
+    with st.expander("📋 스팬 상세"):
+        st.table([
+            {
+                '스팬': "  " * row['depth'] + row['name'],
+                '시작 (ms)': round(row['offsetMs'], 1),
+                '소요 (ms)': round(row['durationMs'], 1),
+                '자체 (ms)': round(row['selfMs'], 1),
+                '상태': row['status'].replace('STATUS_CODE_', ''),
+                '속성': ", ".join(
+                    f"{k}={v}" for k, v in row['attributes'].items() if k != 'thread.name'
+                ) or "-"
+            }
+            for row in rows
+        ])
+
+    st.download_button(
+        "JSON 다운로드",
+        data=json.dumps(document, ensure_ascii=False, indent=2),
+        file_name=os.path.basename(trace_path),
+        mime="application/json"
+    )
+
+
+def show_trace_list(trace_dir: str):
+    """Render recent trace list and the selected trace."""
+    traces = list_traces(trace_dir)
+    if not traces:
+        st.info("아직 기록된 트레이스가 없습니다. 이미지 생성이나 메타데이터 분석을 실행하면 여기에 표시됩니다.")
+        return
+
+    col_filter, col_errors = st.columns([3, 1])
+    with col_filter:
+        names = sorted({t['name'] for t in traces})
+        selected_names = st.multiselect("요청 유형", names, default=names, key="trace_names")
+    with col_errors:
+        errors_only = st.checkbox("오류만 보기", key="trace_errors_only")
+
+    traces = [
+        t for t in traces
+        if t['name'] in selected_names and (not errors_only or t['status'] == STATUS_ERROR)
+    ]
+    if not traces:
+        st.info("조건에 맞는 트레이스가 없습니다.")
+        return
+
+    labels = {
+        t['path']: f"{t['startedAt']} · {t['name']} · {t['durationMs']:,.0f} ms"
+                   + (" · ❌" if t['status'] == STATUS_ERROR else "")
+        for t in traces
+    }
+    selected_path = st.selectbox(
+        "트레이스",
+        list(labels.keys()),
+        format_func=lambda path: labels[path],
+        key="trace_select"
+    )
+
+    show_trace_detail(selected_path)
+
+
+def show_sidebar():
+    """Show sidebar with navigation."""
+    with st.sidebar:
+        # Page navigation
+        page_options = {
+            "🏠 홈": "app.py",
+            "🎨 Image Editor": "pages/01_Image_Editor.py",
+            "📊 DAM System": "pages/02_DAM_System.py",
+            "⚙️ Settings": "pages/03_Settings.py",
+            "📈 Metrics": "pages/04_Metrics.py",
+            "🔍 Traces": "pages/05_Traces.py"
+        }
+
+        try:
+            current_script_path = os.path.basename(__file__)
+        except NameError:
+            current_script_path = "05_Traces.py"
+
+        page_titles = list(page_options.keys())
+        current_page_index = 5  # Default to Traces
+        for i, path in enumerate(page_options.values()):
+            if path.endswith(current_script_path):
+                current_page_index = i
+                break
+
+        selected_page = st.radio(
+            "메뉴",
+            page_titles,
+            index=current_page_index,
+            key="sidebar_radio",
+            label_visibility="collapsed"
+        )
+        st.sidebar.markdown("---")
+
+        # Switch page if selection changes
+        selected_page_path = page_options[selected_page]
+        if not selected_page_path.endswith(current_script_path):
+            st.switch_page(selected_page_path)
+
+
+def main():
+    """Main entry point for Trace Viewer page."""
+    init_session_state()
+    show_sidebar()
+
+    st.title("🔍 요청 트레이스")
+
+    workspace_dir = st.session_state.user['workspace_dir']
+    show_trace_list(trace_dir_for(workspace_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,8 @@ import streamlit as st
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from core.logger import get_logger
+from core.file_events import notify_file_written
+from core.storage_lifecycle import StorageLifecycleManager
 
 
 def save_uploaded_file(uploaded_file, workspace_dir: str) -> str:
@@ -39,6 +40,7 @@ def save_uploaded_file(uploaded_file, workspace_dir: str) -> str:
     # Save file
     with open(filepath, 'wb') as f:
         f.write(uploaded_file.getbuffer())
+    notify_file_written(filepath)
 
     return filepath
 
@@ -108,6 +110,7 @@ def save_generated_image(image_data, workspace_dir: str, prefix: str = "generate
     # Save file
     with open(filepath, 'wb') as f:
         f.write(image_bytes)
+    notify_file_written(filepath)
 
     return filepath
 
@@ -162,32 +165,28 @@ def get_user_images(workspace_dir: str, folder: str = 'generated') -> List[str]:
     return image_files
 
 
-def cleanup_old_files(workspace_dir: str, folder: str = 'uploads', max_age_days: int = 30):
+def cleanup_old_files(workspace_dir: str, folder: str = 'uploads', max_age_days: int = 30) -> dict:
     """
     Clean up old files from workspace directory.
 
+    Runs a one-off age-based delete policy through the storage lifecycle
+    manager, so files referenced by projects or DAM metadata are kept.
+
     Args:
         workspace_dir: User's workspace directory path
         folder: Folder name to clean
         max_age_days: Maximum age of files to keep (in days)
-    """
-    dir_path = os.path.join(workspace_dir, folder)
-
-    if not os.path.exists(dir_path):
-        return
 
-    import time
-    current_time = time.time()
-    max_age_seconds = max_age_days * 24 * 60 * 60
-
-    for filename in os.listdir(dir_path):
-        filepath = os.path.join(dir_path, filename)
-        file_age = current_time - os.path.getmtime(filepath)
-
-        if file_age > max_age_seconds:
-            logger = get_logger()
-            try:
-                os.remove(filepath)
-                logger.info(f"Deleted old file: {filename}")
-            except Exception as e:
-                logger.error(f"Failed to delete {filename}: {e}")
\ No newline at end of file
+    Returns:
+        Lifecycle report for the folder
+    """
+    policy = {
+        'max_age_days': max_age_days,
+        'max_count': None,
+        'max_total_mb': None,
+        'action': 'delete'
+    }
+    manager = StorageLifecycleManager(workspace_dir, policies={folder: policy})
+    report = manager.run()
+
+    return report.get('folders', {}).get(folder, {})
@@ -7,8 +7,13 @@ Initialize and manage Streamlit session state variables.
 
 import streamlit as st
 import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.storage_lifecycle import get_lifecycle_manager
+
 
 def init_session_state():
     """
@@ -25,6 +30,9 @@ def init_session_state():
             'workspace_dir': get_user_workspace_dir('cloit@itcen.com')
         }
 
+    # Scheduled retention / archiving for the workspace (idempotent)
+    get_lifecycle_manager(st.session_state.user['workspace_dir']).start()
+
     # Recent projects
     if 'recent_projects' not in st.session_state:
         st.session_state.recent_projects = []
@@ -72,6 +80,7 @@ def get_user_workspace_dir(user_email: str) -> str:
     os.makedirs(os.path.join(workspace_dir, 'generated'), exist_ok=True)
     os.makedirs(os.path.join(workspace_dir, 'metadata'), exist_ok=True)
     os.makedirs(os.path.join(workspace_dir, 'projects'), exist_ok=True)
+    os.makedirs(os.path.join(workspace_dir, 'temp'), exist_ok=True)
 
     return workspace_dir
 